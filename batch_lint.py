@@ -0,0 +1,385 @@
+# -*- coding: utf-8 -*-
+"""
+Validación por lotes de scripts, sin interfaz gráfica.
+
+Pensado para una tarea nocturna que revise todas las tablas de scripts
+(G_SCRIPT y E_PROGRA) o un directorio de ficheros ``.vbs``:
+
+    python main.py lint --connection-string "..." --output informe.json
+    python main.py lint --dir C:\\scripts --output informe.csv
+
+  - Las filas se leen en streaming (``fetchmany``, ver
+    ``DatabaseConnection.search_scripts``), sin cargar la tabla entera.
+  - ``validate_vbs`` se reparte por lotes entre procesos
+    (``ProcessPoolExecutor``), con un número acotado de lotes en vuelo.
+  - Los resultados se guardan en la caché de validación
+    (``ValidationCache``): en la pasada siguiente solo se validan los
+    scripts que cambiaron.  Las consultas a la caché se hacen en este
+    proceso; al pool solo van los scripts que no estaban.
+  - El informe se escribe en JSON o CSV y al final se imprime el
+    rendimiento en scripts por segundo y la tasa de aciertos de la caché.
+
+Código de salida: 0 sin errores, 1 si algún script tiene errores, 2 si
+la validación no se pudo completar (conexión, directorio...).
+"""
+
+import argparse
+import csv
+import json
+import logging
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from config_loader import ConfigLoader
+from editor.validation_cache import ValidationCache, content_hash
+from editor.vbs_validator import (
+    debug_report,
+    disabled_rules,
+    rule_stats,
+    set_disabled_rules,
+    validate_vbs,
+)
+
+logger = logging.getLogger("EditorVBS.lint")
+
+# Scripts por lote enviado a cada proceso
+LINT_CHUNK = 64
+
+# Lotes en vuelo por proceso (limita la memoria al leer en streaming)
+_IN_FLIGHT_PER_WORKER = 2
+
+# Columnas clave y de contenido por contexto (como las resuelve main.py)
+_TABLE_LAYOUT = {
+    "documento": (["MODELO", "CODIGO"], "SCRIPT"),
+    "plantilla": (["Plantilla"], "Texto"),
+}
+
+# Codificaciones probadas al leer ficheros .vbs
+_FILE_ENCODINGS = ("utf-8-sig", "cp1252", "latin-1")
+
+_CSV_COLUMNS = ("origen", "script", "nivel", "linea", "mensaje")
+
+
+def _lint_chunk(chunk: List[Tuple[str, str, str]]) -> List[Tuple[str, str, list]]:
+    """Valida un lote de (origen, script, código)."""
+    return [(origin, name, validate_vbs(code)) for origin, name, code in chunk]
+
+
+def _lint_chunk_pool(chunk: List[Tuple[str, str, str]]) -> Tuple[list, dict]:
+    """Tarea de un proceso del pool: resultados del lote y tiempos de cada regla."""
+    rule_stats.reset()
+    return _lint_chunk(chunk), rule_stats.totals()
+
+
+def lint_scripts(scripts: Iterable[Tuple[str, str, str]], workers: Optional[int] = None,
+                 chunk_size: int = LINT_CHUNK,
+                 cache: Optional[ValidationCache] = None) -> Iterator[Tuple[str, str, list]]:
+    """
+    Valida scripts en paralelo a medida que llegan.
+
+    Args:
+        scripts: Iterable de (origen, nombre, código); se consume en
+            streaming, solo hay en memoria los lotes en vuelo.
+        workers: Procesos del pool (default: núcleos, hasta 8).  Con 1 se
+            valida en el propio proceso.
+        chunk_size: Scripts por lote.
+        cache: Caché de resultados opcional; los scripts que están en
+            ella no se envían a validar.
+
+    Yields:
+        (origen, nombre, problemas) por script, en orden de finalización.
+    """
+    workers = workers or max(1, min(os.cpu_count() or 1, 8))
+    # Hash de los scripts enviados a validar, para guardar su resultado
+    digests = {}
+
+    def store(results):
+        for origin, name, problems in results:
+            if cache is not None:
+                cache.put_by_hash(digests.pop((origin, name)), problems)
+            yield origin, name, problems
+
+    def chunks():
+        """Lotes a validar, intercalados con los aciertos de la caché."""
+        chunk = []
+        for origin, name, code in scripts:
+            if cache is not None:
+                digest = content_hash(code)
+                problems = cache.get_by_hash(digest)
+                if problems is not None:
+                    yield None, (origin, name, problems)
+                    continue
+                digests[(origin, name)] = digest
+            chunk.append((origin, name, code))
+            if len(chunk) >= chunk_size:
+                yield chunk, None
+                chunk = []
+        if chunk:
+            yield chunk, None
+
+    if workers <= 1:
+        for chunk, hit in chunks():
+            if hit is not None:
+                yield hit
+            else:
+                yield from store(_lint_chunk(chunk))
+        return
+
+    def collect(future):
+        results, totals = future.result()
+        rule_stats.merge(totals)
+        return store(results)
+
+    max_in_flight = workers * _IN_FLIGHT_PER_WORKER
+    # Los procesos del pool no heredan la configuración en Windows
+    with ProcessPoolExecutor(max_workers=workers, initializer=set_disabled_rules,
+                             initargs=(disabled_rules(),)) as executor:
+        pending = set()
+        for chunk, hit in chunks():
+            if hit is not None:
+                yield hit
+                continue
+            pending.add(executor.submit(_lint_chunk_pool, chunk))
+            if len(pending) >= max_in_flight:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield from collect(future)
+        for future in pending:
+            yield from collect(future)
+
+
+# ----------------------------------------------------------------------
+# Orígenes
+# ----------------------------------------------------------------------
+
+def _read_script(path: str) -> str:
+    with open(path, "rb") as f:
+        data = f.read()
+    for encoding in _FILE_ENCODINGS:
+        try:
+            return data.decode(encoding)
+        except UnicodeDecodeError:
+            continue
+    return data.decode("latin-1", errors="replace")
+
+
+def iter_directory(directory: str) -> Iterator[Tuple[str, str, str]]:
+    """(directorio, ruta relativa, código) de cada ``.vbs`` bajo *directory*."""
+    if not os.path.isdir(directory):
+        raise FileNotFoundError(f"No existe el directorio: {directory}")
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for name in sorted(files):
+            if name.lower().endswith(".vbs"):
+                path = os.path.join(root, name)
+                # Saltos de línea como en el editor
+                code = _read_script(path).replace("\r\n", "\n")
+                yield directory, os.path.relpath(path, directory), code
+
+
+def iter_table(db, key_columns: List[str], content_column: str) -> Iterator[Tuple[str, str, str]]:
+    """(tabla, clave, código) de cada fila de la tabla actual de *db*."""
+    for row in db.search_scripts("", key_columns, content_column):
+        yield db.table, row["label"], row["content"].replace("\r\n", "\n")
+
+
+# ----------------------------------------------------------------------
+# Informe
+# ----------------------------------------------------------------------
+
+class LintReport:
+    """Acumula resultados y los escribe en JSON o CSV."""
+
+    def __init__(self):
+        self.scripts = 0
+        self.with_errors = 0
+        self.with_warnings = 0
+        self.problems: List[dict] = []
+        self.seconds = 0.0
+        self.cache_stats: Optional[dict] = None
+        self.rule_totals: dict = {}
+
+    def add(self, origin: str, name: str, problems: list) -> None:
+        self.scripts += 1
+        levels = {level for level, _, _ in problems}
+        self.with_errors += "error" in levels
+        self.with_warnings += "aviso" in levels
+        for level, message, line in problems:
+            self.problems.append({"origen": origin, "script": name, "nivel": level,
+                                  "linea": line, "mensaje": message})
+
+    @property
+    def rate(self) -> float:
+        return self.scripts / self.seconds if self.seconds > 0 else 0.0
+
+    def summary(self) -> str:
+        text = (f"{self.scripts} scripts validados en {self.seconds:.1f} s "
+                f"({self.rate:.0f} scripts/s): {self.with_errors} con errores, "
+                f"{self.with_warnings} con avisos")
+        if self.cache_stats is not None:
+            text += f" | caché: {self.cache_stats['tasa_aciertos']:.0%} aciertos"
+        return text
+
+    def write(self, out, fmt: str) -> None:
+        """Escribe el informe en el fichero abierto *out* ("json" o "csv")."""
+        problems = sorted(self.problems, key=lambda p: (p["origen"], p["script"], p["linea"]))
+        if fmt == "csv":
+            writer = csv.DictWriter(out, fieldnames=_CSV_COLUMNS)
+            writer.writeheader()
+            writer.writerows(problems)
+            return
+        json.dump({
+            "generado": datetime.now().isoformat(timespec="seconds"),
+            "scripts": self.scripts,
+            "con_errores": self.with_errors,
+            "con_avisos": self.with_warnings,
+            "segundos": round(self.seconds, 3),
+            "scripts_por_segundo": round(self.rate, 1),
+            "cache": self.cache_stats,
+            "reglas": {
+                name: {"ejecuciones": runs, "ms": round(seconds * 1000, 1), "problemas": count}
+                for name, (runs, seconds, count) in self.rule_totals.items()
+            },
+            "problemas": problems,
+        }, out, ensure_ascii=False, indent=2)
+
+
+def run(scripts: Iterable[Tuple[str, str, str]], workers: Optional[int] = None,
+        chunk_size: int = LINT_CHUNK, cache: Optional[ValidationCache] = None) -> LintReport:
+    """Valida todos los *scripts* y devuelve el informe (con tiempos)."""
+    report = LintReport()
+    rule_stats.reset()
+    t0 = time.perf_counter()
+    for origin, name, problems in lint_scripts(scripts, workers, chunk_size, cache):
+        report.add(origin, name, problems)
+    report.seconds = time.perf_counter() - t0
+    report.rule_totals = rule_stats.totals()
+    if cache is not None:
+        cache.flush()
+        report.cache_stats = cache.stats()
+    return report
+
+
+# ----------------------------------------------------------------------
+# Línea de comandos
+# ----------------------------------------------------------------------
+
+def _table_scripts(args) -> Iterator[Tuple[str, str, str]]:
+    """Filas de las tablas pedidas, una conexión para todas."""
+    # Import diferido: la validación de directorios no necesita pyodbc
+    from db.connection import DatabaseConnection, detect_odbc_driver
+
+    if args.connection_string:
+        db = DatabaseConnection.from_connection_string(args.connection_string)
+    else:
+        db = DatabaseConnection(server=args.server, database=args.database,
+                                user=args.user, password=args.password,
+                                driver=args.driver or detect_odbc_driver())
+    contexts = list(_TABLE_LAYOUT) if args.tipo == "todos" else [args.tipo]
+    db.connect()
+    try:
+        for context in contexts:
+            key_columns, content_column = _TABLE_LAYOUT[context]
+            if args.key_columns:
+                key_columns = [c.strip() for c in args.key_columns.split(",")]
+            content_column = args.content_column or content_column
+            db.switch_context(context)
+            if args.table:
+                db.table = args.table
+            logger.info("lint: validando %s", db.table)
+            yield from iter_table(db, key_columns, content_column)
+    finally:
+        db.close()
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="main.py lint",
+        description="Valida por lotes los scripts de la BD o de un directorio de .vbs",
+    )
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--dir", help="Directorio con ficheros .vbs (se recorre entero)")
+    source.add_argument("--connection-string", help="Cadena de conexión de SQL Server")
+    source.add_argument("--server", help="Servidor SQL Server")
+    parser.add_argument("--database", help="Base de datos (con --server)")
+    parser.add_argument("--user", help="Usuario SQL (con --server)")
+    parser.add_argument("--password", help="Contraseña SQL (con --server)")
+    parser.add_argument("--driver", help="Driver ODBC (default: auto-detectar)")
+    parser.add_argument("--tipo", choices=["documento", "plantilla", "todos"], default="todos",
+                        help="Tablas a validar: G_SCRIPT, E_PROGRA o ambas (default)")
+    parser.add_argument("--table", help="Tabla concreta (con --tipo documento o plantilla)")
+    parser.add_argument("--key-columns", help="Columnas clave separadas por coma")
+    parser.add_argument("--content-column", help="Columna con el script")
+    parser.add_argument("--output", default="-",
+                        help="Fichero del informe (default: salida estándar)")
+    parser.add_argument("--format", choices=["json", "csv"],
+                        help="Formato del informe (default: según la extensión, o json)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Procesos de validación (default: núcleos, hasta 8; 1 = sin pool)")
+    parser.add_argument("--chunk-size", type=int, default=LINT_CHUNK,
+                        help=f"Scripts por lote (default: {LINT_CHUNK})")
+    parser.add_argument("--cache", help="Fichero de la caché de validación "
+                                        "(default: el mismo que usa el editor)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Validar todos los scripts sin usar la caché")
+    parser.add_argument("--disable-rules",
+                        help="Reglas desactivadas, separadas por coma "
+                             "(default: EDITOR_DISABLED_RULES)")
+    parser.add_argument("--rules-report", action="store_true",
+                        help="Mostrar al final el tiempo de cada regla de validación")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    fmt = args.format or ("csv" if args.output.lower().endswith(".csv") else "json")
+
+    if args.server and not (args.database and args.user and args.password):
+        parser.error("--server necesita también --database, --user y --password")
+    if args.table and args.tipo == "todos":
+        parser.error("--table solo se puede usar con --tipo documento o plantilla")
+
+    # Reglas desactivadas: CLI > EDITOR_DISABLED_RULES (antes de abrir la caché)
+    config = ConfigLoader()
+    config.load_from_env()
+    if args.disable_rules:
+        config.merge({"disabled_rules": args.disable_rules.split(",")})
+    else:
+        config.merge({})
+    set_disabled_rules(config.get("disabled_rules") or [])
+
+    cache = None
+    if not args.no_cache:
+        try:
+            cache = ValidationCache(args.cache)
+        except (OSError, sqlite3.Error) as e:
+            print(f"Aviso: caché de validación no disponible ({e})", file=sys.stderr)
+
+    scripts = iter_directory(args.dir) if args.dir else _table_scripts(args)
+    try:
+        report = run(scripts, args.workers, args.chunk_size, cache)
+    except Exception as e:
+        logger.debug("lint: error durante la validación", exc_info=True)
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    finally:
+        if cache is not None:
+            cache.close()
+
+    if args.output == "-":
+        report.write(sys.stdout, fmt)
+        sys.stdout.write("\n")
+    else:
+        newline = "" if fmt == "csv" else None
+        with open(args.output, "w", encoding="utf-8", newline=newline) as out:
+            report.write(out, fmt)
+    if args.rules_report:
+        print(debug_report(), file=sys.stderr)
+    print(report.summary(), file=sys.stderr)
+    return 1 if report.with_errors else 0
@@ -39,3 +39,28 @@ SEPARADOR_ANCHO = 1           # Ancho en píxeles de la línea divisoria
 
 # Fuente
 FUENTE_EDITOR      = ("Courier New", 12)
+
+# Búsqueda
+BUSQUEDA_MAX_RESULTADOS = 10000  # Tope de coincidencias (se muestra "10 000+")
+BUSQUEDA_DEBOUNCE_MS    = 150    # Espera tras la última tecla antes de buscar
+
+# Validación en vivo
+VALIDACION_DEBOUNCE_MS = 400     # Espera tras la última tecla antes de validar
+COLOR_VALIDACION_ERROR = "#E51400"  # Marca y subrayado de errores
+COLOR_VALIDACION_AVISO = "#BF8803"  # Marca y subrayado de avisos
+
+# Sangría automática y bloque emparejado (Sub / End Sub, If / End If...)
+SANGRIA             = "    "     # Un nivel de sangría
+BLOQUES_DEBOUNCE_MS = 150        # Espera tras la última tecla antes de resaltar
+COLOR_BLOQUE_PAR    = "#DCE8F5"  # Fondo de la apertura y el cierre emparejados
+
+# Precarga de los registros vecinos al script abierto
+PRECARGA_VECINOS   = 2                  # Scripts a cada lado en el desplegable
+PRECARGA_RECIENTES = 5                  # Últimos scripts abiertos
+
+# Índice local de scripts (búsqueda en todos los scripts, Ctrl+Shift+F)
+INDICE_COMPROBACION_S = 300      # Sin permiso para detectar cambios en la tabla:
+                                 # comprobar versiones como mucho cada 5 min
+
+# Panel de esquema (Sub/Function/Class)
+ESQUEMA_DEBOUNCE_MS = 300        # Espera tras la última tecla antes de actualizar
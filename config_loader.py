@@ -48,6 +48,7 @@ class ConfigLoader:
         "tipo": "TIPO",                # Contexto: "documento" o "plantilla"
         "table_documento": "TABLE_DOCUMENTO",    # Tabla para modo documento
         "table_plantilla": "TABLE_PLANTILLA",    # Tabla para modo plantilla
+        "disabled_rules": "DISABLED_RULES",      # Reglas de validación desactivadas: "lineas_largas,comillas"
     }
     
     def __init__(self):
@@ -78,6 +79,9 @@ class ConfigLoader:
                 "key_columns": ["MODELO", "CODIGO"],
                 "key_values": ["T01", "BOBINADO"],
                 "var_columns": ["VAR0", "VAR1", "VAR2", "VAR3"]
+            },
+            "validation": {
+                "disabled_rules": ["lineas_largas"]
             }
         }
         """
@@ -94,6 +98,8 @@ class ConfigLoader:
                 self._file_config.update(data["connection"])
             if "script" in data:
                 self._file_config.update(data["script"])
+            if "validation" in data:
+                self._file_config.update(data["validation"])
             if "scripts_list" in data:
                 self._file_config["scripts_list"] = data["scripts_list"]
             
@@ -125,7 +131,7 @@ class ConfigLoader:
             
             if value:
                 # Convertir strings especiales
-                if config_key in ["key_columns", "var_columns"]:
+                if config_key in ["key_columns", "var_columns", "disabled_rules"]:
                     # Convertir "COL1,COL2" a lista
                     self._env_config[config_key] = [v.strip() for v in value.split(",")]
                 elif config_key == "key_values":
@@ -273,6 +279,9 @@ def create_config_example(output_file: str = "editor_config.example.json") -> No
             "key_values": ["T01", "BOBINADO"],
             "var_columns": ["VAR0", "VAR1", "VAR2", "VAR3", "VAR4", "VAR5", "VAR6", "VAR7", "VAR8", "VAR9"]
         },
+        "validation": {
+            "disabled_rules": []
+        },
         "_comment_2": "Alternativamente, puedes usar connection_string:",
         "connection_string_example": "Driver={ODBC Driver 18 for SQL Server};Server=servidor\\instancia;Database=MIBD;UID=sa;PWD=password;TrustServerCertificate=Yes"
     }
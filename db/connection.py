@@ -12,10 +12,14 @@ from __future__ import annotations
 
 import logging
 import re
-from typing import Optional, List, Tuple, Dict
+import time
+from typing import Optional, List, Tuple, Dict, Iterator
 
 import pyodbc
 
+from db.lru_cache import LRUCache, text_size
+from db.schema_cache import SchemaCache, schema_key
+
 logger = logging.getLogger("EditorVBS.db")
 
 # Patrón para validar identificadores SQL Server (nombres de tabla/columna)
@@ -48,6 +52,62 @@ def _sanitize_identifier(name: str, label: str = "identificador") -> str:
         )
     return name
 
+
+class ConcurrentUpdateError(Exception):
+    """
+    Algunos scripts cambiaron en el servidor desde que se leyeron; no se
+    ha guardado ninguno (ver ``bulk_update_content``).
+
+    Attributes:
+        conflicts: key_values de los scripts que cambiaron (o se borraron).
+    """
+
+    def __init__(self, conflicts: List[List[str]]):
+        self.conflicts = conflicts
+        super().__init__(f"{len(conflicts)} script(s) han cambiado en la base de datos "
+                         f"desde que se leyeron")
+
+
+# Filas por viaje al servidor en las consultas que se leen en streaming
+_FETCH_BATCH = 200
+
+# Contenido de scripts cargado bajo demanda (get_script_content): límites
+CONTENT_CACHE_ENTRIES = 500
+CONTENT_CACHE_BYTES = 32 * 1024 * 1024
+
+# Registros completos con su versión (get_record_full): límites
+RECORD_CACHE_ENTRIES = 1000
+RECORD_CACHE_BYTES = 32 * 1024 * 1024
+
+# Columnas de una tabla y su fecha de modificación (parámetros: tabla, tabla)
+_SCHEMA_SQL = """
+SELECT 
+    COLUMN_NAME,
+    DATA_TYPE,
+    CHARACTER_MAXIMUM_LENGTH,
+    IS_NULLABLE,
+    ORDINAL_POSITION,
+    (SELECT CONVERT(VARCHAR(23), MAX(modify_date), 126)
+     FROM sys.objects WHERE name = ? AND type = 'U')
+FROM INFORMATION_SCHEMA.COLUMNS
+WHERE TABLE_NAME = ?
+ORDER BY ORDINAL_POSITION
+"""
+
+# Solo la fecha de modificación de una tabla (parámetro: tabla)
+_MODIFY_DATE_SQL = """
+SELECT CONVERT(VARCHAR(23), MAX(modify_date), 126)
+FROM sys.objects
+WHERE name = ? AND type = 'U'
+"""
+
+
+def _like_contains(text: str) -> str:
+    """Patrón LIKE '%text%' escapando los comodines (ESCAPE '\\')."""
+    escaped = (text.replace("\\", "\\\\").replace("%", "\\%")
+               .replace("_", "\\_").replace("[", "\\["))
+    return f"%{escaped}%"
+
 # Drivers ODBC preferidos, de más reciente a más antiguo
 _PREFERRED_DRIVERS = [
     "ODBC Driver 18 for SQL Server",
@@ -316,6 +376,7 @@ class DatabaseConnection:
         context_type: Optional[str] = None,
         modelo: Optional[str] = None,
         codigo: Optional[str] = None,
+        schema_cache: Optional[SchemaCache] = None,
     ):
         self.server = server
         self.database = database
@@ -328,6 +389,13 @@ class DatabaseConnection:
         self.context_type = context_type  # 'documento' | 'plantilla' | None
         self.modelo = modelo              # MODELO extraído de la cadena (o None)
         self.codigo = codigo              # CODIGO extraído de la cadena (o None)
+        # Columnas de cada tabla (solo memoria salvo que se dé una con fichero)
+        self.schema_cache = schema_cache or SchemaCache()
+        # Contenido de scripts por (tabla, columna, claves), ver get_script_content
+        self.content_cache: LRUCache[str] = LRUCache(CONTENT_CACHE_ENTRIES, CONTENT_CACHE_BYTES)
+        # (registro, versión) por (tabla, claves), ver get_record_full
+        self.record_cache: LRUCache[Tuple[dict, str]] = LRUCache(
+            RECORD_CACHE_ENTRIES, RECORD_CACHE_BYTES, sizeof=_record_entry_size)
 
         self._cnxn: Optional[pyodbc.Connection] = None
 
@@ -507,6 +575,32 @@ class DatabaseConnection:
             raise RuntimeError("No hay conexión abierta. Llama a connect() primero.")
         return self._cnxn.cursor()
 
+    def clone(self) -> "DatabaseConnection":
+        """
+        Otra conexión (sin abrir) al mismo servidor, base de datos y tabla,
+        que comparte las cachés de esquemas, de contenido y de registros.
+
+        Para consultar desde otro hilo: una conexión pyodbc no se puede
+        usar desde dos hilos a la vez.
+        """
+        other = DatabaseConnection(
+            server=self.server,
+            database=self.database,
+            table=self.table,
+            user=self.user,
+            password=self.password,
+            driver=self.driver,
+            trust_server_certificate=self.trust_server_certificate,
+            content_column=self.content_column,
+            context_type=self.context_type,
+            modelo=self.modelo,
+            codigo=self.codigo,
+            schema_cache=self.schema_cache,
+        )
+        other.content_cache = self.content_cache
+        other.record_cache = self.record_cache
+        return other
+
     # ------------------------------------------------------------------
     # Sanitización de identificadores SQL
     # ------------------------------------------------------------------
@@ -573,7 +667,7 @@ class DatabaseConnection:
                      {**updated_fields, **dict(zip(key_columns, key_values))})
         
         try:
-            cur.execute(sql, *values)
+            self._retry_on_missing_column(lambda: cur.execute(sql, *values))
         except pyodbc.ProgrammingError as e:
             if "42S22" in str(e):
                 raise LookupError(
@@ -584,6 +678,8 @@ class DatabaseConnection:
         
         updated = cur.rowcount
         self._cnxn.commit()
+        self.content_cache.pop(self._content_key(key_values))
+        self.forget_record(key_values)
         logger.info("save_record_full: %d filas actualizadas", updated)
         return updated >= 1
 
@@ -596,12 +692,18 @@ class DatabaseConnection:
         key_columns: List[str],
         key_values: List[str],
         group_by_column: str = None,
+        with_content: bool = True,
     ) -> List[dict]:
         """
         Obtiene todos los scripts que comparten parte de la clave primaria.
         
         Para el desplegable del editor: dado un MODELO, devuelve todos los
         CODIGOS disponibles con su contenido.
+
+        Con ``with_content=False`` solo viajan las claves y el tamaño del
+        contenido (``DATALENGTH``): los dicts no tienen "content" sino
+        "length" (bytes), y el contenido se pide al usarlo con
+        ``get_script_content`` / ``get_script_contents``.
         
         Si key_columns=["MODELO","CODIGO"] y key_values=["T01","BOBINADO"],
         busca todos los registros que coincidan con la PRIMERA clave (MODELO=T01),
@@ -611,6 +713,7 @@ class DatabaseConnection:
             key_columns: Lista completa de columnas clave (ej: ["MODELO", "CODIGO"])
             key_values: Lista completa de valores (ej: ["T01", "BOBINADO"])
             group_by_column: Columna por la que agrupar (default: primera de key_columns)
+            with_content: Si False, solo claves y tamaño (ver arriba).
             
         Returns:
             Lista de dicts: [{"label": "BOBINADO", "key_values": ["T01","BOBINADO"], 
@@ -621,34 +724,56 @@ class DatabaseConnection:
             return []
         
         cur = self._cursor()
+        sql, select_cols = self._model_list_sql(key_columns, with_content)
+        filter_col = key_columns[0]
+        filter_val = key_values[0]
+        
+        logger.debug("get_scripts_for_model SQL: %s (val=%s)", sql, filter_val)
+        
+        try:
+            rows = cur.execute(sql, filter_val).fetchall()
+        except Exception as e:
+            logger.warning("Error al obtener lista de scripts: %s", e)
+            return []
         
+        scripts = self._scripts_from_rows(rows, select_cols, key_columns)
+        logger.info("get_scripts_for_model: %d scripts encontrados para %s=%s",
+                    len(scripts), filter_col, filter_val)
+        return scripts
+
+    def _model_list_sql(self, key_columns: List[str],
+                        with_content: bool = True) -> Tuple[str, List[str]]:
+        """
+        SELECT de los scripts de un modelo (parámetro: valor de la primera
+        columna clave) y columnas que devuelve.  Sin contenido, la última
+        es el tamaño del contenido (``DATALENGTH``) y no está en la lista.
+        """
         # Filtrar por la primera columna clave (ej: MODELO)
         filter_col = key_columns[0]
-        filter_val = key_values[0]
         
         # La segunda columna clave es la que varía (ej: CODIGO)
         label_col = key_columns[1] if len(key_columns) > 1 else key_columns[0]
         
         # Columnas a traer: todas las claves + contenido
-        select_cols = list(key_columns) + [self.content_column]
+        select_cols = list(key_columns) + ([self.content_column] if with_content else [])
         # Eliminar duplicados manteniendo orden
         select_cols = list(dict.fromkeys(select_cols))
         
         # Sanitizar todos los identificadores
         safe_table = self._safe_table()
         cols_sql = ", ".join(f"[{self._safe_column(c)}]" for c in select_cols)
+        if not with_content:
+            cols_sql += f", DATALENGTH([{self._safe_column(self.content_column)}])"
         safe_filter = self._safe_column(filter_col)
         safe_label = self._safe_column(label_col)
         sql = f"SELECT {cols_sql} FROM [{safe_table}] WHERE [{safe_filter}] = ? ORDER BY [{safe_label}]"
-        
-        logger.debug("get_scripts_for_model SQL: %s (val=%s)", sql, filter_val)
-        
-        try:
-            rows = cur.execute(sql, filter_val).fetchall()
-        except Exception as e:
-            logger.warning("Error al obtener lista de scripts: %s", e)
-            return []
-        
+        return sql, select_cols
+
+    def _scripts_from_rows(self, rows, select_cols: List[str],
+                           key_columns: List[str]) -> List[dict]:
+        """Filas de ``_model_list_sql`` → dicts label / content (o length) / key_values."""
+        label_col = key_columns[1] if len(key_columns) > 1 else key_columns[0]
+        with_content = self.content_column in select_cols
         scripts = []
         for row in rows:
             row_dict = {}
@@ -658,19 +783,424 @@ class DatabaseConnection:
             
             # Construir label legible (valor de la segunda clave)
             label = row_dict.get(label_col, "")
-            content = row_dict.get(self.content_column, "")
             row_key_values = [row_dict.get(k, "") for k in key_columns]
             
-            scripts.append({
-                "label": label,
-                "content": content,
-                "key_values": row_key_values,
-            })
-        
-        logger.info("get_scripts_for_model: %d scripts encontrados para %s=%s",
-                    len(scripts), filter_col, filter_val)
+            script = {"label": label, "key_values": row_key_values}
+            if with_content:
+                script["content"] = row_dict.get(self.content_column, "")
+            else:
+                script["length"] = int(row[len(select_cols)] or 0)
+            scripts.append(script)
         return scripts
 
+    # ------------------------------------------------------------------
+    # Búsqueda en todos los scripts de la tabla
+    # ------------------------------------------------------------------
+
+    def search_scripts(
+        self,
+        text: str,
+        key_columns: List[str],
+        content_column: Optional[str] = None,
+        batch_size: int = _FETCH_BATCH,
+        filters: Optional[Dict[str, str]] = None,
+    ) -> Iterator[dict]:
+        """
+        Busca *text* en el contenido de todos los registros de la tabla.
+
+        El filtrado se hace en el servidor (``LIKE '%text%'``, que también
+        funciona con columnas text/ntext) y las filas se leen con
+        ``fetchmany`` de *batch_size* en *batch_size*, de modo que el
+        llamante puede ir mostrando resultados sin esperar al final.
+        Mayúsculas/minúsculas según la intercalación de la columna: el
+        llamante debe afinar las coincidencias en cliente.
+
+        Mientras el generador esté abierto la conexión está ocupada con
+        el cursor; hay que agotarlo o cerrarlo (``close()``) antes de
+        lanzar otras consultas.
+
+        Args:
+            text: Texto a buscar (literal; los comodines de LIKE se escapan).
+                  Vacío: todas las filas (p.ej. para aplicar una regex en cliente).
+            key_columns: Columnas clave del registro (ej: ["MODELO", "CODIGO"]).
+            content_column: Columna con el script (default: self.content_column).
+            batch_size: Filas por viaje al servidor.
+            filters: Igualdades adicionales {columna: valor} (ej: {"MODELO": "T01"}).
+
+        Yields:
+            Dicts como los de get_scripts_for_model:
+            {"label": "T01 / BOBINADO", "key_values": ["T01", "BOBINADO"],
+             "content": "Sub Main()..."}
+        """
+        if not key_columns:
+            return
+        content_column = content_column or self.content_column
+
+        select_cols = list(dict.fromkeys(list(key_columns) + [content_column]))
+        safe_table = self._safe_table()
+        cols_sql = ", ".join(f"[{self._safe_column(c)}]" for c in select_cols)
+        order_sql = ", ".join(f"[{self._safe_column(c)}]" for c in key_columns)
+        where_parts = []
+        params = []
+        if text:
+            where_parts.append(f"[{self._safe_column(content_column)}] LIKE ? ESCAPE '\\'")
+            params.append(_like_contains(text))
+        for col, value in (filters or {}).items():
+            where_parts.append(f"[{self._safe_column(col)}] = ?")
+            params.append(value)
+        where_sql = f"WHERE {' AND '.join(where_parts)} " if where_parts else ""
+        sql = f"SELECT {cols_sql} FROM [{safe_table}] {where_sql}ORDER BY {order_sql}"
+        logger.debug("search_scripts SQL: %s (texto=%s)", sql, text)
+
+        cur = self._cursor()
+        total = 0
+        try:
+            cur.execute(sql, *params)
+            while True:
+                rows = cur.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    row_dict = {}
+                    for i, col in enumerate(select_cols):
+                        val = row[i]
+                        row_dict[col] = "" if val is None else str(val)
+                    row_key_values = [row_dict[k].strip() for k in key_columns]
+                    total += 1
+                    yield {
+                        "label": " / ".join(row_key_values),
+                        "key_values": row_key_values,
+                        "content": row_dict[content_column],
+                    }
+        finally:
+            cur.close()
+            logger.info("search_scripts: %d scripts contienen '%s'", total, text)
+
+    def get_script_versions(
+        self,
+        key_columns: List[str],
+        content_column: Optional[str] = None,
+    ) -> List[Tuple[List[str], str]]:
+        """
+        Versión de cada registro de la tabla, sin traer el contenido.
+
+        Sirve para refrescar de forma incremental el índice local
+        (``ScriptIndex``): solo se descargan las filas cuya versión cambió.
+        Si la tabla tiene una columna ``rowversion``/``timestamp`` se usa
+        esa; si no, un hash SHA-256 del contenido (se calcula para cada
+        fila: ver ``get_table_change_marker`` para evitar la consulta).
+
+        Returns:
+            Lista de tuplas (key_values, versión).
+        """
+        safe_table = self._safe_table()
+        version_sql = self._version_sql(content_column)
+        keys_sql = ", ".join(f"[{self._safe_column(c)}]" for c in key_columns)
+        sql = f"SELECT {keys_sql}, {version_sql} FROM [{safe_table}]"
+        logger.debug("get_script_versions SQL: %s", sql)
+
+        cur = self._cursor()
+        versions = []
+        try:
+            cur.execute(sql)
+            while True:
+                rows = cur.fetchmany(_FETCH_BATCH)
+                if not rows:
+                    break
+                for row in rows:
+                    keys = ["" if v is None else str(v).strip() for v in row[:len(key_columns)]]
+                    versions.append((keys, str(row[len(key_columns)])))
+        finally:
+            cur.close()
+        logger.info("get_script_versions: %d registros en %s (%s)", len(versions),
+                    self.table, "rowversion" if self._rowversion_column() else "hash")
+        return versions
+
+    def get_table_change_marker(self) -> Optional[str]:
+        """
+        Marca barata que cambia cuando cambia la tabla, para no pedir
+        ``get_script_versions`` (que recorre la tabla entera) si nada
+        cambió: ``sys.objects.modify_date`` (estructura) y la última
+        escritura según ``sys.dm_db_index_usage_stats``, junto con el
+        arranque del servidor (esas estadísticas se reinician con él).
+
+        Returns:
+            La marca, o None si no se puede leer (las vistas ``dm_``
+            piden el permiso VIEW SERVER STATE): hay que comprobar versiones.
+        """
+        sql = """
+        SELECT CONVERT(VARCHAR(23), MAX(o.modify_date), 126),
+               CONVERT(VARCHAR(23), MAX(u.last_user_update), 126),
+               (SELECT CONVERT(VARCHAR(23), sqlserver_start_time, 126)
+                FROM sys.dm_os_sys_info)
+        FROM sys.objects o
+        LEFT JOIN sys.dm_db_index_usage_stats u
+            ON u.database_id = DB_ID() AND u.object_id = o.object_id
+        WHERE o.name = ? AND o.type = 'U'
+        """
+        cur = self._cursor()
+        try:
+            row = cur.execute(sql, self._safe_table()).fetchone()
+        except pyodbc.Error as e:
+            logger.debug("Sin marca de cambios de %s: %s", self.table, e)
+            return None
+        finally:
+            cur.close()
+        if not row or not row[0] or not row[2]:
+            return None
+        return "|".join(v or "" for v in row)
+
+    def _version_sql(self, content_column: Optional[str] = None) -> str:
+        """
+        Expresión SQL con la versión del contenido de una fila: la columna
+        ``rowversion``/``timestamp`` si la tabla tiene una y, si no, un
+        hash SHA-256 del contenido (distingue mayúsculas aunque la
+        intercalación no lo haga, a diferencia de ``CHECKSUM``).
+        """
+        rowversion = self._rowversion_column()
+        if rowversion:
+            return self._rowversion_sql(rowversion)
+        content = content_column or self.content_column
+        types = {c["name"].upper(): c["type"] for c in self.get_table_schema()}
+        return _hash_sql(_as_text_sql(content, types.get(content.upper(), "nvarchar")))
+
+    def _record_version_sql(self) -> str:
+        """
+        Versión de la fila entera (``get_record_versioned``): la columna
+        ``rowversion`` o, si no hay, un hash SHA-256 de TODAS las columnas.
+        Así un cambio en cualquier campo editable (no solo en el script)
+        invalida la copia guardada en ``record_cache``.
+        """
+        rowversion = self._rowversion_column()
+        if rowversion:
+            return self._rowversion_sql(rowversion)
+        # NCHAR(31) separa los valores: "AB" + "C" no da lo mismo que "A" + "BC"
+        parts = ", NCHAR(31), ".join(_as_text_sql(c["name"], c["type"])
+                                     for c in self.get_table_schema())
+        return _hash_sql(f"CONCAT({parts}, N'')")
+
+    def _rowversion_sql(self, rowversion: str) -> str:
+        return f"CONVERT(VARCHAR(20), CONVERT(BIGINT, [{self._safe_column(rowversion)}]))"
+
+    def _rowversion_column(self) -> Optional[str]:
+        """Columna ``rowversion``/``timestamp`` de la tabla, o None."""
+        return next(
+            (c["name"] for c in self.get_table_schema()
+             if c["type"] in ("timestamp", "rowversion")),
+            None,
+        )
+
+    def get_record_version(self, key_columns: List[str],
+                           key_values: List[str]) -> Optional[str]:
+        """
+        Versión actual de un registro (ver ``_record_version_sql``), o None
+        si no existe.  Sirve para comprobar con una consulta mínima si una
+        copia guardada del registro sigue valiendo.
+        """
+        where_sql = " AND ".join(f"[{self._safe_column(c)}] = ?" for c in key_columns)
+
+        def run():
+            sql = (f"SELECT {self._record_version_sql()} FROM [{self._safe_table()}] "
+                   f"WHERE {where_sql}")
+            return self._cursor().execute(sql, *key_values).fetchone()
+
+        row = self._retry_on_missing_column(run)
+        return str(row[0]) if row else None
+
+    def get_scripts_by_keys(
+        self,
+        key_columns: List[str],
+        keys_list: List[List[str]],
+        content_column: Optional[str] = None,
+        batch_size: int = _FETCH_BATCH,
+    ) -> Iterator[dict]:
+        """
+        Contenido de los registros indicados, por lotes de *batch_size* claves.
+
+        Yields:
+            Dicts {"label", "key_values", "content"} (como search_scripts).
+        """
+        content_column = content_column or self.content_column
+        select_cols = list(dict.fromkeys(list(key_columns) + [content_column]))
+        safe_table = self._safe_table()
+        cols_sql = ", ".join(f"[{self._safe_column(c)}]" for c in select_cols)
+        row_filter = "(" + " AND ".join(
+            f"[{self._safe_column(c)}] = ?" for c in key_columns) + ")"
+        # SQL Server admite como mucho 2100 parámetros por consulta
+        batch_size = max(1, min(batch_size, 2000 // len(key_columns)))
+
+        cur = self._cursor()
+        try:
+            for i in range(0, len(keys_list), batch_size):
+                chunk = keys_list[i:i + batch_size]
+                sql = (f"SELECT {cols_sql} FROM [{safe_table}] WHERE "
+                       + " OR ".join([row_filter] * len(chunk)))
+                params = [v for keys in chunk for v in keys]
+                for row in cur.execute(sql, *params).fetchall():
+                    row_dict = {}
+                    for j, col in enumerate(select_cols):
+                        val = row[j]
+                        row_dict[col] = "" if val is None else str(val)
+                    row_key_values = [row_dict[k].strip() for k in key_columns]
+                    yield {
+                        "label": " / ".join(row_key_values),
+                        "key_values": row_key_values,
+                        "content": row_dict[content_column],
+                    }
+        finally:
+            cur.close()
+
+    # ------------------------------------------------------------------
+    # Contenido bajo demanda (listados sin contenido)
+    # ------------------------------------------------------------------
+
+    def _content_key(self, key_values: List[str],
+                     content_column: Optional[str] = None) -> tuple:
+        return (self.table.upper(), (content_column or self.content_column).upper(),
+                tuple(str(v).strip().upper() for v in key_values))
+
+    def get_script_content(
+        self,
+        key_columns: List[str],
+        key_values: List[str],
+        content_column: Optional[str] = None,
+    ) -> str:
+        """
+        Contenido de un script, desde ``content_cache`` si ya se pidió.
+
+        La caché es una LRU acotada (``CONTENT_CACHE_ENTRIES`` y
+        ``CONTENT_CACHE_BYTES``); guardar desde esta conexión descarta la
+        entrada del script guardado.
+
+        Raises:
+            LookupError: Si no existe el registro.
+        """
+        content_column = content_column or self.content_column
+        cache_key = self._content_key(key_values, content_column)
+        content = self.content_cache.get(cache_key)
+        if content is not None:
+            return content
+        where_sql = " AND ".join(f"[{self._safe_column(c)}] = ?" for c in key_columns)
+        sql = (f"SELECT [{self._safe_column(content_column)}] "
+               f"FROM [{self._safe_table()}] WHERE {where_sql}")
+        row = self._cursor().execute(sql, *key_values).fetchone()
+        if not row:
+            self._raise_not_found(key_columns, key_values)
+        content = "" if row[0] is None else str(row[0]).strip()
+        self.content_cache.put(cache_key, content)
+        return content
+
+    def get_script_contents(
+        self,
+        key_columns: List[str],
+        keys_list: List[List[str]],
+        content_column: Optional[str] = None,
+    ) -> List[str]:
+        """
+        Contenido de varios scripts (en el orden de *keys_list*, "" si no
+        existe).  Los que no están en ``content_cache`` se piden por lotes
+        con ``get_scripts_by_keys``.
+        """
+        content_column = content_column or self.content_column
+        cache_keys = [self._content_key(kv, content_column) for kv in keys_list]
+        found = {}
+        missing = []
+        for kv, cache_key in zip(keys_list, cache_keys):
+            content = self.content_cache.get(cache_key)
+            if content is None:
+                missing.append(kv)
+            else:
+                found[cache_key] = content
+        if missing:
+            for row in self.get_scripts_by_keys(key_columns, missing, content_column):
+                cache_key = self._content_key(row["key_values"], content_column)
+                found[cache_key] = row["content"].strip()
+                self.content_cache.put(cache_key, found[cache_key])
+        return [found.get(cache_key, "") for cache_key in cache_keys]
+
+    def bulk_update_content(
+        self,
+        key_columns: List[str],
+        updates: List[Tuple],
+        content_column: Optional[str] = None,
+    ) -> int:
+        """
+        Guarda el contenido de varios scripts en una sola transacción.
+
+        Sin contenido anterior usa ``executemany`` con ``fast_executemany``
+        (un solo envío de parámetros en bloque).  Con contenido anterior
+        cada UPDATE lleva ``AND hash(contenido) = hash(anterior)`` (SHA-256,
+        distingue mayúsculas) y se comprueba su ``rowcount``: si algún
+        script cambió en el servidor desde que se leyó, se hace rollback
+        de todos.  Si cualquier fila falla tampoco se guarda ninguna.
+
+        Args:
+            key_columns: Columnas clave (ej: ["MODELO", "CODIGO"]).
+            updates: Lista de (key_values, nuevo_contenido) o de
+                (key_values, nuevo_contenido, contenido_leído).
+            content_column: Columna con el script (default: self.content_column).
+
+        Returns:
+            Número de scripts guardados.
+
+        Raises:
+            ConcurrentUpdateError: Scripts cambiados en el servidor (rollback).
+            pyodbc.Error: Error de la BD (ya deshecho con rollback).
+        """
+        if not updates:
+            return 0
+        content_column = content_column or self.content_column
+        safe_table = self._safe_table()
+        safe_content = self._safe_column(content_column)
+        where_sql = " AND ".join(f"[{self._safe_column(c)}] = ?" for c in key_columns)
+        sql = f"UPDATE [{safe_table}] SET [{safe_content}] = ? WHERE {where_sql}"
+        checked = all(len(update) > 2 for update in updates)
+        if checked:
+            types = {c["name"].upper(): c["type"] for c in self.get_table_schema()}
+            current = _hash_sql(_as_text_sql(content_column,
+                                             types.get(content_column.upper(), "nvarchar")))
+            sql += f" AND {current} = {_hash_sql('CAST(? AS NVARCHAR(MAX))')}"
+            params = [(new, *key_values, old) for key_values, new, old in updates]
+        else:
+            params = [(update[1], *update[0]) for update in updates]
+        logger.debug("bulk_update_content SQL: %s (%d filas)", sql, len(params))
+
+        cur = self._cursor()
+        try:
+            if checked:
+                # Una a una para saber cuáles no coinciden (todas en la transacción)
+                conflicts = []
+                for (key_values, *_), row_params in zip(updates, params):
+                    cur.execute(sql, *row_params)
+                    if cur.rowcount < 1:
+                        conflicts.append(list(key_values))
+                if conflicts:
+                    raise ConcurrentUpdateError(conflicts)
+            else:
+                cur.fast_executemany = True
+                # Contenido como NVARCHAR(MAX): sin esto fast_executemany
+                # dimensiona el parámetro por la primera fila
+                cur.setinputsizes([(pyodbc.SQL_WVARCHAR, 0, 0)]
+                                  + [None] * len(key_columns))
+                cur.executemany(sql, params)
+            self._cnxn.commit()
+        except ConcurrentUpdateError as e:
+            self._cnxn.rollback()
+            logger.warning("bulk_update_content: rollback, %d scripts cambiados en el "
+                           "servidor: %s", len(e.conflicts), e.conflicts)
+            raise
+        except Exception:
+            self._cnxn.rollback()
+            logger.exception("bulk_update_content: rollback de %d filas", len(params))
+            raise
+        finally:
+            cur.close()
+        for key_values, *_ in updates:
+            self.content_cache.pop(self._content_key(key_values, content_column))
+            self.forget_record(key_values)
+        logger.info("bulk_update_content: %d scripts guardados en %s", len(params), self.table)
+        return len(params)
+
     # ------------------------------------------------------------------
     # Listado de plantillas (para el desplegable en modo plantilla)
     # ------------------------------------------------------------------
@@ -806,23 +1336,30 @@ class DatabaseConnection:
 
     def _existing_columns(self, candidates: List[str]) -> List[str]:
         """Devuelve solo los nombres de columna que existen en la tabla."""
-        cur = self._cursor()
-        sql = """
-        SELECT COLUMN_NAME
-        FROM INFORMATION_SCHEMA.COLUMNS
-        WHERE TABLE_NAME = ?
-        """
-        rows = cur.execute(sql, self._safe_table()).fetchall()
-        table_cols = {r[0].upper() for r in rows}
+        table_cols = {col["name"].upper() for col in self.get_table_schema()}
         return [c for c in candidates if c.upper() in table_cols]
 
     # ------------------------------------------------------------------
     # Detección automática de esquema
     # ------------------------------------------------------------------
 
-    def get_table_schema(self) -> List[dict]:
+    def _table_modify_date(self) -> str:
+        """Fecha de la última modificación de la tabla (``sys.objects``), o ""."""
+        cur = self._cursor()
+        row = cur.execute(_MODIFY_DATE_SQL, self._safe_table()).fetchone()
+        return row[0] if row and row[0] else ""
+
+    def get_table_schema(self, refresh: bool = False) -> List[dict]:
         """
         Obtiene el esquema completo de la tabla actual.
+
+        El esquema se guarda en ``schema_cache`` por (servidor, base de
+        datos, tabla): solo la primera llamada de la sesión consulta
+        ``INFORMATION_SCHEMA``.  Si la caché tiene fichero y el esquema
+        guardado coincide con ``sys.objects.modify_date``, ni siquiera esa.
+
+        Args:
+            refresh: Si True, ignora la caché y vuelve a leer el esquema.
         
         Returns:
             Lista de diccionarios con información de cada columna:
@@ -837,20 +1374,27 @@ class DatabaseConnection:
                 ...
             ]
         """
+        key = schema_key(self.server, self.database, self.table)
+        if not refresh:
+            schema = self.schema_cache.get(key)
+            if schema is not None:
+                return schema
+            stored = self.schema_cache.stored(key)
+            if stored is not None:
+                modify_date = self._table_modify_date()
+                if modify_date and modify_date == stored[0]:
+                    self.schema_cache.put(key, stored[1], modify_date, persist=False)
+                    logger.debug("Esquema de tabla %s: desde la caché en disco", self.table)
+                    return self.schema_cache.get(key)
+
         cur = self._cursor()
-        sql = """
-        SELECT 
-            COLUMN_NAME,
-            DATA_TYPE,
-            CHARACTER_MAXIMUM_LENGTH,
-            IS_NULLABLE,
-            ORDINAL_POSITION
-        FROM INFORMATION_SCHEMA.COLUMNS
-        WHERE TABLE_NAME = ?
-        ORDER BY ORDINAL_POSITION
-        """
-        rows = cur.execute(sql, self._safe_table()).fetchall()
-        
+        # La fecha de modificación viaja en la misma consulta
+        safe_table = self._safe_table()
+        rows = cur.execute(_SCHEMA_SQL, safe_table, safe_table).fetchall()
+        return self._store_schema(rows)
+
+    def _store_schema(self, rows) -> List[dict]:
+        """Filas de ``_SCHEMA_SQL`` → esquema, guardado en ``schema_cache``."""
         schema = []
         for row in rows:
             schema.append({
@@ -860,13 +1404,21 @@ class DatabaseConnection:
                 "is_nullable": row[3] == "YES",
                 "ordinal": row[4]
             })
-        
+
+        if schema:
+            # Una tabla que no existe no se guarda: podría crearse después
+            key = schema_key(self.server, self.database, self.table)
+            self.schema_cache.put(key, schema, rows[0][5] or "")
         logger.debug("Esquema de tabla %s: %d columnas", self.table, len(schema))
         return schema
 
     def get_record_full(self, key_columns: List[str], key_values: List[str]) -> dict:
         """
         Carga un registro completo con TODAS sus columnas de forma dinamica.
+
+        Los registros ya leídos se guardan en ``record_cache`` (LRU limitada
+        a ``RECORD_CACHE_BYTES``) con su versión: volver a pedirlos solo
+        cuesta la consulta de la versión (ver ``get_record_versioned``).
         
         Args:
             key_columns: Lista de nombres de columnas que forman la clave (ej: ["MODELO", "CODIGO"])
@@ -885,6 +1437,59 @@ class DatabaseConnection:
                 f"key_values tiene {len(key_values)} elementos"
             )
         
+        record, _ = self.get_record_versioned(key_columns, key_values)
+        return record
+
+    def get_record_versioned(self, key_columns: List[str],
+                             key_values: List[str]) -> Tuple[dict, str]:
+        """
+        Como ``get_record_full``, pero devuelve también la versión del
+        registro (la de ``get_record_version``).
+
+        Un registro que ya está en ``record_cache`` se revalida pidiendo
+        solo su versión; el registro completo solo se vuelve a leer si
+        cambió.
+
+        Raises:
+            LookupError: Si no se encuentra el registro.
+        """
+        cached = self.cached_record(key_values)
+        if cached is not None:
+            version = self.get_record_version(key_columns, key_values)
+            if version == cached[1]:
+                logger.info("Registro en caché sin cambios: %d columnas", len(cached[0]))
+                return cached
+            if version is None:
+                self.forget_record(key_values)
+                self._raise_not_found(key_columns, key_values)
+        record, version = self._select_record(key_columns, key_values)
+        self.record_cache.put(self._record_key(key_values), (record, version))
+        logger.info("Registro cargado: %d columnas", len(record))
+        logger.debug("Columnas: %s", list(record.keys()))
+        return dict(record), version
+
+    def _record_key(self, key_values: List[str]) -> tuple:
+        return (self.table.upper(), tuple(str(v).strip().upper() for v in key_values))
+
+    def cached_record(self, key_values: List[str]) -> Optional[Tuple[dict, str]]:
+        """
+        (copia del registro, versión) guardado en ``record_cache``, sin
+        consultar al servidor (puede estar desactualizado), o None.
+        """
+        entry = self.record_cache.get(self._record_key(key_values))
+        return (dict(entry[0]), entry[1]) if entry is not None else None
+
+    def forget_record(self, key_values: List[str]) -> None:
+        """Descarta el registro de ``record_cache``."""
+        self.record_cache.pop(self._record_key(key_values))
+
+    def _select_record(self, key_columns: List[str],
+                       key_values: List[str]) -> Tuple[dict, str]:
+        return self._retry_on_missing_column(
+            lambda: self._select_record_once(key_columns, key_values))
+
+    def _select_record_once(self, key_columns: List[str],
+                            key_values: List[str]) -> Tuple[dict, str]:
         #Obtener todas las columnas de la tabla
         schema = self.get_table_schema()
         all_columns = [col["name"] for col in schema]
@@ -892,6 +1497,7 @@ class DatabaseConnection:
         #Construir SELECT dinamicamente
         safe_table = self._safe_table()
         cols_sql = ", ".join(f"[{self._safe_column(col)}]" for col in all_columns)
+        cols_sql += f", {self._record_version_sql()}"
         
         #Construir WHERE dinamicamente
         where_parts = [f"[{self._safe_column(col)}] = ?" for col in key_columns]
@@ -903,21 +1509,218 @@ class DatabaseConnection:
         row = cur.execute(sql, *key_values).fetchone()
         
         if not row:
-            keys_display = ", ".join(f"{k}='{v}'" for k, v in zip(key_columns, key_values))
-            raise LookupError(f"No existe registro con {keys_display} en tabla {self.table}")
+            self._raise_not_found(key_columns, key_values)
         
-        # Convertir a diccionario
-        record = {}
-        for i, col_name in enumerate(all_columns):
-            value = row[i]
-            # Normalizar valores None y espacios
-            if value is None:
-                record[col_name] = ""
-            elif isinstance(value, str):
-                record[col_name] = value.strip()
+        version = str(row[len(all_columns)])
+        return _record_from_row(all_columns, row), version
+
+    def _retry_on_missing_column(self, run):
+        """
+        Ejecuta *run()* y, si falla porque una columna no existe (42S22:
+        el esquema de ``schema_cache`` es de antes de un ALTER TABLE),
+        descarta el esquema guardado, lo vuelve a leer y repite una vez.
+        """
+        try:
+            return run()
+        except pyodbc.Error as e:
+            if "42S22" not in str(e):
+                raise
+            logger.warning("Columna inexistente en %s (%s): se vuelve a leer el esquema",
+                           self.table, e)
+        self.schema_cache.invalidate(schema_key(self.server, self.database, self.table))
+        self.get_table_schema(refresh=True)
+        return run()
+
+    def _raise_not_found(self, key_columns: List[str], key_values: List[str]) -> None:
+        keys_display = ", ".join(f"{k}='{v}'" for k, v in zip(key_columns, key_values))
+        raise LookupError(f"No existe registro con {keys_display} en tabla {self.table}")
+
+    # ------------------------------------------------------------------
+    # Arranque en un solo viaje al servidor
+    # ------------------------------------------------------------------
+
+    def load_startup(
+        self,
+        key_columns: List[str],
+        key_values: List[str],
+        include_list: bool = True,
+        list_content: bool = False,
+    ) -> dict:
+        """
+        Carga en UN solo lote lo que necesita el editor al arrancar: el
+        esquema de la tabla (si no está en la caché), la lista de scripts
+        del modelo y el registro inicial.  Si el esquema está en el
+        fichero de la caché, el lote solo pide su fecha de modificación;
+        si no coincide, el esquema se lee después (un viaje más).
+
+        Sustituye a ``get_table_schema`` + ``get_scripts_for_model`` +
+        ``get_record_full`` (cuatro a seis viajes al servidor): el lote
+        devuelve varios conjuntos de resultados que se leen con
+        ``cursor.nextset()``.  Si el driver no lo admite se hacen las
+        consultas por separado.
+
+        Args:
+            key_columns: Columnas clave (ej: ["MODELO", "CODIGO"]).
+            key_values: Valores; si alguno está vacío (solo MODELO) el
+                registro inicial es el primer script del modelo.
+            include_list: Si False no se pide la lista de scripts.
+            list_content: Si False (por defecto) la lista trae solo claves
+                y tamaño, sin el contenido (ver ``get_scripts_for_model``).
+
+        Returns:
+            Dict con "schema", "record", "key_values" (las del registro
+            cargado), "scripts" (como ``get_scripts_for_model``) y
+            "round_trips" (viajes al servidor).
+
+        Raises:
+            ValueError: Si key_columns y key_values tienen diferente longitud.
+            LookupError: Si no se encuentra el registro.
+        """
+        if len(key_columns) != len(key_values):
+            raise ValueError(
+                f"key_columns tiene {len(key_columns)} elementos pero "
+                f"key_values tiene {len(key_values)} elementos"
+            )
+        t0 = time.perf_counter()
+        key = schema_key(self.server, self.database, self.table)
+        schema = self.schema_cache.get(key)
+        stored = self.schema_cache.stored(key) if schema is None else None
+        with_list = include_list and len(key_columns) >= 2
+        first_of_model = len(key_columns) >= 2 and any(v == "" for v in key_values)
+
+        safe_table = self._safe_table()
+        statements, params = ["SET NOCOUNT ON"], []
+        if stored is not None:
+            statements.append(_MODIFY_DATE_SQL)
+            params.append(safe_table)
+        elif schema is None:
+            statements.append(_SCHEMA_SQL)
+            params += [safe_table, safe_table]
+        if with_list:
+            list_sql, select_cols = self._model_list_sql(key_columns, list_content)
+            statements.append(list_sql)
+            params.append(key_values[0])
+        # Registro: SELECT *, las columnas se leen de cursor.description
+        if first_of_model:
+            safe_label = self._safe_column(key_columns[1])
+            statements.append(
+                f"SELECT TOP 1 * FROM [{safe_table}] "
+                f"WHERE [{self._safe_column(key_columns[0])}] = ? ORDER BY [{safe_label}]"
+            )
+            params.append(key_values[0])
+        else:
+            where_sql = " AND ".join(f"[{self._safe_column(c)}] = ?" for c in key_columns)
+            statements.append(f"SELECT * FROM [{safe_table}] WHERE {where_sql}")
+            params += list(key_values)
+
+        try:
+            cur = self._cursor()
+            cur.execute(";\n".join(statements), *params)
+            modify_date = None
+            if stored is not None:
+                row = cur.fetchone()
+                modify_date = row[0] if row and row[0] else ""
+                cur.nextset()
+            elif schema is None:
+                schema = self._store_schema(cur.fetchall())
+                cur.nextset()
+            scripts = []
+            if with_list:
+                scripts = self._scripts_from_rows(cur.fetchall(), select_cols, key_columns)
+                cur.nextset()
+            columns = [d[0] for d in cur.description]
+            row = cur.fetchone()
+        except pyodbc.Error as e:
+            logger.warning("Arranque en un solo lote no disponible (%s), "
+                           "se hacen las consultas por separado", e)
+            return self._load_startup_sequential(key_columns, key_values, with_list,
+                                                 list_content, t0)
+
+        if not row:
+            self._raise_not_found(key_columns, key_values)
+        record = _record_from_row(columns, row)
+        if first_of_model:
+            by_upper = {k.upper(): v for k, v in record.items()}
+            key_values = [by_upper.get(c.upper(), v) for c, v in zip(key_columns, key_values)]
+        round_trips = 1
+        if stored is not None:
+            if modify_date and modify_date == stored[0]:
+                self.schema_cache.put(key, stored[1], modify_date, persist=False)
+                schema = self.schema_cache.get(key)
+                logger.debug("Esquema de tabla %s: desde la caché en disco", self.table)
             else:
-                record[col_name] = str(value)
-        
-        logger.info("Registro cargado: %d columnas", len(record))
-        logger.debug("Columnas: %s", list(record.keys()))
-        return record
\ No newline at end of file
+                # La tabla cambió desde que se guardó: esquema nuevo
+                schema = self.get_table_schema(refresh=True)
+                round_trips += 1
+        logger.info("Arranque: esquema, registro y %d scripts en %d viajes al servidor (%.0f ms)",
+                    len(scripts), round_trips, (time.perf_counter() - t0) * 1000)
+        return {"schema": schema, "record": record, "key_values": list(key_values),
+                "scripts": scripts, "round_trips": round_trips}
+
+    def _load_startup_sequential(self, key_columns: List[str], key_values: List[str],
+                                 with_list: bool, list_content: bool, t0: float) -> dict:
+        """``load_startup`` con una consulta por cosa."""
+        round_trips = 0
+        if self.schema_cache.get(schema_key(self.server, self.database, self.table)) is None:
+            round_trips += 1
+        schema = self.get_table_schema()
+        scripts = []
+        if with_list:
+            scripts = self.get_scripts_for_model(key_columns, key_values,
+                                                 with_content=list_content)
+            round_trips += 1
+        if len(key_columns) >= 2 and any(v == "" for v in key_values):
+            if not with_list:
+                scripts = self.get_scripts_for_model(key_columns, key_values,
+                                                     with_content=False)
+                round_trips += 1
+            if scripts:
+                key_values = scripts[0]["key_values"]
+        record = self.get_record_full(key_columns, key_values)
+        round_trips += 1
+        logger.info("Arranque: esquema, registro y %d scripts en %d viajes al servidor (%.0f ms)",
+                    len(scripts), round_trips, (time.perf_counter() - t0) * 1000)
+        return {"schema": schema, "record": record, "key_values": list(key_values),
+                "scripts": scripts if with_list else [], "round_trips": round_trips}
+
+
+# Tipos que se pasan a texto con un estilo de CONVERT propio (sin perder
+# precisión: CAST de un datetime a texto quita los segundos)
+_DATE_TYPES = {"datetime", "datetime2", "smalldatetime", "date", "time", "datetimeoffset"}
+_BINARY_TYPES = {"binary", "varbinary", "image"}
+
+
+def _as_text_sql(column: str, col_type: str) -> str:
+    """Expresión SQL con el valor de *column* como NVARCHAR(MAX) (NULL → NULL)."""
+    safe = "[" + _sanitize_identifier(column, "columna") + "]"
+    col_type = (col_type or "").lower()
+    if col_type in _DATE_TYPES:
+        return f"CONVERT(NVARCHAR(MAX), {safe}, 121)"
+    if col_type in _BINARY_TYPES:
+        return f"CONVERT(NVARCHAR(MAX), CAST({safe} AS VARBINARY(MAX)), 1)"
+    return f"CAST({safe} AS NVARCHAR(MAX))"
+
+
+def _hash_sql(text_sql: str) -> str:
+    """SHA-256 en hexadecimal de una expresión de texto ("" si es NULL)."""
+    return (f"CONVERT(VARCHAR(64), HASHBYTES('SHA2_256', ISNULL({text_sql}, N'')), 2)")
+
+
+def _record_entry_size(entry: Tuple[dict, str]) -> int:
+    record, version = entry
+    return sum(text_size(k) + text_size(v) for k, v in record.items()) + text_size(version)
+
+
+def _record_from_row(columns: List[str], row) -> dict:
+    """Fila → {columna: valor} con None como "" y los textos sin espacios."""
+    record = {}
+    for i, col_name in enumerate(columns):
+        value = row[i]
+        # Normalizar valores None y espacios
+        if value is None:
+            record[col_name] = ""
+        elif isinstance(value, str):
+            record[col_name] = value.strip()
+        else:
+            record[col_name] = str(value)
+    return record
\ No newline at end of file
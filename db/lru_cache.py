@@ -0,0 +1,93 @@
+"""
+Caché LRU acotada por número de entradas y por tamaño en bytes.
+
+La usan las cachés de ``DatabaseConnection`` (contenido de scripts
+cargado bajo demanda): al superar cualquiera de los dos límites se
+descartan las entradas usadas hace más tiempo.
+
+Se puede usar a la vez desde varios hilos.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Callable, Generic, Hashable, Optional, TypeVar
+
+V = TypeVar("V")
+
+
+def text_size(value) -> int:
+    """Tamaño aproximado en memoria de un texto (2 bytes por carácter)."""
+    return 2 * len(value) if isinstance(value, str) else 64
+
+
+class LRUCache(Generic[V]):
+    """
+    Diccionario con descarte de lo menos usado.
+
+    Args:
+        max_entries: Entradas como máximo.
+        max_bytes: Suma de tamaños como máximo (una entrada mayor no se guarda).
+        sizeof: Función (valor) → tamaño en bytes.
+    """
+
+    def __init__(self, max_entries: int = 1000, max_bytes: int = 32 * 1024 * 1024,
+                 sizeof: Callable[[V], int] = text_size):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof
+        self._items: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._items
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def get(self, key: Hashable) -> Optional[V]:
+        """Valor de *key* (y lo marca como recién usado), o None."""
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def put(self, key: Hashable, value: V) -> None:
+        size = self._sizeof(value)
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            if size > self.max_bytes:
+                return
+            self._items[key] = (value, size)
+            self._bytes += size
+            while self._items and (len(self._items) > self.max_entries
+                                   or self._bytes > self.max_bytes):
+                _, (_, evicted) = self._items.popitem(last=False)
+                self._bytes -= evicted
+
+    def pop(self, key: Hashable) -> Optional[V]:
+        with self._lock:
+            item = self._items.pop(key, None)
+            if item is None:
+                return None
+            self._bytes -= item[1]
+            return item[0]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self._bytes = 0
@@ -0,0 +1,150 @@
+"""
+Caché de esquemas de tabla (columnas de ``INFORMATION_SCHEMA.COLUMNS``).
+
+``get_record_full`` necesita las columnas de la tabla en cada carga de
+registro, y ``get_variables`` y ``get_script_versions`` las vuelven a
+pedir.  Con esta caché cada cambio de script cuesta una sola consulta
+(la del registro):
+
+  - En memoria, por (servidor, base de datos, tabla): dentro de la sesión
+    el esquema se pide al servidor una sola vez.
+  - Opcionalmente en un fichero SQLite (``open_default_schema_cache``):
+    al arrancar, el esquema guardado se da por bueno si la fecha de
+    modificación de la tabla (``sys.objects.modify_date``, que cambia con
+    cada ``ALTER TABLE``) es la misma que cuando se guardó.  Es una
+    consulta de una fila en vez de la de todas las columnas.
+
+Se puede usar a la vez desde varios hilos (y varias conexiones).
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger("EditorVBS.db")
+
+# Fichero por defecto: %APPDATA%/EditorVBS/schema_cache.sqlite
+_DEFAULT_PATH = os.path.join(
+    os.environ.get("APPDATA", os.path.expanduser("~")), "EditorVBS", "schema_cache.sqlite"
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS schemas (
+    server      TEXT NOT NULL,
+    db          TEXT NOT NULL,
+    tbl         TEXT NOT NULL,
+    modify_date TEXT NOT NULL,
+    columns     TEXT NOT NULL,
+    PRIMARY KEY (server, db, tbl)
+);
+"""
+
+# (servidor, base de datos, tabla), en minúsculas
+SchemaKey = Tuple[str, str, str]
+
+
+def schema_key(server: str, database: str, table: str) -> SchemaKey:
+    """Clave de la caché (SQL Server no distingue mayúsculas en los nombres)."""
+    return (server.strip().lower(), database.strip().lower(), table.strip().lower())
+
+
+def _copy(schema: List[dict]) -> List[dict]:
+    # Quien recibe el esquema puede modificarlo: nunca se entrega el guardado
+    return [dict(col) for col in schema]
+
+
+class SchemaCache:
+    """
+    Esquemas de tabla en memoria y, si se da *path*, en SQLite.
+
+    Args:
+        path: Fichero SQLite donde persistirlos, o None para solo memoria.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._memory: Dict[SchemaKey, List[dict]] = {}
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.executescript(_SCHEMA)
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def get(self, key: SchemaKey) -> Optional[List[dict]]:
+        """Esquema ya validado en esta sesión, o None."""
+        with self._lock:
+            schema = self._memory.get(key)
+        return _copy(schema) if schema is not None else None
+
+    def stored(self, key: SchemaKey) -> Optional[Tuple[str, List[dict]]]:
+        """(modify_date, esquema) guardado en disco, sin validar, o None."""
+        with self._lock:
+            if self._conn is None:
+                return None
+            row = self._conn.execute(
+                "SELECT modify_date, columns FROM schemas WHERE server = ? AND db = ? AND tbl = ?",
+                key,
+            ).fetchone()
+        if row is None:
+            return None
+        try:
+            return row[0], json.loads(row[1])
+        except ValueError:
+            return None
+
+    def put(self, key: SchemaKey, schema: List[dict], modify_date: str = "",
+            persist: bool = True) -> None:
+        """
+        Guarda el esquema de *key* en memoria y, con *modify_date* y
+        *persist*, también en disco.
+        """
+        with self._lock:
+            self._memory[key] = _copy(schema)
+            if self._conn is None or not persist or not modify_date:
+                return
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO schemas (server, db, tbl, modify_date, columns) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (*key, modify_date, json.dumps(schema)),
+                )
+                self._conn.commit()
+            except sqlite3.Error as e:
+                logger.warning("No se pudo guardar el esquema en la caché: %s", e)
+
+    def invalidate(self, key: Optional[SchemaKey] = None) -> None:
+        """Olvida el esquema de *key* (o todos) en memoria y en disco."""
+        with self._lock:
+            if key is None:
+                self._memory.clear()
+            else:
+                self._memory.pop(key, None)
+            if self._conn is not None:
+                if key is None:
+                    self._conn.execute("DELETE FROM schemas")
+                else:
+                    self._conn.execute(
+                        "DELETE FROM schemas WHERE server = ? AND db = ? AND tbl = ?", key)
+                self._conn.commit()
+
+
+def open_default_schema_cache() -> Optional[SchemaCache]:
+    """Caché con fichero en la ruta por defecto, o None si no se puede abrir."""
+    try:
+        return SchemaCache(_DEFAULT_PATH)
+    except (OSError, sqlite3.Error) as e:
+        logger.warning("Caché de esquemas no disponible: %s", e)
+        return None
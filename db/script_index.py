@@ -0,0 +1,271 @@
+"""
+Índice local (SQLite) de los scripts para la búsqueda global.
+
+Un ``LIKE '%x%'`` sobre ``NVARCHAR(MAX)`` recorre la tabla entera en el
+servidor en cada búsqueda, y ese servidor lo comparte el ERP.  Este índice
+guarda una copia de los scripts y un índice invertido de trigramas en un
+fichero SQLite local (uno por servidor y base de datos), de modo que las
+búsquedas se resuelven en milisegundos sin consultar el servidor.
+
+Refresco incremental:
+    ``refresh()`` pide al servidor solo la versión de cada fila
+    (rowversion o hash del contenido, ver ``DatabaseConnection.get_script_versions``)
+    y descarga únicamente las filas nuevas o cambiadas.  Antes mira la
+    marca de cambios de la tabla (``get_table_change_marker``): si es la
+    del último refresco, no consulta nada más.  Sin marca (falta de
+    permisos), la comprobación se hace como mucho cada *min_interval*.
+
+Búsqueda:
+    Los trigramas (en minúsculas) del texto buscado seleccionan los
+    candidatos; el filtro exacto (mayúsculas, palabra completa, líneas)
+    lo hace el llamante, igual que con los resultados del servidor.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import re
+import sqlite3
+import time
+from typing import Iterator, List, Optional, Tuple
+
+logger = logging.getLogger("EditorVBS.db")
+
+# Directorio de índices: %APPDATA%/EditorVBS/index/
+_INDEX_DIR = os.path.join(
+    os.environ.get("APPDATA", os.path.expanduser("~")), "EditorVBS", "index"
+)
+
+# Cambiar si cambia el esquema o la forma de extraer trigramas
+_INDEX_VERSION = 1
+
+_UNSAFE_FILENAME = re.compile(r"[^\w.-]+", re.UNICODE)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS scripts (
+    id      INTEGER PRIMARY KEY,
+    tbl     TEXT NOT NULL,
+    keys    TEXT NOT NULL,
+    label   TEXT NOT NULL,
+    content TEXT NOT NULL,
+    version TEXT NOT NULL,
+    UNIQUE (tbl, keys)
+);
+CREATE TABLE IF NOT EXISTS trigrams (
+    tri       TEXT NOT NULL,
+    script_id INTEGER NOT NULL,
+    PRIMARY KEY (tri, script_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS trigrams_script ON trigrams (script_id);
+"""
+
+
+def trigrams(text: str) -> set:
+    """Trigramas distintos de *text* en minúsculas."""
+    text = text.lower()
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def default_index_path(server: str, database: str) -> str:
+    """Fichero de índice para un servidor y una base de datos."""
+    name = _UNSAFE_FILENAME.sub("_", f"{server}__{database}").strip("_")
+    return os.path.join(_INDEX_DIR, f"{name}.sqlite")
+
+
+class ScriptIndex:
+    """
+    Índice invertido de trigramas de los scripts, persistido en SQLite.
+
+    Args:
+        path: Ruta del fichero SQLite (ver ``default_index_path``).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._check_version()
+
+    @classmethod
+    def for_connection(cls, db) -> "ScriptIndex":
+        """Índice del servidor y base de datos de una DatabaseConnection."""
+        return cls(default_index_path(db.server, db.database))
+
+    def _check_version(self) -> None:
+        """Crea el esquema; si el índice es de otra versión se rehace."""
+        self._conn.executescript(_SCHEMA)
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        if row and row[0] != str(_INDEX_VERSION):
+            logger.info("Índice local obsoleto (v%s), se reconstruye", row[0])
+            self._conn.executescript("DELETE FROM trigrams; DELETE FROM scripts;")
+        self._conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES ('version', ?)",
+            (str(_INDEX_VERSION),),
+        )
+        self._conn.commit()
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    # ------------------------------------------------------------------
+    # Mantenimiento
+    # ------------------------------------------------------------------
+
+    def _put(self, table: str, keys: str, label: str, content: str, version: str) -> None:
+        """Inserta o sustituye un script y sus trigramas (sin commit)."""
+        cur = self._conn.cursor()
+        row = cur.execute("SELECT id FROM scripts WHERE tbl = ? AND keys = ?",
+                          (table, keys)).fetchone()
+        if row:
+            script_id = row[0]
+            cur.execute("UPDATE scripts SET label = ?, content = ?, version = ? WHERE id = ?",
+                        (label, content, version, script_id))
+            cur.execute("DELETE FROM trigrams WHERE script_id = ?", (script_id,))
+        else:
+            cur.execute(
+                "INSERT INTO scripts (tbl, keys, label, content, version) VALUES (?, ?, ?, ?, ?)",
+                (table, keys, label, content, version),
+            )
+            script_id = cur.lastrowid
+        cur.executemany("INSERT INTO trigrams (tri, script_id) VALUES (?, ?)",
+                        ((tri, script_id) for tri in trigrams(content)))
+
+    def _delete(self, table: str, keys_list: List[str]) -> None:
+        cur = self._conn.cursor()
+        for keys in keys_list:
+            row = cur.execute("SELECT id FROM scripts WHERE tbl = ? AND keys = ?",
+                              (table, keys)).fetchone()
+            if row:
+                cur.execute("DELETE FROM trigrams WHERE script_id = ?", (row[0],))
+                cur.execute("DELETE FROM scripts WHERE id = ?", (row[0],))
+
+    def update_script(self, table: str, key_values: List[str], content: str,
+                      version: str = "") -> None:
+        """
+        Actualiza un script tras guardarlo desde el editor.
+
+        Con versión vacía el siguiente ``refresh()`` lo vuelve a comprobar.
+        """
+        key_values = [str(v).strip() for v in key_values]
+        self._put(table, json.dumps(key_values), " / ".join(key_values), content, version)
+        self._conn.commit()
+
+    def _meta(self, key: str) -> Optional[str]:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: str) -> None:
+        self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                           (key, value))
+
+    def refresh(self, db, key_columns: List[str],
+                content_column: Optional[str] = None,
+                min_interval: float = 0.0) -> Tuple[int, int]:
+        """
+        Sincroniza el índice con la tabla actual de *db*.
+
+        Solo viaja por la red la versión de cada fila y el contenido de
+        las filas nuevas o cambiadas; y ni eso si la marca de cambios de
+        la tabla es la del último refresco.
+
+        Args:
+            min_interval: Si el servidor no da marca de cambios, segundos
+                mínimos entre dos comprobaciones de versiones.
+
+        Returns:
+            Tupla (scripts actualizados, scripts eliminados).
+        """
+        t0 = time.perf_counter()
+        table = db.table
+        marker = db.get_table_change_marker()
+        if marker is not None:
+            if marker == self._meta(f"marker:{table}"):
+                logger.debug("Índice local %s: la tabla no cambió", table)
+                return 0, 0
+        else:
+            checked = self._meta(f"checked:{table}")
+            if checked and time.time() - float(checked) < min_interval:
+                return 0, 0
+
+        local = dict(self._conn.execute(
+            "SELECT keys, version FROM scripts WHERE tbl = ?", (table,)))
+
+        changed = []
+        remote = set()
+        for key_values, version in db.get_script_versions(key_columns, content_column):
+            keys = json.dumps(key_values)
+            remote.add(keys)
+            if local.get(keys) != version:
+                changed.append((key_values, version))
+        removed = [keys for keys in local if keys not in remote]
+
+        versions = {json.dumps(kv): version for kv, version in changed}
+        updated = 0
+        try:
+            for row in db.get_scripts_by_keys(key_columns, [kv for kv, _ in changed],
+                                              content_column):
+                keys = json.dumps(row["key_values"])
+                self._put(table, keys, row["label"], row["content"], versions.get(keys, ""))
+                updated += 1
+            self._delete(table, removed)
+            if marker is not None:
+                self._set_meta(f"marker:{table}", marker)
+            self._set_meta(f"checked:{table}", str(time.time()))
+            self._conn.commit()
+        except Exception:
+            self._conn.rollback()
+            raise
+
+        logger.info("Índice local %s: %d actualizados, %d eliminados (%.0f ms)",
+                    table, updated, len(removed), (time.perf_counter() - t0) * 1000)
+        return updated, len(removed)
+
+    # ------------------------------------------------------------------
+    # Búsqueda
+    # ------------------------------------------------------------------
+
+    def search(self, table: str, text: str) -> Iterator[dict]:
+        """
+        Scripts de *table* que contienen *text* (sin distinguir mayúsculas).
+
+        Yields:
+            Dicts {"label", "key_values", "content"} ordenados por clave.
+        """
+        if not text:
+            return
+        needle = text.lower()
+        grams = sorted(trigrams(text))
+        if grams:
+            marks = ", ".join("?" * len(grams))
+            sql = (
+                "SELECT s.keys, s.label, s.content FROM scripts s "
+                "WHERE s.tbl = ? AND s.id IN ("
+                f"  SELECT script_id FROM trigrams WHERE tri IN ({marks})"
+                "   GROUP BY script_id HAVING COUNT(*) = ?"
+                ") ORDER BY s.keys"
+            )
+            params = [table, *grams, len(grams)]
+        else:
+            # Menos de 3 caracteres: recorrido local (sigue sin ir al servidor)
+            sql = "SELECT keys, label, content FROM scripts WHERE tbl = ? ORDER BY keys"
+            params = [table]
+
+        for keys, label, content in self._conn.execute(sql, params):
+            # Los trigramas dan candidatos: confirmar la subcadena completa
+            if needle in content.lower():
+                yield {"label": label, "key_values": json.loads(keys), "content": content}
+
+    def count(self, table: str) -> int:
+        """Número de scripts indexados de *table*."""
+        return self._conn.execute(
+            "SELECT COUNT(*) FROM scripts WHERE tbl = ?", (table,)).fetchone()[0]
@@ -4,6 +4,10 @@ Ventana principal del editor usando Tkinter, integra editor y numeros de linea.
 Incluye confirmación al cerrar si hay cambios sin guardar.
 """
 
+import logging
+import queue
+import re
+import threading
 import tkinter as tk
 from tkinter import messagebox, simpledialog
 
@@ -15,14 +19,32 @@ from config import (
     COLOR_SIDEBAR_BG,
     SEPARADOR_ANCHO,
     FUENTE_EDITOR,
+    INDICE_COMPROBACION_S,
 )
+from db.script_index import ScriptIndex
 from editor.text_editor import TextEditor
 from editor.line_numbers import LineNumbers
 from editor.sidebar import Sidebar
 from editor.search_bar import SearchBar
 from editor.script_selector import ScriptSelector
 from editor.fixed_search_bar import FixedSearchBar
-from editor.vbs_validator import validate_vbs, format_problemas
+from editor.script_search_panel import ScriptSearchPanel
+from editor.bulk_replace import BulkReplaceDialog
+from editor.outline_panel import OutlinePanel
+from editor.record_prefetch import RecordPrefetcher
+from editor.block_nesting import BlockAssist
+from editor.model_index import ModelIndexWorker, ModelSymbolIndex
+from editor.references_panel import ReferencesPanel
+from editor.symbols import SymbolAnalyzer
+from editor.vbs_validator import (IncrementalValidator, debug_report, format_problemas,
+                                  preprocess, problems_for_save)
+from editor.live_validator import LiveValidator
+from editor.validation_cache import open_default_cache
+
+logger = logging.getLogger("EditorVBS.app")
+
+# Intervalo de consulta del refresco del índice local de scripts
+_INDICE_POLL_MS = 100
 
 class EditorApp(tk.Tk):
     """
@@ -35,6 +57,8 @@ class EditorApp(tk.Tk):
         key_columns: Lista de nombres de columnas que son clave primaria
         content_column: Nombre de la columna que contiene el script
         editable_columns: Lista de nombres de columnas editables
+        script_index: Índice local de scripts (ScriptIndex) para la búsqueda
+                      global, o None para buscar directamente en el servidor
     """
     
     def __init__(
@@ -46,7 +70,8 @@ class EditorApp(tk.Tk):
         content_column="SCRIPT",
         editable_columns=None,
         scripts_list=None,
-        context_type=None
+        context_type=None,
+        script_index=None
     ):
         super().__init__()
         self.db = db
@@ -56,6 +81,15 @@ class EditorApp(tk.Tk):
         self.editable_columns = editable_columns or []
         self.scripts_list = scripts_list or []
         self.context_type = context_type  # 'documento' | 'plantilla' | None
+        self.script_index = script_index
+        # Refresco del índice local en curso (hilo con su propia conexión)
+        self._indice_hilo = None
+        self._indice_poll_id = None
+        self._indice_resultado = queue.Queue()
+        # Reutiliza el resultado por línea entre validaciones del mismo script
+        self._validador = IncrementalValidator()
+        # Resultados ya calculados por contenido (persisten entre sesiones)
+        self.validation_cache = open_default_cache()
         
         #Titulo de ventana dinamico con contexto
         ctx_label = ""
@@ -119,6 +153,7 @@ class EditorApp(tk.Tk):
         #3)Frame derecho (barras superiores + área de edición)
         right_frame = tk.Frame(self.main_frame, bg=COLOR_FONDO)
         right_frame.pack(side="left", fill="both", expand=True)
+        self._right_frame = right_frame
 
         # ============================================================
         # BARRAS SUPERIORES (siempre visibles)
@@ -179,7 +214,7 @@ class EditorApp(tk.Tk):
         #7) Scrollbar del editor (se empaqueta primero para que quede a la derecha)
         self._editor_scrollbar = tk.Scrollbar(editor_frame, orient="vertical", command=self.text_editor.yview)
         self._editor_scrollbar.pack(side="right", fill="y")
-        self.text_editor.configure(yscrollcommand=self._editor_scrollbar.set)
+        self.text_editor.configure(yscrollcommand=self._on_editor_scroll)
 
         #8) Números de línea a la izquierda
         self.line_numbers = LineNumbers(editor_frame, self.text_editor)
@@ -188,9 +223,47 @@ class EditorApp(tk.Tk):
         #9) Editor ocupa el resto
         self.text_editor.pack(side="left", fill="both", expand=True)
 
+        #9b) Validación en vivo (hilo aparte, marcas en los números de línea)
+        self.live_validator = LiveValidator(self.text_editor, self.line_numbers,
+                                            on_result=self._update_status,
+                                            cache=self.validation_cache)
+
         #10) Barra de búsqueda/reemplazo flotante (Ctrl+H)
         self.search_bar = SearchBar(self.text_editor, self.text_editor)
 
+        #11) Panel "Buscar en todos los scripts" (Ctrl+Shift+F), se crea al abrirlo
+        self._script_search = None
+        self._search_db = None      # Conexión del panel (se abre y cierra en su hilo)
+        #12) Reemplazo en varios scripts (Ctrl+Shift+H), se crea al abrirlo
+        self._bulk_replace = None
+        #13) Panel de esquema a la derecha (Ctrl+Shift+O), oculto al empezar
+        self.outline_panel = OutlinePanel(self.main_frame, self.text_editor,
+                                          on_jump=self._mostrar_linea)
+        #14) Índice de símbolos de los scripts del modelo (F12 / Shift+F12),
+        #    construido en segundo plano
+        self._symbol_analyzer = SymbolAnalyzer()
+        self.model_index = ModelSymbolIndex()
+        #    Con BD la lista del desplegable viene sin contenido: el índice lo
+        #    pide con su propia conexión (se abre y se cierra en su hilo)
+        self._index_db = None
+        self._model_index_worker = ModelIndexWorker(
+            self, self.model_index,
+            load_contents=self._contenidos_para_indice if self.db else None,
+            on_exit=self._cerrar_conexion_indice,
+            on_error=self._error_indice_modelo,
+        )
+        if self.scripts_list:
+            self._model_index_worker.submit(self.scripts_list)
+        #15) Sangría automática y bloque emparejado: el último en escuchar <Key>
+        #    (corta el Enter para insertar la sangría)
+        self.block_assist = BlockAssist(self.text_editor)
+        #16) Precarga en segundo plano de los registros vecinos del desplegable
+        self.prefetcher = None
+        if self.db and self.key_columns and self.scripts_list:
+            self.prefetcher = RecordPrefetcher(self.db, self.key_columns)
+            self.prefetcher.touch(self._script_actual()[1])
+            self.prefetcher.schedule(self.scripts_list, self.script_selector.get_current_index())
+
         #Eventos para actualizar status
         self.text_editor.bind("<<Change>>",        self._update_status)
         self.text_editor.bind("<KeyRelease>",      self._update_status)
@@ -208,7 +281,13 @@ class EditorApp(tk.Tk):
         self.bind_all("<Control-y>", self._rehacer)
         self.bind_all("<Control-f>", self._abrir_buscar)
         self.bind_all("<Control-h>", self._abrir_reemplazar)
+        self.bind_all("<Control-Shift-F>", self._abrir_buscar_scripts)
+        self.bind_all("<Control-Shift-H>", self._abrir_reemplazo_masivo)
         self.bind_all("<Control-g>", self._ir_a_linea)
+        self.bind_all("<Control-Shift-D>", self._informe_validacion)
+        self.bind_all("<Control-Shift-O>", self._alternar_esquema)
+        self.bind_all("<F12>", self._ir_a_definicion)
+        self.bind_all("<Shift-F12>", self._buscar_referencias)
         self.bind_all("<F3>", self._buscar_siguiente)
         self.bind_all("<Shift-F3>", self._buscar_anterior)
         
@@ -230,8 +309,16 @@ class EditorApp(tk.Tk):
         linea, columna = self.text_editor.index("insert").split(".")
         mod = self.text_editor.edit_modified()
         estado = "Modificado" if mod else "Guardado"
+        problema = ""
+        if hasattr(self, "block_assist"):
+            self.block_assist.refresh_match()
+        if hasattr(self, "live_validator"):
+            en_linea = self.live_validator.problem_at(int(linea))
+            if en_linea:
+                nivel, mensaje = en_linea
+                problema = f" | {'✗' if nivel == 'error' else '⚠'} {mensaje}"
         self.status_var.set(
-            f"{self._get_origen_label()} | Línea: {linea}  Col: {int(columna)+1} | {estado}"
+            f"{self._get_origen_label()} | Línea: {linea}  Col: {int(columna)+1} | {estado}{problema}"
         )
 
     def _validar_script(self) -> bool:
@@ -242,7 +329,14 @@ class EditorApp(tk.Tk):
             True si se puede continuar con el guardado, False si se cancela.
         """
         contenido = self.text_editor.get("1.0", "end-1c")
-        problemas = validate_vbs(contenido)
+        cache = self.validation_cache
+        problemas = cache.get(contenido) if cache is not None else None
+        if problemas is None:
+            problemas = self._validador.validate(contenido)
+            if cache is not None:
+                cache.put(contenido, problemas)
+        #Los avisos de símbolos (sin usar, no declarados) solo se muestran en vivo
+        problemas = problems_for_save(contenido, problemas)
         
         if not problemas:
             return True
@@ -340,6 +434,8 @@ class EditorApp(tk.Tk):
                         f"Compruebe que exista el registro con {key_display}."
                     )
                 else:
+                    if self.script_index:
+                        self.script_index.update_script(self.db.table, key_values, contenido)
                     self.text_editor.edit_modified(False)
                     self.status_var.set("✓ Los cambios han sido guardados")
                     self.after(1500, self._update_status)
@@ -362,25 +458,34 @@ class EditorApp(tk.Tk):
         Callback cuando se selecciona un script del selector (Combobox).
         Carga el registro completo desde BD (contenido + variables + sidebar).
         Si hay cambios sin guardar, pregunta antes de cambiar.
+
+        Returns:
+            True si se ha cargado el script.
         """
         if getattr(self, '_initializing', False):
-            return
+            return False
         if self.text_editor._user_modified:
             resp = messagebox.askyesnocancel(
                 "Cambios sin guardar",
                 "Existen cambios sin guardar.\n¿Desea guardarlos antes de cambiar de script?"
             )
             if resp is None:
-                return
+                return False
             elif resp:
                 self._guardar()
         
         #Si hay BD y key_values en el script, recargar registro completo
         new_key_values = script_data.get("key_values")
+        precargado = None
         if self.db and new_key_values and self.key_columns:
             try:
-                #Cargar registro completo desde BD
-                new_record = self.db.get_record_full(self.key_columns, new_key_values)
+                #Cargar registro completo: precargado (se revalida tras mostrarlo) o desde BD
+                if self.prefetcher:
+                    precargado = self.prefetcher.get(new_key_values)
+                if precargado is not None:
+                    new_record = precargado[0]
+                else:
+                    new_record = self.db.get_record_full(self.key_columns, new_key_values)
                 self.record = new_record
 
                 #Actualizar contenido del editor (búsqueda case-insensitive)
@@ -393,7 +498,8 @@ class EditorApp(tk.Tk):
                 self.text_editor.edit_reset()
 
                 #Posicionar desplegable en el script seleccionado
-                self.script_selector.combo.current(index)
+                if index >= 0:
+                    self.script_selector.combo.current(index)
 
                 #Reconstruir sidebar con los nuevos datos
                 self.sidebar.destroy()
@@ -417,17 +523,50 @@ class EditorApp(tk.Tk):
 
             except Exception as e:
                 messagebox.showerror("Error al cargar el script", f"No se ha podido cargar el script:\n{e}")
-                return
+                return False
         else:
             #Modo local o sin key_values: solo cambiar contenido
             content = script_data.get("content", "")
             self.text_editor.set_content(content)
             self.text_editor.edit_reset()
+            if index >= 0:
+                self.script_selector.combo.current(index)
             
         self.text_editor.edit_reset()
         self.text_editor.edit_modified(False)
         self.text_editor._user_modified = False
         self._update_status()
+        if self.prefetcher and new_key_values:
+            self.prefetcher.touch(new_key_values)
+            self.prefetcher.schedule(self.scripts_list, self.script_selector.get_current_index())
+            if precargado is not None:
+                # Antes de que se empiece a editar: ¿sigue igual en la BD?
+                self.after_idle(self._revalidar_registro, new_key_values, precargado[1])
+        return True
+
+    def _revalidar_registro(self, key_values, version):
+        """Comprueba que el registro precargado que se muestra no ha cambiado en la BD."""
+        if [v.upper() for v in self._script_actual()[1]] != \
+                [str(v).strip().upper() for v in key_values]:
+            return
+        try:
+            actual = self.db.get_record_version(self.key_columns, key_values)
+        except Exception as e:
+            logger.warning("No se pudo comprobar la versión del registro: %s", e)
+            return
+        if actual == version:
+            return
+        self.db.forget_record(key_values)
+        logger.info("Registro precargado desactualizado, se vuelve a cargar: %s", key_values)
+        if self.text_editor._user_modified:
+            messagebox.showwarning(
+                "Script modificado",
+                "El script ha cambiado en la base de datos desde que se precargó.\n"
+                "Si guarda, sobrescribirá esos cambios."
+            )
+            return
+        self._on_script_selected(self.script_selector.get_current_index(),
+                                 {"key_values": key_values})
 
     def _on_cerrar(self):
         """
@@ -449,6 +588,16 @@ class EditorApp(tk.Tk):
                     return
         
         #Cerrar ventana
+        self.live_validator.close()
+        self._model_index_worker.close()
+        if self._script_search is not None and self._script_search.winfo_exists():
+            self._script_search.close()
+        if self._indice_poll_id is not None:
+            self.after_cancel(self._indice_poll_id)
+        if self.prefetcher:
+            self.prefetcher.close()
+        if self.validation_cache is not None:
+            self.validation_cache.close()
         self.destroy()
 
     def _seleccionar_todo(self, event=None):
@@ -476,6 +625,15 @@ class EditorApp(tk.Tk):
     # Búsqueda / Reemplazo / Ir a línea
     # ------------------------------------------------------------------
 
+    def _on_editor_scroll(self, first, last):
+        """Scroll del editor: mueve la scrollbar y re-etiqueta las búsquedas visibles."""
+        self._editor_scrollbar.set(first, last)
+        if hasattr(self, "search_bar"):
+            self.search_bar.refresh_viewport()
+        self.fixed_search.refresh_viewport()
+        if hasattr(self, "live_validator"):
+            self.live_validator.refresh_viewport()
+
     def _abrir_buscar(self, event=None):
         """Foco a la barra de búsqueda fija (Ctrl+F)."""
         self.fixed_search.entry.focus_set()
@@ -499,6 +657,223 @@ class EditorApp(tk.Tk):
             self.search_bar.find_prev()
         return "break"
 
+    def _abrir_buscar_scripts(self, event=None):
+        """Abre el panel de búsqueda en todos los scripts (Ctrl+Shift+F)."""
+        self._refrescar_indice()
+        if self._script_search is None or not self._script_search.winfo_exists():
+            self._script_search = ScriptSearchPanel(
+                self, self._buscar_en_scripts, self._abrir_resultado_scripts,
+                on_exit=self._cerrar_conexion_busqueda,
+            )
+        else:
+            self._script_search.deiconify()
+            self._script_search.lift()
+        self._script_search.entry.focus_set()
+        self._script_search.entry.select_range(0, "end")
+        return "break"
+
+    def _refrescar_indice(self):
+        """
+        Trae al índice local solo los scripts nuevos o cambiados en el
+        servidor, en un hilo con su propia conexión y su propia apertura
+        del fichero del índice (una conexión SQLite no cambia de hilo).
+        """
+        if not (self.script_index and self.db and self.key_columns):
+            return
+        if self._indice_hilo is not None:
+            return                      # Ya se está actualizando
+        self.status_var.set("Actualizando índice local de scripts…")
+        self._indice_hilo = threading.Thread(
+            target=self._refrescar_indice_hilo,
+            args=(self.db.clone(), self.script_index.path, list(self.key_columns),
+                  self.content_column),
+            name="ScriptIndex", daemon=True,
+        )
+        self._indice_hilo.start()
+        self._indice_poll_id = self.after(_INDICE_POLL_MS, self._esperar_indice)
+
+    def _refrescar_indice_hilo(self, db, path, key_columns, content_column):
+        """Refresco del índice local (en su hilo)."""
+        index = None
+        try:
+            db.connect()
+            index = ScriptIndex(path)
+            index.refresh(db, key_columns, content_column, INDICE_COMPROBACION_S)
+            self._indice_resultado.put(None)
+        except Exception as e:
+            self._indice_resultado.put(e)
+        finally:
+            if index is not None:
+                index.close()
+            db.close()
+
+    def _esperar_indice(self):
+        """Recoge el final del refresco del índice local."""
+        try:
+            error = self._indice_resultado.get_nowait()
+        except queue.Empty:
+            self._indice_poll_id = self.after(_INDICE_POLL_MS, self._esperar_indice)
+            return
+        self._indice_poll_id = None
+        self._indice_hilo = None
+        if error is not None:
+            # Sin índice se busca directamente en el servidor
+            logger.warning("No se pudo actualizar el índice local: %s", error)
+            self.script_index = None
+        self._update_status()
+
+    def _buscar_en_scripts(self, query):
+        """
+        Scripts que contienen *query*: índice local, BD (filtrado en
+        servidor) o lista local.  Se llama en el hilo del panel de
+        búsqueda, así que usa su propia conexión y su propio acceso al índice.
+        """
+        table = self.db.table if self.db else None
+        if self.script_index and self.db:
+            index = ScriptIndex(self.script_index.path)
+            # Mientras se llena por primera vez, el índice aún no sirve
+            if index.count(table):
+                return self._buscar_en_indice(index, table, query)
+            index.close()
+        if self.db and self.key_columns:
+            if self._search_db is None:
+                search_db = self.db.clone()
+                search_db.connect()
+                self._search_db = search_db
+            self._search_db.table = table
+            return self._search_db.search_scripts(query, self.key_columns, self.content_column)
+        return (
+            {
+                "label": script.get("label", ""),
+                "key_values": script.get("key_values") or [script.get("label", "")],
+                "content": script.get("content", ""),
+            }
+            for script in self.scripts_list
+            if query.lower() in script.get("content", "").lower()
+        )
+
+    @staticmethod
+    def _buscar_en_indice(index, table, query):
+        """Resultados de *index*, que se cierra al acabar (o al cerrar el generador)."""
+        try:
+            yield from index.search(table, query)
+        finally:
+            index.close()
+
+    def _cerrar_conexion_busqueda(self):
+        """Cierra la conexión del panel de búsqueda (en su hilo, al cerrarlo)."""
+        if self._search_db is not None:
+            self._search_db.close()
+            self._search_db = None
+
+    def _abrir_resultado_scripts(self, key_values, linea):
+        """Abre el script con esas claves (del panel de búsqueda) en la línea indicada."""
+        target = [str(v).strip().upper() for v in key_values]
+        index = -1
+        script_data = {"key_values": key_values}
+        for i, script in enumerate(self.scripts_list):
+            kv = script.get("key_values") or [script.get("label", "")]
+            if [str(v).strip().upper() for v in kv] == target:
+                index, script_data = i, script
+                break
+        if self.db and self.key_columns:
+            current = [str(self.record.get(k, "")).strip().upper() for k in self.key_columns]
+            ya_abierto = current == target
+        else:
+            ya_abierto = index >= 0 and index == self.script_selector.get_current_index()
+        if not ya_abierto and not self._on_script_selected(index, script_data):
+            return
+        self._mostrar_linea(linea)
+
+    def _abrir_reemplazo_masivo(self, event=None):
+        """Abre el reemplazo en varios scripts con vista previa (Ctrl+Shift+H)."""
+        if self._bulk_replace is not None and self._bulk_replace.winfo_exists():
+            self._bulk_replace.deiconify()
+            self._bulk_replace.lift()
+            return "break"
+        scope_label = None
+        if self.db and len(self.key_columns) >= 2 and self.record:
+            scope_label = f"Solo {self.key_columns[0]} {self.record.get(self.key_columns[0], '')}"
+        self._bulk_replace = BulkReplaceDialog(
+            self, self._scripts_para_reemplazo, self._aplicar_reemplazo_masivo, scope_label
+        )
+        return "break"
+
+    def _scripts_para_reemplazo(self, query, regex, solo_ambito):
+        """Scripts candidatos, con el contenido actual (del servidor si hay BD)."""
+        texto = "" if regex else query
+        if self.db and self.key_columns:
+            filtros = None
+            if solo_ambito and len(self.key_columns) >= 2:
+                primera = self.key_columns[0]
+                filtros = {primera: str(self.record.get(primera, "")).strip()}
+            return self.db.search_scripts(texto, self.key_columns, self.content_column,
+                                          filters=filtros)
+        return (
+            {
+                "label": script.get("label", ""),
+                "key_values": script.get("key_values") or [script.get("label", "")],
+                "content": script.get("content", ""),
+            }
+            for script in self.scripts_list
+            if texto.lower() in script.get("content", "").lower()
+        )
+
+    def _aplicar_reemplazo_masivo(self, resultados):
+        """
+        Guarda los scripts de la vista previa (todo o nada) y refresca el
+        script abierto si es uno de ellos.
+
+        Returns:
+            Número de scripts guardados.
+        """
+        cambios = [(r["key_values"], r["new"]) for r in resultados]
+        if self.db and self.key_columns:
+            # Con el contenido de la vista previa: falla si otro lo cambió después
+            guardados = self.db.bulk_update_content(
+                self.key_columns, [(r["key_values"], r["new"], r["old"]) for r in resultados],
+                self.content_column)
+            if self.script_index:
+                for key_values, contenido in cambios:
+                    self.script_index.update_script(self.db.table, key_values, contenido)
+            actual = [str(self.record.get(k, "")).strip().upper() for k in self.key_columns]
+        else:
+            nuevos = {tuple(str(v).upper() for v in kv): c for kv, c in cambios}
+            for script in self.scripts_list:
+                kv = script.get("key_values") or [script.get("label", "")]
+                clave = tuple(str(v).upper() for v in kv)
+                if clave in nuevos:
+                    script["content"] = nuevos[clave]
+            guardados = len(cambios)
+            actual = None
+            idx = self.script_selector.get_current_index()
+            if 0 <= idx < len(self.scripts_list):
+                script = self.scripts_list[idx]
+                actual = [str(v).strip().upper()
+                          for v in (script.get("key_values") or [script.get("label", "")])]
+
+        for key_values, contenido in cambios:
+            if [str(v).strip().upper() for v in key_values] != actual:
+                continue
+            if self.text_editor._user_modified:
+                messagebox.showwarning(
+                    "Reemplazar en varios scripts",
+                    "El script abierto también se ha modificado en la BD, pero tiene "
+                    "cambios sin guardar en el editor.\nSi los guarda, sobrescribirá "
+                    "el reemplazo.",
+                )
+            else:
+                for k in self.record:
+                    if k.upper() == self.content_column.upper():
+                        self.record[k] = contenido
+                self.text_editor.set_content(contenido)
+                self.text_editor.edit_reset()
+                self.text_editor.edit_modified(False)
+                self.text_editor._user_modified = False
+                self._update_status()
+            break
+        return guardados
+
     def _ir_a_linea(self, event=None):
         """Diálogo 'Ir a línea' (Ctrl+G)."""
         total = int(self.text_editor.index("end-1c").split(".")[0])
@@ -510,7 +885,145 @@ class EditorApp(tk.Tk):
             maxvalue=total,
         )
         if linea is not None:
-            self.text_editor.mark_set("insert", f"{linea}.0")
-            self.text_editor.see(f"{linea}.0")
-            self.text_editor.focus_set()
+            self._mostrar_linea(linea)
+        return "break"
+
+    def _mostrar_linea(self, linea: int, columna: int = 0):
+        """Lleva el cursor a la línea *linea* (y columna) y la hace visible."""
+        self.text_editor.mark_set("insert", f"{linea}.{columna}")
+        self.text_editor.see(f"{linea}.{columna}")
+        self.text_editor.focus_set()
+        self._update_status()
+
+    # ------------------------------------------------------------------
+    # Ir a la definición / buscar referencias en los scripts del modelo
+    # ------------------------------------------------------------------
+
+    def _nombre_en_cursor(self) -> str:
+        """Identificador bajo el cursor (o justo antes), o ""."""
+        for index in ("insert", "insert-1c"):
+            palabra = self.text_editor.get(f"{index} wordstart", f"{index} wordend")
+            if re.match(r"^[A-Za-z]\w*$", palabra):
+                return palabra
+        return ""
+
+    def _script_actual(self):
+        """(label, key_values) del script abierto."""
+        if self.db and self.key_columns and self.record:
+            key_values = [str(self.record.get(k, "")).strip() for k in self.key_columns]
+            return key_values[-1], key_values
+        script = self.script_selector.get_current_script() or {}
+        label = script.get("label", "")
+        return label, script.get("key_values") or [label]
+
+    def _contenidos_para_indice(self, keys_list):
+        """Contenido de scripts para el índice del modelo (en el hilo del índice)."""
+        if self._index_db is None:
+            index_db = self.db.clone()
+            index_db.connect()
+            self._index_db = index_db
+        return self._index_db.get_script_contents(self.key_columns, keys_list,
+                                                  self.content_column)
+
+    def _cerrar_conexion_indice(self):
+        """Cierra la conexión del índice del modelo (en el hilo del índice, al terminar)."""
+        if self._index_db is not None:
+            self._index_db.close()
+            self._index_db = None
+
+    def _sincronizar_indice(self):
+        """Indexa el script abierto tal como está en el editor (sin guardar)."""
+        label, key_values = self._script_actual()
+        self.model_index.update_script(key_values, self.text_editor.get("1.0", "end-1c"),
+                                       label=label)
+
+    def _abrir_ubicacion(self, loc):
+        """Abre el script de *loc* (si no es el abierto) y va a su posición."""
+        _, actual = self._script_actual()
+        if [str(v).strip().upper() for v in actual] == [v.upper() for v in loc.key_values]:
+            self._mostrar_linea(loc.line, loc.col)
+        else:
+            self._abrir_resultado_scripts(list(loc.key_values), loc.line)
+
+    def _error_indice_modelo(self, mensaje: str):
+        """Avisa en la barra de estado de que el índice del modelo ha fallado."""
+        self._aviso_estado(f"No se pudo construir el índice de scripts del modelo: {mensaje}")
+
+    def _aviso_estado(self, mensaje: str):
+        self.status_var.set(mensaje)
+        self.after(3000, self._update_status)
+
+    def _ir_a_definicion(self, event=None):
+        """Va a la definición del nombre bajo el cursor (F12)."""
+        nombre = self._nombre_en_cursor()
+        if not nombre:
+            return "break"
+        # Primero el ámbito actual: variables locales y miembros de la clase
+        texto = self.text_editor.get("1.0", "end-1c")
+        tabla = self._symbol_analyzer.analyze(preprocess(texto))
+        linea = int(self.text_editor.index("insert").split(".")[0])
+        ambito = tabla.scope_at(linea)
+        simbolo = tabla.lookup(nombre, ambito) if ambito else None
+        if simbolo is not None and simbolo.scope:
+            self._mostrar_linea(simbolo.line)
+            return "break"
+
+        self._sincronizar_indice()
+        definiciones = self.model_index.definitions(nombre)
+        if len(definiciones) == 1:
+            self._abrir_ubicacion(definiciones[0])
+        elif definiciones:
+            ReferencesPanel(self, f"Definiciones de '{nombre}'", definiciones,
+                            on_open=self._abrir_ubicacion)
+        else:
+            if self._model_index_worker.error:
+                pendiente = " (no se pudo construir el índice de scripts del modelo)"
+            elif self.model_index.ready or not self.scripts_list:
+                pendiente = ""
+            else:
+                pendiente = " (el índice de scripts del modelo aún se está construyendo)"
+            self._aviso_estado(f"No se encuentra la definición de '{nombre}'{pendiente}")
+        return "break"
+
+    def _buscar_referencias(self, event=None):
+        """Lista dónde se usa el nombre bajo el cursor en los scripts del modelo (Shift+F12)."""
+        nombre = self._nombre_en_cursor()
+        if not nombre:
+            return "break"
+        self._sincronizar_indice()
+        referencias = self.model_index.references(nombre)
+        if not referencias:
+            self._aviso_estado(f"No hay referencias a '{nombre}'")
+        else:
+            ReferencesPanel(self, f"Referencias de '{nombre}'", referencias,
+                            on_open=self._abrir_ubicacion)
+        return "break"
+
+    def _alternar_esquema(self, event=None):
+        """Muestra u oculta el panel de esquema (Ctrl+Shift+O)."""
+        if self.outline_panel.winfo_ismapped():
+            self.outline_panel.pack_forget()
+        else:
+            self.outline_panel.pack(side="right", fill="y", before=self._right_frame)
+            self.outline_panel.refresh()
+        return "break"
+
+    def _informe_validacion(self, event=None):
+        """Muestra el tiempo de cada regla de validación (diagnóstico)."""
+        informe = debug_report()
+        if self.validation_cache is not None:
+            stats = self.validation_cache.stats()
+            informe += (f"\n\nCaché de validación: {stats['entradas']} entradas, "
+                        f"{stats['aciertos']} aciertos, {stats['fallos']} fallos "
+                        f"({stats['tasa_aciertos']:.0%})")
+        logger.info("Informe de validación:\n%s", informe)
+
+        ventana = tk.Toplevel(self)
+        ventana.title("Informe de reglas de validación")
+        ventana.transient(self)
+        texto = tk.Text(ventana, font=FUENTE_EDITOR, width=82, height=12, wrap="none")
+        texto.insert("1.0", informe)
+        texto.configure(state="disabled")
+        texto.pack(fill="both", expand=True, padx=8, pady=8)
+        ventana.bind("<Escape>", lambda e: ventana.destroy())
         return "break"
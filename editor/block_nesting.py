@@ -0,0 +1,414 @@
+# -*- coding: utf-8 -*-
+"""
+Sangría automática y resaltado del bloque emparejado.
+
+``NestingIndex`` guarda por línea si abre o cierra un bloque (los de
+``BLOCK_PAIRS`` del validador), la profundidad de anidamiento antes de
+ella, la apertura que la contiene y su pareja (estas dos como distancia
+en líneas, para que no cambien al insertar o borrar líneas antes).  Tras
+una edición solo se clasifican las líneas cambiadas y el resto se
+recalcula desde la primera de ellas hasta la siguiente línea de nivel
+superior (profundidad 0) que ya estaba: editar una línea cuesta lo que
+mide su Sub o Function, no el script entero.
+
+``BlockAssist`` usa ese estado en el editor:
+
+  - Solo se vuelven a leer del widget las líneas tocadas por las teclas
+    desde la última sincronización (Enter, solo la del cursor); pegar,
+    deshacer o sustituir el texto sincronizan comparando el texto entero.
+  - Enter copia la sangría de la línea y añade un nivel tras una línea
+    que abre un bloque (``Sub``, ``If ... Then``, ``For``...).  Un cierre
+    (``End If``) o un ``Else`` se alinean antes con su apertura.
+  - Con el cursor en una línea que abre o cierra un bloque se resaltan
+    ella y su pareja (``Sub`` / ``End Sub``, ``If`` / ``End If``...) con
+    un único tag que se mueve de sitio.
+"""
+
+import re
+from typing import Callable, List, Optional, Tuple
+
+from config import BLOQUES_DEBOUNCE_MS, COLOR_BLOQUE_PAR, SANGRIA
+from editor.syntax.vb_tokens import lex_lines
+from editor.vbs_validator import preprocess_line
+
+TAG_MATCH = "block_match"
+
+# "Public Sub", "Private Function"...: BLOCK_PAIRS solo reconoce "Sub"
+_MODIFIERS_RE = re.compile(
+    r"^\s*(?:Public(?:\s+Default)?|Private)\s+(?=(?:Sub|Function|Property)\b)",
+    re.IGNORECASE,
+)
+# Líneas intermedias de un bloque: se alinean con su apertura
+_MIDDLE_RE = re.compile(r"^\s*(?:Else|ElseIf\b.*\bThen)\s*$", re.IGNORECASE)
+# Líneas tras las que se sangra aunque no abran bloque
+_INDENT_AFTER_RE = re.compile(r"^\s*(?:Else|ElseIf\b.*\bThen|Case)\b", re.IGNORECASE)
+_LEADING_WS_RE = re.compile(r"^[ \t]*")
+
+Block = Optional[Tuple[str, int]]
+
+
+def _classify(lines: List[str]) -> List[Tuple[Block, str]]:
+    """(bloque, código sin comentario) de cada línea."""
+    result = []
+    for line, tokens in zip(lines, lex_lines(lines)):
+        info = preprocess_line(line, tokens)
+        block = info.block
+        if block is None and _MODIFIERS_RE.match(info.code):
+            block = preprocess_line(_MODIFIERS_RE.sub("", info.code)).block
+        result.append((block, info.code))
+    return result
+
+
+class NestingIndex:
+    """
+    Bloques y profundidad de anidamiento por línea (líneas 1-based).
+
+    ``update(text)`` compara con el texto anterior y ``replace_lines``
+    recibe directamente las líneas cambiadas; las dos reutilizan todo lo
+    de las líneas sin cambios (ver el docstring del módulo).
+    """
+
+    def __init__(self):
+        self._lines: List[str] = []
+        self._blocks: List[Block] = []
+        self._codes: List[str] = []
+        # Profundidad antes de cada línea (0-based) y al final del texto
+        self._depth: List[int] = [0]
+        # Distancia hacia atrás a la apertura que contiene la línea, y a
+        # la pareja de una apertura o cierre (0: ninguna)
+        self._opener: List[int] = []
+        self._partner: List[int] = []
+
+    def update(self, text: str) -> None:
+        lines = text.split("\n")
+        old_lines = self._lines
+        n, old_n = len(lines), len(old_lines)
+
+        limit = min(n, old_n)
+        first = 0
+        while first < limit and lines[first] == old_lines[first]:
+            first += 1
+        suffix = 0
+        while (suffix < limit - first
+               and lines[n - 1 - suffix] == old_lines[old_n - 1 - suffix]):
+            suffix += 1
+        if first == n == old_n:
+            return
+        self.replace_lines(first, old_n - suffix - first, lines[first:n - suffix])
+
+    def replace_lines(self, first: int, count: int, new_lines: List[str]) -> None:
+        """Sustituye *count* líneas desde la *first* (0-based) por *new_lines*."""
+        old_n = len(self._lines)
+        # Bloques abiertos antes de 'first' (las líneas anteriores no cambian)
+        stack = []
+        j = self._open_before(first)
+        while j is not None:
+            stack.append(j)
+            self._partner[j] = 0        # Su cierre se vuelve a buscar
+            j = self._open_before(j)
+        stack.reverse()
+
+        changed = _classify(new_lines)
+        end_old = first + count
+        self._lines[first:end_old] = new_lines
+        self._blocks[first:end_old] = [b for b, _ in changed]
+        self._codes[first:end_old] = [c for _, c in changed]
+        n = len(self._lines)
+        delta = n - old_n
+        end = first + len(new_lines)
+
+        old_depth = self._depth
+        blocks = self._blocks
+        depth: List[int] = []
+        opener: List[int] = []
+        partner: List[int] = []
+        stop = old_n + 1
+        for i in range(first, n):
+            if i >= end and not stack and old_depth[i - delta] == 0:
+                # Nivel superior en líneas sin cambios: el resto no cambia
+                # (las distancias no salen de un bloque de nivel superior)
+                stop = i - delta
+                break
+            depth.append(len(stack))
+            opener.append(i - stack[-1] if stack else 0)
+            partner.append(0)
+            block = blocks[i]
+            if block is None:
+                continue
+            if block[0] == "o":
+                stack.append(i)
+            elif stack:
+                j = stack.pop()
+                if blocks[j][1] == block[1]:
+                    partner[i - first] = j - i
+                    if j >= first:
+                        partner[j - first] = i - j
+                    else:
+                        self._partner[j] = i - j
+        else:
+            depth.append(len(stack))
+        self._depth[first:stop] = depth
+        self._opener[first:stop] = opener
+        self._partner[first:stop] = partner
+
+    def _open_before(self, i: int) -> Optional[int]:
+        """Apertura más interior aún abierta antes de la línea *i* (0-based)."""
+        if i <= 0 or i > len(self._opener):
+            return None
+        prev = i - 1
+        block = self._blocks[prev]
+        if block is not None and block[0] == "o":
+            return prev
+        enclosing = prev - self._opener[prev] if self._opener[prev] else None
+        if block is not None and enclosing is not None:
+            # Un cierre cierra la apertura que lo contiene
+            return enclosing - self._opener[enclosing] if self._opener[enclosing] else None
+        return enclosing
+
+    def __len__(self) -> int:
+        return len(self._lines)
+
+    def block(self, line: int) -> Block:
+        """("o" | "c", índice en BLOCK_PAIRS) si la línea abre o cierra un bloque."""
+        return self._blocks[line - 1] if 0 < line <= len(self._blocks) else None
+
+    def depth(self, line: int) -> int:
+        """Bloques abiertos antes de la línea *line*."""
+        return self._depth[line - 1] if 0 < line <= len(self._lines) else 0
+
+    def code(self, line: int) -> str:
+        return self._codes[line - 1] if 0 < line <= len(self._codes) else ""
+
+    def enclosing(self, line: int) -> Optional[int]:
+        """Línea que abre el bloque más interior que contiene a *line*."""
+        if not 0 < line <= len(self._opener) or not self._opener[line - 1]:
+            return None
+        return line - self._opener[line - 1]
+
+    def partner(self, line: int) -> Optional[int]:
+        """
+        Línea que empareja con la apertura o cierre de *line*, o None si
+        no lo es, no tiene pareja o la pareja es de otro tipo (``End If``
+        cerrando un ``For``).
+        """
+        if not 0 < line <= len(self._partner) or not self._partner[line - 1]:
+            return None
+        return line + self._partner[line - 1]
+
+
+def leading_ws(text: str) -> str:
+    return _LEADING_WS_RE.match(text).group()
+
+
+def newline_indent(index: NestingIndex, line: int,
+                   line_text: Callable[[int], str]) -> Tuple[Optional[str], str]:
+    """
+    Sangría al pulsar Enter al final de la línea *line*.
+
+    Args:
+        index: Índice actualizado con el texto.
+        line: Línea del cursor.
+        line_text: Función (línea) → texto de esa línea.
+
+    Returns:
+        (nueva sangría de la línea actual o None si no cambia,
+         sangría de la línea nueva).
+    """
+    current = leading_ws(line_text(line))
+    block = index.block(line)
+    code = index.code(line)
+
+    align_to = None
+    if block is not None and block[0] == "c":
+        align_to = index.partner(line)
+    elif _MIDDLE_RE.match(code):
+        align_to = index.enclosing(line)
+    fixed = None
+    if align_to is not None:
+        target = leading_ws(line_text(align_to))
+        if target != current:
+            fixed = current = target
+
+    opens = block is not None and block[0] == "o"
+    if opens or _INDENT_AFTER_RE.match(code):
+        return fixed, current + SANGRIA
+    return fixed, current
+
+
+class BlockAssist:
+    """
+    Sangría automática y resaltado de bloques en un TextEditor.
+
+    Debe crearse después de los demás que escuchan ``<Key>`` en el
+    editor (LiveValidator, OutlinePanel): en Enter corta el evento para
+    insertar el salto de línea con su sangría.
+    """
+
+    def __init__(self, text_widget):
+        self.text_widget = text_widget
+        self.index = NestingIndex()
+        # Pendiente de sincronizar: todo el texto, o un rango de líneas
+        # (1-based, en la numeración del índice) tocado por las teclas
+        self._full = True
+        self._pending: Optional[Tuple[int, int]] = None
+        self._after_id = None
+        self._marked: Tuple[int, ...] = ()
+
+        text_widget.tag_configure(TAG_MATCH, background=COLOR_BLOQUE_PAR)
+        text_widget.bind("<Key>", self._on_key, add=True)
+        for sequence in ("<<Paste>>", "<<PasteSelection>>", "<<Cut>>", "<<Undo>>",
+                         "<<Redo>>", "<<ContentReplaced>>"):
+            text_widget.bind(sequence, self._on_edit, add=True)
+
+    # ------------------------------------------------------------------
+    # Sincronización del índice
+    # ------------------------------------------------------------------
+
+    @property
+    def _dirty(self) -> bool:
+        return self._full or self._pending is not None
+
+    def _line_count(self) -> int:
+        return int(self.text_widget.index("end-1c").split(".")[0])
+
+    def _mark(self, first: int, last: int):
+        """
+        Apunta que se van a editar las líneas *first*..*last* del widget
+        (antes de la edición).  Se pasan a la numeración del índice: las
+        de después del rango pendiente se movieron con sus ediciones.
+        """
+        if self._full:
+            return
+        count = len(self.index)
+        first, last = max(first, 1), max(last, 1)
+        if self._pending is None:
+            self._pending = (min(first, count), min(last, count))
+            return
+        start, end = self._pending
+        delta = self._line_count() - count
+
+        def to_index(line):
+            if line < start:
+                return line
+            if line > end + delta:
+                return line - delta
+            return None                 # Dentro del rango pendiente
+
+        first, last = to_index(first), to_index(last)
+        self._pending = (min(start, first if first is not None else start),
+                         min(max(end, last if last is not None else end), count))
+
+    def _on_edit(self, event=None):
+        """Edición sin rango conocido (pegar, deshacer...): se compara todo."""
+        self._full = True
+        self._schedule()
+
+    def _schedule(self):
+        """El texto cambió: el resaltado actual ya no vale."""
+        self._move_tag(())
+        if self._after_id is not None:
+            self.text_widget.after_cancel(self._after_id)
+        self._after_id = self.text_widget.after(BLOQUES_DEBOUNCE_MS, self._after_edit)
+
+    def _after_edit(self):
+        self._after_id = None
+        self._sync()
+        self.refresh_match()
+
+    def _sync(self):
+        text = self.text_widget
+        if self._pending is not None and not self._full:
+            start, end = self._pending
+            new_end = end + self._line_count() - len(self.index)
+            if new_end >= start:
+                self.index.replace_lines(start - 1, end - start + 1,
+                                         text.get(f"{start}.0", f"{new_end}.end").split("\n"))
+            else:
+                self._full = True
+        if self._full:
+            self.index.update(text.get("1.0", "end-1c"))
+        self._full = False
+        self._pending = None
+
+    def _on_key(self, event):
+        if event.keysym in ("Return", "KP_Enter"):
+            return self._on_return()
+        if event.char or event.keysym in ("BackSpace", "Delete"):
+            # Se llama antes de que Tk aplique la tecla.  La línea de antes y
+            # la de después cubren las uniones (BackSpace al principio,
+            # Supr o Ctrl+K al final)
+            text = self.text_widget
+            if text.tag_ranges("sel"):
+                self._mark(int(text.index("sel.first").split(".")[0]),
+                           int(text.index("sel.last").split(".")[0]))
+            line = int(text.index("insert").split(".")[0])
+            self._mark(line - 1, line + 1)
+            self._schedule()
+        return None
+
+    # ------------------------------------------------------------------
+    # Sangría automática
+    # ------------------------------------------------------------------
+
+    def _on_return(self):
+        text = self.text_widget
+        if text.tag_ranges("sel"):
+            self._mark(int(text.index("sel.first").split(".")[0]),
+                       int(text.index("sel.last").split(".")[0]))
+            text.delete("sel.first", "sel.last")
+        self._sync()
+        line = int(text.index("insert").split(".")[0])
+        # Lo que sigue solo toca la línea del cursor (y añade la nueva)
+        self._mark(line, line)
+        head = text.get("insert linestart", "insert")
+        if head.strip():
+            fixed, indent = newline_indent(self.index, line,
+                                           lambda n: text.get(f"{n}.0", f"{n}.end"))
+        else:
+            # Enter al principio de la línea: la línea baja tal cual
+            fixed, indent = None, head
+        if fixed is not None:
+            # Solo si el cursor está detrás de la sangría (no la parte en dos)
+            current = leading_ws(text.get(f"{line}.0", f"{line}.end"))
+            col = int(text.index("insert").split(".")[1])
+            if col >= len(current):
+                text.delete(f"{line}.0", f"{line}.{len(current)}")
+                text.insert(f"{line}.0", fixed)
+        # El texto tras el cursor pasa a la línea nueva sin su sangría
+        rest = text.get("insert", "insert lineend")
+        strip = len(rest) - len(rest.lstrip(" \t"))
+        if strip:
+            text.delete("insert", f"insert+{strip}c")
+        text.insert("insert", "\n" + indent)
+        text.see("insert")
+        self._schedule()
+        return "break"
+
+    # ------------------------------------------------------------------
+    # Resaltado del bloque emparejado
+    # ------------------------------------------------------------------
+
+    def refresh_match(self, event=None):
+        """
+        Resalta la pareja de la línea del cursor (llamar al mover el cursor).
+
+        Con ediciones pendientes de indexar no hace nada: se resaltará al
+        vencer la espera tras la última tecla.
+        """
+        if self._dirty:
+            return
+        line = int(self.text_widget.index("insert").split(".")[0])
+        other = self.index.partner(line)
+        self._move_tag((line, other) if other is not None else ())
+
+    def _move_tag(self, lines: Tuple[int, ...]):
+        if lines == self._marked:
+            return
+        text = self.text_widget
+        # Solo hay dos tramos con el tag: quitarlo de todo el texto es barato
+        # y no depende de que las líneas marcadas se hayan movido
+        text.tag_remove(TAG_MATCH, "1.0", "end")
+        for n in lines:
+            start = len(leading_ws(text.get(f"{n}.0", f"{n}.end")))
+            text.tag_add(TAG_MATCH, f"{n}.{start}", f"{n}.end")
+        self._marked = lines
@@ -0,0 +1,402 @@
+# -*- coding: utf-8 -*-
+"""
+Reemplazo masivo en varios scripts con vista previa.
+
+Para renombrar un campo usado en cientos de scripts sin abrirlos uno a uno:
+
+  1. Se eligen los scripts (los del MODELO actual o toda la tabla) que
+     contienen el texto buscado.
+  2. Los reemplazos y los diffs se calculan en procesos aparte
+     (``ProcessPoolExecutor``) sin bloquear la interfaz.
+  3. La vista previa muestra cada script con su diff; se pueden excluir.
+  4. Al aplicar, todos los cambios se guardan en una sola transacción
+     (``DatabaseConnection.bulk_update_content``): o todos o ninguno.  Si
+     algún script cambió en el servidor desde la vista previa, no se
+     guarda ninguno y se indica cuáles.
+"""
+
+import difflib
+import os
+import re
+import time
+import tkinter as tk
+from concurrent.futures import ProcessPoolExecutor
+from tkinter import messagebox, ttk
+from typing import Callable, Iterable, List, Optional, Tuple
+
+from config import COLOR_SIDEBAR_BG
+from editor.search_engine import REGEX_TIMEOUT, SearchTimeout, format_count, replace_matches
+
+# Por debajo de este número de scripts no compensa arrancar procesos
+_POOL_MIN_ROWS = 64
+
+# Scripts por tarea enviada a cada proceso
+_POOL_CHUNK = 32
+
+# Líneas de diff guardadas por script (la vista previa es orientativa)
+_MAX_DIFF_LINES = 400
+
+
+def compute_replacement(row: dict, query: str, replacement: str,
+                        match_case: bool = False, regex: bool = False,
+                        whole_word: bool = False) -> Optional[dict]:
+    """
+    Aplica el reemplazo a un script y calcula su diff.
+
+    Returns:
+        Dict {"label", "key_values", "old", "new", "count", "diff"} o None
+        si el script no cambia.  Si la regex agota el tiempo, "error".
+    """
+    old = row.get("content", "")
+    deadline = time.perf_counter() + REGEX_TIMEOUT if regex else None
+    try:
+        new, count = replace_matches(old, query, replacement, match_case, regex, whole_word,
+                                     deadline=deadline)
+    except SearchTimeout:
+        return {"label": row.get("label", ""), "key_values": row.get("key_values"),
+                "old": old, "new": old, "count": 0, "diff": [],
+                "error": "Tiempo agotado"}
+    if not count:
+        return None
+    diff = list(difflib.unified_diff(old.splitlines(), new.splitlines(),
+                                     "antes", "después", n=1, lineterm=""))
+    if len(diff) > _MAX_DIFF_LINES:
+        diff = diff[:_MAX_DIFF_LINES] + [f"… ({len(diff) - _MAX_DIFF_LINES} líneas más)"]
+    return {"label": row.get("label", ""), "key_values": row.get("key_values"),
+            "old": old, "new": new, "count": count, "diff": diff}
+
+
+def _compute_chunk(rows: List[dict], options: Tuple) -> List[dict]:
+    """Tarea de un proceso del pool: un lote de scripts."""
+    results = []
+    for row in rows:
+        result = compute_replacement(row, *options)
+        if result is not None:
+            results.append(result)
+    return results
+
+
+class ReplacementJob:
+    """
+    Cálculo de reemplazos en segundo plano, consultable desde ``after``.
+
+    Con pocos scripts se calcula en el propio proceso (arrancar el pool
+    costaría más que el trabajo), salvo con regex: un patrón catastrófico
+    no se puede cortar dentro de una línea, y en el pool no congela la
+    interfaz y ``shutdown()`` mata sus procesos.
+
+    Args:
+        rows: Scripts candidatos (dicts "label", "key_values", "content").
+        options: (query, replacement, match_case, regex, whole_word).
+    """
+
+    def __init__(self, rows: List[dict], options: Tuple):
+        self.total = len(rows)
+        self._executor = None
+        self._futures = []
+        self._ready: List[dict] = []
+        if len(rows) < _POOL_MIN_ROWS and not options[3]:
+            self._ready = _compute_chunk(rows, options)
+            return
+        workers = max(1, min(os.cpu_count() or 1, 8))
+        self._executor = ProcessPoolExecutor(max_workers=workers)
+        self._futures = [
+            self._executor.submit(_compute_chunk, rows[i:i + _POOL_CHUNK], options)
+            for i in range(0, len(rows), _POOL_CHUNK)
+        ]
+
+    @property
+    def done(self) -> bool:
+        return not self._futures
+
+    def poll(self) -> List[dict]:
+        """Resultados terminados desde la última llamada (lanza si un proceso falló)."""
+        ready, self._ready = self._ready, []
+        pending = []
+        for future in self._futures:
+            if future.done():
+                ready.extend(future.result())
+            else:
+                pending.append(future)
+        self._futures = pending
+        if not pending:
+            self.shutdown()
+        return ready
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            for future in self._futures:
+                future.cancel()
+            # Un proceso atascado en una regex no acabaría nunca
+            running = list((self._executor._processes or {}).values()) if self._futures else []
+            self._executor.shutdown(wait=False)
+            for process in running:
+                process.terminate()
+            self._executor = None
+        self._futures = []
+
+
+class BulkReplaceDialog(tk.Toplevel):
+    """
+    Ventana de reemplazo masivo con vista previa.
+
+    Args:
+        master: Ventana principal.
+        load_rows: Función (texto, es_regex, solo_ambito) → iterable de
+            scripts candidatos con su contenido actual (con regex no se
+            puede filtrar en el servidor: se devuelven todos los del ámbito).
+        apply: Función (lista de resultados) → número de scripts guardados.
+            Debe guardar todo o nada (lanza excepción si falla).
+        scope_label: Texto de la opción "solo ..." (p.ej. "Solo MODELO T01");
+            None si no hay ámbito reducido.
+    """
+
+    def __init__(self, master, load_rows: Callable[[str, bool, bool], Iterable[dict]],
+                 apply: Callable[[List[dict]], int], scope_label: Optional[str] = None):
+        super().__init__(master, bg=COLOR_SIDEBAR_BG)
+        self.title("Reemplazar en varios scripts")
+        self.geometry("900x560")
+        self.transient(master)
+
+        self._load_rows = load_rows
+        self._apply = apply
+        self._job: Optional[ReplacementJob] = None
+        self._after_id = None
+        self._results = {}          # item del árbol → resultado
+
+        self._match_case = tk.BooleanVar(value=False)
+        self._whole_word = tk.BooleanVar(value=False)
+        self._regex = tk.BooleanVar(value=False)
+        self._only_scope = tk.BooleanVar(value=scope_label is not None)
+
+        # --- Buscar / Reemplazar ---
+        form = tk.Frame(self, bg=COLOR_SIDEBAR_BG, padx=6, pady=4)
+        form.pack(side="top", fill="x")
+        self.search_var = tk.StringVar()
+        self.replace_var = tk.StringVar()
+        self.entry = self._field(form, 0, "Buscar:", self.search_var)
+        self._field(form, 1, "Reemplazar:", self.replace_var)
+        self.entry.bind("<Return>", lambda e: self.preview())
+
+        options = tk.Frame(form, bg=COLOR_SIDEBAR_BG)
+        options.grid(row=0, column=2, rowspan=2, sticky="w")
+        for text, var in (("Aa", self._match_case), ("ab", self._whole_word), (".*", self._regex)):
+            tk.Checkbutton(options, text=text, variable=var, bg=COLOR_SIDEBAR_BG, fg="#000000",
+                           activebackground=COLOR_SIDEBAR_BG,
+                           font=("Segoe UI", 8)).pack(side="left")
+        if scope_label:
+            tk.Checkbutton(options, text=scope_label, variable=self._only_scope,
+                           bg=COLOR_SIDEBAR_BG, fg="#000000", activebackground=COLOR_SIDEBAR_BG,
+                           font=("Segoe UI", 8)).pack(side="left", padx=(6, 0))
+
+        buttons = tk.Frame(form, bg=COLOR_SIDEBAR_BG)
+        buttons.grid(row=0, column=3, rowspan=2, sticky="w", padx=(8, 0))
+        self.preview_btn = self._btn(buttons, "Vista previa", self.preview)
+        self.apply_btn = self._btn(buttons, "Aplicar", self.apply)
+        self.apply_btn.config(state="disabled")
+
+        self.status_label = tk.Label(self, text="", bg=COLOR_SIDEBAR_BG, fg="#555555",
+                                     font=("Segoe UI", 8), anchor="w", padx=6)
+        self.status_label.pack(side="top", fill="x")
+
+        # --- Vista previa: scripts a la izquierda, diff a la derecha ---
+        panes = ttk.PanedWindow(self, orient="horizontal")
+        panes.pack(side="top", fill="both", expand=True)
+        self.tree = ttk.Treeview(panes, columns=("cambios",), show="tree headings")
+        self.tree.heading("#0", text="Script")
+        self.tree.heading("cambios", text="Cambios")
+        self.tree.column("#0", width=200)
+        self.tree.column("cambios", width=70, anchor="e", stretch=False)
+        self.tree.bind("<<TreeviewSelect>>", self._show_diff)
+        self.tree.bind("<Delete>", self._exclude)
+        panes.add(self.tree, weight=1)
+
+        self.diff_text = tk.Text(panes, wrap="none", font=("Courier New", 9),
+                                 bg="#FFFFFF", fg="#000000", state="disabled")
+        self.diff_text.tag_configure("add", background="#e6ffec")
+        self.diff_text.tag_configure("del", background="#ffebe9")
+        self.diff_text.tag_configure("hunk", foreground="#0550ae")
+        panes.add(self.diff_text, weight=3)
+
+        tk.Label(self, text="Supr: excluir el script seleccionado", bg=COLOR_SIDEBAR_BG,
+                 fg="#555555", font=("Segoe UI", 8), anchor="w", padx=6).pack(side="bottom", fill="x")
+
+        self.protocol("WM_DELETE_WINDOW", self.close)
+        self.entry.focus_set()
+
+    @staticmethod
+    def _field(parent, row, text, variable):
+        tk.Label(parent, text=text, bg=COLOR_SIDEBAR_BG, fg="#000000",
+                 font=("Segoe UI", 9, "bold")).grid(row=row, column=0, sticky="w")
+        entry = tk.Entry(parent, textvariable=variable, font=("Segoe UI", 10), bg="#FFFFFF",
+                         fg="#000000", insertbackground="#000000", relief="solid",
+                         borderwidth=1, width=40)
+        entry.grid(row=row, column=1, sticky="w", padx=4, pady=1)
+        return entry
+
+    @staticmethod
+    def _btn(parent, text, command):
+        btn = tk.Button(parent, text=text, command=command, bg="#E0E0E0", fg="#000000",
+                        activebackground="#C0C0C0", relief="raised", font=("Segoe UI", 8),
+                        padx=6, pady=1)
+        btn.pack(side="left", padx=(0, 4))
+        return btn
+
+    # ------------------------------------------------------------------
+    # Vista previa
+    # ------------------------------------------------------------------
+
+    def preview(self):
+        """Carga los scripts candidatos y lanza el cálculo de los reemplazos."""
+        self._cancel_job()
+        self.tree.delete(*self.tree.get_children())
+        self._results.clear()
+        self._set_diff([])
+        self.apply_btn.config(state="disabled")
+        query = self.search_var.get()
+        if not query:
+            return
+        if self._regex.get():
+            try:
+                re.compile(query)
+            except re.error as e:
+                self.status_label.config(text=f"Expresión no válida: {e}", fg="#C00000")
+                return
+
+        self.status_label.config(text="Leyendo scripts…", fg="#555555")
+        self.update_idletasks()
+        try:
+            rows = list(self._load_rows(query, self._regex.get(), self._only_scope.get()))
+        except Exception as e:
+            self.status_label.config(text=f"Error: {e}", fg="#C00000")
+            return
+        options = (query, self.replace_var.get(), self._match_case.get(),
+                   self._regex.get(), self._whole_word.get())
+        self._job = ReplacementJob(rows, options)
+        self._poll()
+
+    def _poll(self):
+        self._after_id = None
+        try:
+            results = self._job.poll()
+        except Exception as e:
+            self._cancel_job()
+            self.status_label.config(text=f"Error: {e}", fg="#C00000")
+            return
+        for result in sorted(results, key=lambda r: r["label"]):
+            cambios = result.get("error") or format_count(result["count"])
+            item = self.tree.insert("", "end", text=result["label"], values=(cambios,))
+            if "error" not in result:
+                self._results[item] = result
+        if self._job.done:
+            self._job = None
+            self._update_status()
+            if self._results:
+                self.apply_btn.config(state="normal")
+        else:
+            self.status_label.config(
+                text=f"Calculando… {format_count(len(self._results))} scripts con cambios",
+                fg="#555555")
+            self._after_id = self.after(50, self._poll)
+
+    def _update_status(self):
+        total = sum(r["count"] for r in self._results.values())
+        self.status_label.config(
+            text=f"{format_count(total)} reemplazos en {format_count(len(self._results))} scripts",
+            fg="#555555")
+
+    def _show_diff(self, event=None):
+        result = self._results.get(self.tree.focus())
+        self._set_diff(result["diff"] if result else [])
+
+    def _set_diff(self, lines: List[str]):
+        self.diff_text.config(state="normal")
+        self.diff_text.delete("1.0", "end")
+        for line in lines:
+            tag = ()
+            if line.startswith("@@"):
+                tag = ("hunk",)
+            elif line.startswith("+") and not line.startswith("+++"):
+                tag = ("add",)
+            elif line.startswith("-") and not line.startswith("---"):
+                tag = ("del",)
+            self.diff_text.insert("end", line + "\n", tag)
+        self.diff_text.config(state="disabled")
+
+    def _exclude(self, event=None):
+        """Quita de la vista previa (y del guardado) el script seleccionado."""
+        for item in self.tree.selection():
+            self._results.pop(item, None)
+            self.tree.delete(item)
+        self._set_diff([])
+        self._update_status()
+        if not self._results:
+            self.apply_btn.config(state="disabled")
+
+    # ------------------------------------------------------------------
+    # Aplicar
+    # ------------------------------------------------------------------
+
+    def apply(self):
+        """Guarda todos los scripts de la vista previa en una transacción."""
+        results = list(self._results.values())
+        if not results:
+            return
+        total = sum(r["count"] for r in results)
+        if not messagebox.askyesno(
+            "Reemplazar en varios scripts",
+            f"Se van a guardar {len(results)} scripts ({total} reemplazos).\n\n¿Continuar?",
+            parent=self,
+        ):
+            return
+        try:
+            saved = self._apply(results)
+        except Exception as e:
+            conflicts = getattr(e, "conflicts", None)     # ConcurrentUpdateError
+            if conflicts:
+                self._show_conflicts(results, conflicts)
+                return
+            messagebox.showerror(
+                "Reemplazar en varios scripts",
+                f"No se ha guardado ningún cambio (se ha deshecho la transacción):\n{e}",
+                parent=self,
+            )
+            return
+        messagebox.showinfo("Reemplazar en varios scripts",
+                            f"✓ {saved} scripts guardados.", parent=self)
+        self.tree.delete(*self.tree.get_children())
+        self._results.clear()
+        self._set_diff([])
+        self.apply_btn.config(state="disabled")
+        self.status_label.config(text=f"✓ {saved} scripts guardados", fg="#555555")
+
+    def _show_conflicts(self, results: List[dict], conflicts: List[List[str]]):
+        """Avisa de los scripts cambiados en el servidor desde la vista previa."""
+        labels = {tuple(str(v).strip().upper() for v in r["key_values"]): r["label"]
+                  for r in results}
+        names = [labels.get(tuple(str(v).strip().upper() for v in kv), " / ".join(kv))
+                 for kv in conflicts]
+        shown = "\n".join(f"  • {name}" for name in names[:20])
+        if len(names) > 20:
+            shown += f"\n  … y {len(names) - 20} más"
+        messagebox.showwarning(
+            "Reemplazar en varios scripts",
+            f"No se ha guardado ningún cambio: {len(names)} script(s) se han modificado "
+            f"en la base de datos después de la vista previa:\n\n{shown}\n\n"
+            f"Vuelva a pulsar Vista previa para recalcular los reemplazos.",
+            parent=self,
+        )
+        self.status_label.config(text=f"Sin guardar: {len(names)} script(s) cambiados "
+                                      f"en la BD", fg="#C00000")
+
+    def _cancel_job(self):
+        if self._after_id is not None:
+            self.after_cancel(self._after_id)
+            self._after_id = None
+        if self._job is not None:
+            self._job.shutdown()
+            self._job = None
+
+    def close(self):
+        self._cancel_job()
+        self.destroy()
@@ -5,6 +5,7 @@ Barra de búsqueda fija en la parte superior del editor.
 Estilo clásico de aplicación de escritorio: siempre visible,
 con campo de texto y botón "Buscar" al lado.
 Resalta las coincidencias y permite navegar entre ellas.
+Modos: mayúsculas, palabra completa, expresión regular y en la selección.
 """
 
 import tkinter as tk
@@ -13,6 +14,7 @@ from config import (
     COLOR_BARRA_ESTADO_BG,
     COLOR_BARRA_ESTADO_FG,
 )
+from editor.search_engine import SearchEngine, format_count
 
 
 class FixedSearchBar(tk.Frame):
@@ -29,8 +31,13 @@ class FixedSearchBar(tk.Frame):
     def __init__(self, parent, text_widget: tk.Text = None):
         super().__init__(parent, bg=COLOR_SIDEBAR_BG, padx=6, pady=4)
         self.text_widget = text_widget
-        self._matches: list[str] = []
-        self._current_idx = -1
+        self._engine = None
+        if text_widget is not None:
+            self._engine = SearchEngine(text_widget, self._TAG, self._TAG_CURRENT)
+        self._match_case = tk.BooleanVar(value=False)
+        self._whole_word = tk.BooleanVar(value=False)
+        self._regex = tk.BooleanVar(value=False)
+        self._in_selection = tk.BooleanVar(value=False)
 
         # --- Layout ---
         tk.Label(
@@ -62,6 +69,12 @@ class FixedSearchBar(tk.Frame):
         self._make_btn("▲", self.find_prev)
         self._make_btn("▼", self.find_next)
 
+        # Modos de búsqueda
+        self._make_toggle("Aa", self._match_case)
+        self._make_toggle("ab", self._whole_word)
+        self._make_toggle(".*", self._regex)
+        self._make_toggle("Sel", self._in_selection, self._on_scope_toggle)
+
         # Contador de resultados
         self.match_label = tk.Label(
             self,
@@ -93,6 +106,32 @@ class FixedSearchBar(tk.Frame):
         btn.pack(side="left", padx=(0, 2))
         return btn
 
+    def _make_toggle(self, text, variable, command=None):
+        """Crea un interruptor de modo de búsqueda; al cambiarlo se re-busca."""
+        chk = tk.Checkbutton(
+            self,
+            text=text,
+            variable=variable,
+            bg=COLOR_SIDEBAR_BG,
+            fg="#000000",
+            activebackground=COLOR_SIDEBAR_BG,
+            font=("Segoe UI", 8),
+            command=command or self._on_mode_change,
+        )
+        chk.pack(side="left", padx=(0, 2))
+        return chk
+
+    def _on_scope_toggle(self):
+        """Al activar "en selección" se toma la selección actual como ámbito."""
+        if self._in_selection.get() and self._engine:
+            self._engine.capture_scope()
+        self._on_mode_change()
+
+    def _on_mode_change(self):
+        """Re-busca con los nuevos modos si ya había una búsqueda activa."""
+        if self.text_widget and self.search_var.get():
+            self._find_all()
+
     def add_save_button(self, save_command, status_var=None, update_status=None):
         """Añade un botón de guardar (💾) a la derecha de la barra."""
         # Separador visual
@@ -124,6 +163,7 @@ class FixedSearchBar(tk.Frame):
     def set_text_widget(self, text_widget: tk.Text):
         """Conecta el widget de texto al buscador (si no se pasó en el constructor)."""
         self.text_widget = text_widget
+        self._engine = SearchEngine(text_widget, self._TAG, self._TAG_CURRENT)
         # Configurar tags de resaltado
         self.text_widget.tag_configure(self._TAG, background="#FFFF00", foreground="#000000")
         self.text_widget.tag_configure(self._TAG_CURRENT, background="#FF8C00", foreground="#FFFFFF")
@@ -132,93 +172,97 @@ class FixedSearchBar(tk.Frame):
         """Busca la siguiente coincidencia."""
         if not self.text_widget:
             return
-        query = self.search_var.get()
-        if not query:
+        if not self.search_var.get():
             self._clear()
             return
 
-        # Re-buscar si cambió el texto
-        if not self._matches or self._last_query != query:
-            self._find_all()
-
-        if not self._matches:
+        # Re-buscar si cambió el texto o los modos; la búsqueda nueva ya
+        # deja resaltada la primera coincidencia a partir del cursor
+        if self._engine.options is None or self._last_query != self._search_key():
+            self._find_all(move_cursor=True)
             return
 
-        self._current_idx = (self._current_idx + 1) % len(self._matches)
-        self._highlight_current()
+        self._engine.next()
+        self._update_label()
 
     def find_prev(self):
         """Busca la coincidencia anterior."""
         if not self.text_widget:
             return
-        query = self.search_var.get()
-        if not query:
+        if not self.search_var.get():
             self._clear()
             return
 
-        if not self._matches or self._last_query != query:
+        if self._engine.options is None or self._last_query != self._search_key():
             self._find_all()
+            self._engine.finish()
+
+        self._engine.prev()
+        self._update_label()
+
+    def refresh_viewport(self):
+        """Re-etiqueta las coincidencias de la zona visible (tras un scroll)."""
+        if self._engine:
+            self._engine.refresh_viewport()
+
+    @property
+    def _matches(self):
+        return self._engine.starts if self._engine else []
+
+    def _search_key(self):
+        """Búsqueda + modos actuales (para saber si hay que re-buscar)."""
+        return (
+            self.search_var.get(),
+            self._match_case.get(),
+            self._whole_word.get(),
+            self._regex.get(),
+            self._in_selection.get(),
+        )
 
-        if not self._matches:
-            return
-
-        self._current_idx = (self._current_idx - 1) % len(self._matches)
-        self._highlight_current()
-
-    def _find_all(self):
-        """Encuentra todas las coincidencias."""
-        self._clear_tags()
-        self._matches.clear()
-        self._current_idx = -1
+    def _find_all(self, move_cursor=False):
+        """Inicia la búsqueda incremental (Python sobre una instantánea)."""
+        self._last_query = self._search_key()
+        self._engine.start(
+            self.search_var.get(),
+            match_case=self._match_case.get(),
+            regex=self._regex.get(),
+            whole_word=self._whole_word.get(),
+            in_selection=self._in_selection.get(),
+            on_update=self._update_label,
+            move_cursor=move_cursor,
+        )
+        self._update_label()
 
-        query = self.search_var.get()
-        self._last_query = query
-        if not query:
+    def _update_label(self):
+        """Actualiza el contador según el estado del motor de búsqueda."""
+        engine = self._engine
+        self.match_label.config(fg="#555555")
+        if not self.search_var.get():
             self.match_label.config(text="")
-            return
-
-        start = "1.0"
-        while True:
-            pos = self.text_widget.search(query, start, stopindex="end", nocase=True)
-            if not pos:
-                break
-            end = f"{pos}+{len(query)}c"
-            self.text_widget.tag_add(self._TAG, pos, end)
-            self._matches.append(pos)
-            start = end
-
-        total = len(self._matches)
-        if total == 0:
+        elif engine.error:
+            self.match_label.config(text=engine.error, fg="#C00000")
+        elif engine.running:
+            self.match_label.config(text=f"{format_count(engine.count)}…")
+        elif engine.timed_out:
+            self.match_label.config(
+                text=f"{format_count(engine.count, True)} resultados "
+                     f"(tiempo agotado: simplifique la expresión)"
+            )
+        elif engine.current < 0:
             self.match_label.config(text="Sin resultados")
         else:
-            self.match_label.config(text=f"{total} resultado{'s' if total != 1 else ''}")
-
-    def _highlight_current(self):
-        """Resalta la coincidencia actual de forma diferenciada."""
-        self.text_widget.tag_remove(self._TAG_CURRENT, "1.0", "end")
-        if not self._matches:
-            return
-        pos = self._matches[self._current_idx]
-        query = self.search_var.get()
-        end = f"{pos}+{len(query)}c"
-        self.text_widget.tag_add(self._TAG_CURRENT, pos, end)
-        self.text_widget.see(pos)
-        self.match_label.config(
-            text=f"{self._current_idx + 1}/{len(self._matches)}"
-        )
+            total = format_count(engine.count, engine.capped)
+            self.match_label.config(text=f"{engine.current + 1}/{total}")
 
     def _clear(self):
         """Limpia resultados y etiquetas."""
         self._clear_tags()
-        self._matches.clear()
-        self._current_idx = -1
-        self._last_query = ""
+        self._last_query = None
         self.match_label.config(text="")
 
     def _clear_tags(self):
         """Elimina tags de resaltado del texto."""
-        if self.text_widget:
-            self.text_widget.tag_remove(self._TAG, "1.0", "end")
-            self.text_widget.tag_remove(self._TAG_CURRENT, "1.0", "end")
+        if self._engine:
+            self._engine.clear()
 
-    _last_query = ""
+    _last_query = None
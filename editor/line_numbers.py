@@ -4,7 +4,16 @@ Widget para mostrar numeros de linea sincronizados con el Text principal.
 """
 
 import tkinter as tk
-from config import COLOR_LINEAS_BG, COLOR_LINEAS_FG, FUENTE_EDITOR
+from config import (
+    COLOR_LINEAS_BG,
+    COLOR_LINEAS_FG,
+    COLOR_VALIDACION_AVISO,
+    COLOR_VALIDACION_ERROR,
+    FUENTE_EDITOR,
+)
+
+# Columna reservada a la izquierda para las marcas de validación
+MARCA_ANCHO = 8
 
 
 class LineNumbers(tk.Canvas):
@@ -25,6 +34,8 @@ class LineNumbers(tk.Canvas):
         except Exception:
             self.font = FUENTE_EDITOR
         self.fg = COLOR_LINEAS_FG
+        # Línea → "error" | "aviso" (ver LiveValidator)
+        self.markers = {}
 
         # Eventos que pueden cambiar el número de líneas o el scroll
         self.text_widget.bind("<<Change>>", self.redraw)
@@ -39,6 +50,11 @@ class LineNumbers(tk.Canvas):
         # Forzar redibujado inicial después de que el widget esté visible
         self.after(100, self.redraw)
 
+    def set_markers(self, markers: dict):
+        """Sustituye las marcas de validación y redibuja."""
+        self.markers = markers
+        self.redraw()
+
     def redraw(self, event=None):
         """Redibuja los números de línea con padding de ceros."""
         self.delete("all")
@@ -49,7 +65,7 @@ class LineNumbers(tk.Canvas):
             total_lines = int(self.text_widget.index('end-1c').split('.')[0])
             num_digits = max(4, len(str(total_lines)))  # Mínimo 4 dígitos (hasta 9999)
             # Ancho justo para los dígitos + margen cómodo
-            barra_width = 10 + num_digits * 10
+            barra_width = 10 + num_digits * 10 + MARCA_ANCHO
             if self.winfo_width() != barra_width:
                 self.configure(width=barra_width)
             # Obtener la primera línea visible
@@ -74,6 +90,14 @@ class LineNumbers(tk.Canvas):
                     font=self.font,
                     fill=self.fg,
                 )
+                # Marca de validación (solo líneas visibles)
+                level = self.markers.get(linenum)
+                if level:
+                    color = COLOR_VALIDACION_ERROR if level == "error" else COLOR_VALIDACION_AVISO
+                    self.create_oval(
+                        2, y_pos - 3, 2 + MARCA_ANCHO - 2, y_pos + 3,
+                        fill=color, outline=color,
+                    )
                 i = self.text_widget.index(f"{i}+1line")
         except (tk.TclError, ValueError):
             # Si hay algún error, simplemente intentarlo de nuevo después
@@ -0,0 +1,252 @@
+# -*- coding: utf-8 -*-
+"""
+Validación en vivo del script mientras se escribe.
+
+La validación (``IncrementalValidator``) se ejecuta en un hilo aparte
+sobre una instantánea del texto, de modo que escribir no espera nunca
+al validador:
+
+  - Cada tecla solo reprograma un ``after`` (espera de
+    ``VALIDACION_DEBOUNCE_MS`` tras la última edición).
+  - Al vencer la espera se copia el texto y se entrega al hilo con un
+    número de generación.  Si mientras tanto hay otra edición, la
+    generación cambia y el resultado antiguo se descarta: el hilo toma
+    siempre solo la instantánea más reciente.
+  - Los resultados se recogen en el hilo de la interfaz (Tk no admite
+    llamadas desde otros hilos) y se dibujan como marcas en la barra de
+    números de línea y como subrayado en las líneas visibles.
+"""
+
+import logging
+import queue
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from config import (
+    COLOR_VALIDACION_AVISO,
+    COLOR_VALIDACION_ERROR,
+    VALIDACION_DEBOUNCE_MS,
+)
+from editor.vbs_validator import IncrementalValidator
+
+logger = logging.getLogger("EditorVBS.validacion")
+
+# Intervalo de consulta de resultados mientras hay una validación en curso
+_POLL_MS = 40
+
+# Líneas por encima y por debajo de la zona visible que también se subrayan
+_VIEWPORT_MARGIN = 50
+
+# Teclas que no modifican el texto
+_NAVIGATION_KEYS = {
+    "Shift_L", "Shift_R", "Control_L", "Control_R", "Alt_L", "Alt_R",
+    "Left", "Right", "Up", "Down", "Home", "End", "Prior", "Next",
+}
+
+TAG_ERROR = "validation_error"
+TAG_WARNING = "validation_warning"
+
+
+class LiveValidator:
+    """
+    Valida el contenido de un TextEditor en segundo plano.
+
+    Args:
+        text_widget: Editor a validar.
+        line_numbers: Barra ``LineNumbers`` donde dibujar las marcas.
+        on_result: Función opcional llamada (sin argumentos) al aplicar
+            un resultado nuevo (p.ej. para refrescar la barra de estado).
+        cache: ``ValidationCache`` opcional: al cargar un script ya
+            validado otras veces el resultado sale de la caché.  Solo se
+            usa tras ``<<ContentReplaced>>``; las versiones intermedias de
+            la edición no se guardan.
+    """
+
+    def __init__(self, text_widget, line_numbers=None, on_result=None, cache=None):
+        self.text_widget = text_widget
+        self.line_numbers = line_numbers
+        self._on_result = on_result
+        self._cache = cache
+        self._token_cache = getattr(text_widget, "token_cache", None)
+
+        # Problemas del último resultado aplicado
+        self.problems: List[Tuple[str, str, int]] = []
+        self._by_line: Dict[int, Tuple[str, str]] = {}
+
+        self._generation = 0
+        self._submitted = 0       # Generación de la última instantánea entregada
+        self._applied = 0         # Generación del último resultado aplicado
+        self._last_text: Optional[str] = None
+        self._replaced = False    # La próxima instantánea es un contenido cargado
+        self._after_id = None
+        self._poll_id = None
+        self._tagged: Optional[Tuple[int, int]] = None
+
+        # Hilo de validación: solo procesa la instantánea más reciente
+        self._job: Optional[Tuple[int, str, bool]] = None
+        self._job_ready = threading.Condition()
+        self._results: "queue.Queue[Tuple[int, list]]" = queue.Queue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._worker, name="LiveValidator",
+                                        daemon=True)
+        self._thread.start()
+
+        # Subrayado recto: Tk no tiene subrayado ondulado
+        text_widget.tag_configure(TAG_ERROR, underline=True,
+                                  underlinefg=COLOR_VALIDACION_ERROR)
+        text_widget.tag_configure(TAG_WARNING, underline=True,
+                                  underlinefg=COLOR_VALIDACION_AVISO)
+
+        # <Key> y no <KeyRelease>: EditorApp sustituye los <KeyRelease> del editor.
+        # La instantánea se toma tras la espera, ya con la tecla aplicada
+        text_widget.bind("<Key>", self._on_key, add=True)
+        # <<ContentReplaced>>: set_content / replace_range de TextEditor
+        for sequence in ("<<Paste>>", "<<Cut>>", "<<Undo>>", "<<Redo>>"):
+            text_widget.bind(sequence, self.schedule, add=True)
+        text_widget.bind("<<ContentReplaced>>", self._on_replaced, add=True)
+
+    # ------------------------------------------------------------------
+    # Programación
+    # ------------------------------------------------------------------
+
+    def _on_key(self, event=None):
+        if event is None or event.keysym not in _NAVIGATION_KEYS:
+            self.schedule()
+
+    def _on_replaced(self, event=None):
+        self._replaced = True
+        self.schedule()
+
+    def schedule(self, event=None):
+        """Valida tras ``VALIDACION_DEBOUNCE_MS`` sin más ediciones."""
+        # Cualquier resultado en curso ya no corresponde al texto
+        self._generation += 1
+        if self._after_id is not None:
+            self.text_widget.after_cancel(self._after_id)
+        self._after_id = self.text_widget.after(VALIDACION_DEBOUNCE_MS, self._submit)
+
+    def _submit(self):
+        """Entrega una instantánea del texto al hilo de validación."""
+        self._after_id = None
+        text = self.text_widget.get("1.0", "end-1c")
+        use_cache, self._replaced = self._replaced, False
+        if text == self._last_text and self._applied == self._submitted:
+            return  # Sin cambios desde el último resultado mostrado
+        self._last_text = text
+        self._generation += 1
+        self._submitted = self._generation
+        with self._job_ready:
+            self._job = (self._generation, text, use_cache)
+            self._job_ready.notify()
+        if self._poll_id is None:
+            self._poll_id = self.text_widget.after(_POLL_MS, self._poll)
+
+    def _worker(self):
+        validator = IncrementalValidator()
+        while True:
+            with self._job_ready:
+                while self._job is None and not self._closed:
+                    self._job_ready.wait()
+                if self._closed:
+                    return
+                generation, text, use_cache = self._job
+                self._job = None
+            if generation != self._generation:
+                continue  # Ya hay otra edición: no validar una versión vieja
+            try:
+                cache = self._cache if use_cache else None
+                problems = cache.get(text) if cache is not None else None
+                if problems is None:
+                    # Mismos tokens que el resaltado: si ya los calculó, no se repite
+                    stream = self._token_cache.stream(text) if self._token_cache else None
+                    problems = validator.validate(text, stream)
+                    if cache is not None:
+                        cache.put(text, problems)
+            except Exception:
+                # El margen queda limpio: que al menos quede constancia en el log
+                logger.exception("Error en la validación en vivo")
+                validator.reset()
+                problems = []
+            self._results.put((generation, problems))
+
+    def _poll(self):
+        """Recoge resultados del hilo; descarta los de generaciones viejas."""
+        self._poll_id = None
+        while True:
+            try:
+                generation, problems = self._results.get_nowait()
+            except queue.Empty:
+                break
+            if generation == self._generation:
+                self._apply(problems)
+        # Seguir esperando solo si la última instantánea sigue vigente
+        if (not self._closed and self._submitted == self._generation
+                and self._applied != self._generation):
+            self._poll_id = self.text_widget.after(_POLL_MS, self._poll)
+
+    def close(self):
+        """Detiene el hilo y cancela las esperas pendientes."""
+        for after_id in (self._after_id, self._poll_id):
+            if after_id is not None:
+                try:
+                    self.text_widget.after_cancel(after_id)
+                except Exception:
+                    pass
+        self._after_id = self._poll_id = None
+        with self._job_ready:
+            self._closed = True
+            self._job_ready.notify()
+
+    # ------------------------------------------------------------------
+    # Presentación
+    # ------------------------------------------------------------------
+
+    def _apply(self, problems: List[Tuple[str, str, int]]):
+        self._applied = self._generation
+        self.problems = problems
+        by_line: Dict[int, Tuple[str, str]] = {}
+        for level, message, line in problems:
+            # Primer problema de cada línea, pero un error manda sobre un aviso
+            if line > 0 and (line not in by_line
+                             or (level == "error" and by_line[line][0] != "error")):
+                by_line[line] = (level, message)
+        self._by_line = by_line
+
+        if self.line_numbers is not None:
+            self.line_numbers.set_markers({line: level for line, (level, _) in by_line.items()})
+        self.refresh_viewport(force=True)
+        if self._on_result:
+            self._on_result()
+
+    def problem_at(self, line: int) -> Optional[Tuple[str, str]]:
+        """(nivel, mensaje) del problema de la línea *line*, o None."""
+        return self._by_line.get(line)
+
+    def _visible_lines(self) -> Tuple[int, int]:
+        first = int(self.text_widget.index("@0,0").split(".")[0])
+        height = self.text_widget.winfo_height()
+        last = int(self.text_widget.index(f"@0,{height}").split(".")[0])
+        return max(first - _VIEWPORT_MARGIN, 1), last + _VIEWPORT_MARGIN
+
+    def refresh_viewport(self, force: bool = False):
+        """
+        Subraya las líneas con problemas de la zona visible.
+
+        Barato si la zona visible sigue dentro de la ya subrayada, así que
+        se puede llamar en cada evento de scroll.
+        """
+        first, last = self._visible_lines()
+        if not force and self._tagged is not None:
+            if self._tagged[0] <= first and last <= self._tagged[1]:
+                return
+        for tag in (TAG_ERROR, TAG_WARNING):
+            self.text_widget.tag_remove(tag, "1.0", "end")
+        indices = {TAG_ERROR: [], TAG_WARNING: []}
+        for line, (level, _) in self._by_line.items():
+            if first <= line <= last:
+                tag = TAG_ERROR if level == "error" else TAG_WARNING
+                indices[tag] += [f"{line}.0", f"{line}.end"]
+        for tag, tag_indices in indices.items():
+            if tag_indices:
+                self.text_widget.tag_add(tag, *tag_indices)
+        self._tagged = (first, last)
@@ -0,0 +1,357 @@
+# -*- coding: utf-8 -*-
+"""
+Índice de símbolos de todos los scripts de un MODELO.
+
+Los scripts de un mismo modelo se llaman entre sí (``Call MiFuncion(x)``).
+Este índice permite ir a la definición de un nombre y buscar sus
+referencias en todos ellos:
+
+  - Cada script se analiza una vez por contenido (``content_hash``): sus
+    definiciones de nivel superior (Sub, Function, Class, variables y
+    constantes globales), los miembros de sus clases y dónde aparece
+    cada nombre que no es local de un procedimiento.
+  - El primer análisis de todo el modelo se hace en un hilo aparte
+    (``ModelIndexWorker``); después, al consultar, solo se vuelve a
+    analizar el script abierto si cambió.
+  - Una consulta recorre los diccionarios de cada script: con el índice
+    construido responde en milisegundos aunque haya cientos de scripts.
+"""
+
+import logging
+import queue
+import threading
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from editor.symbols import SymbolAnalyzer, identifier_occurrences
+from editor.validation_cache import content_hash
+from editor.vbs_validator import preprocess
+
+logger = logging.getLogger("EditorVBS.app")
+
+# Análisis de scripts guardados como máximo (por contenido)
+_CACHE_MAX = 5000
+
+# Intervalo de consulta del resultado mientras se construye el índice
+_POLL_MS = 100
+
+# Scripts sin contenido (listados solo con claves) pedidos de una vez
+_LOAD_CHUNK = 200
+
+# Función (lista de key_values) → contenidos en el mismo orden
+ContentLoader = Callable[[List[List[str]]], List[str]]
+
+
+class Location(NamedTuple):
+    """
+    Posición de un nombre en un script del modelo.
+
+    Attributes:
+        label: Nombre del script en el desplegable.
+        key_values: Claves del registro del script.
+        line: Línea (1-based).
+        col: Columna (0-based).
+        kind: Clase de la definición (``KIND_*`` de ``editor.symbols``)
+            o "" en una referencia.
+        text: Línea completa, para mostrarla en los resultados.
+    """
+    label: str
+    key_values: Tuple[str, ...]
+    line: int
+    col: int
+    kind: str = ""
+    text: str = ""
+
+
+class ScriptSymbols(NamedTuple):
+    """Análisis de un script (sin datos del registro: se comparte por contenido)."""
+    # Nombre en minúsculas → (clase, línea, columna) de cada definición global
+    definitions: Dict[str, Tuple[Tuple[str, int, int], ...]]
+    # Lo mismo para los miembros de las clases
+    members: Dict[str, Tuple[Tuple[str, int, int], ...]]
+    # Nombre en minúsculas → (línea, columna) de cada aparición no local
+    references: Dict[str, Tuple[Tuple[int, int], ...]]
+    lines: Tuple[str, ...]
+
+
+def analyze_script(content: str, analyzer: Optional[SymbolAnalyzer] = None) -> ScriptSymbols:
+    """Definiciones y referencias de un script."""
+    lines = [line.rstrip("\r") for line in content.split("\n")]
+    infos = preprocess(content)
+    table = (analyzer or SymbolAnalyzer()).analyze(infos)
+    scopes = table.scopes_by_line(len(infos))
+
+    occurrences: Dict[str, List[Tuple[int, int]]] = {}
+    first_col: Dict[Tuple[str, int], int] = {}
+    for line, col, name in identifier_occurrences(infos):
+        lower = name.lower()
+        first_col.setdefault((lower, line), col)
+        scope = scopes[line]
+        if scope and table.is_local(lower, scope):
+            continue    # Variable o parámetro del procedimiento: otro nombre
+        occurrences.setdefault(lower, []).append((line, col))
+
+    def located(symbols) -> Dict[str, Tuple[Tuple[str, int, int], ...]]:
+        found: Dict[str, List[Tuple[str, int, int]]] = {}
+        for symbol in symbols:
+            lower = symbol.name.lower()
+            col = first_col.get((lower, symbol.line), 0)
+            found.setdefault(lower, []).append((symbol.kind, symbol.line, col))
+        return {lower: tuple(items) for lower, items in found.items()}
+
+    # Procedimientos y clases de ``definitions`` (incluye Property Get/Let
+    # del mismo nombre), más variables y constantes
+    globals_ = [s for s in table.definitions if not s.scope]
+    globals_ += [s for s in table.globals.values() if s.kind in ("variable", "constante")]
+    members = [s for s in table.definitions if s.scope]
+    for class_members in table.classes.values():
+        members += [s for s in class_members.values() if s.kind in ("variable", "constante")]
+    return ScriptSymbols(
+        definitions=located(globals_),
+        members=located(members),
+        references={lower: tuple(items) for lower, items in occurrences.items()},
+        lines=tuple(lines),
+    )
+
+
+class ModelSymbolIndex:
+    """
+    Definiciones y referencias de los scripts de un modelo.
+
+    Se puede usar a la vez desde el hilo de la interfaz (consultas y
+    ``update_script``) y desde el de ``ModelIndexWorker`` (``build``).
+    """
+
+    def __init__(self):
+        self._analyzer = SymbolAnalyzer()
+        self._by_hash: Dict[str, ScriptSymbols] = {}
+        # (label, key_values, hash) de cada script del modelo, en orden
+        self._scripts: List[Tuple[str, Tuple[str, ...], str]] = []
+        self._lock = threading.Lock()
+        self.ready = False
+
+    def _analyze(self, content: str) -> str:
+        digest = content_hash(content)
+        with self._lock:
+            if digest in self._by_hash:
+                return digest
+        symbols = analyze_script(content, self._analyzer)
+        with self._lock:
+            if len(self._by_hash) >= _CACHE_MAX:
+                self._by_hash.clear()
+            self._by_hash[digest] = symbols
+        return digest
+
+    def build(self, scripts: Sequence[dict],
+              cancelled: Optional[Callable[[], bool]] = None,
+              load_contents: Optional[ContentLoader] = None) -> bool:
+        """
+        Indexa *scripts* (dicts "label", "key_values", "content" como los
+        de ``DatabaseConnection.get_scripts_for_model``).
+
+        Los scripts sin "content" (listado solo con claves) se piden con
+        *load_contents*, por tandas de ``_LOAD_CHUNK``.
+
+        Returns:
+            False si *cancelled* pidió parar antes de acabar.
+        """
+        entries = []
+        pending: List[str] = []
+        for i, script in enumerate(scripts):
+            if cancelled is not None and cancelled():
+                return False
+            key_values = tuple(str(v).strip() for v in script.get("key_values")
+                               or [script.get("label", "")])
+            if "content" in script or load_contents is None:
+                content = script.get("content", "")
+            else:
+                if not pending:
+                    chunk = [s for s in scripts[i:i + _LOAD_CHUNK] if "content" not in s]
+                    pending = list(load_contents([list(s.get("key_values") or [])
+                                                  for s in chunk]))
+                    pending.reverse()
+                content = pending.pop()
+            digest = self._analyze(content or "")
+            entries.append((script.get("label", ""), key_values, digest))
+        with self._lock:
+            self._scripts = entries
+            self.ready = True
+            # Liberar los análisis de contenidos que ya no están en el modelo
+            alive = {digest for _, _, digest in entries}
+            self._by_hash = {d: s for d, s in self._by_hash.items() if d in alive}
+        return True
+
+    def update_script(self, key_values: Sequence[str], content: str,
+                      label: str = "") -> None:
+        """Vuelve a indexar un script (p.ej. el abierto, con sus cambios sin guardar)."""
+        key = tuple(str(v).strip() for v in key_values)
+        digest = self._analyze(content)
+        with self._lock:
+            for i, (old_label, old_key, _) in enumerate(self._scripts):
+                if _same_key(old_key, key):
+                    self._scripts[i] = (old_label, old_key, digest)
+                    return
+            self._scripts.append((label or (key[-1] if key else ""), key, digest))
+
+    def __len__(self) -> int:
+        return len(self._scripts)
+
+    # ------------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------------
+
+    def _each_script(self):
+        with self._lock:
+            scripts = list(self._scripts)
+            by_hash = self._by_hash
+        for label, key_values, digest in scripts:
+            symbols = by_hash.get(digest)
+            if symbols is not None:
+                yield label, key_values, symbols
+
+    def definitions(self, name: str) -> List[Location]:
+        """
+        Definiciones de *name* en el modelo: las de nivel superior y, si
+        no hay ninguna, las de miembros de clase (``obj.Metodo``).
+        """
+        lower = name.lower()
+        found, members = [], []
+        for label, key_values, symbols in self._each_script():
+            for kind, line, col in symbols.definitions.get(lower, ()):
+                found.append(Location(label, key_values, line, col, kind,
+                                      symbols.lines[line - 1]))
+            for kind, line, col in symbols.members.get(lower, ()):
+                members.append(Location(label, key_values, line, col, kind,
+                                        symbols.lines[line - 1]))
+        return found or members
+
+    def references(self, name: str) -> List[Location]:
+        """Apariciones de *name* (no locales) en todos los scripts del modelo."""
+        lower = name.lower()
+        found = []
+        for label, key_values, symbols in self._each_script():
+            for line, col in symbols.references.get(lower, ()):
+                found.append(Location(label, key_values, line, col, "",
+                                      symbols.lines[line - 1]))
+        return found
+
+
+def _same_key(a: Sequence[str], b: Sequence[str]) -> bool:
+    return [v.upper() for v in a] == [v.upper() for v in b]
+
+
+class ModelIndexWorker:
+    """
+    Construye un ``ModelSymbolIndex`` en un hilo aparte.
+
+    Args:
+        widget: Widget Tk cuyo ``after`` se usa para avisar en el hilo de
+            la interfaz.
+        index: Índice a construir.
+        on_ready: Función opcional (sin argumentos) llamada en el hilo de
+            la interfaz cuando el índice está listo.
+        on_error: Función opcional llamada en el hilo de la interfaz con el
+            mensaje de error si la construcción falla (queda en ``error``).
+        load_contents: Función opcional que trae el contenido de los
+            scripts listados sin él (se llama en el hilo del índice).
+        on_exit: Función opcional (sin argumentos) llamada en el hilo del
+            índice al terminar, tras ``close()``: cierra lo que use
+            *load_contents* (p.ej. su conexión) cuando ya no se está usando.
+    """
+
+    def __init__(self, widget, index: ModelSymbolIndex,
+                 on_ready: Optional[Callable[[], None]] = None,
+                 load_contents: Optional[ContentLoader] = None,
+                 on_exit: Optional[Callable[[], None]] = None,
+                 on_error: Optional[Callable[[str], None]] = None):
+        self.widget = widget
+        self.index = index
+        self.error: Optional[str] = None
+        self._on_ready = on_ready
+        self._on_error = on_error
+        self._load_contents = load_contents
+        self._on_exit = on_exit
+        self._generation = 0
+        self._job: Optional[Tuple[int, List[dict]]] = None
+        self._job_ready = threading.Condition()
+        # (generación, mensaje de error o None si terminó bien)
+        self._results: "queue.Queue[Tuple[int, Optional[str]]]" = queue.Queue()
+        self._poll_id = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._worker, name="ModelIndex", daemon=True)
+        self._thread.start()
+
+    def submit(self, scripts: Sequence[dict]) -> None:
+        """Reconstruye el índice con *scripts* (cancela la construcción en curso)."""
+        self._generation += 1
+        self.error = None
+        with self._job_ready:
+            self._job = (self._generation, list(scripts))
+            self._job_ready.notify()
+        if self._poll_id is None:
+            self._poll_id = self.widget.after(_POLL_MS, self._poll)
+
+    def _worker(self):
+        try:
+            self._run()
+        finally:
+            if self._on_exit:
+                try:
+                    self._on_exit()
+                except Exception as e:
+                    logger.warning("Error al cerrar el índice de símbolos del modelo: %s", e)
+
+    def _run(self):
+        while True:
+            with self._job_ready:
+                while self._job is None and not self._closed:
+                    self._job_ready.wait()
+                if self._closed:
+                    return
+                generation, scripts = self._job
+                self._job = None
+            try:
+                done = self.index.build(
+                    scripts, cancelled=lambda: generation != self._generation or self._closed,
+                    load_contents=self._load_contents)
+            except Exception as e:
+                logger.warning("No se pudo construir el índice de símbolos del modelo: %s", e)
+                self._results.put((generation, str(e) or type(e).__name__))
+                continue
+            if done:
+                self._results.put((generation, None))
+
+    def _poll(self):
+        self._poll_id = None
+        finished = False
+        error = None
+        while True:
+            try:
+                generation, message = self._results.get_nowait()
+            except queue.Empty:
+                break
+            if generation == self._generation:
+                finished, error = True, message
+        if finished:
+            if error is not None:
+                self.error = error
+                if self._on_error:
+                    self._on_error(error)
+            elif self._on_ready:
+                self._on_ready()
+        elif not self._closed:
+            self._poll_id = self.widget.after(_POLL_MS, self._poll)
+
+    def close(self):
+        """
+        Detiene el hilo y cancela la espera pendiente.  No espera a que
+        termine la construcción en curso: ``on_exit`` se llama al acabar.
+        """
+        if self._poll_id is not None:
+            try:
+                self.widget.after_cancel(self._poll_id)
+            except Exception:
+                pass
+            self._poll_id = None
+        with self._job_ready:
+            self._closed = True
+            self._job_ready.notify()
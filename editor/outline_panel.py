@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+"""
+Panel "Esquema" (Ctrl+Shift+O): Sub, Function, Property y Class del
+script con su número de línea.  Un clic en una entrada lleva a ella.
+
+  - Las definiciones salen de ``DefinitionIndex``, que tras cada edición
+    solo vuelve a leer las líneas cambiadas.
+  - La lista es virtual: el ``ttk.Treeview`` tiene solo las filas que
+    caben en pantalla y al desplazarse se cambian sus valores, así que
+    un script con miles de definiciones cuesta lo mismo que uno con diez.
+"""
+
+import tkinter as tk
+from tkinter import ttk
+from typing import Callable, List, Optional
+
+from config import COLOR_SIDEBAR_BG, ESQUEMA_DEBOUNCE_MS
+from editor.symbols import DefinitionIndex, Symbol
+
+# Alto de fila si el tema no lo define
+_ROW_HEIGHT = 20
+
+# Filas que se desplaza la lista por cada paso de la rueda del ratón
+_WHEEL_ROWS = 3
+
+_KIND_LABELS = {
+    "sub": "Sub",
+    "function": "Function",
+    "property": "Property",
+    "class": "Class",
+}
+
+
+class OutlinePanel(tk.Frame):
+    """
+    Esquema del script abierto en *text_widget*.
+
+    Args:
+        master: Widget padre.
+        text_widget: Editor (TextEditor) cuyo contenido se indexa.
+        on_jump: Función (línea) llamada al pulsar una entrada.
+    """
+
+    WIDTH = 230
+
+    def __init__(self, master, text_widget, on_jump: Callable[[int], None]):
+        super().__init__(master, bg=COLOR_SIDEBAR_BG, width=self.WIDTH)
+        self.pack_propagate(False)
+        self.text_widget = text_widget
+        self._on_jump = on_jump
+        self.index = DefinitionIndex()
+        self._offset = 0                  # Primera definición visible
+        self._rows: List[str] = []        # Filas del Treeview (reutilizadas)
+        self._selected: Optional[int] = None
+        self._after_id = None
+
+        self.count_label = tk.Label(
+            self, text="Esquema", bg=COLOR_SIDEBAR_BG, fg="#000000",
+            font=("Segoe UI", 9, "bold"), anchor="w", padx=6,
+        )
+        self.count_label.pack(side="top", fill="x")
+
+        frame = tk.Frame(self)
+        frame.pack(side="top", fill="both", expand=True)
+        self.tree = ttk.Treeview(frame, columns=("nombre", "linea"), show="headings",
+                                 selectmode="none")
+        self.tree.heading("nombre", text="Definición", anchor="w")
+        self.tree.heading("linea", text="Línea", anchor="e")
+        self.tree.column("nombre", width=170, anchor="w")
+        self.tree.column("linea", width=50, stretch=False, anchor="e")
+        self.tree.tag_configure("selected", background="#CCE8FF")
+        self.scroll = ttk.Scrollbar(frame, orient="vertical", command=self._on_scrollbar)
+        self.scroll.pack(side="right", fill="y")
+        self.tree.pack(side="left", fill="both", expand=True)
+
+        self.tree.bind("<Configure>", self._on_resize)
+        self.tree.bind("<ButtonRelease-1>", self._on_click)
+        self.tree.bind("<MouseWheel>", self._on_wheel)
+        self.tree.bind("<Button-4>", lambda e: self._scroll_to(self._offset - _WHEEL_ROWS))
+        self.tree.bind("<Button-5>", lambda e: self._scroll_to(self._offset + _WHEEL_ROWS))
+
+        # <Key>, como LiveValidator: el texto se lee tras la espera
+        text_widget.bind("<Key>", self.schedule, add=True)
+        for sequence in ("<<Paste>>", "<<Cut>>", "<<Undo>>", "<<Redo>>",
+                         "<<ContentReplaced>>"):
+            text_widget.bind(sequence, self.schedule, add=True)
+
+    # ------------------------------------------------------------------
+    # Actualización del índice
+    # ------------------------------------------------------------------
+
+    def schedule(self, event=None):
+        """Actualiza tras ``ESQUEMA_DEBOUNCE_MS`` sin más ediciones (si está visible)."""
+        if not self.winfo_ismapped():
+            return
+        if self._after_id is not None:
+            self.after_cancel(self._after_id)
+        self._after_id = self.after(ESQUEMA_DEBOUNCE_MS, self.refresh)
+
+    def refresh(self):
+        """Lee el texto del editor y, si cambiaron las definiciones, redibuja."""
+        self._after_id = None
+        if self.index.update(self.text_widget.get("1.0", "end-1c")):
+            total = len(self.index.definitions)
+            if self._selected is not None and self._selected >= total:
+                self._selected = None
+            self.count_label.config(text=f"Esquema ({total})")
+            self._render()
+
+    # ------------------------------------------------------------------
+    # Lista virtual
+    # ------------------------------------------------------------------
+
+    def _visible_rows(self) -> int:
+        row_height = int(ttk.Style().lookup("Treeview", "rowheight") or _ROW_HEIGHT)
+        # La cabecera ocupa aproximadamente una fila
+        return max(1, self.tree.winfo_height() // row_height - 1)
+
+    def _on_resize(self, event=None):
+        wanted = self._visible_rows()
+        while len(self._rows) < wanted:
+            self._rows.append(self.tree.insert("", "end", values=("", "")))
+        while len(self._rows) > wanted:
+            self.tree.delete(self._rows.pop())
+        self._scroll_to(self._offset)
+
+    def _scroll_to(self, offset: int):
+        total = len(self.index.definitions)
+        self._offset = max(0, min(offset, total - len(self._rows)))
+        self._render()
+
+    def _render(self):
+        """Copia en las filas del Treeview las definiciones visibles."""
+        definitions = self.index.definitions
+        total = len(definitions)
+        self._offset = max(0, min(self._offset, total - len(self._rows)))
+        for row, item in enumerate(self._rows):
+            i = self._offset + row
+            if i < total:
+                values = (self._label(definitions[i]), definitions[i].line)
+            else:
+                values = ("", "")
+            self.tree.item(item, values=values,
+                           tags=("selected",) if i == self._selected else ())
+        if total:
+            self.scroll.set(self._offset / total,
+                            min(1.0, (self._offset + len(self._rows)) / total))
+        else:
+            self.scroll.set(0.0, 1.0)
+
+    @staticmethod
+    def _label(symbol: Symbol) -> str:
+        indent = "    " if symbol.scope else ""
+        return f"{indent}{_KIND_LABELS.get(symbol.kind, symbol.kind)} {symbol.name}"
+
+    def _on_scrollbar(self, action, value, unit=None):
+        if action == "moveto":
+            self._scroll_to(int(float(value) * len(self.index.definitions)))
+        elif action == "scroll":
+            step = len(self._rows) if unit == "pages" else 1
+            self._scroll_to(self._offset + int(value) * step)
+
+    def _on_wheel(self, event):
+        self._scroll_to(self._offset - _WHEEL_ROWS * (1 if event.delta > 0 else -1))
+        return "break"
+
+    # ------------------------------------------------------------------
+    # Navegación
+    # ------------------------------------------------------------------
+
+    def _on_click(self, event):
+        item = self.tree.identify_row(event.y)
+        if item not in self._rows:
+            return
+        i = self._offset + self._rows.index(item)
+        if i >= len(self.index.definitions):
+            return
+        self._selected = i
+        self._render()
+        self._on_jump(self.index.definitions[i].line)
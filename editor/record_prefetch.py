@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""
+Precarga en segundo plano de los registros vecinos al script abierto.
+
+Cambiar de script en el desplegable bloquea la interfaz mientras llega
+el registro completo.  ``RecordPrefetcher`` trae en otro hilo, con su
+propia conexión (``DatabaseConnection.clone``), los registros de los
+scripts de al lado en el desplegable y de los últimos abiertos:
+
+  - Se guardan con su versión (rowversion o hash de la fila, ver
+    ``DatabaseConnection.get_record_version``) en ``record_cache`` de la
+    conexión, que el clon comparte y que está limitada en bytes.
+  - Cada ``schedule()`` cancela la precarga anterior (número de
+    generación).  Si la tabla de la conexión cambia (``switch_context``)
+    se olvidan los últimos abiertos (la caché va por tabla).
+  - Un registro precargado se puede mostrar al momento, pero hay que
+    comprobar su versión antes de editarlo (``EditorApp`` lo hace justo
+    después de mostrarlo).
+"""
+
+import logging
+import threading
+from collections import deque
+from typing import List, Optional, Sequence, Tuple
+
+from config import PRECARGA_RECIENTES, PRECARGA_VECINOS
+
+logger = logging.getLogger("EditorVBS.app")
+
+# (registro, versión)
+Entry = Tuple[dict, str]
+
+
+def _key(key_values: Sequence[str]) -> Tuple[str, ...]:
+    return tuple(str(v).strip().upper() for v in key_values)
+
+
+class RecordPrefetcher:
+    """
+    Precarga de registros en ``db.record_cache`` desde un hilo aparte.
+
+    Args:
+        db: Conexión de la interfaz (se clona para el hilo de precarga).
+        key_columns: Columnas clave de los registros.
+        neighbours: Scripts a cada lado del seleccionado que se precargan.
+        recent: Últimos scripts abiertos que se mantienen precargados.
+    """
+
+    def __init__(self, db, key_columns: Sequence[str],
+                 neighbours: int = PRECARGA_VECINOS, recent: int = PRECARGA_RECIENTES):
+        self._db = db
+        self.key_columns = list(key_columns)
+        self.neighbours = neighbours
+        self._recent: deque = deque(maxlen=recent)
+        self._table = db.table
+        self._conn = None           # Solo se usa en el hilo de precarga
+        self._generation = 0
+        self._job: Optional[Tuple[int, str, List[List[str]]]] = None
+        self._job_ready = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._worker, name="RecordPrefetch", daemon=True)
+        self._thread.start()
+
+    # ------------------------------------------------------------------
+    # Caché (hilo de la interfaz)
+    # ------------------------------------------------------------------
+
+    def get(self, key_values: Sequence[str]) -> Optional[Entry]:
+        """
+        (copia del registro, versión) si está precargado (o ya se abrió),
+        o None.  No consulta al servidor: hay que revalidarlo.
+        """
+        return self._db.cached_record(list(key_values))
+
+    def touch(self, key_values: Sequence[str]) -> None:
+        """Apunta *key_values* como el último script abierto."""
+        key = _key(key_values)
+        self._recent = deque((kv for kv in self._recent if _key(kv) != key),
+                             maxlen=self._recent.maxlen)
+        self._recent.append(list(key_values))
+
+    # ------------------------------------------------------------------
+    # Precarga
+    # ------------------------------------------------------------------
+
+    def schedule(self, scripts: Sequence[dict], index: int) -> None:
+        """
+        Precarga los vecinos de ``scripts[index]`` en el desplegable y los
+        últimos abiertos.  Cancela la precarga anterior.
+        """
+        if self._db.table != self._table:
+            # Cambio de contexto (otra tabla): lo precargado ya no sirve
+            self._table = self._db.table
+            self._recent.clear()
+        candidates = []
+        for distance in range(1, self.neighbours + 1):
+            for i in (index + distance, index - distance):
+                if 0 <= index and 0 <= i < len(scripts):
+                    candidates.append(scripts[i].get("key_values"))
+        candidates += reversed(self._recent)
+
+        current = _key(scripts[index].get("key_values") or []) \
+            if 0 <= index < len(scripts) else None
+        seen = {current}
+        todo = []
+        for key_values in candidates:
+            key = _key(key_values or [])
+            if key and key not in seen and len(key) == len(self.key_columns):
+                seen.add(key)
+                todo.append(list(key_values))
+
+        self._generation += 1
+        with self._job_ready:
+            self._job = (self._generation, self._table, todo)
+            self._job_ready.notify()
+
+    def cancel(self) -> None:
+        """Cancela la precarga en curso (lo ya precargado se mantiene)."""
+        self._generation += 1
+        with self._job_ready:
+            self._job = None
+
+    def close(self) -> None:
+        """Detiene el hilo; su conexión se cierra en él."""
+        with self._job_ready:
+            self._closed = True
+            self._job = None
+            self._job_ready.notify()
+
+    def _connection(self, table: str):
+        if self._conn is None:
+            conn = self._db.clone()
+            conn.connect()
+            self._conn = conn
+        self._conn.table = table
+        return self._conn
+
+    def _close_connection(self) -> None:
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+            self._conn = None
+
+    def _worker(self):
+        while True:
+            with self._job_ready:
+                while self._job is None and not self._closed:
+                    self._job_ready.wait()
+                if self._closed:
+                    break
+                generation, table, todo = self._job
+                self._job = None
+            for key_values in todo:
+                if generation != self._generation or self._closed:
+                    break
+                try:
+                    conn = self._connection(table)
+                    if conn.cached_record(key_values) is None:
+                        # Queda en record_cache, compartida con la interfaz
+                        conn.get_record_versioned(self.key_columns, key_values)
+                except LookupError:
+                    continue
+                except Exception as e:
+                    # Sin conexión no se precarga; se reintenta en el siguiente schedule()
+                    logger.warning("Precarga de registros interrumpida: %s", e)
+                    self._close_connection()
+                    break
+        self._close_connection()
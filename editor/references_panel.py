@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+Ventana con las definiciones o referencias de un nombre en los scripts
+del modelo (F12 con varias definiciones, Shift+F12).
+
+Los resultados se agrupan por script; doble clic (o Enter) en una línea
+abre el script en esa posición.
+"""
+
+import tkinter as tk
+from tkinter import ttk
+from typing import Callable, Dict, List, Tuple
+
+from config import COLOR_SIDEBAR_BG
+from editor.model_index import Location
+from editor.search_engine import format_count
+
+
+class ReferencesPanel(tk.Toplevel):
+    """
+    Lista de posiciones de un nombre.
+
+    Args:
+        master: Ventana principal.
+        title: Título de la ventana.
+        locations: Posiciones a mostrar (``ModelSymbolIndex``).
+        on_open: Función (Location) que abre el script en esa posición.
+    """
+
+    def __init__(self, master, title: str, locations: List[Location],
+                 on_open: Callable[[Location], None]):
+        super().__init__(master, bg=COLOR_SIDEBAR_BG)
+        self.title(title)
+        self.geometry("700x360")
+        self.transient(master)
+        self._on_open = on_open
+        self._items: Dict[str, Location] = {}
+
+        scripts = len({loc.key_values for loc in locations})
+        tk.Label(
+            self, text=f"{format_count(len(locations))} resultado(s) en "
+                       f"{format_count(scripts)} script(s)",
+            bg=COLOR_SIDEBAR_BG, fg="#555555", font=("Segoe UI", 8), anchor="w", padx=6,
+        ).pack(side="top", fill="x")
+
+        frame = tk.Frame(self)
+        frame.pack(side="top", fill="both", expand=True)
+        self.tree = ttk.Treeview(frame, columns=("linea", "texto"), show="tree headings")
+        self.tree.heading("#0", text="Script")
+        self.tree.heading("linea", text="Línea")
+        self.tree.heading("texto", text="Texto")
+        self.tree.column("#0", width=160, stretch=False)
+        self.tree.column("linea", width=60, stretch=False, anchor="e")
+        self.tree.column("texto", width=460)
+        scroll = ttk.Scrollbar(frame, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scroll.set)
+        scroll.pack(side="right", fill="y")
+        self.tree.pack(side="left", fill="both", expand=True)
+        self.tree.bind("<Double-1>", self._on_activate)
+        self.tree.bind("<Return>", self._on_activate)
+        self.bind("<Escape>", lambda e: self.destroy())
+
+        groups: Dict[Tuple[str, ...], str] = {}
+        for loc in locations:
+            parent = groups.get(loc.key_values)
+            if parent is None:
+                parent = self.tree.insert("", "end", text=loc.label, open=True,
+                                          values=("", ""))
+                groups[loc.key_values] = parent
+                self._items[parent] = loc
+            item = self.tree.insert(parent, "end", text="",
+                                    values=(loc.line, loc.text.strip()))
+            self._items[item] = loc
+        self.tree.focus_set()
+
+    def _on_activate(self, event=None):
+        loc = self._items.get(self.tree.focus())
+        if loc is not None:
+            self._on_open(loc)
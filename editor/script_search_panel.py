@@ -0,0 +1,281 @@
+# -*- coding: utf-8 -*-
+"""
+Panel "Buscar en todos los scripts" (Ctrl+Shift+F).
+
+Busca un texto en todos los registros de la tabla activa (G_SCRIPT o
+E_PROGRA) sin abrirlos uno a uno desde el desplegable:
+
+  - El servidor (o el índice local) filtra las filas que contienen el
+    texto y se leen por lotes (``fetchmany``), así que los primeros
+    resultados aparecen enseguida aunque la tabla tenga miles de scripts.
+  - Las filas se leen y sus líneas concretas se calculan en un hilo
+    aparte, con su propia conexión: la interfaz no espera al servidor ni
+    deja ocupada la conexión del editor.  Los resultados vuelven por una
+    cola que se recoge con ``after`` (como en ``RecordPrefetcher``).
+  - Doble clic (o Enter) en una línea abre el script en esa línea.
+"""
+
+import logging
+import queue
+import threading
+import time
+import tkinter as tk
+from tkinter import ttk
+from typing import Callable, Iterator, List, Optional, Tuple
+
+from config import COLOR_SIDEBAR_BG
+from editor.search_engine import format_count, line_hits
+
+logger = logging.getLogger("EditorVBS.app")
+
+# Tiempo máximo por porción de trabajo en el hilo de la interfaz
+_SLICE_SECONDS = 0.03
+
+# Intervalo de recogida de resultados del hilo de búsqueda
+_POLL_MS = 30
+
+# Líneas mostradas como máximo por script
+_MAX_HITS_PER_SCRIPT = 100
+
+
+class ScriptSearchPanel(tk.Toplevel):
+    """
+    Ventana de búsqueda en todos los scripts.
+
+    Args:
+        master: Ventana principal.
+        search_rows: Función (texto) → iterador de dicts con claves
+            "label", "key_values" y "content" de los scripts que
+            contienen el texto (ver ``DatabaseConnection.search_scripts``).
+            Se llama en el hilo de búsqueda: debe usar su propia conexión.
+        on_open: Función (key_values, línea) que abre el script.
+        on_exit: Función opcional (sin argumentos) llamada en el hilo de
+            búsqueda al cerrar el panel: cierra lo que use *search_rows*.
+    """
+
+    def __init__(self, master, search_rows: Callable[[str], Iterator[dict]],
+                 on_open: Callable[[List[str], int], None],
+                 on_exit: Optional[Callable[[], None]] = None):
+        super().__init__(master, bg=COLOR_SIDEBAR_BG)
+        self.title("Buscar en todos los scripts")
+        self.geometry("760x420")
+        self.transient(master)
+
+        self._search_rows = search_rows
+        self._on_open = on_open
+        self._on_exit = on_exit
+        self._running = False
+        self._after_id = None
+        self._hits = {}            # item del árbol → (key_values, línea)
+        self._scripts = 0
+        self._lines = 0
+        self._options = None
+        # Hilo de búsqueda: trabajo con número de generación y resultados
+        # (generación, etiqueta, key_values, líneas) por cola; etiqueta None = fin
+        self._generation = 0
+        self._job: Optional[Tuple[int, str, tuple]] = None
+        self._job_ready = threading.Condition()
+        self._results: "queue.Queue[tuple]" = queue.Queue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._worker, name="ScriptSearch", daemon=True)
+        self._thread.start()
+
+        self._match_case = tk.BooleanVar(value=False)
+        self._whole_word = tk.BooleanVar(value=False)
+
+        # --- Barra superior ---
+        top = tk.Frame(self, bg=COLOR_SIDEBAR_BG, padx=6, pady=4)
+        top.pack(side="top", fill="x")
+
+        tk.Label(
+            top, text="Buscar:", bg=COLOR_SIDEBAR_BG, fg="#000000",
+            font=("Segoe UI", 9, "bold"),
+        ).pack(side="left", padx=(0, 4))
+
+        self.search_var = tk.StringVar()
+        self.entry = tk.Entry(
+            top,
+            textvariable=self.search_var,
+            font=("Segoe UI", 10),
+            bg="#FFFFFF",
+            fg="#000000",
+            insertbackground="#000000",
+            relief="solid",
+            borderwidth=1,
+            width=35,
+        )
+        self.entry.pack(side="left", padx=(0, 4))
+        self.entry.bind("<Return>", lambda e: self.start())
+        self.entry.bind("<Escape>", lambda e: self.close())
+
+        tk.Button(
+            top, text="Buscar", command=self.start, bg="#E0E0E0", fg="#000000",
+            activebackground="#C0C0C0", relief="raised", font=("Segoe UI", 8),
+            padx=6, pady=1,
+        ).pack(side="left", padx=(0, 2))
+
+        for text, variable in (("Aa", self._match_case), ("ab", self._whole_word)):
+            tk.Checkbutton(
+                top, text=text, variable=variable, bg=COLOR_SIDEBAR_BG, fg="#000000",
+                activebackground=COLOR_SIDEBAR_BG, font=("Segoe UI", 8),
+            ).pack(side="left", padx=(0, 2))
+
+        self.status_label = tk.Label(
+            top, text="", bg=COLOR_SIDEBAR_BG, fg="#555555", font=("Segoe UI", 8),
+        )
+        self.status_label.pack(side="left", padx=(6, 0))
+
+        # --- Resultados: script → líneas ---
+        frame = tk.Frame(self)
+        frame.pack(side="top", fill="both", expand=True)
+        self.tree = ttk.Treeview(frame, columns=("linea", "texto"), show="tree headings")
+        self.tree.heading("#0", text="Script")
+        self.tree.heading("linea", text="Línea")
+        self.tree.heading("texto", text="Texto")
+        self.tree.column("#0", width=180, stretch=False)
+        self.tree.column("linea", width=60, stretch=False, anchor="e")
+        self.tree.column("texto", width=500)
+        scroll = ttk.Scrollbar(frame, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scroll.set)
+        scroll.pack(side="right", fill="y")
+        self.tree.pack(side="left", fill="both", expand=True)
+        self.tree.bind("<Double-1>", self._on_activate)
+        self.tree.bind("<Return>", self._on_activate)
+
+        self.protocol("WM_DELETE_WINDOW", self.close)
+        self.entry.focus_set()
+
+    # ------------------------------------------------------------------
+    # Búsqueda en streaming
+    # ------------------------------------------------------------------
+
+    def start(self):
+        """Lanza la búsqueda (cancela la anterior) y limpia los resultados."""
+        self.cancel()
+        self.tree.delete(*self.tree.get_children())
+        self._hits.clear()
+        self._scripts = 0
+        self._lines = 0
+        query = self.search_var.get()
+        if not query:
+            self.status_label.config(text="")
+            return
+        self._options = (query, self._match_case.get(), False, self._whole_word.get())
+        self._generation += 1
+        with self._job_ready:
+            self._job = (self._generation, query, self._options)
+            self._job_ready.notify()
+        self._running = True
+        self.status_label.config(text="Buscando…", fg="#555555")
+        self._after_id = self.after(_POLL_MS, self._poll)
+
+    def _worker(self):
+        try:
+            self._run()
+        finally:
+            if self._on_exit:
+                try:
+                    self._on_exit()
+                except Exception as e:
+                    logger.warning("Error al cerrar la búsqueda en todos los scripts: %s", e)
+
+    def _run(self):
+        """Bucle del hilo de búsqueda: lee filas y calcula sus líneas."""
+        while True:
+            with self._job_ready:
+                while self._job is None and not self._closed:
+                    self._job_ready.wait()
+                if self._closed:
+                    return
+                generation, query, options = self._job
+                self._job = None
+            rows = None
+            error = None
+            try:
+                rows = self._search_rows(query)
+                for row in rows:
+                    if generation != self._generation or self._closed:
+                        break
+                    hits = line_hits(row.get("content", ""), *options,
+                                     max_hits=_MAX_HITS_PER_SCRIPT)
+                    if hits:  # El servidor filtra sin distinguir mayúsculas/palabras
+                        self._results.put((generation, row.get("label", ""),
+                                           row.get("key_values") or [], hits))
+            except Exception as e:
+                error = e
+            finally:
+                # Libera el cursor de la conexión aunque no se haya agotado
+                close = getattr(rows, "close", None)
+                if close:
+                    close()
+            self._results.put((generation, None, None, error))
+
+    def _poll(self):
+        """Añade los resultados llegados durante como mucho ``_SLICE_SECONDS``."""
+        self._after_id = None
+        slice_end = time.perf_counter() + _SLICE_SECONDS
+        while time.perf_counter() < slice_end:
+            try:
+                generation, label, key_values, extra = self._results.get_nowait()
+            except queue.Empty:
+                break
+            if generation != self._generation:
+                continue                # De una búsqueda anterior
+            if label is None:
+                self._running = False
+                if extra is not None:
+                    self.status_label.config(text=f"Error: {extra}", fg="#C00000")
+                    return
+                break
+            self._add_row(label, key_values, extra)
+        if self._running:
+            self._after_id = self.after(_POLL_MS, self._poll)
+        self._update_status()
+
+    def _add_row(self, label: str, key_values: List[str], hits: list):
+        """Añade un script con sus líneas."""
+        parent = self.tree.insert("", "end", text=label, open=True,
+                                  values=("", f"{len(hits)} línea(s)"))
+        self._hits[parent] = (key_values, hits[0][0])
+        for line, _col, text in hits:
+            item = self.tree.insert(parent, "end", text="", values=(line, text.strip()))
+            self._hits[item] = (key_values, line)
+        self._scripts += 1
+        self._lines += len(hits)
+
+    def _update_status(self):
+        running = "…" if self._running else ""
+        self.status_label.config(
+            text=f"{format_count(self._lines)} líneas en "
+                 f"{format_count(self._scripts)} scripts{running}",
+            fg="#555555",
+        )
+
+    def cancel(self):
+        """Detiene la búsqueda (el hilo libera el cursor al ver el cambio)."""
+        if self._after_id is not None:
+            self.after_cancel(self._after_id)
+            self._after_id = None
+        self._generation += 1
+        with self._job_ready:
+            self._job = None
+        self._running = False
+
+    # ------------------------------------------------------------------
+    # Abrir resultado
+    # ------------------------------------------------------------------
+
+    def _on_activate(self, event=None):
+        item = self.tree.focus()
+        if item not in self._hits:
+            return
+        key_values, line = self._hits[item]
+        self._on_open(key_values, line)
+
+    def close(self):
+        """Cierra el panel; ``on_exit`` se llama en el hilo al terminar."""
+        self.cancel()
+        with self._job_ready:
+            self._closed = True
+            self._job_ready.notify()
+        self.destroy()
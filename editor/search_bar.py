@@ -4,14 +4,19 @@ Barra de búsqueda y reemplazo integrada en el editor.
 
 Se muestra como un panel flotante en la parte superior del editor,
 al estilo VS Code.  Soporta:
+  - Buscar mientras se escribe (con espera y en segundo plano)
   - Buscar siguiente / anterior (Enter / Shift+Enter)
-  - Reemplazar una ocurrencia / todas
+  - Reemplazar una ocurrencia / todas (todas = un solo paso de deshacer)
   - Buscar con coincidencia de mayúsculas (match case)
+  - Palabra completa, expresión regular y solo en la selección
   - Escape para cerrar
 """
 
+import re
+import time
 import tkinter as tk
-from config import COLOR_BARRA_ESTADO_BG, COLOR_BARRA_ESTADO_FG
+from config import COLOR_BARRA_ESTADO_BG, COLOR_BARRA_ESTADO_FG, BUSQUEDA_DEBOUNCE_MS
+from editor.search_engine import SearchEngine, SearchTimeout, format_count
 
 
 class SearchBar(tk.Frame):
@@ -23,16 +28,19 @@ class SearchBar(tk.Frame):
     def __init__(self, parent, text_widget: tk.Text):
         super().__init__(parent, bg=COLOR_BARRA_ESTADO_BG, padx=6, pady=4)
         self.text_widget = text_widget
-        self._matches: list[str] = []   # índices Tkinter de matches
-        self._current_idx = -1
+        self._engine = SearchEngine(text_widget, self._TAG, self._TAG_CURRENT)
+        self._search_after_id = None   # Búsqueda pendiente (debounce)
         self._match_case = tk.BooleanVar(value=False)
+        self._whole_word = tk.BooleanVar(value=False)
+        self._regex = tk.BooleanVar(value=False)
+        self._in_selection = tk.BooleanVar(value=False)
 
         # --- Fila 1: Buscar ---
         row1 = tk.Frame(self, bg=COLOR_BARRA_ESTADO_BG)
         row1.pack(fill="x", pady=(0, 2))
 
         self.search_var = tk.StringVar()
-        self.search_var.trace_add("write", lambda *_: self._on_search_change())
+        self.search_var.trace_add("write", lambda *_: self._schedule_search())
 
         self.entry_search = tk.Entry(
             row1, textvariable=self.search_var,
@@ -50,12 +58,10 @@ class SearchBar(tk.Frame):
         )
         self.match_label.pack(side="left", padx=(0, 6))
 
-        tk.Checkbutton(
-            row1, text="Aa", variable=self._match_case,
-            bg=COLOR_BARRA_ESTADO_BG, fg=COLOR_BARRA_ESTADO_FG,
-            selectcolor="#3c3c3c", activebackground=COLOR_BARRA_ESTADO_BG,
-            font=("Segoe UI", 9), command=self._on_search_change,
-        ).pack(side="left", padx=(0, 4))
+        self._toggle(row1, "Aa", self._match_case, self._on_search_change)
+        self._toggle(row1, "ab", self._whole_word, self._on_search_change)
+        self._toggle(row1, ".*", self._regex, self._on_search_change)
+        self._toggle(row1, "Sel", self._in_selection, self._on_scope_toggle)
 
         self._btn(row1, "▲", self.find_prev)
         self._btn(row1, "▼", self.find_next)
@@ -99,6 +105,17 @@ class SearchBar(tk.Frame):
         b.pack(side="left", padx=(0, 2))
         return b
 
+    @staticmethod
+    def _toggle(parent, text, variable, command):
+        c = tk.Checkbutton(
+            parent, text=text, variable=variable,
+            bg=COLOR_BARRA_ESTADO_BG, fg=COLOR_BARRA_ESTADO_FG,
+            selectcolor="#3c3c3c", activebackground=COLOR_BARRA_ESTADO_BG,
+            font=("Segoe UI", 9), command=command,
+        )
+        c.pack(side="left", padx=(0, 4))
+        return c
+
     # ------------------------------------------------------------------
     # Mostrar / ocultar
     # ------------------------------------------------------------------
@@ -110,6 +127,8 @@ class SearchBar(tk.Frame):
             self.lift()
             self._visible = True
         self.entry_search.focus_set()
+        # Guardar la selección como ámbito antes de que el foco la quite
+        self._engine.capture_scope()
         # Pre-llenar con texto seleccionado si hay
         try:
             sel = self.text_widget.get("sel.first", "sel.last")
@@ -134,71 +153,98 @@ class SearchBar(tk.Frame):
     # Búsqueda
     # ------------------------------------------------------------------
 
+    @property
+    def _matches(self):
+        return self._engine.starts
+
+    def refresh_viewport(self):
+        """Re-etiqueta las coincidencias de la zona visible (tras un scroll)."""
+        self._engine.refresh_viewport()
+
+    def _schedule_search(self):
+        """Búsqueda al escribir: espera BUSQUEDA_DEBOUNCE_MS tras la última tecla."""
+        if self._search_after_id is not None:
+            self.after_cancel(self._search_after_id)
+        self._engine.cancel()
+        self._search_after_id = self.after(BUSQUEDA_DEBOUNCE_MS, self._on_search_change)
+
+    def _ensure_search(self) -> bool:
+        """
+        Lanza ya la búsqueda pendiente (o la repite si no hay resultados
+        vigentes) y la completa.
+
+        Returns:
+            True si la búsqueda se acaba de lanzar (la coincidencia
+            actual ya es la primera a partir del cursor).
+        """
+        launched = False
+        if self._search_after_id is not None or self._engine.options is None:
+            self._on_search_change()
+            launched = True
+        self._engine.finish()
+        return launched
+
     def _on_search_change(self):
-        """Se llama cada vez que cambia el texto de búsqueda."""
-        self._find_all()
-        if self._matches:
-            self._current_idx = 0
-            self._highlight_current()
+        """Inicia la búsqueda incremental con el texto y los modos actuales."""
+        if self._search_after_id is not None:
+            self.after_cancel(self._search_after_id)
+            self._search_after_id = None
+        self._engine.start(
+            self.search_var.get(),
+            match_case=self._match_case.get(),
+            regex=self._regex.get(),
+            whole_word=self._whole_word.get(),
+            in_selection=self._in_selection.get(),
+            on_update=self._update_label,
+        )
+        self._update_label()
 
-    def _find_all(self):
-        """Encuentra todas las ocurrencias y las guarda en self._matches."""
-        self._clear_tags()
-        self._matches.clear()
-        self._current_idx = -1
+    def _on_scope_toggle(self):
+        """Al activar "en selección" se toma la selección actual como ámbito."""
+        if self._in_selection.get():
+            self._engine.capture_scope()
+        self._on_search_change()
 
-        query = self.search_var.get()
-        if not query:
+    def _find_all(self):
+        """Encuentra todas las ocurrencias de forma síncrona."""
+        self._on_search_change()
+        self._engine.finish()
+
+    def _update_label(self):
+        """Actualiza el contador según el estado del motor de búsqueda."""
+        engine = self._engine
+        self.match_label.config(fg=COLOR_BARRA_ESTADO_FG)
+        if not self.search_var.get():
             self.match_label.config(text="")
-            return
-
-        nocase = not self._match_case.get()
-        start = "1.0"
-        while True:
-            pos = self.text_widget.search(
-                query, start, stopindex="end", nocase=nocase
+        elif engine.error:
+            self.match_label.config(text=engine.error, fg="#f48771")
+        elif engine.running:
+            self.match_label.config(text=f"{format_count(engine.count)}…")
+        elif engine.timed_out:
+            self.match_label.config(
+                text=f"{format_count(engine.count, True)} resultados "
+                     f"(tiempo agotado: simplifique la expresión)"
             )
-            if not pos:
-                break
-            end = f"{pos}+{len(query)}c"
-            self.text_widget.tag_add(self._TAG, pos, end)
-            self._matches.append(pos)
-            start = end
-
-        total = len(self._matches)
-        self.match_label.config(text=f"{total} resultado{'s' if total != 1 else ''}")
-
-    def _highlight_current(self):
-        """Resalta la coincidencia actual de forma diferenciada."""
-        self.text_widget.tag_remove(self._TAG_CURRENT, "1.0", "end")
-        if not self._matches:
-            return
-        pos = self._matches[self._current_idx]
-        query = self.search_var.get()
-        end = f"{pos}+{len(query)}c"
-        self.text_widget.tag_add(self._TAG_CURRENT, pos, end)
-        self.text_widget.see(pos)
-        self.match_label.config(
-            text=f"{self._current_idx + 1}/{len(self._matches)}"
-        )
+        elif engine.current >= 0:
+            total = format_count(engine.count, engine.capped)
+            self.match_label.config(text=f"{engine.current + 1}/{total}")
+        else:
+            self.match_label.config(text="0 resultados")
 
     def find_next(self):
         """Salta a la siguiente coincidencia."""
-        if not self._matches:
-            self._find_all()
-        if not self._matches:
-            return
-        self._current_idx = (self._current_idx + 1) % len(self._matches)
-        self._highlight_current()
+        if self._ensure_search() and self._engine.current >= 0:
+            # Búsqueda recién lanzada: la actual ya es la primera desde el cursor
+            self._engine.highlight(self._engine.current, move_cursor=True)
+        else:
+            self._engine.next()
+        self._update_label()
 
     def find_prev(self):
         """Salta a la coincidencia anterior."""
-        if not self._matches:
-            self._find_all()
-        if not self._matches:
-            return
-        self._current_idx = (self._current_idx - 1) % len(self._matches)
-        self._highlight_current()
+        self._ensure_search()
+        self._engine.prev()
+        self._update_label()
 
     # ------------------------------------------------------------------
     # Reemplazo
@@ -206,42 +252,64 @@ class SearchBar(tk.Frame):
 
     def replace_one(self):
         """Reemplaza la coincidencia actual y avanza a la siguiente."""
-        if not self._matches or self._current_idx < 0:
+        self._ensure_search()
+        current = self._engine.current
+        if not self._matches or current < 0:
             return
-        pos = self._matches[self._current_idx]
-        query = self.search_var.get()
-        replacement = self.replace_var.get()
-        end = f"{pos}+{len(query)}c"
+        pos, end = self._engine.match_indices(current)
+        replacement = self._engine.expand(current, self.replace_var.get())
 
-        self.text_widget.delete(pos, end)
-        self.text_widget.insert(pos, replacement)
+        # replace_range avisa con <<ContentReplaced>> a quien sigue el texto
+        self.text_widget.replace_range(pos, end, replacement)
+        self.text_widget.mark_set("insert", f"{pos}+{len(replacement)}c")
 
-        # Re-buscar porque las posiciones cambiaron
+        # Re-buscar porque las posiciones cambiaron y seguir desde el cursor
         self._find_all()
-        if self._matches:
-            self._current_idx = min(self._current_idx, len(self._matches) - 1)
-            self._highlight_current()
+        if self._engine.next():
+            self._update_label()
 
     def replace_all(self):
-        """Reemplaza todas las coincidencias."""
+        """
+        Reemplaza todas las coincidencias en una sola edición (un solo
+        Ctrl+Z) e indica cuántas se reemplazaron y el tiempo empleado.
+        """
         query = self.search_var.get()
-        replacement = self.replace_var.get()
         if not query:
             return
+        if self._search_after_id is not None:
+            self.after_cancel(self._search_after_id)
+            self._search_after_id = None
 
-        # Reemplazar de abajo a arriba para mantener posiciones válidas
-        self._find_all()
-        for pos in reversed(self._matches):
-            end = f"{pos}+{len(query)}c"
-            self.text_widget.delete(pos, end)
-            self.text_widget.insert(pos, replacement)
+        t0 = time.perf_counter()
+        try:
+            count = self._engine.replace_all(
+                query,
+                self.replace_var.get(),
+                match_case=self._match_case.get(),
+                regex=self._regex.get(),
+                whole_word=self._whole_word.get(),
+                in_selection=self._in_selection.get(),
+            )
+        except re.error as e:
+            self.match_label.config(text=f"Reemplazo no válido: {e}", fg="#f48771")
+            return
+        except SearchTimeout:
+            self.match_label.config(text="Reemplazo cancelado (tiempo agotado)", fg="#f48771")
+            return
+        elapsed_ms = (time.perf_counter() - t0) * 1000
 
         self._find_all()
+        self.match_label.config(
+            text=f"{format_count(count)} reemplazos ({elapsed_ms:.0f} ms)",
+            fg=COLOR_BARRA_ESTADO_FG,
+        )
 
     # ------------------------------------------------------------------
     # Limpieza
     # ------------------------------------------------------------------
 
     def _clear_tags(self):
-        self.text_widget.tag_remove(self._TAG, "1.0", "end")
-        self.text_widget.tag_remove(self._TAG_CURRENT, "1.0", "end")
+        if self._search_after_id is not None:
+            self.after_cancel(self._search_after_id)
+            self._search_after_id = None
+        self._engine.clear()
@@ -0,0 +1,1081 @@
+# -*- coding: utf-8 -*-
+"""
+Motor de búsqueda compartido por SearchBar y FixedSearchBar.
+
+En lugar de llamar a ``text_widget.search`` una vez por coincidencia
+(un viaje de ida y vuelta a Tcl por cada resultado), se toma una única
+instantánea del buffer y se busca en Python con ``str.find`` o con una
+expresión regular compilada.  Los offsets se traducen a índices Tkinter
+``línea.columna`` mediante una tabla de inicios de línea y los tags se
+aplican en bloque (varios rangos por llamada a ``tag_add``).
+
+Modos de búsqueda:
+  - Literal (con o sin distinción de mayúsculas)
+  - Palabra completa
+  - Expresión regular (línea a línea, en un proceso aparte con límite
+    de tiempo: ver ``RegexWorker``)
+  - Solo dentro de la selección
+
+La búsqueda es incremental: se ejecuta en porciones cortas con
+``after`` (cancelable en cualquier momento), empieza en la línea del
+cursor para mostrar enseguida las coincidencias cercanas y se detiene
+al llegar a ``BUSQUEDA_MAX_RESULTADOS``.
+
+Las coincidencias se guardan como arrays compactos de offsets
+(``array('i')``) y solo se etiquetan las que caen en la zona visible
+(más un margen), re-etiquetando al hacer scroll.  Así el árbol de tags
+de Tk no crece con decenas de miles de resultados.
+"""
+
+import bisect
+import logging
+import multiprocessing
+import re
+from array import array
+import time
+import tkinter as tk
+from functools import lru_cache
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+from config import BUSQUEDA_MAX_RESULTADOS
+
+logger = logging.getLogger("EditorVBS.app")
+
+
+# Rangos por llamada a tag_add (evita construir comandos Tcl gigantes)
+_TAG_BATCH = 500
+
+# Tiempo máximo (segundos) de una búsqueda o reemplazo por expresión
+# regular.  Protege contra patrones con backtracking catastrófico: la regex
+# se ejecuta en un proceso aparte (RegexWorker) que se mata al superarlo.
+REGEX_TIMEOUT = 2.0
+
+# Coincidencias por mensaje del proceso de regex a la interfaz, y tiempo
+# máximo que una coincidencia espera en el proceso antes de enviarse
+_REGEX_BATCH = 500
+_REGEX_FLUSH_SECONDS = 0.05
+
+# Búsqueda incremental: tamaño de bloque y duración de cada porción de
+# trabajo antes de devolver el control al bucle de eventos de Tk
+_BLOCK_CHARS = 64 * 1024
+_SLICE_SECONDS = 0.015
+
+# Solo se etiquetan las coincidencias de la zona visible más este margen
+# (en líneas) por arriba y por abajo; el resto vive en arrays de offsets.
+_VIEWPORT_MARGIN = 100
+
+# Marcas Tk que delimitan el ámbito de "buscar en la selección".
+# Son marcas (no offsets) para que sigan al texto si se edita.
+_SCOPE_FIRST = "search_scope_first"
+_SCOPE_LAST = "search_scope_last"
+
+
+_NEWLINE = re.compile("\n")
+
+
+class SearchTimeout(Exception):
+    """La búsqueda superó el tiempo máximo permitido."""
+
+
+def build_line_starts(text: str) -> List[int]:
+    """Devuelve el offset de inicio de cada línea (la línea 1 empieza en 0)."""
+    starts = [0]
+    starts.extend(m.end() for m in _NEWLINE.finditer(text))
+    return starts
+
+
+@lru_cache(maxsize=32)
+def compile_pattern(query: str, match_case: bool = False, regex: bool = False,
+                    whole_word: bool = False) -> "re.Pattern":
+    """
+    Compila el patrón de búsqueda.  Cacheado (LRU) por patrón y flags para
+    que escribir en la barra y navegar con F3 no recompilen cada vez.
+
+    Raises:
+        re.error: Si *regex* es True y el patrón no es válido.
+    """
+    source = query if regex else re.escape(query)
+    if whole_word:
+        # Lookarounds en lugar de \b: funciona aunque la búsqueda empiece
+        # o termine por un carácter que no sea de palabra
+        source = rf"(?<!\w)(?:{source})(?!\w)"
+    flags = re.MULTILINE
+    if not match_case:
+        flags |= re.IGNORECASE
+    return re.compile(source, flags)
+
+
+def iter_matches(text: str, query: str, match_case: bool = False,
+                 regex: bool = False, whole_word: bool = False,
+                 start: int = 0, end: Optional[int] = None,
+                 deadline: Optional[float] = None) -> Iterator[Tuple[int, int]]:
+    """
+    Genera las coincidencias (no solapadas) de *query* en ``text[start:end]``.
+
+    - Literal con mayúsculas: ``str.find``, sin expresiones regulares.
+    - Literal sin mayúsculas / palabra completa: patrón escapado (lineal).
+    - Expresión regular: se aplica línea a línea, de modo que un patrón
+      con mucho backtracking solo puede recorrer una línea en cada intento;
+      entre líneas se comprueba *deadline* (``time.perf_counter()``).
+      Dentro de una línea no se puede cortar: la interfaz lo ejecuta en
+      ``RegexWorker``.
+
+    Yields:
+        Tuplas (inicio, fin) en offsets de carácter.
+
+    Raises:
+        re.error: Patrón regex no válido.
+        SearchTimeout: Se superó *deadline*.
+    """
+    if end is None:
+        end = len(text)
+    if not query or start >= end:
+        return
+
+    if match_case and not regex and not whole_word:
+        size = len(query)
+        pos = text.find(query, start, end)
+        while pos != -1:
+            yield (pos, pos + size)
+            pos = text.find(query, pos + size, end)
+        return
+
+    pattern = compile_pattern(query, match_case, regex, whole_word)
+    if not regex:
+        for m in pattern.finditer(text, start, end):
+            yield m.span()
+        return
+
+    for m in _iter_line_matches(text, pattern, start, end, deadline):
+        yield m.span()
+
+
+def _iter_line_matches(text: str, pattern: "re.Pattern", start: int, end: int,
+                       deadline: Optional[float]) -> Iterator["re.Match"]:
+    """Coincidencias regex línea a línea (sin las vacías), con *deadline*."""
+    line_start = start
+    while line_start < end:
+        line_end = text.find("\n", line_start, end)
+        if line_end == -1:
+            line_end = end
+        for m in pattern.finditer(text, line_start, line_end):
+            if m.start() == m.end():
+                continue  # Coincidencias vacías (p.ej. '^') no se resaltan
+            yield m
+        if deadline is not None and time.perf_counter() > deadline:
+            raise SearchTimeout()
+        line_start = line_end + 1
+
+
+def replace_matches(text: str, query: str, replacement: str,
+                    match_case: bool = False, regex: bool = False,
+                    whole_word: bool = False, start: int = 0,
+                    end: Optional[int] = None,
+                    deadline: Optional[float] = None) -> Tuple[str, int]:
+    """
+    Reemplaza en Python todas las coincidencias de *query* en ``text[start:end]``.
+
+    Reemplaza exactamente lo que encuentra :func:`iter_matches`.  En modo
+    regex se expanden las referencias a grupos (``\\1``, ``\\g<nombre>``);
+    en los demás el reemplazo es literal.
+
+    Returns:
+        Tupla (texto_nuevo, número_de_reemplazos).
+
+    Raises:
+        re.error: Patrón o plantilla de reemplazo no válidos.
+        SearchTimeout: Se superó *deadline*.
+    """
+    if end is None:
+        end = len(text)
+    if match_case and not regex and not whole_word and query:
+        segment = text[start:end]
+        count = segment.count(query)
+        if not count:
+            return text, 0
+        return text[:start] + segment.replace(query, replacement) + text[end:], count
+
+    if regex:
+        pattern = compile_pattern(query, match_case, regex, whole_word)
+        expand = _replacement_expander(pattern, replacement)
+        matches = ((m.start(), m.end(), expand(m))
+                   for m in _iter_line_matches(text, pattern, start, end, deadline))
+    else:
+        matches = ((s, e, replacement)
+                   for s, e in iter_matches(text, query, match_case, regex,
+                                            whole_word, start, end))
+    pieces = []
+    pos = 0
+    count = 0
+    for s, e, new in matches:
+        pieces.append(text[pos:s])
+        pieces.append(new)
+        pos = e
+        count += 1
+    if not count:
+        return text, 0
+    pieces.append(text[pos:])
+    return "".join(pieces), count
+
+
+_TEMPLATE_TOKEN = re.compile(r"\\g<([^>]*)>|\\(\d\d?)|\\(.)", re.DOTALL)
+_TEMPLATE_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "\\": "\\"}
+
+
+def _replacement_expander(pattern: "re.Pattern",
+                          replacement: str) -> Callable[["re.Match"], str]:
+    """
+    Función que expande *replacement* para cada coincidencia.
+
+    ``Match.expand`` vuelve a analizar la plantilla en cada llamada; aquí se
+    analiza una sola vez.  Las plantillas con escapes poco habituales usan
+    ``Match.expand`` tal cual.
+
+    Raises:
+        re.error: Plantilla no válida (grupo inexistente, escape erróneo).
+    """
+    if "\\" not in replacement:
+        return lambda m: replacement
+    # Valida la plantilla igual que re.sub (lanza re.error si no es válida)
+    try:
+        pattern.sub(replacement, "")
+    except IndexError as e:
+        raise re.error(str(e)) from None
+    # Trozos literales (str) y referencias a grupos ((grupo,))
+    parts: List[object] = []
+    pos = 0
+    for tok in _TEMPLATE_TOKEN.finditer(replacement):
+        name, number, char = tok.groups()
+        parts.append(replacement[pos:tok.start()])
+        pos = tok.end()
+        if char is not None:
+            if char not in _TEMPLATE_ESCAPES:
+                return lambda m: m.expand(replacement)
+            parts.append(_TEMPLATE_ESCAPES[char])
+            continue
+        ref = name if name is not None else number
+        parts.append((int(ref) if ref.isdigit() else ref,))
+    parts.append(replacement[pos:])
+
+    def expand(m: "re.Match") -> str:
+        return "".join(part if part.__class__ is str else (m.group(part[0]) or "")
+                       for part in parts)
+
+    return expand
+
+
+def minimal_edit(old: str, new: str) -> Tuple[int, int, str]:
+    """
+    Rango mínimo que convierte *old* en *new* (quitando prefijo y sufijo comunes).
+
+    Returns:
+        Tupla (inicio, fin_en_old, texto_a_insertar).
+    """
+    limit = min(len(old), len(new))
+    prefix = 0
+    # Comparar por bloques (memcmp) y afinar dentro del primero distinto
+    while prefix < limit:
+        step = min(4096, limit - prefix)
+        if old[prefix:prefix + step] == new[prefix:prefix + step]:
+            prefix += step
+            continue
+        while old[prefix] == new[prefix]:
+            prefix += 1
+        break
+
+    limit -= prefix
+    suffix = 0
+    while suffix < limit:
+        step = min(4096, limit - suffix)
+        if old[len(old) - suffix - step:len(old) - suffix] == \
+                new[len(new) - suffix - step:len(new) - suffix]:
+            suffix += step
+            continue
+        while old[len(old) - suffix - 1] == new[len(new) - suffix - 1]:
+            suffix += 1
+        break
+
+    return prefix, len(old) - suffix, new[prefix:len(new) - suffix]
+
+
+def format_count(total: int, capped: bool = False) -> str:
+    """Número de resultados para el contador: '10 000+' si se alcanzó el tope."""
+    text = f"{total:,}".replace(",", " ")
+    return f"{text}+" if capped else text
+
+
+def find_matches(text: str, query: str, match_case: bool = False,
+                 regex: bool = False, whole_word: bool = False) -> List[Tuple[int, int]]:
+    """
+    Busca todas las ocurrencias (no solapadas) de *query* en *text*.
+
+    Returns:
+        Lista de tuplas (inicio, fin) en offsets de carácter.
+    """
+    return list(iter_matches(text, query, match_case, regex, whole_word))
+
+
+def line_hits(text: str, query: str, match_case: bool = False,
+              regex: bool = False, whole_word: bool = False,
+              max_hits: int = 100) -> List[Tuple[int, int, str]]:
+    """
+    Líneas de *text* con coincidencias (una entrada por línea).
+
+    Returns:
+        Lista de tuplas (línea 1-based, columna 0-based, texto de la línea).
+    """
+    hits: List[Tuple[int, int, str]] = []
+    line_starts = None
+    last_line = 0
+    for start, _ in iter_matches(text, query, match_case, regex, whole_word):
+        if line_starts is None:
+            line_starts = build_line_starts(text)
+        line = bisect.bisect_right(line_starts, start)
+        if line == last_line:
+            continue
+        last_line = line
+        line_end = text.find("\n", start)
+        line_text = text[line_starts[line - 1]:line_end if line_end != -1 else len(text)]
+        hits.append((line, start - line_starts[line - 1], line_text.rstrip("\r")))
+        if len(hits) >= max_hits:
+            break
+    return hits
+
+
+def _regex_server(conn) -> None:
+    """
+    Bucle del proceso de ``RegexWorker``: ejecuta trabajos hasta que se
+    cierra la tubería.  Mensajes de vuelta: (trabajo, "spans", tramo,
+    coincidencias), (trabajo, "done", resultado) y (trabajo, "error", texto).
+    """
+    while True:
+        try:
+            job, kind, *args = conn.recv()
+        except (EOFError, OSError):
+            return
+        try:
+            if kind == "find":
+                text, query, match_case, whole_word, segments, max_matches = args
+                found = 0
+                for index, (start, end) in enumerate(segments):
+                    batch = []
+                    sent = time.perf_counter()
+                    for span in iter_matches(text, query, match_case, True, whole_word,
+                                             start, end):
+                        batch.append(span)
+                        found += 1
+                        if found >= max_matches:
+                            break
+                        # Por lotes, y a menudo: si luego se mata el proceso,
+                        # lo ya enviado se muestra
+                        if (len(batch) >= _REGEX_BATCH
+                                or time.perf_counter() - sent > _REGEX_FLUSH_SECONDS):
+                            conn.send((job, "spans", index, batch))
+                            batch = []
+                            sent = time.perf_counter()
+                    conn.send((job, "spans", index, batch))
+                    if found >= max_matches:
+                        break
+                conn.send((job, "done", None))
+            else:
+                conn.send((job, "done", replace_matches(*args)))
+        except re.error as e:
+            conn.send((job, "error", str(e)))
+
+
+class RegexWorker:
+    """
+    Proceso auxiliar donde la interfaz ejecuta las expresiones regulares.
+
+    Una llamada de ``re`` no se puede interrumpir (ni suelta el GIL: un
+    hilo no evitaría que la interfaz se congele), así que un patrón con
+    backtracking catastrófico solo se puede cortar matando el proceso.
+    ``cancel()`` lo mata si hay un trabajo en curso; el siguiente trabajo
+    arranca otro.  Si no se puede arrancar, ``available`` es False y la
+    búsqueda se hace en el propio proceso (límite solo entre líneas).
+    """
+
+    def __init__(self):
+        self._process = None
+        self._conn = None
+        self._job = 0
+        self.busy = False
+        self.available = True
+
+    def _ensure(self) -> bool:
+        if self._process is not None and self._process.is_alive():
+            return True
+        self.kill()
+        try:
+            parent, child = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=_regex_server, args=(child,),
+                                              name="RegexWorker", daemon=True)
+            process.start()
+            child.close()
+        except Exception as e:
+            logger.warning("No se pudo arrancar el proceso de expresiones regulares: %s", e)
+            self.available = False
+            return False
+        self._process, self._conn = process, parent
+        return True
+
+    def submit(self, kind: str, *args) -> bool:
+        """Envía un trabajo ("find" o "replace"); False si no hay proceso."""
+        self.cancel()
+        if not self.available or not self._ensure():
+            return False
+        self._job += 1
+        self._conn.send((self._job, kind) + args)
+        self.busy = True
+        return True
+
+    def receive(self, timeout: float) -> Optional[tuple]:
+        """
+        Siguiente mensaje del trabajo en curso, (tipo, ...), o None si no
+        llega en *timeout* segundos.
+        """
+        if not self.busy:
+            return None
+        try:
+            while self._conn.poll(timeout):
+                job, *message = self._conn.recv()
+                if job == self._job:
+                    if message[0] != "spans":
+                        self.busy = False
+                    return tuple(message)
+                timeout = 0
+        except (EOFError, OSError):
+            self.kill()
+            return ("error", "el proceso de búsqueda terminó inesperadamente")
+        return None
+
+    def cancel(self) -> None:
+        """Abandona el trabajo en curso (mata el proceso si sigue con él)."""
+        if self.busy:
+            self.kill()
+
+    def kill(self) -> None:
+        self.busy = False
+        if self._process is not None:
+            self._process.terminate()
+            self._process.join(1)
+        if self._conn is not None:
+            self._conn.close()
+        self._process = self._conn = None
+
+
+class BufferSnapshot:
+    """
+    Instantánea del contenido de un tk.Text.
+
+    Guarda el texto y la tabla de inicios de línea para convertir entre
+    offsets de Python e índices Tkinter sin volver a consultar el widget.
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        self.line_starts = build_line_starts(text)
+
+    @classmethod
+    def from_widget(cls, text_widget) -> "BufferSnapshot":
+        return cls(text_widget.get("1.0", "end-1c"))
+
+    def index(self, offset: int) -> str:
+        """Convierte un offset en índice Tkinter 'línea.columna'."""
+        line = bisect.bisect_right(self.line_starts, offset) - 1
+        return f"{line + 1}.{offset - self.line_starts[line]}"
+
+    def offset(self, index: str) -> int:
+        """Convierte un índice Tkinter numérico 'línea.columna' en offset."""
+        line, col = index.split(".")
+        line = min(max(int(line), 1), len(self.line_starts))
+        start = self.line_starts[line - 1]
+        # No pasar del final de la línea (como hace Tk con columnas grandes)
+        if line < len(self.line_starts):
+            line_end = self.line_starts[line] - 1
+        else:
+            line_end = len(self.text)
+        return min(start + int(col), line_end)
+
+
+def tag_ranges(text_widget, tag: str, snapshot: BufferSnapshot,
+               ranges: Iterable[Tuple[int, int]]) -> None:
+    """Aplica *tag* a todos los rangos con el mínimo de llamadas a Tcl."""
+    indices = []
+    for start, end in ranges:
+        indices.append(snapshot.index(start))
+        indices.append(snapshot.index(end))
+        if len(indices) >= 2 * _TAG_BATCH:
+            text_widget.tag_add(tag, *indices)
+            indices = []
+    if indices:
+        text_widget.tag_add(tag, *indices)
+
+
+class MatchScanner:
+    """
+    Búsqueda reanudable sobre un texto, por bloques de ``_BLOCK_CHARS``.
+
+    Recorre primero desde *origin* (inicio de la línea del cursor) hasta
+    *end* y después desde *start* hasta *origin*.  Las coincidencias de
+    cada tramo se guardan por separado (``after_*`` / ``before_*``) para
+    que la concatenación ``before + after`` quede ordenada sin reordenar.
+
+    Args:
+        text: Texto completo (instantánea del buffer).
+        query, match_case, regex, whole_word: Parámetros de búsqueda.
+        start, end: Ámbito de la búsqueda (offsets).
+        origin: Offset donde empezar (dentro de [start, end]).
+        max_matches: Tope de coincidencias; al alcanzarlo se para.
+        worker: ``RegexWorker`` donde ejecutar la búsqueda regex (se
+            corta a los ``REGEX_TIMEOUT`` segundos aunque una sola línea
+            tarde más).  Sin él se busca aquí, con el límite entre líneas.
+    """
+
+    def __init__(self, text: str, query: str, match_case: bool, regex: bool,
+                 whole_word: bool, start: int, end: int, origin: int,
+                 max_matches: int = BUSQUEDA_MAX_RESULTADOS,
+                 worker: Optional[RegexWorker] = None):
+        self.text = text
+        self.query = query
+        self.match_case = match_case
+        self.regex = regex
+        self.whole_word = whole_word
+        self.max_matches = max_matches
+        self.after_starts, self.after_ends = array("i"), array("i")
+        self.before_starts, self.before_ends = array("i"), array("i")
+        self.error: Optional[str] = None
+        self.timed_out = False
+        self.capped = False
+        self.done = False
+        self._new: List[Tuple[int, int]] = []
+        self._segments = [
+            (origin, end, self.after_starts, self.after_ends),
+            (start, origin, self.before_starts, self.before_ends),
+        ]
+        self._pos: Optional[int] = None
+        self._regex_time = 0.0
+        self._worker = worker if regex else None
+        self._submitted: Optional[float] = None
+
+    @property
+    def count(self) -> int:
+        return len(self.after_starts) + len(self.before_starts)
+
+    def take_new(self) -> List[Tuple[int, int]]:
+        """Devuelve (y olvida) las coincidencias halladas desde la última llamada."""
+        new, self._new = self._new, []
+        return new
+
+    def run(self, budget: float) -> bool:
+        """
+        Busca durante como mucho *budget* segundos (al menos un bloque).
+
+        Returns:
+            True si la búsqueda ha terminado.
+        """
+        if self._worker is not None and self._worker.available:
+            return self._run_in_worker(budget)
+        slice_end = time.perf_counter() + budget
+        try:
+            while not self.done:
+                self._scan_block()
+                if time.perf_counter() >= slice_end:
+                    break
+        except re.error as e:
+            self.error = f"Expresión no válida: {e}"
+            self.done = True
+        except SearchTimeout:
+            self.timed_out = True
+            self.done = True
+        return self.done
+
+    def _run_in_worker(self, budget: float) -> bool:
+        """``run`` en modo regex: recoge lo que envía el ``RegexWorker``."""
+        worker = self._worker
+        if self._submitted is None:
+            try:
+                compile_pattern(self.query, self.match_case, True, self.whole_word)
+            except re.error as e:
+                self.error = f"Expresión no válida: {e}"
+                self.done = True
+                return True
+            segments = [(seg_start, seg_end) for seg_start, seg_end, _, _ in self._segments]
+            if not worker.submit("find", self.text, self.query, self.match_case,
+                                 self.whole_word, segments, self.max_matches):
+                self._worker = None             # Sin proceso: se busca aquí
+                return self.run(budget)
+            self._submitted = time.perf_counter()
+        slice_end = time.perf_counter() + budget
+        while not self.done:
+            remaining = slice_end - time.perf_counter()
+            message = worker.receive(max(remaining, 0))
+            if message is None:
+                if time.perf_counter() - self._submitted > REGEX_TIMEOUT:
+                    worker.cancel()
+                    self.timed_out = True
+                    self.done = True
+                break
+            if message[0] == "spans":
+                _, index, spans = message
+                _, _, starts, ends = self._segments[index]
+                for span in spans:
+                    starts.append(span[0])
+                    ends.append(span[1])
+                self._new.extend(spans)
+                if self.count >= self.max_matches:
+                    self.capped = True
+            elif message[0] == "error":
+                self.error = f"Expresión no válida: {message[1]}"
+                self.done = True
+            else:
+                self.done = True
+        return self.done
+
+    def cancel(self) -> None:
+        """Abandona la búsqueda (mata el proceso de regex si sigue con ella)."""
+        if self._worker is not None and not self.done:
+            self._worker.cancel()
+        self.done = True
+
+    def _scan_block(self) -> None:
+        if not self._segments:
+            self.done = True
+            return
+        seg_start, seg_end, starts, ends = self._segments[0]
+        pos = seg_start if self._pos is None else self._pos
+        if pos >= seg_end:
+            self._segments.pop(0)
+            self._pos = None
+            return
+
+        # El bloque termina siempre en un inicio de línea (o fin de tramo)
+        block_end = self.text.find("\n", min(pos + _BLOCK_CHARS, seg_end), seg_end)
+        block_end = seg_end if block_end == -1 else block_end + 1
+
+        # En modo regex (línea a línea) ninguna coincidencia cruza el bloque;
+        # en los demás se busca hasta el fin del tramo y se corta por el inicio
+        limit = block_end if self.regex else seg_end
+        deadline = None
+        t0 = time.perf_counter()
+        if self.regex:
+            deadline = t0 + REGEX_TIMEOUT - self._regex_time
+
+        next_pos = block_end
+        for span in iter_matches(self.text, self.query, self.match_case, self.regex,
+                                 self.whole_word, pos, limit, deadline):
+            if span[0] >= block_end:
+                break
+            starts.append(span[0])
+            ends.append(span[1])
+            self._new.append(span)
+            next_pos = max(block_end, span[1])
+            if self.count >= self.max_matches:
+                self.capped = True
+                self.done = True
+                break
+
+        if self.regex:
+            self._regex_time += time.perf_counter() - t0
+        self._pos = next_pos
+
+
+class SearchEngine:
+    """
+    Estado de búsqueda sobre un tk.Text: coincidencias, navegación y resaltado.
+
+    Las barras de búsqueda delegan aquí la búsqueda y el etiquetado;
+    solo se ocupan de la interfaz (entradas, botones y contador).
+
+    Las coincidencias se guardan en ``starts`` / ``ends`` (``array('i')``,
+    ordenados) y solo se etiquetan las de la zona visible: hay que llamar
+    a :meth:`refresh_viewport` cuando el editor hace scroll.
+
+    Args:
+        text_widget: Widget de texto sobre el que se busca.
+        tag: Tag para las coincidencias visibles.
+        tag_current: Tag para la coincidencia actual.
+        max_matches: Tope de coincidencias por búsqueda.
+    """
+
+    def __init__(self, text_widget, tag: str, tag_current: str,
+                 max_matches: int = BUSQUEDA_MAX_RESULTADOS):
+        self.text_widget = text_widget
+        self.tag = tag
+        self.tag_current = tag_current
+        self.max_matches = max_matches
+        self.snapshot: Optional[BufferSnapshot] = None
+        self.starts = array("i")
+        self.ends = array("i")
+        self.current = -1                  # Índice de la coincidencia actual
+        self.error: Optional[str] = None   # Patrón no válido (mensaje)
+        self.timed_out = False             # Búsqueda cortada por tiempo
+        self.capped = False                # Se alcanzó max_matches
+        # Última búsqueda: (query, match_case, regex, whole_word)
+        self.options: Optional[Tuple[str, bool, bool, bool]] = None
+        self._scanner: Optional[MatchScanner] = None
+        self._after_id = None
+        self._on_update: Optional[Callable[[], None]] = None
+        self._current_span: Optional[Tuple[int, int]] = None
+        self._move_cursor = False
+        # Zona (offsets) cuyas coincidencias están etiquetadas ahora mismo
+        self._tagged: Optional[Tuple[int, int]] = None
+        # Proceso donde se ejecutan las regex (se arranca al usarlo)
+        self._regex_worker = RegexWorker()
+
+    # ------------------------------------------------------------------
+    # Ámbito "en la selección"
+    # ------------------------------------------------------------------
+
+    def capture_scope(self) -> bool:
+        """
+        Guarda la selección actual como ámbito de "buscar en la selección".
+
+        Returns:
+            True si había selección.
+        """
+        try:
+            first = self.text_widget.index("sel.first")
+            last = self.text_widget.index("sel.last")
+        except tk.TclError:
+            return False
+        self.text_widget.mark_set(_SCOPE_FIRST, first)
+        self.text_widget.mark_gravity(_SCOPE_FIRST, "left")
+        self.text_widget.mark_set(_SCOPE_LAST, last)
+        self.text_widget.mark_gravity(_SCOPE_LAST, "right")
+        return True
+
+    def _scope_offsets(self, in_selection: bool) -> Tuple[int, int]:
+        """Rango (inicio, fin) de offsets donde buscar."""
+        if not in_selection:
+            return 0, len(self.snapshot.text)
+        try:
+            first = self.text_widget.index(_SCOPE_FIRST)
+            last = self.text_widget.index(_SCOPE_LAST)
+        except tk.TclError:
+            if not self.capture_scope():
+                return 0, 0
+            return self._scope_offsets(True)
+        return self.snapshot.offset(first), self.snapshot.offset(last)
+
+    # ------------------------------------------------------------------
+    # Búsqueda incremental
+    # ------------------------------------------------------------------
+
+    @property
+    def running(self) -> bool:
+        """True mientras hay una búsqueda en curso."""
+        return self._scanner is not None
+
+    @property
+    def count(self) -> int:
+        """Coincidencias halladas hasta ahora (también durante la búsqueda)."""
+        if self._scanner is not None:
+            return self._scanner.count
+        return len(self.starts)
+
+    def start(self, query: str, match_case: bool = False, regex: bool = False,
+              whole_word: bool = False, in_selection: bool = False,
+              on_update: Optional[Callable[[], None]] = None,
+              move_cursor: bool = False) -> None:
+        """
+        Inicia una búsqueda incremental (cancela la anterior si la hay).
+
+        La primera porción se ejecuta ya, de modo que la primera coincidencia
+        a partir de la línea del cursor se resalta de inmediato.  El resto se
+        procesa en porciones de ``_SLICE_SECONDS`` con ``after``.
+
+        Un patrón no válido no lanza excepción: deja el mensaje en
+        ``self.error``.  Si la regex supera ``REGEX_TIMEOUT`` se conservan
+        las coincidencias halladas y se activa ``timed_out``.
+
+        Args:
+            on_update: Se llama tras cada porción y al terminar.
+            move_cursor: Colocar el cursor en la primera coincidencia
+                mostrada (para que ``next`` continúe desde ella).
+        """
+        self.clear()
+        if not query:
+            return
+        self.options = (query, match_case, regex, whole_word)
+        self.snapshot = BufferSnapshot.from_widget(self.text_widget)
+        start, end = self._scope_offsets(in_selection)
+
+        # Empezar en el inicio de la línea del cursor (dentro del ámbito)
+        cursor = self._cursor_offset()
+        line = bisect.bisect_right(self.snapshot.line_starts, cursor) - 1
+        origin = min(max(self.snapshot.line_starts[line], start), end)
+
+        self._scanner = MatchScanner(self.snapshot.text, query, match_case, regex,
+                                     whole_word, start, end, origin, self.max_matches,
+                                     self._regex_worker)
+        self._on_update = on_update
+        self._move_cursor = move_cursor
+        self._step()
+
+    def _step(self) -> None:
+        """Ejecuta una porción de la búsqueda y programa la siguiente."""
+        self._after_id = None
+        scanner = self._scanner
+        done = scanner.run(_SLICE_SECONDS)
+
+        # Durante la búsqueda solo se etiquetan las nuevas que se ven
+        view_start, view_end = self._viewport_offsets()
+        tag_ranges(self.text_widget, self.tag, self.snapshot,
+                   (span for span in scanner.take_new()
+                    if span[1] >= view_start and span[0] <= view_end))
+
+        if self._current_span is None and scanner.after_starts:
+            self._show((scanner.after_starts[0], scanner.after_ends[0]))
+
+        if done:
+            self._complete()
+        else:
+            self._after_id = self.text_widget.after(1, self._step)
+        if self._on_update:
+            self._on_update()
+
+    def _complete(self) -> None:
+        """Cierra la búsqueda: arrays finales ordenados y coincidencia actual."""
+        scanner = self._scanner
+        self._scanner = None
+        self.starts = scanner.before_starts + scanner.after_starts
+        self.ends = scanner.before_ends + scanner.after_ends
+        self.error = scanner.error
+        self.timed_out = scanner.timed_out
+        self.capped = scanner.capped
+        if not self.starts:
+            self.current = -1
+        elif scanner.after_starts:
+            self.current = len(scanner.before_starts)
+        else:
+            self.current = 0
+            self._show((self.starts[0], self.ends[0]))
+        self.refresh_viewport(force=True)
+
+    def finish(self) -> None:
+        """Completa de forma síncrona la búsqueda en curso (p.ej. antes de navegar)."""
+        if self._scanner is None:
+            return
+        if self._after_id is not None:
+            self.text_widget.after_cancel(self._after_id)
+            self._after_id = None
+        while not self._scanner.run(_SLICE_SECONDS):
+            pass
+        self._step()
+
+    def cancel(self) -> None:
+        """Cancela la búsqueda en curso (las coincidencias ya etiquetadas se quedan)."""
+        if self._after_id is not None:
+            self.text_widget.after_cancel(self._after_id)
+            self._after_id = None
+        if self._scanner is not None:
+            self._scanner.cancel()
+        self._scanner = None
+
+    def search(self, query: str, match_case: bool = False, regex: bool = False,
+               whole_word: bool = False, in_selection: bool = False) -> int:
+        """
+        Búsqueda síncrona completa.
+
+        Returns:
+            Número de coincidencias encontradas.
+        """
+        self.start(query, match_case, regex, whole_word, in_selection)
+        self.finish()
+        return len(self.starts)
+
+    def replace_all(self, query: str, replacement: str, match_case: bool = False,
+                    regex: bool = False, whole_word: bool = False,
+                    in_selection: bool = False) -> int:
+        """
+        Reemplaza todas las coincidencias como una sola edición del widget.
+
+        El reemplazo se calcula en Python sobre una instantánea y se aplica
+        con ``replace_range`` (ver ``TextEditor``) sobre el rango mínimo que
+        cambia, de modo que queda como un único paso de deshacer.
+
+        Returns:
+            Número de reemplazos.
+
+        Raises:
+            re.error: Patrón o plantilla de reemplazo no válidos.
+            SearchTimeout: La regex superó ``REGEX_TIMEOUT``.
+        """
+        self.clear()
+        if not query:
+            return 0
+        self.snapshot = BufferSnapshot.from_widget(self.text_widget)
+        try:
+            start, end = self._scope_offsets(in_selection)
+            if regex:
+                new_text, count = self._replace_regex(query, replacement, match_case,
+                                                      whole_word, start, end)
+            else:
+                new_text, count = replace_matches(self.snapshot.text, query, replacement,
+                                                  match_case, regex, whole_word, start, end)
+            if count:
+                edit_start, edit_end, inserted = minimal_edit(self.snapshot.text, new_text)
+                self.text_widget.replace_range(self.snapshot.index(edit_start),
+                                               self.snapshot.index(edit_end), inserted)
+        finally:
+            self.snapshot = None
+        return count
+
+    def _replace_regex(self, query: str, replacement: str, match_case: bool,
+                       whole_word: bool, start: int, end: int) -> Tuple[str, int]:
+        """``replace_matches`` en el ``RegexWorker``, esperando como mucho ``REGEX_TIMEOUT``."""
+        text = self.snapshot.text
+        # Patrón y plantilla se validan aquí (es inmediato): re.error al momento
+        _replacement_expander(compile_pattern(query, match_case, True, whole_word), replacement)
+        worker = self._regex_worker
+        if not worker.submit("replace", text, query, replacement, match_case, True,
+                             whole_word, start, end):
+            return replace_matches(text, query, replacement, match_case, True, whole_word,
+                                   start, end, time.perf_counter() + REGEX_TIMEOUT)
+        message = worker.receive(REGEX_TIMEOUT)
+        if message is None:
+            worker.cancel()
+            raise SearchTimeout()
+        if message[0] == "error":
+            raise re.error(message[1])
+        return message[1]
+
+    # ------------------------------------------------------------------
+    # Etiquetado de la zona visible
+    # ------------------------------------------------------------------
+
+    def _viewport_offsets(self) -> Tuple[int, int]:
+        """Offsets (inicio, fin) de las líneas visibles más el margen."""
+        first = int(self.text_widget.index("@0,0").split(".")[0])
+        height = self.text_widget.winfo_height()
+        last = int(self.text_widget.index(f"@0,{height}").split(".")[0])
+        line_starts = self.snapshot.line_starts
+        first = max(first - _VIEWPORT_MARGIN, 1)
+        last = last + _VIEWPORT_MARGIN
+        start = line_starts[min(first, len(line_starts)) - 1]
+        end = line_starts[last] if last < len(line_starts) else len(self.snapshot.text)
+        return start, end
+
+    def refresh_viewport(self, force: bool = False) -> None:
+        """
+        Re-etiqueta las coincidencias de la zona visible (llamar al hacer scroll).
+
+        Si la zona visible sigue dentro de la ya etiquetada no hace nada,
+        así que es barato llamarlo en cada evento de scroll.
+        """
+        if self.snapshot is None or self._scanner is not None:
+            return
+        view_start, view_end = self._viewport_offsets()
+        if not force and self._tagged is not None:
+            tagged_start, tagged_end = self._tagged
+            if tagged_start <= view_start and view_end <= tagged_end:
+                return
+        # Ampliar la zona etiquetada otro margen para no re-etiquetar
+        # en cada paso de scroll
+        span = view_end - view_start
+        tag_start = max(view_start - span, 0)
+        tag_end = view_end + span
+
+        self.text_widget.tag_remove(self.tag, "1.0", "end")
+        lo = bisect.bisect_left(self.ends, tag_start)
+        hi = bisect.bisect_right(self.starts, tag_end)
+        tag_ranges(self.text_widget, self.tag, self.snapshot,
+                   zip(self.starts[lo:hi], self.ends[lo:hi]))
+        self._tagged = (tag_start, tag_end)
+
+    # ------------------------------------------------------------------
+    # Navegación y resaltado
+    # ------------------------------------------------------------------
+
+    def match_indices(self, idx: int) -> Tuple[str, str]:
+        """Índices Tkinter (inicio, fin) de la coincidencia *idx*."""
+        return self.snapshot.index(self.starts[idx]), self.snapshot.index(self.ends[idx])
+
+    def expand(self, idx: int, replacement: str) -> str:
+        """
+        Texto con el que reemplazar la coincidencia *idx*.
+
+        En modo regex se expanden las referencias a grupos (``\\1``,
+        ``\\g<nombre>``); en los demás modos el reemplazo es literal.
+        """
+        query, match_case, regex, whole_word = self.options
+        if not regex:
+            return replacement
+        pattern = compile_pattern(query, match_case, regex, whole_word)
+        m = pattern.match(self.snapshot.text, self.starts[idx], self.ends[idx])
+        if not m:
+            return replacement
+        try:
+            return m.expand(replacement)
+        except (re.error, IndexError):
+            return replacement
+
+    def _cursor_offset(self) -> int:
+        return self.snapshot.offset(self.text_widget.index("insert"))
+
+    def next(self) -> bool:
+        """
+        Salta a la primera coincidencia que empieza después del cursor
+        (búsqueda binaria sobre ``starts``).  False si no hay ninguna.
+        """
+        self.finish()
+        if not self.starts:
+            return False
+        idx = bisect.bisect_right(self.starts, self._cursor_offset())
+        self.highlight(idx % len(self.starts), move_cursor=True)
+        return True
+
+    def prev(self) -> bool:
+        """Salta a la última coincidencia que empieza antes del cursor."""
+        self.finish()
+        if not self.starts:
+            return False
+        idx = bisect.bisect_left(self.starts, self._cursor_offset()) - 1
+        self.highlight(idx % len(self.starts), move_cursor=True)
+        return True
+
+    def highlight(self, idx: int, move_cursor: bool = False) -> None:
+        """
+        Marca la coincidencia *idx* como actual y hace scroll hasta ella.
+
+        Con *move_cursor* el cursor se coloca al inicio de la coincidencia,
+        que es el punto desde el que navegan :meth:`next` y :meth:`prev`.
+        """
+        if not self.starts:
+            self.text_widget.tag_remove(self.tag_current, "1.0", "end")
+            return
+        self.current = idx
+        self._move_cursor = move_cursor
+        self._show((self.starts[idx], self.ends[idx]))
+        self.refresh_viewport()
+
+    def _show(self, span: Tuple[int, int]) -> None:
+        self._current_span = span
+        self.text_widget.tag_remove(self.tag_current, "1.0", "end")
+        start = self.snapshot.index(span[0])
+        self.text_widget.tag_add(self.tag_current, start, self.snapshot.index(span[1]))
+        self.text_widget.see(start)
+        if self._move_cursor:
+            self.text_widget.mark_set("insert", start)
+            self._move_cursor = False
+
+    def clear(self) -> None:
+        """Cancela la búsqueda y elimina coincidencias y tags de resaltado."""
+        self.cancel()
+        self.starts = array("i")
+        self.ends = array("i")
+        self.current = -1
+        self.snapshot = None
+        self.options = None
+        self.error = None
+        self.timed_out = False
+        self.capped = False
+        self._current_span = None
+        self._move_cursor = False
+        self._tagged = None
+        self.clear_tags()
+
+    def clear_tags(self) -> None:
+        self.text_widget.tag_remove(self.tag, "1.0", "end")
+        self.text_widget.tag_remove(self.tag_current, "1.0", "end")
@@ -0,0 +1,566 @@
+# -*- coding: utf-8 -*-
+"""
+Tabla de símbolos de un script VBScript.
+
+Recoge en una sola pasada por las líneas las declaraciones (``Dim``,
+``ReDim``, ``Const``, ``Public``/``Private``, parámetros, ``Sub``,
+``Function``, ``Property`` y ``Class``) y las referencias de cada ámbito,
+y con ella informa de:
+
+  - Nombres duplicados en un mismo ámbito (error: VBScript no compila).
+  - Variables y constantes declaradas y no usadas (aviso).
+  - Nombres no declarados (aviso), solo con ``Option Explicit``: sin él
+    VBScript los admite y los scripts de G21 usan objetos que pone el
+    propio ERP.
+
+Incremental por procedimiento: el script se divide en regiones (cada
+``Sub``/``Function``/``Property`` y cada tramo de código de nivel
+superior o de clase) y el análisis de cada región se guarda indexado
+por su texto.  Tras una edición solo se vuelve a analizar la región que
+cambió; el resto es unir los resultados con búsquedas en diccionarios.
+
+Las líneas de entrada son ``LineInfo`` (ver ``editor.vbs_validator``):
+código sin el comentario final y rangos de sus cadenas.
+"""
+
+from __future__ import annotations
+
+import bisect
+import re
+import threading
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from pygments.lexers._vbscript_builtins import (
+    BUILTIN_CONSTANTS,
+    BUILTIN_FUNCTIONS,
+    BUILTIN_VARIABLES,
+)
+
+# Palabras del lenguaje que nunca son nombres de usuario
+_KEYWORDS = {
+    "and", "as", "byref", "byval", "call", "case", "class", "const", "default",
+    "dim", "do", "each", "else", "elseif", "empty", "end", "eqv", "erase",
+    "error", "exit", "explicit", "false", "for", "function", "get", "goto",
+    "if", "imp", "in", "is", "let", "loop", "me", "mod", "new", "next", "not",
+    "nothing", "null", "on", "option", "optional", "or", "preserve", "private",
+    "property", "public", "redim", "rem", "resume", "select", "set", "step",
+    "stop", "sub", "then", "to", "true", "until", "wend", "while", "with", "xor",
+}
+
+# Funciones, constantes y objetos predefinidos (incluidos los del host de scripts)
+_BUILTINS = {name.lower() for name in (
+    list(BUILTIN_FUNCTIONS) + list(BUILTIN_CONSTANTS) + list(BUILTIN_VARIABLES)
+    + ["AscB", "AscW", "ChrB", "ChrW", "Escape", "Eval", "Execute", "ExecuteGlobal",
+       "GetRef", "InputBox", "InStrB", "LeftB", "LenB", "MidB", "RightB", "Unescape"]
+    + ["WScript", "WSH"]
+)}
+
+_PROC_RE = re.compile(
+    r"^\s*(?:(?:Public(?:\s+Default)?|Private)\s+)?"
+    r"(Sub|Function|Property\s+(?:Get|Let|Set))\s+(\w+)\s*(?:\((.*)\))?",
+    re.IGNORECASE,
+)
+_END_PROC_RE = re.compile(r"^\s*End\s+(?:Sub|Function|Property)\b", re.IGNORECASE)
+_CLASS_RE = re.compile(r"^\s*Class\s+(\w+)", re.IGNORECASE)
+_END_CLASS_RE = re.compile(r"^\s*End\s+Class\b", re.IGNORECASE)
+_OPTION_EXPLICIT_RE = re.compile(r"^\s*Option\s+Explicit\b", re.IGNORECASE)
+
+_DECL_RE = re.compile(
+    r"^(Dim|ReDim(?:\s+Preserve)?|Const|(?:Public|Private)(?:\s+Const)?)\s+(.*)$",
+    re.IGNORECASE,
+)
+_NOT_A_FIELD_RE = re.compile(r"^(?:Sub|Function|Property|Class|Default)\b", re.IGNORECASE)
+_DECL_ITEM_RE = re.compile(r"^\s*(\w+)\s*(?:\((.*)\))?\s*(?:As\s+\w+)?\s*(?:=\s*(.*))?$",
+                           re.IGNORECASE | re.DOTALL)
+_PARAM_RE = re.compile(r"^\s*(?:Optional\s+)?(?:ByVal\s+|ByRef\s+)?(\w+)", re.IGNORECASE)
+
+# Identificador que no sigue a un punto (``obj.Miembro``, ``.Campo`` en With)
+_IDENT_RE = re.compile(r"(?<![\w.])([A-Za-z]\w*)")
+# Literales hexadecimales y octales: &HFF, &O17
+_NUMBER_LITERAL_RE = re.compile(r"&[Hh][0-9A-Fa-f]+&?|&[Oo]?[0-7]+&?")
+_CONTINUATION_RE = re.compile(r"(?:^|\s)_\s*$")
+
+# Regiones analizadas guardadas como máximo
+_CACHE_MAX = 20000
+
+# Clases de símbolo
+KIND_VARIABLE = "variable"
+KIND_CONSTANT = "constante"
+KIND_PARAMETER = "parametro"
+KIND_SUB = "sub"
+KIND_FUNCTION = "function"
+KIND_PROPERTY = "property"
+KIND_CLASS = "class"
+
+# Símbolos que pueden quedar sin usar sin que sea un problema
+_MAY_BE_UNUSED = {KIND_PARAMETER, KIND_SUB, KIND_FUNCTION, KIND_PROPERTY, KIND_CLASS}
+
+
+class Symbol(NamedTuple):
+    """
+    Nombre declarado.
+
+    Attributes:
+        name: Nombre tal como se escribió en la declaración.
+        kind: ``KIND_*``.
+        line: Línea de la declaración (1-based).
+        scope: Ámbito: "" (global), "Clase", "Proc" o "Clase.Proc".
+        public: Accesible desde fuera de su clase (campos y métodos).
+    """
+    name: str
+    kind: str
+    line: int
+    scope: str
+    public: bool = True
+
+
+class _Region(NamedTuple):
+    """Resultado del análisis de una región, con líneas relativas (0-based)."""
+    # Declaraciones: (nombre, clase, línea, público)
+    decls: Tuple[Tuple[str, str, int, bool], ...]
+    # Referencias libres: nombre en minúsculas → (nombre, primera línea)
+    refs: Dict[str, Tuple[str, int]]
+    # Duplicados y no usados locales: (nombre, primera declaración o None, línea)
+    problems: Tuple[Tuple[str, Optional[int], int], ...]
+    # Procedimientos: cabecera (nombre, clase, público) y locales
+    # (nombre en minúsculas → (nombre, clase, línea))
+    header: Optional[Tuple[str, str, bool]] = None
+    local: Optional[Dict[str, Tuple[str, str, int]]] = None
+
+
+def _masked(info) -> str:
+    """Código de la línea con el interior de las cadenas en blanco."""
+    code = info.code
+    if not info.strings:
+        return code
+    parts = []
+    prev = 0
+    for start, end in info.strings:
+        parts.append(code[prev:start])
+        parts.append(" " * (end - start))
+        prev = end
+    parts.append(code[prev:])
+    return "".join(parts)
+
+
+def _statements(masked_lines: Sequence[str]):
+    """(línea relativa, sentencia) uniendo continuaciones ``_`` y separando ``:``."""
+    pending = ""
+    start = 0
+    for rel, text in enumerate(masked_lines):
+        if not pending:
+            start = rel
+        if _CONTINUATION_RE.search(text):
+            pending += _CONTINUATION_RE.sub(" ", text)
+            continue
+        text = pending + text
+        pending = ""
+        for statement in text.split(":"):
+            statement = statement.strip()
+            if statement:
+                yield start, statement
+    if pending.strip():
+        yield start, pending.strip()
+
+
+def _split_top(text: str) -> List[str]:
+    """Divide por comas fuera de paréntesis."""
+    items, depth, current = [], 0, []
+    for ch in text:
+        if ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        elif ch == "," and depth <= 0:
+            items.append("".join(current))
+            current = []
+            continue
+        current.append(ch)
+    items.append("".join(current))
+    return items
+
+
+def _identifiers(text: str):
+    """Nombres de usuario referenciados en *text* (sin palabras clave ni predefinidos)."""
+    for match in _IDENT_RE.finditer(_NUMBER_LITERAL_RE.sub(" ", text)):
+        name = match.group(1)
+        lower = name.lower()
+        if lower not in _KEYWORDS and lower not in _BUILTINS:
+            yield name, lower
+
+
+def _analyze_region(masked_lines: Tuple[str, ...], procedure: bool) -> _Region:
+    """
+    Analiza una región.
+
+    En un procedimiento las declaraciones son locales (con sus
+    parámetros): se resuelven aquí, y solo las demás referencias quedan
+    libres.  En un tramo de nivel superior o de clase las declaraciones
+    son del ámbito exterior y se resuelven al unir todas las regiones.
+    """
+    decls: List[Tuple[str, str, int, bool]] = []
+    header = None
+    refs: Dict[str, Tuple[str, int]] = {}
+    used: set = set()
+    problems: List[Tuple[str, Optional[int], int]] = []
+    local: Dict[str, Tuple[str, str, int]] = {}
+
+    def declare(name: str, kind: str, rel: int, public: bool = True):
+        lower = name.lower()
+        if procedure:
+            if lower in local:
+                problems.append((name, local[lower][2], rel))
+                return
+            local[lower] = (name, kind, rel)
+        decls.append((name, kind, rel, public))
+
+    def reference(text: str, rel: int):
+        for name, lower in _identifiers(text):
+            if procedure and lower in local:
+                used.add(lower)
+            elif lower not in refs:
+                refs[lower] = (name, rel)
+
+    for rel, statement in _statements(masked_lines):
+        if procedure and header is None:
+            m = _PROC_RE.match(statement)
+            if m:
+                header = (m.group(2), m.group(1).split()[0].lower(),
+                          not statement.lower().startswith("private"))
+                for param in _split_top(m.group(3) or ""):
+                    p = _PARAM_RE.match(param)
+                    if p:
+                        declare(p.group(1), KIND_PARAMETER, rel)
+                continue
+
+        decl = _DECL_RE.match(statement)
+        if decl and not _NOT_A_FIELD_RE.match(decl.group(2)):
+            keyword = decl.group(1).lower()
+            is_redim = keyword.startswith("redim")
+            kind = KIND_CONSTANT if keyword.endswith("const") else KIND_VARIABLE
+            public = not keyword.startswith("private")
+            for item in _split_top(decl.group(2)):
+                m = _DECL_ITEM_RE.match(item)
+                if not m:
+                    reference(item, rel)
+                    continue
+                name = m.group(1)
+                if m.group(2):
+                    reference(m.group(2), rel)      # Dimensiones
+                if m.group(3):
+                    reference(m.group(3), rel)      # Valor de la constante
+                if is_redim and (name.lower() in local or not procedure):
+                    reference(name, rel)            # ReDim de un array ya declarado
+                else:
+                    declare(name, kind, rel, public)
+            continue
+        if _OPTION_EXPLICIT_RE.match(statement):
+            continue
+        reference(statement, rel)
+
+    if not procedure:
+        return _Region(tuple(decls), refs, tuple(problems))
+    for lower, (name, kind, rel) in local.items():
+        if kind in (KIND_VARIABLE, KIND_CONSTANT) and lower not in used:
+            problems.append((name, None, rel))
+    return _Region((), refs, tuple(problems), header or ("", KIND_SUB, True), local)
+
+
+def _duplicate(name: str, first_line: int, line: int) -> Tuple[str, str, int]:
+    return ("error", f"Nombre duplicado: '{name}' ya está declarado en la línea {first_line}",
+            line)
+
+
+def _unused(name: str, line: int) -> Tuple[str, str, int]:
+    return ("aviso", f"'{name}' se declara pero no se usa", line)
+
+
+class SymbolTable:
+    """
+    Símbolos de un script, por ámbito, con búsqueda O(1).
+
+    Attributes:
+        option_explicit: El script tiene ``Option Explicit``.
+        globals: Ámbito global: nombre en minúsculas → ``Symbol``.
+        classes: Miembros de cada clase: clase (minúsculas) → ámbito.
+        definitions: ``Sub``/``Function``/``Property``/``Class`` en orden
+            de línea.
+        problems: Duplicados, no usados y no declarados.
+    """
+
+    def __init__(self):
+        self.option_explicit = False
+        self.globals: Dict[str, Symbol] = {}
+        self.classes: Dict[str, Dict[str, Symbol]] = {}
+        self.definitions: List[Symbol] = []
+        self.problems: List[Tuple[str, str, int]] = []
+        # (inicio, fin, ámbito del procedimiento) por orden de línea
+        self._ranges: List[Tuple[int, int, str]] = []
+        # Locales de cada procedimiento: ámbito → (línea inicial, locales)
+        self._locals: Dict[str, Tuple[int, Dict[str, Tuple[str, str, int]]]] = {}
+
+    def lookup(self, name: str, scope: str = "") -> Optional[Symbol]:
+        """Resuelve *name* desde *scope*: procedimiento → clase → global."""
+        lower = name.lower()
+        if scope:
+            start, local = self._locals.get(scope, (0, {}))
+            if lower in local:
+                local_name, kind, rel = local[lower]
+                return Symbol(local_name, kind, start + rel + 1, scope)
+            class_name = scope.split(".")[0] if "." in scope else scope
+            members = self.classes.get(class_name.lower())
+            if members is not None and lower in members:
+                return members[lower]
+        return self.globals.get(lower)
+
+    def locals(self, scope: str) -> Dict[str, Symbol]:
+        """Parámetros y variables locales del procedimiento *scope* ("Proc" o "Clase.Proc")."""
+        start, local = self._locals.get(scope, (0, {}))
+        return {lower: Symbol(name, kind, start + rel + 1, scope)
+                for lower, (name, kind, rel) in local.items()}
+
+    def is_local(self, name: str, scope: str) -> bool:
+        """*name* es un parámetro o variable local del procedimiento *scope*."""
+        return name.lower() in self._locals.get(scope, (0, {}))[1]
+
+    def scope_at(self, line: int) -> str:
+        """Ámbito del procedimiento (o clase) que contiene la línea *line*."""
+        for start, end, scope in self._ranges:
+            if start <= line <= end:
+                return scope
+        return ""
+
+    def scopes_by_line(self, n: int) -> List[str]:
+        """``scope_at`` de las líneas 1..*n* de una vez (índice = línea)."""
+        scopes = [""] * (n + 1)
+        for start, end, scope in self._ranges:
+            scopes[start:min(end, n) + 1] = [scope] * (min(end, n) + 1 - start)
+        return scopes
+
+
+class SymbolAnalyzer:
+    """
+    Construye ``SymbolTable`` reutilizando el análisis de las regiones
+    que no cambiaron (ver el docstring del módulo).
+
+    Se puede usar desde varios hilos: la caché solo guarda resultados
+    inmutables.
+    """
+
+    def __init__(self):
+        self._cache: Dict[Tuple[bool, Tuple[str, ...]], _Region] = {}
+        self._lock = threading.Lock()
+
+    def _region(self, masked_lines: Tuple[str, ...], procedure: bool) -> _Region:
+        key = (procedure, masked_lines)
+        region = self._cache.get(key)
+        if region is None:
+            region = _analyze_region(masked_lines, procedure)
+            with self._lock:
+                if len(self._cache) >= _CACHE_MAX:
+                    self._cache.clear()
+                self._cache[key] = region
+        return region
+
+    def analyze(self, infos: Sequence) -> SymbolTable:
+        """Tabla de símbolos de las líneas *infos* (``LineInfo``)."""
+        table = SymbolTable()
+        masked = [_masked(info) for info in infos]
+
+        # 1) Regiones: procedimientos y tramos de nivel superior o de clase
+        regions: List[Tuple[int, int, bool, str]] = []   # (inicio, fin, proc, clase)
+        class_name = ""
+        run_start = 0
+        proc_start = None
+        for i, text in enumerate(masked):
+            if not text or text.isspace():
+                continue
+            if proc_start is None:
+                if _PROC_RE.match(text):
+                    if run_start < i:
+                        regions.append((run_start, i, False, class_name))
+                    proc_start = i
+                elif _CLASS_RE.match(text):
+                    if run_start < i:
+                        regions.append((run_start, i, False, class_name))
+                    class_name = _CLASS_RE.match(text).group(1)
+                    table.definitions.append(Symbol(class_name, KIND_CLASS, i + 1, ""))
+                    self._declare(table, table.globals, class_name, KIND_CLASS, i, "")
+                    table.classes[class_name.lower()] = {}
+                    run_start = i + 1
+                elif class_name and _END_CLASS_RE.match(text):
+                    if run_start < i:
+                        regions.append((run_start, i, False, class_name))
+                    class_name = ""
+                    run_start = i + 1
+                elif _OPTION_EXPLICIT_RE.match(text):
+                    table.option_explicit = True
+            elif _END_PROC_RE.match(text):
+                regions.append((proc_start, i + 1, True, class_name))
+                proc_start = None
+                run_start = i + 1
+        if proc_start is not None:
+            regions.append((proc_start, len(masked), True, class_name))
+        elif run_start < len(masked):
+            regions.append((run_start, len(masked), False, class_name))
+
+        # 2) Declaraciones de cada ámbito
+        analyzed = []
+        for start, end, procedure, owner in regions:
+            region = self._region(tuple(masked[start:end]), procedure)
+            analyzed.append((start, end, procedure, owner, region))
+            for name, first, rel in region.problems:
+                table.problems.append(_unused(name, start + rel + 1) if first is None
+                                      else _duplicate(name, start + first + 1, start + rel + 1))
+            outer = table.classes[owner.lower()] if owner else table.globals
+            if procedure:
+                name, kind, public = region.header
+                scope = f"{owner}.{name}" if owner else name
+                table.definitions.append(Symbol(name, kind, start + 1, owner, public))
+                self._declare(table, outer, name, kind, start, owner, public)
+                table._locals.setdefault(scope, (start, region.local))
+                table._ranges.append((start + 1, end, scope))
+            else:
+                for n, k, rel, public in region.decls:
+                    self._declare(table, outer, n, k, start + rel, owner, public)
+
+        # 3) Referencias libres: procedimiento → clase → global
+        used = set()
+        for start, _, procedure, owner, region in analyzed:
+            members = table.classes.get(owner.lower()) if owner else None
+            for lower, (name, rel) in region.refs.items():
+                if members is not None and lower in members:
+                    used.add((owner.lower(), lower))
+                elif lower in table.globals:
+                    used.add(("", lower))
+                elif table.option_explicit:
+                    table.problems.append(
+                        ("aviso", f"Nombre no declarado: '{name}'", start + rel + 1))
+
+        # 4) Variables y constantes de nivel superior o de clase sin usar
+        for owner, scope in [("", table.globals)] + list(table.classes.items()):
+            for lower, symbol in scope.items():
+                if symbol.kind in _MAY_BE_UNUSED or (owner, lower) in used:
+                    continue
+                if owner and symbol.public:
+                    continue    # Un campo público se puede usar desde fuera
+                table.problems.append(_unused(symbol.name, symbol.line))
+
+        table.definitions.sort(key=lambda s: s.line)
+        table.problems.sort(key=lambda p: p[2])
+        return table
+
+    @staticmethod
+    def _declare(table: SymbolTable, scope: Dict[str, Symbol], name: str, kind: str,
+                 line: int, owner: str, public: bool = True) -> None:
+        lower = name.lower()
+        previous = scope.get(lower)
+        if previous is not None:
+            # Property Get / Let / Set comparten nombre
+            if not (previous.kind == kind == KIND_PROPERTY):
+                table.problems.append(_duplicate(name, previous.line, line + 1))
+            return
+        scope[lower] = Symbol(name, kind, line + 1, owner, public)
+
+
+def identifier_occurrences(infos: Sequence):
+    """
+    (línea, columna, nombre) de cada nombre de usuario de *infos*
+    (``LineInfo``), sin los de dentro de cadenas o comentarios ni los que
+    siguen a un punto.  Líneas 1-based, columnas 0-based.
+    """
+    blank = lambda m: " " * len(m.group())
+    for line, info in enumerate(infos, start=1):
+        text = _NUMBER_LITERAL_RE.sub(blank, _masked(info))
+        for match in _IDENT_RE.finditer(text):
+            name = match.group(1)
+            lower = name.lower()
+            if lower not in _KEYWORDS and lower not in _BUILTINS:
+                yield line, match.start(1), name
+
+
+class DefinitionIndex:
+    """
+    ``Sub``/``Function``/``Property``/``Class`` de un script, para el
+    panel de esquema.
+
+    ``update(text)`` compara con el texto anterior (prefijo y sufijo sin
+    cambios, como ``IncrementalValidator``) y solo busca definiciones en
+    las líneas cambiadas; las de después se desplazan sin volver a
+    leerlas.
+
+    Attributes:
+        definitions: ``Symbol`` de cada definición en orden de línea (los
+            miembros de una clase llevan la clase en ``scope``).
+    """
+
+    def __init__(self):
+        self._lines: List[str] = []
+        # Definiciones y cierres de clase: (línea 0-based, clase, nombre, público)
+        self._marks: List[Tuple[int, str, str, bool]] = []
+        self.definitions: List[Symbol] = []
+
+    @staticmethod
+    def _scan(lines: Sequence[str], offset: int) -> List[Tuple[int, str, str, bool]]:
+        marks = []
+        for i, line in enumerate(lines, start=offset):
+            m = _PROC_RE.match(line)
+            if m:
+                marks.append((i, m.group(1).split()[0].lower(), m.group(2),
+                              not line.lstrip().lower().startswith("private")))
+                continue
+            m = _CLASS_RE.match(line)
+            if m:
+                marks.append((i, KIND_CLASS, m.group(1), True))
+            elif _END_CLASS_RE.match(line):
+                marks.append((i, "", "", True))
+        return marks
+
+    def update(self, text: str) -> bool:
+        """Actualiza el índice con *text*; True si cambiaron las definiciones."""
+        lines = text.split("\n")
+        old_lines = self._lines
+        n, old_n = len(lines), len(old_lines)
+
+        limit = min(n, old_n)
+        first = 0
+        while first < limit and lines[first] == old_lines[first]:
+            first += 1
+        suffix = 0
+        while (suffix < limit - first
+               and lines[n - 1 - suffix] == old_lines[old_n - 1 - suffix]):
+            suffix += 1
+        self._lines = lines
+        if first == n == old_n:
+            return False
+
+        starts = [mark[0] for mark in self._marks]
+        lo = bisect.bisect_left(starts, first)
+        hi = bisect.bisect_left(starts, old_n - suffix)
+        delta = n - old_n
+        marks = (self._marks[:lo]
+                 + self._scan(lines[first:n - suffix], first)
+                 + [(i + delta, kind, name, public)
+                    for i, kind, name, public in self._marks[hi:]])
+        if marks == self._marks:
+            return False
+        self._marks = marks
+
+        definitions = []
+        class_name = ""
+        for i, kind, name, public in marks:
+            if kind == KIND_CLASS:
+                definitions.append(Symbol(name, kind, i + 1, ""))
+                class_name = name
+            elif not kind:
+                class_name = ""
+            else:
+                definitions.append(Symbol(name, kind, i + 1, class_name, public))
+        self.definitions = definitions
+        return True
+
+
+def analyze_code(code: str) -> SymbolTable:
+    """Tabla de símbolos de *code* (sin caché entre llamadas)."""
+    from editor.vbs_validator import preprocess
+    return SymbolAnalyzer().analyze(preprocess(code))
@@ -5,9 +5,6 @@ Estilo VS Code con diferenciacion de colores mejorada.
 """
 from __future__ import annotations
 
-from pygments import lex
-from pygments.lexers.basic import VBScriptLexer
-from pygments.token import Token
 from config import (
     COLOR_KEYWORD,
     COLOR_STRING,
@@ -23,66 +20,10 @@ from config import (
     COLOR_OPERADOR,
     FUENTE_EDITOR,
 )
+from editor.syntax.vb_tokens import TokenCache
 
-
-def _token_to_tag(token) -> str:
-    """
-    Devuelve el tag Tkinter a usar para un token de Pygments.
-    Mapeo completo de tokens para lograr colores estilo VS Code.
-    """
-    #Comentarios (verde)
-    if token in Token.Comment:
-        return "comment"
-    
-    #Palabras clave (azul)
-    if token in Token.Keyword:
-        return "keyword"
-    
-    #Cadenas de texto (naranja/salmon)
-    if token in Token.Literal.String:
-        return "string"
-    
-    #Numeros (verde claro)
-    if token in Token.Literal.Number:
-        return "number"
-    
-    #Funciones built-in (amarillo)
-    if token in Token.Name.Builtin:
-        return "builtin"
-    
-    #Nombres de funciones (amarillo)
-    if token in Token.Name.Function:
-        return "function"
-    
-    #Nombres de clases/tipos (verde turquesa)
-    if token in Token.Name.Class:
-        return "class"
-    if token in Token.Name.Type:
-        return "class"
-    
-    #Variables y otros nombres (azul claro)
-    if token in Token.Name.Variable:
-        return "variable"
-    if token in Token.Name.Attribute:
-        return "variable"
-    
-    #Constantes (azul cyan)
-    if token in Token.Name.Constant:
-        return "constant"
-    
-    #Operadores
-    if token in Token.Operator:
-        return "operator"
-    
-    #Puntuacion (gris)
-    if token in Token.Punctuation:
-        return "punctuation"
-    
-    #Otros nombres (resaltarlos como variables para mejor visual)
-    if token in Token.Name:
-        return "variable"
-    
-    return "normal"
+# Índices por llamada a tag_add (cada llamada es un viaje a Tcl)
+_TAG_BATCH = 2000
 
 
 class VBHighlighter:
@@ -98,9 +39,10 @@ class VBHighlighter:
         "operator", "punctuation", "normal"
     )
     
-    def __init__(self, text_widget):
+    def __init__(self, text_widget, token_cache: TokenCache = None):
         self.text_widget = text_widget
-        self.lexer = VBScriptLexer()
+        # Tokens compartidos con el validador (ver editor.syntax.vb_tokens)
+        self.token_cache = token_cache or TokenCache()
         
         #Definir los tags de colores con estilo VS Code
         self.text_widget.tag_configure("keyword", foreground=COLOR_KEYWORD)
@@ -119,7 +61,11 @@ class VBHighlighter:
     def highlight(self, code: str = None) -> None:
         """
         Tokeniza el contenido actual del widget y aplica tags.
-        Usa posiciones linea.columna para evitar problemas con offsets.
+
+        Los tokens salen del ``TokenCache`` del editor, por líneas: solo se
+        tokenizan las líneas nuevas o cambiadas y los índices
+        línea.columna se construyen sin recorrer el texto carácter a
+        carácter.
         """
         # Quitar TODOS los tags anteriores primero
         for tag in self.TAGS:
@@ -131,31 +77,15 @@ class VBHighlighter:
         if not text:
             return
 
-        #Posicion actual: linea (1-based), columna (0-based)
-        line = 1
-        col = 0
-
-        for token, content in lex(text, self.lexer):
-            if not content:
-                continue
+        stream = self.token_cache.stream(text)
+        indices = {tag: [] for tag in self.TAGS}
+        for line, tokens in enumerate(stream.tokens, start=1):
+            for start, end, tag in tokens:
+                indices[tag] += (f"{line}.{start}", f"{line}.{end}")
 
-            tag = _token_to_tag(token)
-            
-            #Calcular posicion inicial
-            start_index = f"{line}.{col}"
-            
-            #Avanzar por el contenido del token
-            for char in content:
-                if char == '\n':
-                    line += 1
-                    col = 0
-                else:
-                    col += 1
-            
-            #Posicion final
-            end_index = f"{line}.{col}"
-            
-            self.text_widget.tag_add(tag, start_index, end_index)
+        for tag, tag_indices in indices.items():
+            for i in range(0, len(tag_indices), 2 * _TAG_BATCH):
+                self.text_widget.tag_add(tag, *tag_indices[i:i + 2 * _TAG_BATCH])
         
         #Asegurar que los tags de sintaxis tienen prioridad sobre normal
         for tag in self.TAGS:
@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+"""
+Tokens VBScript por líneas, compartidos por el resaltado y el validador.
+
+El lexer de Pygments da exactamente la información que necesita el
+validador (comentarios, cadenas y palabras clave), así que ambos usan
+el mismo flujo de tokens: el coste de tokenizar se paga una vez por
+edición y lo que el validador considera cadena o comentario es lo que
+el usuario ve resaltado.
+
+  - ``lex_lines(lines)`` tokeniza solo las líneas que no están en la
+    caché (indexada por el contenido de la línea), todas juntas en una
+    sola llamada al lexer.
+  - ``TokenCache`` guarda el ``TokenStream`` del documento actual con un
+    número de generación: mientras el texto no cambie, el resaltado y el
+    validador reciben el mismo objeto sin volver a tokenizar.
+
+Cada línea se representa como una tupla de tramos ``(inicio, fin, tag)``
+(columnas 0-based); los tramos contiguos con el mismo tag van unidos.
+"""
+from __future__ import annotations
+
+import threading
+from typing import List, Optional, Sequence, Tuple
+
+from pygments.lexers.basic import VBScriptLexer
+from pygments.token import Comment, Error, Token
+
+# Tramos (inicio, fin, tag) de una línea
+LineTokens = Tuple[Tuple[int, int, str], ...]
+
+# Líneas distintas guardadas como máximo en la caché de tokens
+_CACHE_MAX = 50000
+
+
+def _token_to_tag(token) -> str:
+    """
+    Devuelve el tag Tkinter a usar para un token de Pygments.
+    Mapeo completo de tokens para lograr colores estilo VS Code.
+    """
+    #Comentarios (verde)
+    if token in Token.Comment:
+        return "comment"
+
+    #Palabras clave (azul)
+    if token in Token.Keyword:
+        return "keyword"
+
+    #Cadenas de texto (naranja/salmon)
+    if token in Token.Literal.String:
+        return "string"
+
+    #Numeros (verde claro)
+    if token in Token.Literal.Number:
+        return "number"
+
+    #Funciones built-in (amarillo)
+    if token in Token.Name.Builtin:
+        return "builtin"
+
+    #Nombres de funciones (amarillo)
+    if token in Token.Name.Function:
+        return "function"
+
+    #Nombres de clases/tipos (verde turquesa)
+    if token in Token.Name.Class:
+        return "class"
+    if token in Token.Name.Type:
+        return "class"
+
+    #Variables y otros nombres (azul claro)
+    if token in Token.Name.Variable:
+        return "variable"
+    if token in Token.Name.Attribute:
+        return "variable"
+
+    #Constantes (azul cyan)
+    if token in Token.Name.Constant:
+        return "constant"
+
+    #Operadores
+    if token in Token.Operator:
+        return "operator"
+
+    #Puntuacion (gris)
+    if token in Token.Punctuation:
+        return "punctuation"
+
+    #Otros nombres (resaltarlos como variables para mejor visual)
+    if token in Token.Name:
+        return "variable"
+
+    return "normal"
+
+
+def _line_local(rules):
+    """
+    Reglas de VBScriptLexer ajustadas para que cada línea se tokenice
+    igual sola que dentro del documento:
+
+      - Los separadores entre palabras (``Sub Nombre``, ``End If``...)
+        son espacios o tabuladores, no saltos de línea.
+      - ``REM`` sin texto detrás ya no se come la línea siguiente.
+      - Un carácter no reconocido (``[``, ``;``...) es un error de un
+        solo carácter, en vez de tragarse el resto de la línea con sus
+        cadenas y comentarios.
+    """
+    adjusted = []
+    for rule in rules:
+        if isinstance(rule, tuple) and isinstance(rule[0], str):
+            regex = rule[0]
+            if regex == r"rem\s.*[^\n]*":
+                rule = (r"rem(?:[ \t][^\n]*)?(?=\n|$)", Comment.Single)
+            elif regex == r".+(\n)?":
+                rule = (r"[^\n]", Error)
+            elif regex != r"\s+" and r"\s" in regex:
+                rule = (regex.replace(r"\s", r"[ \t]"),) + rule[1:]
+        adjusted.append(rule)
+    return adjusted
+
+
+class _LineLexer(VBScriptLexer):
+    """VBScriptLexer sin reglas que crucen de una línea a otra."""
+    tokens = {
+        state: _line_local(rules) for state, rules in VBScriptLexer.tokens.items()
+    }
+
+
+_LEXER = _LineLexer()
+
+_cache: dict = {}
+_cache_lock = threading.Lock()
+
+
+def _lex_joined(lines: Sequence[str]) -> List[LineTokens]:
+    """Tokeniza *lines* en una sola llamada y reparte los tramos por línea."""
+    result: List[LineTokens] = []
+    current: list = []
+    col = 0
+    for _pos, ttype, value in _LEXER.get_tokens_unprocessed("\n".join(lines)):
+        tag = _token_to_tag(ttype)
+        pieces = value.split("\n")
+        for n, piece in enumerate(pieces):
+            if n:
+                result.append(tuple(current))
+                current = []
+                col = 0
+            if not piece:
+                continue
+            end = col + len(piece)
+            if current and current[-1][2] == tag and current[-1][1] == col:
+                current[-1] = (current[-1][0], end, tag)
+            else:
+                current.append((col, end, tag))
+            col = end
+    result.append(tuple(current))
+    # El texto unido no acaba en salto de línea: completar líneas vacías
+    result.extend(() for _ in range(len(lines) - len(result)))
+    return result[:len(lines)]
+
+
+def lex_lines(lines: Sequence[str]) -> List[LineTokens]:
+    """Tramos de cada línea de *lines*, tokenizando solo las que faltan."""
+    result: List[Optional[LineTokens]] = [None] * len(lines)
+    missing: dict = {}
+    with _cache_lock:
+        for i, line in enumerate(lines):
+            tokens = _cache.get(line)
+            if tokens is None:
+                missing.setdefault(line, []).append(i)
+            else:
+                result[i] = tokens
+    if not missing:
+        return result
+
+    unique = list(missing)
+    lexed = _lex_joined(unique)
+    with _cache_lock:
+        for line, tokens in zip(unique, lexed):
+            _cache[line] = tokens
+            for i in missing[line]:
+                result[i] = tokens
+        # Descartar las entradas más antiguas (orden de inserción)
+        excess = len(_cache) - _CACHE_MAX
+        if excess > 0:
+            for line in list(_cache)[:excess]:
+                del _cache[line]
+    return result
+
+
+def line_tokens(line: str) -> LineTokens:
+    """Tramos de una sola línea (ver ``lex_lines``)."""
+    return lex_lines([line])[0]
+
+
+class TokenStream:
+    """
+    Tokens de un documento completo, por líneas (separadas por ``\\n``).
+
+    Attributes:
+        text: Texto tokenizado.
+        lines: ``text.split("\\n")``.
+        tokens: Tramos de cada línea (ver ``lex_lines``).
+        generation: Generación del documento en su ``TokenCache``.
+    """
+
+    def __init__(self, text: str, generation: int = 0):
+        self.text = text
+        self.lines = text.split("\n")
+        self.tokens = lex_lines(self.lines)
+        self.generation = generation
+
+
+class TokenCache:
+    """
+    Último ``TokenStream`` de un documento.
+
+    La generación aumenta cada vez que el texto cambia; con el mismo
+    texto se devuelve el mismo flujo sin tokenizar.  Se puede usar a la
+    vez desde el hilo de la interfaz y desde el del validador.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stream: Optional[TokenStream] = None
+        self.generation = 0
+
+    def stream(self, text: str) -> TokenStream:
+        with self._lock:
+            stream = self._stream
+        if stream is not None and stream.text == text:
+            return stream
+        new_stream = TokenStream(text)
+        with self._lock:
+            self.generation += 1
+            new_stream.generation = self.generation
+            self._stream = new_stream
+        return new_stream
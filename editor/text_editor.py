@@ -5,6 +5,7 @@ Editor principal con soporte para resaltado de sintaxis y funcionalidades de edi
 
 import tkinter as tk
 from editor.syntax.vb_highlighter import VBHighlighter
+from editor.syntax.vb_tokens import TokenCache
 from config import COLOR_FONDO, COLOR_TEXTO, COLOR_CURSOR, COLOR_SELECCION, FUENTE_EDITOR
 
 
@@ -27,8 +28,11 @@ class TextEditor(tk.Text):
         )
 
         self.configure(blockcursor=False, insertontime=600, insertofftime=300)
-        self.highlighter = VBHighlighter(self)
+        # Tokens por generación del texto, compartidos por resaltado y validación
+        self.token_cache = TokenCache()
+        self.highlighter = VBHighlighter(self, self.token_cache)
         self._highlight_after_id = None
+        self._skip_modified = False
 
         self.bind("<KeyRelease>", self._on_key_release)
         self.bind("<Key>", self._schedule_highlight_fast)
@@ -38,7 +42,7 @@ class TextEditor(tk.Text):
         self.bind("<<Cut>>", self._do_highlight_now)
         self.bind("<<Undo>>", self._do_highlight_now)
         self.bind("<<Redo>>", self._do_highlight_now)
-        self.bind("<<Modified>>", self._schedule_highlight_fast)
+        self.bind("<<Modified>>", self._on_modified)
 
         self.bind("<KeyRelease>", lambda e: self.event_generate("<<Change>>"), add=True)
         self.bind("<MouseWheel>", lambda e: self.event_generate("<<Change>>"), add=True)
@@ -57,6 +61,13 @@ class TextEditor(tk.Text):
         else:
             self._schedule_highlight_fast()
 
+    def _on_modified(self, event=None):
+        """<<Modified>> llega en diferido: ignorar el de una edición agrupada."""
+        if self._skip_modified:
+            self._skip_modified = False
+            return
+        self._schedule_highlight_fast()
+
     def _schedule_highlight_fast(self, event=None):
         if self._highlight_after_id is not None:
             self.after_cancel(self._highlight_after_id)
@@ -90,3 +101,28 @@ class TextEditor(tk.Text):
         self.insert("1.0", text)
         self._do_highlight()
         self._user_modified = False
+        self.event_generate("<<ContentReplaced>>")
+
+    def replace_range(self, start: str, end: str, text: str):
+        """
+        Sustituye el rango start..end por *text* como una única edición.
+
+        Queda como un solo paso de deshacer (sin separadores automáticos
+        entre el borrado y la inserción) y se resalta una sola vez al
+        final, lo que también redibuja una vez los números de línea.
+        """
+        autoseparators = self.cget("autoseparators")
+        self._skip_modified = not self.edit_modified()
+        self.edit_separator()
+        self.configure(autoseparators=False)
+        try:
+            self.delete(start, end)
+            self.insert(start, text)
+        finally:
+            self.edit_separator()
+            self.configure(autoseparators=autoseparators)
+        self._user_modified = True
+        self.event_generate("<<ContentReplaced>>")
+        if self._highlight_after_id is not None:
+            self.after_cancel(self._highlight_after_id)
+        self._do_highlight()
@@ -0,0 +1,260 @@
+# -*- coding: utf-8 -*-
+"""
+Caché persistente (SQLite) de resultados de validación.
+
+Los mismos scripts se validan una y otra vez: al guardar, al cambiar de
+script y en cada pasada nocturna de ``main.py lint``, y casi siempre sin
+cambios.  Esta caché guarda la lista de problemas de cada contenido:
+
+  - Clave: hash SHA-256 del contenido + versión de las reglas activas
+    (``ruleset_version()``: ``RULESET_VERSION`` y reglas no
+    desactivadas).  El editor y ``main.py lint`` comparten el fichero y
+    pueden tener reglas distintas, así que las entradas de otras
+    versiones no se borran: solo dejan de usarse y acaban saliendo por
+    el límite de tamaño.
+  - Límite de tamaño: al superar ``max_entries`` se descartan las
+    entradas usadas hace más tiempo (un 10 % de golpe, para no borrar en
+    cada inserción).
+  - Estadísticas: aciertos, fallos y tasa de aciertos de la sesión
+    (``stats()``), y acumuladas en el propio fichero.
+
+Se puede usar a la vez desde el hilo de la interfaz y desde el del
+validador en vivo.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+from typing import List, Optional, Tuple
+
+from editor.vbs_validator import ruleset_version
+
+logger = logging.getLogger("EditorVBS.validacion")
+
+# Fichero por defecto: %APPDATA%/EditorVBS/validation_cache.sqlite
+_DEFAULT_PATH = os.path.join(
+    os.environ.get("APPDATA", os.path.expanduser("~")), "EditorVBS", "validation_cache.sqlite"
+)
+
+# Entradas guardadas como máximo
+CACHE_MAX_ENTRIES = 50000
+
+# Fracción de entradas que se descarta al llenarse
+_EVICT_FRACTION = 0.1
+
+# Inserciones acumuladas antes de confirmar en disco
+_COMMIT_EVERY = 200
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS results (
+    hash     TEXT NOT NULL,
+    version  TEXT NOT NULL,
+    problems TEXT NOT NULL,
+    used     INTEGER NOT NULL,
+    PRIMARY KEY (hash, version)
+);
+CREATE INDEX IF NOT EXISTS results_used ON results (used);
+"""
+
+Problems = List[Tuple[str, str, int]]
+
+
+def content_hash(code: str) -> str:
+    """Hash del contenido usado como clave."""
+    return hashlib.sha256(code.encode("utf-8", "surrogatepass")).hexdigest()
+
+
+class ValidationCache:
+    """
+    Resultados de ``validate_vbs`` por contenido, persistidos en SQLite.
+
+    Args:
+        path: Ruta del fichero SQLite (default: en %APPDATA%/EditorVBS).
+        max_entries: Entradas como máximo antes de descartar las más antiguas.
+        version: Versión de las reglas (default: ``ruleset_version()`` al abrir).
+    """
+
+    def __init__(self, path: Optional[str] = None, max_entries: int = CACHE_MAX_ENTRIES,
+                 version: Optional[str] = None):
+        self.path = path or _DEFAULT_PATH
+        self.max_entries = max_entries
+        self.version = str(version if version is not None else ruleset_version())
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._pending = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._upgrade_schema()
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+        row = self._conn.execute("SELECT MAX(used) FROM results").fetchone()
+        self._clock = row[0] or 0
+        self._count = self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def close(self) -> None:
+        """Guarda lo pendiente y las estadísticas acumuladas, y cierra."""
+        with self._lock:
+            if self._conn is None:
+                return
+            self._save_totals()
+            self._conn.commit()
+            self._conn.close()
+            self._conn = None
+        logger.info("Caché de validación: %d aciertos, %d fallos (%.0f %%)",
+                    self.hits, self.misses, self.hit_rate * 100)
+
+    # ------------------------------------------------------------------
+    # Consulta
+    # ------------------------------------------------------------------
+
+    def get(self, code: str) -> Optional[Problems]:
+        """Problemas guardados para *code*, o None si no está en la caché."""
+        return self.get_by_hash(content_hash(code))
+
+    def get_by_hash(self, digest: str) -> Optional[Problems]:
+        with self._lock:
+            if self._conn is None:
+                return None
+            row = self._conn.execute(
+                "SELECT problems FROM results WHERE hash = ? AND version = ?",
+                (digest, self.version),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._clock += 1
+            self._conn.execute("UPDATE results SET used = ? WHERE hash = ? AND version = ?",
+                               (self._clock, digest, self.version))
+            self._maybe_commit()
+        return [tuple(p) for p in json.loads(row[0])]
+
+    def put(self, code: str, problems: Problems) -> None:
+        """Guarda los problemas de *code*."""
+        self.put_by_hash(content_hash(code), problems)
+
+    def put_by_hash(self, digest: str, problems: Problems) -> None:
+        data = json.dumps(problems, ensure_ascii=False)
+        with self._lock:
+            if self._conn is None:
+                return
+            self._clock += 1
+            exists = self._conn.execute("SELECT 1 FROM results WHERE hash = ? AND version = ?",
+                                        (digest, self.version)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results (hash, version, problems, used) "
+                "VALUES (?, ?, ?, ?)",
+                (digest, self.version, data, self._clock),
+            )
+            if not exists:
+                self._count += 1
+            if self._count > self.max_entries:
+                self._evict()
+            self._maybe_commit()
+
+    def flush(self) -> None:
+        """Confirma en disco las inserciones pendientes."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.commit()
+                self._pending = 0
+
+    # ------------------------------------------------------------------
+    # Mantenimiento
+    # ------------------------------------------------------------------
+
+    def _upgrade_schema(self) -> None:
+        """Rehace la tabla de versiones anteriores (clave solo por hash)."""
+        keys = [row[1] for row in self._conn.execute("PRAGMA table_info(results)") if row[5]]
+        if keys == ["hash"]:
+            self._conn.execute("DROP TABLE results")
+
+    def _maybe_commit(self) -> None:
+        self._pending += 1
+        if self._pending >= _COMMIT_EVERY:
+            self._conn.commit()
+            self._pending = 0
+
+    def _evict(self) -> None:
+        """Descarta las entradas usadas hace más tiempo (de cualquier versión)."""
+        # Otro proceso puede haber añadido entradas al mismo fichero
+        self._count = self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        target = int(self.max_entries * (1 - _EVICT_FRACTION))
+        excess = self._count - target
+        if excess <= 0:
+            return
+        self._conn.execute(
+            "DELETE FROM results WHERE rowid IN "
+            "(SELECT rowid FROM results ORDER BY used LIMIT ?)", (excess,))
+        self.evictions += excess
+        self._count = target
+        logger.debug("Caché de validación: %d entradas descartadas", excess)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM results")
+            self._conn.commit()
+            self._count = 0
+
+    # ------------------------------------------------------------------
+    # Estadísticas
+    # ------------------------------------------------------------------
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _totals(self) -> Tuple[int, int]:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'totals'").fetchone()
+        return tuple(json.loads(row[0])) if row else (0, 0)
+
+    def _save_totals(self) -> None:
+        hits, misses = self._totals()
+        self._conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES ('totals', ?)",
+            (json.dumps([hits + self.hits, misses + self.misses]),),
+        )
+
+    def stats(self) -> dict:
+        """Estadísticas de la sesión y acumuladas (todas las sesiones cerradas)."""
+        with self._lock:
+            total_hits, total_misses = self._totals()
+        total = total_hits + total_misses
+        return {
+            "entradas": self._count,
+            "max_entradas": self.max_entries,
+            "aciertos": self.hits,
+            "fallos": self.misses,
+            "tasa_aciertos": round(self.hit_rate, 3),
+            "descartadas": self.evictions,
+            "aciertos_acumulados": total_hits,
+            "fallos_acumulados": total_misses,
+            "tasa_acumulada": round(total_hits / total, 3) if total else 0.0,
+        }
+
+
+def open_default_cache() -> Optional[ValidationCache]:
+    """Caché en la ruta por defecto, o None si no se puede abrir (disco, permisos)."""
+    try:
+        return ValidationCache()
+    except (OSError, sqlite3.Error) as e:
+        logger.warning("Caché de validación no disponible: %s", e)
+        return None
@@ -8,10 +8,31 @@ Comprueba errores comunes antes de guardar:
 - Paréntesis desbalanceados
 - Comillas sin cerrar en una línea
 - Líneas extremadamente largas (posible error de pegado)
+- Nombres duplicados, sin usar o no declarados (tabla de símbolos,
+  ver ``editor.symbols``)
+
+Cada comprobación es una regla registrada (``register_rule``) con su
+ámbito (línea, bloque o global) y si admite validación incremental.  Las
+reglas se pueden desactivar por configuración (``set_disabled_rules``) y
+el tiempo y los problemas de cada una quedan medidos en ``rule_stats``
+(``debug_report()``).
 """
 
+import logging
 import re
-from typing import List, Tuple
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from editor.symbols import SymbolAnalyzer
+from editor.syntax.vb_tokens import LineTokens, TokenStream, lex_lines, line_tokens
+
+logger = logging.getLogger("EditorVBS.validacion")
+
+
+# Versión de las reglas: cambiarla cuando cambie lo que se detecta o los
+# mensajes, para invalidar los resultados guardados (ValidationCache)
+RULESET_VERSION = 3
 
 
 #Pares de apertura/cierre en VBScript (case-insensitive)
@@ -30,24 +51,7 @@ BLOCK_PAIRS = [
 ]
 
 
-def _strip_comments(line: str) -> str:
-    """Elimina comentarios de una línea VBS (todo lo que va después de ')."""
-    in_string = False
-    for i, ch in enumerate(line):
-        if ch == '"':
-            in_string = not in_string
-        elif ch == "'" and not in_string:
-            return line[:i]
-    return line
-
-
-def _is_comment_line(line: str) -> bool:
-    """Comprueba si una linea es enteramente un comentario."""
-    stripped = line.strip()
-    return stripped.startswith("'") or stripped.upper().startswith("REM ")
-
-
-def validate_vbs(code: str) -> List[Tuple[str, str, int]]:
+def validate_vbs(code: str, cache=None) -> List[Tuple[str, str, int]]:
     """
     Valida codigo VBScript y devuelve una lista de problemas encontrados.
     
@@ -56,144 +60,634 @@ def validate_vbs(code: str) -> List[Tuple[str, str, int]]:
       -mensaje: Descripción del problema
       -linea: Número de línea (1-based), 0 si es global
     
+    Args:
+        code: Código a validar.
+        cache: ``ValidationCache`` opcional: se consulta antes de validar
+            y se actualiza con el resultado.
+    
     Returns:
         Lista de problemas encontrados (vacia si todo esta bien).
     """
-    problemas: List[Tuple[str, str, int]] = []
-    
-    if not code or not code.strip():
-        problemas.append(("error", "El script está vacío", 0))
+    if cache is not None:
+        problemas = cache.get(code)
+        if problemas is None:
+            problemas = _validate(code)
+            cache.put(code, problemas)
         return problemas
+    return _validate(code)
+
+
+def _validate(code: str) -> List[Tuple[str, str, int]]:
+    if not code or not code.strip():
+        return [("error", "El script está vacío", 0)]
     
-    lines = code.splitlines()
-    
-    #1)Comprobar bloques abiertos/cerrados
-    _check_blocks(lines, problemas)
-    
-    #2)Comprobar comillas sin cerrar
-    _check_quotes(lines, problemas)
-    
-    #3)Comprobar parentesis desbalanceados
-    _check_parentheses(lines, problemas)
-    
-    #4) Comprobar lineas muy largas
-    _check_long_lines(lines, problemas)
-    
-    return problemas
+    #Cada línea se recorre una sola vez; las reglas usan el resultado
+    return run_rules(preprocess(code))
 
 
-def _check_blocks(lines: List[str], problemas: List):
-    """Comprueba que cada bloque abierto tenga su cierre correspondiente."""
-    for regex_open, regex_close, name in BLOCK_PAIRS:
-        open_count = 0
-        open_lines = []
-        
-        for i, line in enumerate(lines, start=1):
-            if _is_comment_line(line):
-                continue
-            
-            clean = _strip_comments(line)
-            
-            if re.search(regex_open, clean, re.IGNORECASE):
-                open_count += 1
-                open_lines.append(i)
-            if re.search(regex_close, clean, re.IGNORECASE):
-                open_count -= 1
-                if open_lines:
-                    open_lines.pop()
-        
-        if open_count > 0:
-            linea_ref = open_lines[0] if open_lines else 0
+# Todas las regex de BLOCK_PAIRS empiezan así (anclan al inicio de línea)
+_LINE_START = r"^\s*"
+
+
+def _compile_block_regex() -> "re.Pattern":
+    """
+    Une todas las aperturas y cierres de BLOCK_PAIRS en una sola regex.
+
+    Cada alternativa lleva un grupo con nombre: ``o<i>`` para la apertura
+    del par *i* y ``c<i>`` para su cierre (``match.lastgroup``).
+    """
+    alternatives = []
+    for idx, (regex_open, regex_close, _) in enumerate(BLOCK_PAIRS):
+        alternatives.append(f"(?P<c{idx}>{regex_close[len(_LINE_START):]})")
+        alternatives.append(f"(?P<o{idx}>{regex_open[len(_LINE_START):]})")
+    return re.compile(_LINE_START + "(?:" + "|".join(alternatives) + ")", re.IGNORECASE)
+
+
+_BLOCK_RE = _compile_block_regex()
+
+class LineInfo(NamedTuple):
+    """
+    Línea ya clasificada y limpiada, compartida por todas las comprobaciones.
+
+    Attributes:
+        length: Longitud de la línea original.
+        is_comment: La línea entera es un comentario (``'`` o ``REM``).
+        code: Parte de código, sin el comentario final.
+        strings: Rangos (inicio, fin) de las cadenas dentro de ``code``;
+            una cadena sin cerrar llega hasta el final.
+        quotes_odd: Número impar de comillas dobles en ``code``.
+        parens: Balance ``(`` - ``)`` fuera de cadenas.
+        block: ("o" | "c", índice en BLOCK_PAIRS) si la línea abre o
+            cierra un bloque, o None.
+    """
+    length: int
+    is_comment: bool
+    code: str
+    strings: Tuple[Tuple[int, int], ...]
+    quotes_odd: bool
+    parens: int
+    block: Optional[Tuple[str, int]]
+
+
+def preprocess_line(line: str, tokens: Optional[LineTokens] = None) -> LineInfo:
+    """
+    Clasifica y limpia una línea a partir de sus tokens.
+
+    Comentarios, cadenas y palabras clave salen del mismo lexer que el
+    resaltado (ver ``editor.syntax.vb_tokens``), así que el validador
+    trata como cadena o comentario lo mismo que el usuario ve coloreado.
+    """
+    if tokens is None:
+        tokens = line_tokens(line)
+
+    code_end = len(line)
+    first_tag = None
+    strings = []
+    quotes = 0
+    for start, end, tag in tokens:
+        if tag == "comment":
+            code_end = start
+            break
+        if first_tag is None and line[start:end].strip():
+            first_tag = tag
+        if tag == "string":
+            strings.append((start, end))
+            quotes += line.count('"', start, end)
+
+    if first_tag is None and code_end < len(line):
+        return LineInfo(len(line), True, "", (), False, 0, None)
+    code = line[:code_end]
+
+    # Paréntesis de los tramos que quedan fuera de las cadenas
+    parens = 0
+    prev = 0
+    for begin, end in strings + [(code_end, code_end)]:
+        parens += code.count("(", prev, begin) - code.count(")", prev, begin)
+        prev = end
+
+    # Solo una palabra clave puede abrir o cerrar un bloque
+    block = None
+    if first_tag == "keyword":
+        m = _BLOCK_RE.match(code)
+        if m:
+            block = (m.lastgroup[0], int(m.lastgroup[1:]))
+    return LineInfo(len(line), False, code, tuple(strings), quotes % 2 == 1, parens, block)
+
+
+def preprocess(code: str) -> List[LineInfo]:
+    """Clasifica todas las líneas de *code* (ver ``LineInfo``)."""
+    lines = code.split("\n")
+    return [preprocess_line(line, tokens) for line, tokens in zip(lines, lex_lines(lines))]
+
+
+def _block_step(stack: Tuple, info: LineInfo, i: int) -> Tuple[Tuple, List]:
+    """
+    Aplica la línea *i* a la pila de bloques abiertos.
+
+    La pila es una tupla de (índice en BLOCK_PAIRS, línea) para poder
+    guardarla como estado tras cada línea sin copiarla.
+
+    Returns:
+        Tupla (nueva pila, problemas de esta línea).
+    """
+    if info.block is None:
+        return stack, []
+    kind, idx = info.block
+    if kind == "o":
+        return stack + ((idx, i),), []
+
+    if not any(open_idx == idx for open_idx, _ in stack):
+        return stack, []  # Cierre sin apertura: patrón válido en G21
+    problemas = []
+    close_word = BLOCK_PAIRS[idx][2].split(" / ")[1]
+    depth = len(stack) - 1
+    while stack[depth][0] != idx:
+        open_idx, open_line = stack[depth]
+        open_word = BLOCK_PAIRS[open_idx][2].split(" / ")[0]
+        problemas.append((
+            "error",
+            f"Bloque mal anidado: '{close_word}' cierra un '{open_word}' "
+            f"abierto en la línea {open_line}",
+            i
+        ))
+        depth -= 1
+    return stack[:depth], problemas
+
+
+def _unclosed_blocks(stack: Tuple) -> List:
+    """Bloques sin cerrar, agrupados por tipo en el orden de BLOCK_PAIRS."""
+    problemas = []
+    for idx, (_, _, name) in enumerate(BLOCK_PAIRS):
+        open_lines = [line for open_idx, line in stack if open_idx == idx]
+        if open_lines:
+            open_count = len(open_lines)
             problemas.append((
                 "error",
                 f"Bloque sin cerrar: {name} "
                 f"({open_count} apertura{'s' if open_count > 1 else ''} sin cierre)",
-                linea_ref
-            ))
-        elif open_count < 0:
-            #Cierre sin apertura ignorado - Patron valido en G21
-            pass
-            #Ignora "End Sub" suelto al inicio - Patron valido para G21
-            """
-            if name == "Sub / End Sub":
-                pass
-            else:
-                problemas.append((
-                    "aviso",
-                    f"Cierre extra: {name} "
-                    f"({abs(open_count)} cierre{'s' if abs(open_count) > 1 else ''} sin apertura)",
-                    0
-                ))
-            """
-
-def _check_quotes(lines: List[str], problemas: List):
-    """Comprueba comillas dobles sin cerrar en cada línea."""
-    for i, line in enumerate(lines, start=1):
-        if _is_comment_line(line):
-            continue
-        
-        clean = _strip_comments(line)
-        
-        #Contar comillas dobles — si es impar, hay una sin cerrar
-        count = clean.count('"')
-        if count % 2 != 0:
-            problemas.append((
-                "error",
-                f"Comillas sin cerrar en esta línea",
-                i
+                open_lines[0]
             ))
+    return problemas
 
 
-def _check_parentheses(lines: List[str], problemas: List):
-    """Comprueba paréntesis desbalanceados globalmente."""
-    total_open = 0
-    
-    for i, line in enumerate(lines, start=1):
-        if _is_comment_line(line):
-            continue
-        
-        clean = _strip_comments(line)
-        
-        #Excluir contenido dentro de strings
-        in_string = False
-        line_balance = 0
-        for ch in clean:
-            if ch == '"':
-                in_string = not in_string
-            elif not in_string:
-                if ch == '(':
-                    line_balance += 1
-                elif ch == ')':
-                    line_balance -= 1
-        
-        total_open += line_balance
-        
-        #Si el balance acumulado es negativo, hay un ) de más
-        if total_open < 0:
-            problemas.append((
-                "aviso",
-                f"Paréntesis de cierre ')' sin apertura correspondiente",
-                i
-            ))
-            total_open = 0  #Reset para no repetir el aviso
-    
+_QUOTE_ERROR = "Comillas sin cerrar en esta línea"
+
+
+def _quote_line(info: LineInfo) -> Tuple:
+    #Si el número de comillas es impar, hay una sin cerrar
+    return (("error", _QUOTE_ERROR),) if info.quotes_odd else ()
+
+
+def _paren_step(total_open: int, info: LineInfo, i: int) -> Tuple[int, List]:
+    """
+    Suma el balance de paréntesis de la línea *i* al acumulado.
+
+    Returns:
+        Tupla (nuevo acumulado, problemas de esta línea).
+    """
+    total_open += info.parens
+    if total_open < 0:
+        #Hay un ) de más; reset para no repetir el aviso
+        return 0, [("aviso", _PAREN_CLOSE_WARNING, i)]
+    return total_open, []
+
+
+_PAREN_CLOSE_WARNING = "Paréntesis de cierre ')' sin apertura correspondiente"
+
+
+def _unclosed_parens(total_open: int) -> List:
     if total_open > 0:
-        problemas.append((
-            "aviso",
-            f"Hay {total_open} paréntesis '(' sin cerrar en el script",
-            0
-        ))
+        return [("aviso", f"Hay {total_open} paréntesis '(' sin cerrar en el script", 0)]
+    return []
 
 
-def _check_long_lines(lines: List[str], problemas: List, max_length: int = 1000):
-    """Avisa sobre lineas extremadamente largas."""
-    for i, line in enumerate(lines, start=1):
-        if len(line) > max_length:
-            problemas.append((
-                "aviso",
-                f"Línea muy larga ({len(line)} caracteres). ¿Posible error de pegado?",
-                i
-            ))
+_MAX_LINE_LENGTH = 1000
+
+def _long_line_warning(length: int) -> str:
+    return f"Línea muy larga ({length} caracteres). ¿Posible error de pegado?"
+
+
+def _long_line(info: LineInfo) -> Tuple:
+    if info.length > _MAX_LINE_LENGTH:
+        return (("aviso", _long_line_warning(info.length)),)
+    return ()
+
+
+# ----------------------------------------------------------------------
+# Registro de reglas
+# ----------------------------------------------------------------------
+
+SCOPES = ("line", "block", "global")
+
+Problem = Tuple[str, str, int]
+
+
+class Rule(NamedTuple):
+    """
+    Regla de validación registrada (ver ``register_rule``).
+
+    Attributes:
+        name: Nombre; es el que se usa para desactivarla en la configuración.
+        scope: "line" (solo mira su línea), "block" (depende de los
+            bloques abiertos) o "global" (depende de todo el script).
+        incremental: ``IncrementalValidator`` puede reutilizar sus
+            resultados de la validación anterior.
+        description: Texto para el informe de depuración.
+        line: Reglas "line": ``line(info) -> ((nivel, mensaje), ...)``.
+        step: Reglas "block"/"global" incrementales:
+            ``step(estado, info, i) -> (estado, problemas de la línea i)``.
+            El estado debe ser inmutable y comparable con ``==``.
+        finish: ``finish(estado final) -> problemas`` (con ``step``).
+        initial: Estado antes de la primera línea (con ``step``).
+        check: Reglas no incrementales: ``check(infos) -> problemas``.
+        live_warnings_only: Sus avisos solo se muestran en vivo; no piden
+            confirmación al guardar (ver ``problems_for_save``).
+    """
+    name: str
+    scope: str
+    incremental: bool
+    description: str
+    line: Optional[Callable] = None
+    step: Optional[Callable] = None
+    finish: Optional[Callable] = None
+    initial: object = None
+    check: Optional[Callable] = None
+    live_warnings_only: bool = False
+
+
+_RULES: Dict[str, Rule] = {}
+_disabled: frozenset = frozenset()
+
+
+def register_rule(name: str, scope: str, *, incremental: bool = True,
+                  description: str = "", line: Optional[Callable] = None,
+                  step: Optional[Callable] = None, finish: Optional[Callable] = None,
+                  initial: object = None, check: Optional[Callable] = None,
+                  live_warnings_only: bool = False) -> Rule:
+    """
+    Añade una regla al validador; se ejecuta después de las ya registradas.
+
+    Las reglas de línea solo necesitan ``line``.  Las de bloque o globales
+    son incrementales si dan ``step`` y ``finish`` (el validador guarda su
+    estado tras cada línea) y si no, dan ``check`` y se ejecutan enteras
+    en cada validación.
+
+    Raises:
+        ValueError: Nombre repetido, ámbito desconocido o faltan funciones.
+    """
+    if name in _RULES:
+        raise ValueError(f"Ya hay una regla registrada con el nombre '{name}'")
+    if scope not in SCOPES:
+        raise ValueError(f"Ámbito de regla desconocido: '{scope}'")
+    if scope == "line":
+        if line is None:
+            raise ValueError(f"La regla de línea '{name}' necesita 'line'")
+    elif incremental:
+        if step is None or finish is None:
+            raise ValueError(f"La regla incremental '{name}' necesita 'step' y 'finish'")
+    elif check is None:
+        raise ValueError(f"La regla '{name}' necesita 'check'")
+    rule = Rule(name, scope, incremental, description, line, step, finish, initial, check,
+                live_warnings_only)
+    _RULES[name] = rule
+    return rule
+
+
+def unregister_rule(name: str) -> None:
+    """Quita una regla registrada (si existe)."""
+    _RULES.pop(name, None)
+
+
+def registered_rules() -> List[Rule]:
+    """Todas las reglas, en orden de ejecución."""
+    return list(_RULES.values())
+
+
+def set_disabled_rules(names: Iterable[str]) -> None:
+    """Desactiva las reglas *names* (las demás quedan activas)."""
+    global _disabled
+    names = {name.strip() for name in names if name and name.strip()}
+    unknown = names - set(_RULES)
+    if unknown:
+        logger.warning("Reglas de validación desconocidas: %s", ", ".join(sorted(unknown)))
+    _disabled = frozenset(names)
+    if names:
+        logger.info("Reglas de validación desactivadas: %s", ", ".join(sorted(names)))
+
+
+def disabled_rules() -> List[str]:
+    return sorted(_disabled)
+
+
+def enabled_rules() -> List[Rule]:
+    """Reglas activas, en orden de ejecución."""
+    return [rule for rule in _RULES.values() if rule.name not in _disabled]
+
+
+def ruleset_version() -> str:
+    """Versión de las reglas activas: clave de ``ValidationCache``."""
+    return f"{RULESET_VERSION}:" + ",".join(rule.name for rule in enabled_rules())
+
+
+def _apply_rule(rule: Rule, infos: List[LineInfo]) -> List[Problem]:
+    """Ejecuta una regla sobre el script completo."""
+    if rule.scope == "line":
+        check = rule.line
+        return [(level, message, i)
+                for i, info in enumerate(infos, start=1)
+                for level, message in check(info)]
+    if rule.incremental:
+        problemas = []
+        state = rule.initial
+        for i, info in enumerate(infos, start=1):
+            state, found = rule.step(state, info, i)
+            problemas.extend(found)
+        problemas.extend(rule.finish(state))
+        return problemas
+    return list(rule.check(infos))
+
+
+def problems_for_save(code: str, problemas: List[Problem]) -> List[Problem]:
+    """
+    *problemas* (los de validar *code*) sin los avisos de las reglas
+    ``live_warnings_only``: los que deben pedir confirmación al guardar.
+    """
+    rules = [rule for rule in enabled_rules() if rule.live_warnings_only]
+    if not rules or not any(p[0] == "aviso" for p in problemas):
+        return problemas
+    infos = preprocess(code)
+    live = {tuple(p) for rule in rules for p in _apply_rule(rule, infos) if p[0] == "aviso"}
+    return [p for p in problemas if tuple(p) not in live]
+
+
+def run_rules(infos: List[LineInfo]) -> List[Problem]:
+    """Ejecuta las reglas activas, midiendo cada una (ver ``rule_stats``)."""
+    problemas: List[Problem] = []
+    run = []
+    for rule in enabled_rules():
+        t0 = time.perf_counter()
+        found = _apply_rule(rule, infos)
+        run.append((rule.name, time.perf_counter() - t0, len(found)))
+        problemas.extend(found)
+    rule_stats.record(run)
+    return problemas
+
+
+class RuleStats:
+    """
+    Tiempo y número de problemas de cada regla.
+
+    ``last_run`` guarda la última ejecución (lista de (regla, segundos,
+    problemas)) y los totales se acumulan desde el último ``reset()``.
+    Se actualiza a la vez desde el hilo de la interfaz y el de la
+    validación en vivo.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.last_run: List[Tuple[str, float, int]] = []
+            # regla → [ejecuciones, segundos, problemas]
+            self._totals: Dict[str, list] = {}
+
+    def record(self, run: List[Tuple[str, float, int]]) -> None:
+        with self._lock:
+            self.last_run = run
+            for name, seconds, count in run:
+                total = self._totals.setdefault(name, [0, 0.0, 0])
+                total[0] += 1
+                total[1] += seconds
+                total[2] += count
+
+    def totals(self) -> Dict[str, Tuple[int, float, int]]:
+        """regla → (ejecuciones, segundos, problemas) acumulados."""
+        with self._lock:
+            return {name: tuple(total) for name, total in self._totals.items()}
+
+    def merge(self, totals: Dict[str, Tuple[int, float, int]]) -> None:
+        """Suma totales medidos en otro proceso (p.ej. el pool de ``main.py lint``)."""
+        with self._lock:
+            for name, (runs, seconds, count) in totals.items():
+                total = self._totals.setdefault(name, [0, 0.0, 0])
+                total[0] += runs
+                total[1] += seconds
+                total[2] += count
+
+    def report(self) -> str:
+        """Tabla de tiempos por regla, de la más lenta a la más rápida."""
+        totals = self.totals()
+        last = {name: (seconds, count) for name, seconds, count in self.last_run}
+        rows = [f"{'Regla':<16}{'Ámbito':<8}{'Incr.':<7}{'Ejec.':>7}{'Total ms':>11}"
+                f"{'Media ms':>10}{'Última ms':>11}{'Probl.':>8}"]
+        order = sorted(_RULES.values(), key=lambda r: -totals.get(r.name, (0, 0.0, 0))[1])
+        for rule in order:
+            if rule.name in _disabled:
+                continue
+            runs, seconds, _ = totals.get(rule.name, (0, 0.0, 0))
+            last_seconds, last_count = last.get(rule.name, (0.0, 0))
+            mean = seconds / runs if runs else 0.0
+            rows.append(f"{rule.name:<16}{rule.scope:<8}{'sí' if rule.incremental else 'no':<7}"
+                        f"{runs:>7}{seconds * 1000:>11.1f}{mean * 1000:>10.2f}"
+                        f"{last_seconds * 1000:>11.2f}{last_count:>8}")
+        if _disabled:
+            rows.append(f"Desactivadas: {', '.join(sorted(_disabled))}")
+        return "\n".join(rows)
+
+
+# Medidas de todas las validaciones de este proceso
+rule_stats = RuleStats()
+
+
+def debug_report() -> str:
+    """Informe de depuración: tiempo y problemas de cada regla."""
+    return rule_stats.report()
+
+
+register_rule(
+    "bloques", "block",
+    description="Sub/Function/If/For... sin cerrar o mal anidados",
+    step=_block_step, finish=_unclosed_blocks, initial=(),
+)
+register_rule(
+    "comillas", "line",
+    description="Comillas dobles sin cerrar en una línea",
+    line=_quote_line,
+)
+register_rule(
+    "parentesis", "global",
+    description="Paréntesis desbalanceados en el script",
+    step=_paren_step, finish=_unclosed_parens, initial=0,
+)
+register_rule(
+    "lineas_largas", "line",
+    description=f"Líneas de más de {_MAX_LINE_LENGTH} caracteres",
+    line=_long_line,
+)
+
+
+# Tabla de símbolos: el análisis de cada Sub/Function se reutiliza
+# mientras su texto no cambie
+_symbol_analyzer = SymbolAnalyzer()
+
+
+def _check_symbols(infos: List[LineInfo]) -> List[Problem]:
+    return _symbol_analyzer.analyze(infos).problems
+
+
+register_rule(
+    "simbolos", "global", incremental=False,
+    description="Nombres duplicados, sin usar o no declarados (con Option Explicit)",
+    check=_check_symbols, live_warnings_only=True,
+)
+
+
+class IncrementalValidator:
+    """
+    Validador que reutiliza el trabajo de la validación anterior.
+
+    Pensado para validar muchas veces el mismo script mientras se edita:
+
+      - El resultado de cada línea (``LineInfo``: comillas, paréntesis,
+        longitud, bloque) se guarda en una caché indexada por el
+        contenido de la línea, así que solo se preprocesan las líneas
+        nuevas o modificadas.
+      - Las reglas de línea solo se ejecutan sobre las líneas cambiadas.
+      - De las reglas incrementales de bloque o globales se guarda el
+        estado tras cada línea (prefijo).  Tras una edición se recalcula
+        desde la primera línea cambiada; si el número de líneas no
+        cambia, en cuanto el estado coincide con el anterior el resto
+        se reutiliza tal cual.
+      - Las reglas no incrementales se ejecutan enteras cada vez.
+
+    ``validate(code)`` devuelve lo mismo que ``validate_vbs(code)``.
+    """
+
+    def __init__(self):
+        self._lines: List[str] = []
+        self._infos: List[LineInfo] = []
+        self._cache: dict = {}
+        self._rules: Tuple[Rule, ...] = ()
+        # Reglas de línea: resultado de cada línea
+        self._line_results: Dict[str, List[Tuple]] = {}
+        # Reglas con estado: estado tras cada línea y problemas de cada línea
+        self._states: Dict[str, List] = {}
+        self._line_problems: Dict[str, List[List]] = {}
+
+    def reset(self) -> None:
+        """Olvida el script anterior (p.ej. al cambiar de script)."""
+        self.__init__()
+
+    def _infos_for(self, lines: List[str]) -> List[LineInfo]:
+        """``LineInfo`` de *lines*; las que faltan se tokenizan juntas."""
+        missing = [line for line in lines if line not in self._cache]
+        if missing:
+            for line, tokens in zip(missing, lex_lines(missing)):
+                self._cache[line] = preprocess_line(line, tokens)
+        return [self._cache[line] for line in lines]
+
+    def validate(self, code: str,
+                 stream: Optional[TokenStream] = None) -> List[Problem]:
+        """
+        Valida *code* recalculando solo lo que cambió desde la última vez.
+
+        Args:
+            code: Texto del script.
+            stream: ``TokenStream`` de *code* ya calculado (p.ej. por el
+                resaltado); sus tokens se reutilizan sin volver a tokenizar.
+        """
+        if not code or not code.strip():
+            self.reset()
+            return [("error", "El script está vacío", 0)]
+
+        rules = tuple(enabled_rules())
+        if rules != self._rules:
+            # Cambiaron las reglas activas: no se reutilizan resultados
+            self.reset()
+            self._rules = rules
+
+        lines = stream.lines if stream is not None else code.split("\n")
+        old_lines = self._lines
+        n, old_n = len(lines), len(old_lines)
+
+        # Prefijo y sufijo sin cambios
+        limit = min(n, old_n)
+        first = 0
+        while first < limit and lines[first] == old_lines[first]:
+            first += 1
+        suffix = 0
+        while (suffix < limit - first
+               and lines[n - 1 - suffix] == old_lines[old_n - 1 - suffix]):
+            suffix += 1
+
+        infos = (self._infos[:first]
+                 + self._infos_for(lines[first:n - suffix])
+                 + self._infos[old_n - suffix:])
+        changed = (first, n - suffix, old_n - suffix)
+
+        problemas: List[Problem] = []
+        run = []
+        for rule in rules:
+            t0 = time.perf_counter()
+            if not rule.incremental:
+                found = _apply_rule(rule, infos)
+            elif rule.scope == "line":
+                found = self._run_line_rule(rule, infos, changed)
+            else:
+                found = self._run_step_rule(rule, infos, changed, n == old_n)
+            run.append((rule.name, time.perf_counter() - t0, len(found)))
+            problemas.extend(found)
+        rule_stats.record(run)
+
+        self._lines, self._infos = lines, infos
+        self._prune_cache(n)
+        return problemas
+
+    def _run_line_rule(self, rule: Rule, infos: List[LineInfo],
+                       changed: Tuple[int, int, int]) -> List[Problem]:
+        """Regla de línea: solo se evalúan las líneas cambiadas."""
+        first, end, old_end = changed
+        old = self._line_results.get(rule.name, [])
+        results = old[:first] + [rule.line(info) for info in infos[first:end]] + old[old_end:]
+        self._line_results[rule.name] = results
+        return [(level, message, i)
+                for i, found in enumerate(results, start=1) if found
+                for level, message in found]
+
+    def _run_step_rule(self, rule: Rule, infos: List[LineInfo],
+                       changed: Tuple[int, int, int], same_count: bool) -> List[Problem]:
+        """Regla con estado: se recalcula desde la primera línea cambiada."""
+        first, end, _ = changed
+        n = len(infos)
+        old_states = self._states.get(rule.name, [])
+        old_problems = self._line_problems.get(rule.name, [])
+        states = old_states[:first]
+        line_problems = old_problems[:first]
+        state = states[-1] if states else rule.initial
+        for idx in range(first, n):
+            state, found = rule.step(state, infos[idx], idx + 1)
+            states.append(state)
+            line_problems.append(found)
+            if same_count and idx >= end and old_states[idx] == state:
+                # El resto del script no cambia ni su estado de entrada
+                states.extend(old_states[idx + 1:])
+                line_problems.extend(old_problems[idx + 1:])
+                break
+        self._states[rule.name] = states
+        self._line_problems[rule.name] = line_problems
+
+        problemas = [p for found in line_problems for p in found]
+        problemas.extend(rule.finish(states[-1] if states else rule.initial))
+        return problemas
+
+    def _prune_cache(self, n: int) -> None:
+        """Evita que la caché crezca sin límite con líneas ya borradas."""
+        if len(self._cache) > 2 * n + 1000:
+            self._cache = {}
+            for line, info in zip(self._lines, self._infos):
+                self._cache[line] = info
 
 
 def format_problemas(problemas: List[Tuple[str, str, int]]) -> str:
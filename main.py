@@ -23,12 +23,15 @@ Uso desde otro sistema:
 Cero hardcodeo: Todo configurable externamente.
 
 SIN PARÁMETROS: Si ejecutas solo 'python main.py', se abre en modo local sin BD.
+
+VALIDACIÓN POR LOTES (sin interfaz, ver batch_lint.py):
+    python main.py lint --connection-string "..." --output informe.json
+    python main.py lint --dir C:\scripts --output informe.csv
 """
 
 import argparse
+import multiprocessing
 import sys
-import tkinter as tk
-from tkinter import messagebox
 
 # -----------------------------------------------------------------------
 # Compatibilidad con Gestión 21 y otros ERPs que llaman al .exe pasando
@@ -56,6 +59,10 @@ def _normalizar_argv():
     if len(sys.argv) < 2:
         return
 
+    # Subcomando de validación por lotes (batch_lint.py): argumentos propios
+    if sys.argv[1] == "lint":
+        return
+
     # Si ya viene con flag reconocido, no hacer nada
     if sys.argv[1].startswith("-"):
         return
@@ -79,6 +86,14 @@ def _normalizar_argv():
 
 _normalizar_argv()
 
+# Validación por lotes sin interfaz (python main.py lint --help): antes de
+# importar tkinter, pyodbc y el editor, que el modo --dir no necesita.
+if __name__ == "__main__" and len(sys.argv) > 1 and sys.argv[1] == "lint":
+    # Necesario en el .exe: la validación usa procesos auxiliares
+    multiprocessing.freeze_support()
+    from batch_lint import main as lint_main
+    sys.exit(lint_main(sys.argv[2:]))
+
 # Logging de diagnóstico: registrar argv y variables de entorno relevantes
 # ANTES de importar nada más para capturar el estado más temprano posible.
 import logging as _logging
@@ -100,6 +115,9 @@ try:
 except Exception:
     pass
 
+import tkinter as tk
+from tkinter import messagebox
+
 from editor.logger import logger
 from db.connection import (
     DatabaseConnection,
@@ -109,8 +127,11 @@ from db.connection import (
     CONTEXT_PLANTILLA,
     DEFAULT_TABLES,
 )
+from db.schema_cache import open_default_schema_cache
+from db.script_index import ScriptIndex
 from editor.app import EditorApp
 from config_loader import ConfigLoader
+from editor.vbs_validator import set_disabled_rules
 
 def _mostrar_error(titulo: str, mensaje: str):
     """Muestra un error en ventana gráfica (para cuando no hay consola)."""
@@ -171,6 +192,7 @@ CONFIGURACIÓN MULTI-FUENTE (prioridad: CLI > ENV > JSON):
    EDITOR_KEY_COLUMNS (formato: MODELO,CODIGO)
    EDITOR_KEY_VALUES (formato: T01,SCRIPT001)
    EDITOR_CONTENT_COLUMN, EDITOR_USER, EDITOR_PASSWORD
+   EDITOR_DISABLED_RULES (formato: lineas_largas,comillas)
 
 3. Parámetros de línea de comandos:
    --server, --database, --table
@@ -228,6 +250,11 @@ O simplemente:
     parser.add_argument("--table-plantilla",
                         help="Tabla específica para modo plantilla (default: G_SCRIPT_PLANTILLA)")
 
+    # Validación
+    parser.add_argument("--disable-rules",
+                        help="Reglas de validación desactivadas, separadas por coma "
+                             "(bloques, comillas, parentesis, lineas_largas, simbolos)")
+
     # Modo local sin BD
     parser.add_argument("--local", action="store_true",
                         help="Modo local sin conexión a BD (solo para pruebas)")
@@ -278,9 +305,17 @@ O simplemente:
         cli_args["table_documento"] = args.table_documento
     if args.table_plantilla:
         cli_args["table_plantilla"] = args.table_plantilla
+    if args.disable_rules:
+        cli_args["disabled_rules"] = [r.strip() for r in args.disable_rules.split(",")]
     
     # 4. Combinar todas las fuentes
     final_config = config.merge(cli_args)
+
+    # Reglas de validación desactivadas (antes de abrir la caché de validación)
+    disabled = final_config.get("disabled_rules") or []
+    if isinstance(disabled, str):
+        disabled = disabled.split(",")
+    set_disabled_rules(disabled)
     
     # ========================================================================
     # MODO LOCAL (sin BD) - Por defecto si no hay configuracion
@@ -369,6 +404,7 @@ O simplemente:
     # ========================================================================
     db = None
     record = {}
+    startup_scripts = []
     contenido = TEXTO_EJEMPLO
 
     # Resolver contexto de trabajo (Plantilla vs Documento)
@@ -450,40 +486,41 @@ O simplemente:
         logger.info("Tabla (resuelta): %s", db.table)
         logger.info("Contexto: %s", db.context_type)
         
+        # Esquemas de tabla también en disco: al arrancar basta con comprobar
+        # la fecha de modificación de la tabla
+        schema_cache = open_default_schema_cache()
+        if schema_cache is not None:
+            db.schema_cache = schema_cache
+
         db.connect()
         logger.info("✓ Conexión establecida correctamente")
         
-        # Obtener esquema de la tabla
-        schema = db.get_table_schema()
-        logger.info("✓ Esquema detectado: %d columnas", len(schema))
-        logger.debug("Columnas: %s", [col["name"] for col in schema])
-        
-        # Cargar registro completo con TODOS los campos
+        # Esquema, registro y lista del desplegable en un solo lote.
+        # Si solo tenemos MODELO (sin CODIGO), el registro inicial es el
+        # primer script del modelo.
         key_columns = final_config["key_columns"]
         key_values = final_config["key_values"]
-        
-        # Si solo tenemos MODELO (sin CODIGO), cargar la lista de scripts
-        # y usar el primero como registro por defecto.
-        has_empty_key = any(v == "" for v in key_values)
-        
-        if has_empty_key and len(key_columns) >= 2:
-            logger.info("CODIGO no especificado, cargando lista de scripts para MODELO=%s", key_values[0])
-            scripts_list = db.get_scripts_for_model(key_columns, key_values)
-            if scripts_list:
-                # Usar el primer script disponible como registro inicial
-                first = scripts_list[0]
-                key_values = first["key_values"]
-                final_config["key_values"] = key_values
-                logger.info("Registro inicial auto-seleccionado: %s", 
-                           ", ".join(f"{k}={v}" for k, v in zip(key_columns, key_values)))
-            else:
-                logger.warning("No se encontraron scripts para MODELO=%s", key_values[0])
-        
         logger.info("Cargando registro: %s", 
                     ", ".join(f"{k}={v}" for k, v in zip(key_columns, key_values)))
         
-        record = db.get_record_full(key_columns, key_values)
-        logger.info("✓ Registro cargado: %d campos", len(record))
+        startup = db.load_startup(
+            key_columns, key_values,
+            include_list=(context_type != CONTEXT_PLANTILLA
+                          and not final_config.get("scripts_list")),
+        )
+        schema = startup["schema"]
+        logger.info("✓ Esquema detectado: %d columnas", len(schema))
+        logger.debug("Columnas: %s", [col["name"] for col in schema])
+        if startup["key_values"] != list(key_values):
+            key_values = startup["key_values"]
+            final_config["key_values"] = key_values
+            logger.info("Registro inicial auto-seleccionado: %s", 
+                       ", ".join(f"{k}={v}" for k, v in zip(key_columns, key_values)))
+        
+        record = startup["record"]
+        startup_scripts = startup["scripts"]
+        logger.info("✓ Registro cargado: %d campos (%d viaje(s) al servidor)",
+                    len(record), startup["round_trips"])
         
         # Extraer contenido del script
         content_column = final_config.get("content_column", "SCRIPT")
@@ -512,7 +549,7 @@ O simplemente:
     # LANZAR EDITOR CON DATOS DINÁMICOS
     # ========================================================================
     # Cargar lista para el desplegable según el contexto
-    scripts_list = final_config.get("scripts_list", [])
+    scripts_list = final_config.get("scripts_list", []) or startup_scripts
 
     if not scripts_list and db:
         try:
@@ -525,11 +562,20 @@ O simplemente:
                 scripts_list = db.get_scripts_for_model(
                     key_columns=final_config["key_columns"],
                     key_values=final_config["key_values"],
+                    with_content=False,
                 )
                 logger.info("Scripts disponibles en desplegable: %d", len(scripts_list))
         except Exception as e:
             logger.warning("No se pudo cargar lista para el desplegable: %s", e)
             scripts_list = []
+
+    # Índice local para "Buscar en todos los scripts" (uno por servidor y BD)
+    script_index = None
+    if db:
+        try:
+            script_index = ScriptIndex.for_connection(db)
+        except Exception as e:
+            logger.warning("Índice local de scripts no disponible: %s", e)
     
     app = EditorApp(
         inicial_text=contenido,
@@ -539,12 +585,17 @@ O simplemente:
         content_column=final_config.get("content_column", "SCRIPT"),
         editable_columns=final_config.get("editable_columns", []),
         scripts_list=scripts_list,
-        context_type=context_type
+        context_type=context_type,
+        script_index=script_index,
     )
     
     try:
         app.mainloop()
     finally:
+        if script_index is not None:
+            script_index.close()
+        if db is not None:
+            db.schema_cache.close()
         # Garantizar que la conexión se cierra aunque la app falle
         if db is not None:
             db.close()
@@ -552,4 +603,6 @@ O simplemente:
 
 
 if __name__ == "__main__":
+    # Necesario en el .exe: el reemplazo masivo usa procesos auxiliares
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
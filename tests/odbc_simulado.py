@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+Conexión pyodbc simulada para los tests que no necesitan SQL Server.
+
+Cada test define su servidor como subclase de ``ServidorBase`` con
+``responder(sql, params)``, que devuelve:
+
+  - una lista de filas (resultado de una consulta),
+  - un entero: filas afectadas (UPDATE / INSERT / DELETE),
+  - un ``Lote``: los resultados ``(description, filas)`` de un lote de
+    varias sentencias, que se recorren con ``nextset()``.
+
+Puede lanzar ``pyodbc.Error`` como lo haría el driver.  Cada sentencia
+queda anotada en ``servidor.consultas``.
+"""
+
+import os
+import sys
+
+# Añadir raíz del proyecto al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db.connection import DatabaseConnection
+
+
+class Lote(list):
+    """Resultados ``(description, filas)`` de un lote, en orden."""
+
+
+class CursorSimulado:
+    """Lo mínimo de un cursor pyodbc."""
+
+    def __init__(self, servidor):
+        self.servidor = servidor
+        self.resultados = []
+        self.description = None
+        self.rowcount = -1
+
+    def execute(self, sql, *params):
+        self.servidor.consultas.append(sql)
+        respuesta = self.servidor.responder(sql, list(params))
+        self.rowcount = -1
+        if isinstance(respuesta, int):
+            self.rowcount, respuesta = respuesta, []
+        if isinstance(respuesta, Lote):
+            self.resultados = [(descripcion, list(filas)) for descripcion, filas in respuesta]
+        else:
+            self.resultados = [(None, list(respuesta))]
+        self.description = self.resultados[0][0] if self.resultados else None
+        return self
+
+    def _filas(self):
+        return self.resultados[0][1] if self.resultados else []
+
+    def fetchone(self):
+        filas = self._filas()
+        return filas.pop(0) if filas else None
+
+    def fetchmany(self, n):
+        filas = self._filas()
+        devueltas = filas[:n]
+        del filas[:n]
+        return devueltas
+
+    def fetchall(self):
+        return self.fetchmany(len(self._filas()))
+
+    def nextset(self):
+        if self.resultados:
+            self.resultados.pop(0)
+        self.description = self.resultados[0][0] if self.resultados else None
+        return bool(self.resultados)
+
+    def close(self):
+        pass
+
+
+class ServidorBase:
+    """Lo mínimo de una conexión pyodbc; las subclases implementan ``responder``."""
+
+    def __init__(self):
+        self.consultas = []
+
+    def cursor(self):
+        return CursorSimulado(self)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def responder(self, sql, params):
+        raise NotImplementedError
+
+
+def conexion(servidor, **kwargs):
+    """``DatabaseConnection`` a G_SCRIPT que usa *servidor* en lugar de SQL Server."""
+    db = DatabaseConnection(server="srv", database="GESTION", table="G_SCRIPT",
+                            user="u", password="p", **kwargs)
+    db._cnxn = servidor
+    return db
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""
+Test de la validación por lotes (python main.py lint).
+
+Ejecutar:
+    py -3 tests/test_batch_lint.py
+
+No necesita SQL Server: se valida un directorio de ficheros .vbs y una
+conexión simulada con la interfaz de search_scripts.
+"""
+
+import csv
+import io
+import json
+import os
+import sys
+import tempfile
+
+# Añadir raíz del proyecto al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import batch_lint
+from batch_lint import iter_directory, iter_table, run
+from editor.validation_cache import ValidationCache
+
+
+CORRECTO = "Sub Main()\r\n  x = 1\r\nEnd Sub\r\n"
+SIN_CERRAR = "Function Calcular()\n  Calcular = 1\n"
+
+
+def _directorio():
+    raiz = tempfile.mkdtemp()
+    os.makedirs(os.path.join(raiz, "sub"))
+    with open(os.path.join(raiz, "a.vbs"), "w", encoding="utf-8", newline="") as f:
+        f.write(CORRECTO)
+    with open(os.path.join(raiz, "sub", "B.VBS"), "w", encoding="cp1252") as f:
+        f.write("' Descripción en cp1252\n" + SIN_CERRAR)
+    with open(os.path.join(raiz, "notas.txt"), "w") as f:
+        f.write("no es un script")
+    return raiz
+
+
+class ConexionSimulada:
+    table = "G_SCRIPT"
+
+    def __init__(self, filas):
+        self.filas = filas
+
+    def search_scripts(self, text, key_columns, content_column=None):
+        for claves, contenido in self.filas:
+            yield {"label": " / ".join(claves), "key_values": list(claves),
+                   "content": contenido}
+
+
+def test_directorio():
+    """Solo los .vbs (sin distinguir mayúsculas), en subdirectorios y con cp1252."""
+    raiz = _directorio()
+    scripts = list(iter_directory(raiz))
+    assert [nombre for _, nombre, _ in scripts] == ["a.vbs", os.path.join("sub", "B.VBS")]
+    assert "\r" not in scripts[0][2]
+    assert "Descripción" in scripts[1][2]
+
+    informe = run(iter_directory(raiz), workers=1)
+    assert informe.scripts == 2
+    assert informe.with_errors == 1
+    assert {p["script"] for p in informe.problems} == {os.path.join("sub", "B.VBS")}
+
+
+def test_tabla():
+    db = ConexionSimulada([(("T01", "ALTA"), CORRECTO), (("T01", "BAJA"), SIN_CERRAR)])
+    informe = run(iter_table(db, ["MODELO", "CODIGO"], "SCRIPT"), workers=1)
+    assert informe.scripts == 2
+    assert [(p["origen"], p["script"]) for p in informe.problems] == [("G_SCRIPT", "T01 / BAJA")]
+
+
+def test_pool_igual_que_secuencial():
+    """El reparto entre procesos da el mismo informe que validar en serie."""
+    scripts = [("dir", f"s{i:03}.vbs", CORRECTO if i % 3 else SIN_CERRAR) for i in range(150)]
+    serie = run(scripts, workers=1, chunk_size=16)
+    pool = run(scripts, workers=2, chunk_size=16)
+    assert pool.scripts == serie.scripts == 150
+    assert pool.with_errors == serie.with_errors == 50
+    clave = lambda p: (p["script"], p["linea"], p["mensaje"])
+    assert sorted(pool.problems, key=clave) == sorted(serie.problems, key=clave)
+
+
+def test_informes():
+    informe = run([("dir", "b.vbs", SIN_CERRAR), ("dir", "a.vbs", CORRECTO)], workers=1)
+
+    salida = io.StringIO()
+    informe.write(salida, "json")
+    datos = json.loads(salida.getvalue())
+    assert datos["scripts"] == 2 and datos["con_errores"] == 1
+    assert datos["problemas"][0]["nivel"] == "error"
+    assert "scripts_por_segundo" in datos
+
+    salida = io.StringIO()
+    informe.write(salida, "csv")
+    filas = list(csv.DictReader(io.StringIO(salida.getvalue())))
+    assert filas[0]["script"] == "b.vbs" and filas[0]["nivel"] == "error"
+
+
+def test_linea_de_comandos():
+    """Formato según la extensión del informe y código de salida."""
+    raiz = _directorio()
+    informe = os.path.join(tempfile.mkdtemp(), "informe.csv")
+    assert batch_lint.main(["--dir", raiz, "--output", informe, "--workers", "1",
+                            "--no-cache"]) == 1
+    with open(informe, encoding="utf-8") as f:
+        assert f.readline().strip() == "origen,script,nivel,linea,mensaje"
+
+    limpio = tempfile.mkdtemp()
+    with open(os.path.join(limpio, "a.vbs"), "w") as f:
+        f.write(CORRECTO)
+    cache = os.path.join(limpio, "cache.sqlite")
+    assert batch_lint.main(["--dir", limpio, "--output", os.path.join(limpio, "r.json"),
+                            "--workers", "1", "--cache", cache]) == 0
+    assert batch_lint.main(["--dir", os.path.join(limpio, "no_existe"), "--workers", "1",
+                            "--cache", cache]) == 2
+
+
+def test_cache():
+    """La segunda pasada solo valida los scripts que cambiaron."""
+    ruta = os.path.join(tempfile.mkdtemp(), "cache.sqlite")
+    scripts = [("dir", f"s{i}.vbs", CORRECTO if i % 2 else SIN_CERRAR + f"' {i}")
+               for i in range(40)]
+    cache = ValidationCache(ruta)
+    primera = run(scripts, workers=1, chunk_size=8, cache=cache)
+    assert primera.cache_stats["aciertos"] + primera.cache_stats["fallos"] == 40
+    cache.close()
+
+    cache = ValidationCache(ruta)
+    scripts[2] = ("dir", "s2.vbs", CORRECTO + "' corregido")
+    segunda = run(scripts, workers=2, chunk_size=8, cache=cache)
+    assert segunda.cache_stats["fallos"] == 1
+    assert segunda.scripts == 40
+    assert segunda.with_errors == primera.with_errors - 1
+    cache.close()
+
+
+if __name__ == "__main__":
+    test_directorio()
+    test_tabla()
+    test_pool_igual_que_secuencial()
+    test_informes()
+    test_linea_de_comandos()
+    test_cache()
+    print("\n  ✓ Validación por lotes: todos los tests pasaron\n")
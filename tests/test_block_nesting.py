@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+"""
+Test del anidamiento por línea (sangría automática y bloque emparejado).
+
+Ejecutar:
+    py -3 tests/test_block_nesting.py
+"""
+
+import os
+import random
+import sys
+
+# Añadir raíz del proyecto al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import SANGRIA
+from editor.block_nesting import NestingIndex, newline_indent
+
+
+SCRIPT = """Public Sub Main()
+    If x > 1 Then
+        For i = 1 To 10
+            y = y + i
+        Next
+    Else
+        y = 0
+    End If
+End Sub
+Function Calcular(n)
+    Calcular = n
+End Function"""
+
+
+def _indice(texto):
+    indice = NestingIndex()
+    indice.update(texto)
+    return indice
+
+
+def test_parejas():
+    """Apertura ↔ cierre, incluido 'Public Sub' y sin pareja si no cuadra."""
+    indice = _indice(SCRIPT)
+    assert [indice.depth(n) for n in range(1, 13)] == [0, 1, 2, 3, 3, 2, 2, 2, 1, 0, 1, 1]
+    assert indice.partner(1) == 9 and indice.partner(9) == 1
+    assert indice.partner(2) == 8 and indice.partner(8) == 2
+    assert indice.partner(3) == 5 and indice.partner(5) == 3
+    assert indice.partner(10) == 12
+    assert indice.partner(4) is None            # No abre ni cierra
+    assert indice.enclosing(6) == 2             # Else dentro del If
+    # End If cerrando un For: sin pareja
+    mal = _indice("For i = 1 To 2\nEnd If")
+    assert mal.partner(1) is None and mal.partner(2) is None
+
+
+def test_incremental():
+    """Tras ediciones aleatorias el índice coincide con uno construido de cero."""
+    rng = random.Random(45)
+    piezas = ["Sub A()", "End Sub", "If a Then", "End If", "For i = 1 To 2", "Next",
+              "x = 1", "' If comentado Then", "Else", ""]
+    lineas = SCRIPT.split("\n")
+    indice = _indice(SCRIPT)
+    for _ in range(1500):
+        op = rng.random()
+        if op < 0.35 and lineas:
+            del lineas[rng.randrange(len(lineas))]
+        elif op < 0.7:
+            lineas.insert(rng.randrange(len(lineas) + 1), rng.choice(piezas))
+        elif lineas:
+            lineas[rng.randrange(len(lineas))] = rng.choice(piezas)
+        texto = "\n".join(lineas)
+        indice.update(texto)
+        _comparar(indice, _indice(texto))
+
+
+def _comparar(indice, nuevo):
+    assert indice._depth == nuevo._depth and indice._blocks == nuevo._blocks
+    assert indice._opener == nuevo._opener and indice._partner == nuevo._partner
+    for n in range(1, len(nuevo) + 1):
+        assert indice.partner(n) == _pareja_lineal(nuevo, n)
+        assert indice.enclosing(n) == _apertura_lineal(nuevo, n)
+
+
+def _apertura_lineal(indice, linea):
+    """Recorrido hacia atrás (referencia para las distancias guardadas)."""
+    objetivo = indice.depth(linea) - 1
+    for n in range(linea - 1, 0, -1):
+        bloque = indice.block(n)
+        if bloque is not None and bloque[0] == "o" and indice.depth(n) == objetivo:
+            return n
+    return None
+
+
+def _pareja_lineal(indice, linea):
+    bloque = indice.block(linea)
+    if bloque is None:
+        return None
+    if bloque[0] == "c":
+        apertura = _apertura_lineal(indice, linea)
+        if apertura is None or indice.block(apertura)[1] != bloque[1]:
+            return None
+        return apertura
+    objetivo = indice.depth(linea) + 1
+    for n in range(linea + 1, len(indice) + 1):
+        if indice.depth(n) < objetivo:
+            return None
+        otro = indice.block(n)
+        if otro is not None and otro[0] == "c" and indice.depth(n) == objetivo:
+            return n if otro[1] == bloque[1] else None
+    return None
+
+
+def test_por_rango_de_lineas():
+    """replace_lines (solo las líneas tocadas) deja lo mismo que reconstruir."""
+    rng = random.Random(31)
+    piezas = ["Sub A()", "End Sub", "If a Then", "End If", "For i = 1 To 2", "Next",
+              "x = 1", "Else", "Class C", "End Class"]
+    lineas = (SCRIPT + "\n" + SCRIPT).split("\n")
+    indice = _indice("\n".join(lineas))
+    for _ in range(1500):
+        primera = rng.randrange(len(lineas) + 1)
+        cuantas = min(rng.randrange(3), len(lineas) - primera)
+        nuevas = [rng.choice(piezas) for _ in range(rng.randrange(3))]
+        if len(lineas) - cuantas + len(nuevas) == 0:
+            continue
+        lineas[primera:primera + cuantas] = nuevas
+        indice.replace_lines(primera, cuantas, nuevas)
+        _comparar(indice, _indice("\n".join(lineas)))
+
+
+def test_coste_acotado():
+    """Editar dentro de un Sub no recalcula los Sub de después."""
+    texto = "\n".join(f"Sub S{i}()\n    If x Then\n        y = {i}\n    End If\nEnd Sub"
+                      for i in range(2000))
+    indice = _indice(texto)
+
+    class Contador(list):
+        lecturas = 0
+
+        def __getitem__(self, i):
+            Contador.lecturas += 1
+            return super().__getitem__(i)
+
+    indice._blocks = Contador(indice._blocks)
+    indice.replace_lines(2, 1, ["        For j = 1 To 2", "        Next"])
+    assert Contador.lecturas < 20
+    assert indice.partner(1) == 6 and indice.partner(2) == 5 and indice.partner(3) == 4
+    assert indice.partner(7) == 11 and indice.enclosing(10001) == 9997
+    _comparar(indice, _indice("\n".join(indice._lines)))
+
+
+def test_sangria_automatica():
+    """Enter: un nivel más tras una apertura; los cierres se alinean con ella."""
+    lineas = SCRIPT.split("\n")
+    indice = _indice(SCRIPT)
+    linea = lambda n: lineas[n - 1]
+    assert newline_indent(indice, 2, linea) == (None, SANGRIA * 2)      # If ... Then
+    assert newline_indent(indice, 4, linea) == (None, SANGRIA * 3)      # Instrucción
+    assert newline_indent(indice, 6, linea) == (None, SANGRIA * 2)      # Else
+    assert newline_indent(indice, 9, linea) == (None, "")               # End Sub
+    # Un End If escrito con la sangría de dentro del bloque se alinea con el If
+    lineas[7] = SANGRIA * 2 + "End If"
+    indice.update("\n".join(lineas))
+    assert newline_indent(indice, 8, linea) == (SANGRIA, SANGRIA)
+
+
+if __name__ == "__main__":
+    test_parejas()
+    test_incremental()
+    test_por_rango_de_lineas()
+    test_coste_acotado()
+    test_sangria_automatica()
+    print("\n  ✓ Anidamiento de bloques: todos los tests pasaron\n")
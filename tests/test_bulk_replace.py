@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""
+Test del reemplazo masivo en varios scripts (cálculo y vista previa).
+
+Ejecutar:
+    py -3 tests/test_bulk_replace.py
+
+No necesita BD ni interfaz gráfica: valida los reemplazos, los diffs
+y el cálculo en procesos aparte.
+"""
+
+import sys
+import os
+import time
+
+# Añadir raíz del proyecto al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from editor.bulk_replace import ReplacementJob, compute_replacement
+
+
+def _script(codigo, cuerpo):
+    return {"label": f"T01 / {codigo}", "key_values": ["T01", codigo], "content": cuerpo}
+
+
+def test_compute_replacement():
+    """Reemplazo + diff de un script; None si no cambia."""
+    fila = _script("ALTA", "Sub Main()\n  x = CLIENTE.NOMBRE\n  y = CLIENTE.NIF\nEnd Sub")
+    r = compute_replacement(fila, "CLIENTE.", "CLIENTES.", match_case=True)
+    assert r["count"] == 2
+    assert r["new"] == "Sub Main()\n  x = CLIENTES.NOMBRE\n  y = CLIENTES.NIF\nEnd Sub"
+    assert r["key_values"] == ["T01", "ALTA"]
+    assert "-  x = CLIENTE.NOMBRE" in r["diff"]
+    assert "+  x = CLIENTES.NOMBRE" in r["diff"]
+    assert compute_replacement(fila, "PROVEEDOR", "X") is None
+
+
+def test_compute_replacement_regex():
+    fila = _script("ALTA", "x = CLIENTE.NOMBRE")
+    r = compute_replacement(fila, r"(\w+)\.NOMBRE", r"\1.RAZON", regex=True)
+    assert r["new"] == "x = CLIENTE.RAZON"
+
+
+def _esperar(job):
+    resultados = []
+    limite = time.time() + 60
+    while True:
+        resultados.extend(job.poll())
+        if job.done:
+            return resultados
+        assert time.time() < limite, "El cálculo no terminó"
+        time.sleep(0.02)
+
+
+def test_job_en_proceso():
+    """Pocos scripts: se calcula en el propio proceso."""
+    filas = [_script(f"C{i}", "Dim a" if i % 2 else "Dim b") for i in range(10)]
+    job = ReplacementJob(filas, ("a", "z", True, False, True))
+    resultados = _esperar(job)
+    assert sorted(r["label"] for r in resultados) == sorted(f"T01 / C{i}" for i in range(1, 10, 2))
+
+
+def test_job_con_pool():
+    """Muchos scripts: se reparten entre procesos y no se pierde ninguno."""
+    filas = [_script(f"C{i:03d}", f"Sub S{i}()\n  v = STOCK.CANTIDAD\nEnd Sub") for i in range(200)]
+    job = ReplacementJob(filas, ("stock.cantidad", "STOCK.UNIDADES", False, False, False))
+    resultados = _esperar(job)
+    assert len(resultados) == 200
+    assert all("STOCK.UNIDADES" in r["new"] and r["count"] == 1 for r in resultados)
+
+
+def test_job_regex_cancelable():
+    """Con regex siempre va al pool: una catastrófica no bloquea y se puede matar."""
+    filas = [_script("ALTA", "a" * 28 + "b")]
+    job = ReplacementJob(filas, (r"(a+)+$", "x", True, True, False))
+    time.sleep(0.5)
+    assert job.poll() == [] and not job.done
+    procesos = list(job._executor._processes.values())
+    job.shutdown()
+    for proceso in procesos:
+        proceso.join(5)
+        assert not proceso.is_alive()
+
+
+if __name__ == "__main__":
+    test_compute_replacement()
+    test_compute_replacement_regex()
+    test_job_en_proceso()
+    test_job_con_pool()
+    test_job_regex_cancelable()
+    print("\n  ✓ Reemplazo masivo: todos los tests pasaron\n")
@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+"""
+Test de la validación en vivo (hilo de validación y generaciones).
+
+Ejecutar:
+    py -3 tests/test_live_validator.py
+
+No necesita interfaz gráfica: un widget simulado ejecuta los ``after``
+a mano y registra las etiquetas.
+"""
+
+import sys
+import os
+import time
+
+# Añadir raíz del proyecto al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from editor.live_validator import LiveValidator, TAG_ERROR, TAG_WARNING
+
+
+class TextoSimulado:
+    """Lo mínimo de tk.Text que usa LiveValidator."""
+
+    def __init__(self, texto):
+        self.texto = texto
+        self.pendientes = {}
+        self.siguiente_id = 0
+        self.etiquetas = {TAG_ERROR: [], TAG_WARNING: []}
+
+    def after(self, ms, funcion):
+        self.siguiente_id += 1
+        self.pendientes[self.siguiente_id] = funcion
+        return self.siguiente_id
+
+    def after_cancel(self, after_id):
+        self.pendientes.pop(after_id, None)
+
+    def ejecutar_pendientes(self):
+        """Ejecuta los ``after`` programados hasta ahora (no los nuevos)."""
+        for after_id in sorted(self.pendientes):
+            funcion = self.pendientes.pop(after_id, None)
+            if funcion:
+                funcion()
+
+    def get(self, inicio, fin):
+        return self.texto
+
+    def index(self, indice):
+        # Zona visible: líneas 1 a 20
+        return "1.0" if indice == "@0,0" else "20.0"
+
+    def winfo_height(self):
+        return 400
+
+    def bind(self, *args, **kwargs):
+        pass
+
+    def tag_configure(self, *args, **kwargs):
+        pass
+
+    def tag_remove(self, etiqueta, inicio, fin):
+        self.etiquetas[etiqueta] = []
+
+    def tag_add(self, etiqueta, *indices):
+        self.etiquetas[etiqueta].extend(indices)
+
+
+class NumerosSimulados:
+    def __init__(self):
+        self.markers = {}
+
+    def set_markers(self, markers):
+        self.markers = markers
+
+
+def _esperar_resultado(texto, validador, limite=5.0):
+    """Ejecuta los ``after`` hasta que el hilo entrega el resultado."""
+    fin = time.time() + limite
+    while time.time() < fin:
+        texto.ejecutar_pendientes()
+        if validador._applied == validador._generation:
+            return
+        time.sleep(0.01)
+    raise AssertionError("El validador no respondió a tiempo")
+
+
+def test_marcas_y_subrayado():
+    lineas = ["Sub Main()"] + ["  x = 1"] * 40 + ['  y = "abierta', "  If a Then"]
+    texto = TextoSimulado("\n".join(lineas))
+    numeros = NumerosSimulados()
+    validador = LiveValidator(texto, numeros)
+    try:
+        validador.schedule()
+        _esperar_resultado(texto, validador)
+        # Comillas en la línea 42; Sub e If sin cerrar en las líneas 1 y 43
+        assert numeros.markers == {1: "error", 42: "error", 43: "error"}
+        assert validador.problem_at(42) == ("error", "Comillas sin cerrar en esta línea")
+        # Solo se subrayan las líneas visibles (1-20 más el margen)
+        assert TAG_ERROR in texto.etiquetas
+        assert set(texto.etiquetas[TAG_ERROR][::2]) == {"1.0", "42.0", "43.0"}
+    finally:
+        validador.close()
+
+
+def test_resultado_obsoleto_descartado():
+    """Si se edita mientras se valida, el resultado viejo no se aplica."""
+    texto = TextoSimulado('x = "abierta')
+    numeros = NumerosSimulados()
+    validador = LiveValidator(texto, numeros)
+    try:
+        validador.schedule()
+        texto.ejecutar_pendientes()          # Entrega la instantánea
+        texto.texto = "x = 1"
+        validador.schedule()                 # Nueva edición antes del resultado
+        time.sleep(0.2)
+        validador._poll()                    # Llega el resultado de la instantánea
+        assert numeros.markers == {}         # El resultado viejo se descartó
+        _esperar_resultado(texto, validador)
+        assert numeros.markers == {}
+        assert validador.problems == []
+    finally:
+        validador.close()
+
+
+if __name__ == "__main__":
+    test_marcas_y_subrayado()
+    test_resultado_obsoleto_descartado()
+    print("\n  ✓ Validación en vivo: todos los tests pasaron\n")
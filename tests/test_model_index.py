@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+"""
+Test del índice de símbolos de los scripts de un modelo (F12 / Shift+F12).
+
+Ejecutar:
+    py -3 tests/test_model_index.py
+
+No necesita interfaz gráfica ni base de datos.
+"""
+
+import os
+import sys
+import threading
+import time
+
+# Añadir raíz del proyecto al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from editor.model_index import ModelIndexWorker, ModelSymbolIndex
+
+
+COMUN = """Option Explicit
+Dim gContador
+Sub Inicializar(modo)
+    Dim CalcularTotal
+    CalcularTotal = 1
+    gContador = 0
+End Sub
+Function CalcularTotal(x)
+    CalcularTotal = x * 2
+End Function
+Class Pedido
+    Public Sub Enviar()
+    End Sub
+End Class
+"""
+
+PRINCIPAL = """Sub Main()
+    Call Inicializar("rapido")
+    total = CalcularTotal(gContador)
+    Set p = New Pedido
+    p.Enviar
+    MsgBox "CalcularTotal"
+End Sub
+"""
+
+SCRIPTS = [
+    {"label": "COMUN", "key_values": ["T01", "COMUN"], "content": COMUN},
+    {"label": "MAIN", "key_values": ["T01", "MAIN"], "content": PRINCIPAL},
+]
+
+
+def _posiciones(locations):
+    return [(loc.label, loc.line, loc.col) for loc in locations]
+
+
+def test_definiciones_y_referencias():
+    """Definiciones globales y de miembros; referencias sin locales ni cadenas."""
+    indice = ModelSymbolIndex()
+    assert indice.build(SCRIPTS)
+    definicion = indice.definitions("calculartotal")
+    assert _posiciones(definicion) == [("COMUN", 8, 9)]
+    assert definicion[0].kind == "function"
+    assert definicion[0].text == "Function CalcularTotal(x)"
+    assert _posiciones(indice.definitions("gContador")) == [("COMUN", 2, 4)]
+    # Un método solo se encuentra como miembro de su clase
+    assert _posiciones(indice.definitions("Enviar")) == [("COMUN", 12, 15)]
+    # La variable local CalcularTotal de Inicializar y la cadena no cuentan
+    assert _posiciones(indice.references("CalcularTotal")) == [
+        ("COMUN", 8, 9), ("COMUN", 9, 4), ("MAIN", 3, 12),
+    ]
+    assert _posiciones(indice.references("Inicializar")) == [("COMUN", 3, 4), ("MAIN", 2, 9)]
+    assert indice.definitions("NoExiste") == []
+
+
+def test_script_modificado():
+    """El script abierto se vuelve a indexar con su contenido sin guardar."""
+    indice = ModelSymbolIndex()
+    indice.build(SCRIPTS)
+    indice.update_script(["t01", "main"], PRINCIPAL.replace("Sub Main()", "Sub Main2()"))
+    assert len(indice) == 2
+    assert _posiciones(indice.definitions("Main2")) == [("MAIN", 1, 4)]
+    assert indice.definitions("Main") == []
+    # Un script nuevo (aún no en la lista) se añade
+    indice.update_script(["T01", "NUEVO"], "Sub Otra()\nEnd Sub", label="NUEVO")
+    assert _posiciones(indice.definitions("Otra")) == [("NUEVO", 1, 4)]
+
+
+def test_cache_por_contenido():
+    """Scripts con el mismo contenido se analizan una sola vez."""
+    indice = ModelSymbolIndex()
+    copias = [{"label": f"S{i}", "key_values": ["T01", f"S{i}"], "content": COMUN}
+              for i in range(50)]
+    indice.build(copias)
+    assert len(indice._by_hash) == 1
+    assert len(indice.definitions("Inicializar")) == 50
+
+
+def test_contenido_bajo_demanda():
+    """Los scripts listados sin contenido se piden con load_contents, por tandas."""
+    pedidos = []
+
+    def cargar(claves):
+        pedidos.append(len(claves))
+        return [COMUN if kv[1] == "COMUN" else PRINCIPAL for kv in claves]
+
+    sin_contenido = [{"label": s["label"], "key_values": s["key_values"]} for s in SCRIPTS]
+    sin_contenido += [{"label": f"S{i}", "key_values": ["T01", f"S{i}"], "content": ""}
+                      for i in range(3)]
+    indice = ModelSymbolIndex()
+    assert indice.build(sin_contenido, load_contents=cargar)
+    assert pedidos == [2]
+    assert _posiciones(indice.definitions("Main")) == [("MAIN", 1, 4)]
+    assert _posiciones(indice.definitions("Inicializar")) == [("COMUN", 3, 4)]
+
+
+def test_cancelar():
+    indice = ModelSymbolIndex()
+    assert not indice.build(SCRIPTS, cancelled=lambda: True)
+    assert not indice.ready
+
+
+class VentanaSimulada:
+    """Lo mínimo de un widget Tk que usa ModelIndexWorker."""
+
+    def __init__(self):
+        self.pendientes = {}
+        self.siguiente_id = 0
+
+    def after(self, ms, funcion):
+        self.siguiente_id += 1
+        self.pendientes[self.siguiente_id] = funcion
+        return self.siguiente_id
+
+    def after_cancel(self, after_id):
+        self.pendientes.pop(after_id, None)
+
+    def ejecutar_pendientes(self):
+        for after_id in sorted(self.pendientes):
+            funcion = self.pendientes.pop(after_id, None)
+            if funcion:
+                funcion()
+
+
+def test_construccion_en_segundo_plano():
+    """El índice se construye en otro hilo y avisa en el de la interfaz."""
+    ventana = VentanaSimulada()
+    avisos = []
+    indice = ModelSymbolIndex()
+    worker = ModelIndexWorker(ventana, indice, on_ready=lambda: avisos.append(len(indice)))
+    try:
+        worker.submit(SCRIPTS[:1])
+        worker.submit(SCRIPTS)      # Sustituye a la anterior
+        limite = time.time() + 10
+        while not avisos and time.time() < limite:
+            time.sleep(0.02)
+            ventana.ejecutar_pendientes()
+        assert avisos == [2]
+        assert indice.ready
+        assert not ventana.pendientes
+    finally:
+        worker.close()
+
+
+def test_fallo_en_la_construccion():
+    """Si la construcción falla se avisa con el error y se deja de esperar."""
+    ventana = VentanaSimulada()
+    avisos, errores = [], []
+
+    def cargar(claves):
+        raise RuntimeError("sin conexión")
+
+    worker = ModelIndexWorker(ventana, ModelSymbolIndex(), load_contents=cargar,
+                              on_ready=lambda: avisos.append("listo"),
+                              on_error=errores.append)
+    try:
+        worker.submit([{"label": "MAIN", "key_values": ["T01", "MAIN"]}])
+        limite = time.time() + 10
+        while not errores and time.time() < limite:
+            time.sleep(0.02)
+            ventana.ejecutar_pendientes()
+        assert errores == ["sin conexión"] and not avisos
+        assert worker.error == "sin conexión"
+        assert not ventana.pendientes                   # Ya no se re-arma
+
+        # Una nueva construcción limpia el error
+        worker.submit(SCRIPTS)
+        assert worker.error is None
+    finally:
+        worker.close()
+
+
+def test_cerrar_espera_a_la_carga():
+    """on_exit se llama en el hilo del índice, después de la carga en curso."""
+    ventana = VentanaSimulada()
+    eventos = []
+    cargando = threading.Event()
+    seguir = threading.Event()
+
+    def cargar(claves):
+        eventos.append("carga")
+        cargando.set()
+        seguir.wait(5)
+        eventos.append("fin carga")
+        return [PRINCIPAL for _ in claves]
+
+    def al_terminar():
+        eventos.append(("on_exit", threading.current_thread().name))
+
+    worker = ModelIndexWorker(ventana, ModelSymbolIndex(), load_contents=cargar,
+                              on_exit=al_terminar)
+    worker.submit([{"label": "MAIN", "key_values": ["T01", "MAIN"]}])
+    assert cargando.wait(5)
+    worker.close()
+    time.sleep(0.05)
+    assert eventos == ["carga"]                 # No se cierra con la carga a medias
+    seguir.set()
+    worker._thread.join(5)
+    assert eventos == ["carga", "fin carga", ("on_exit", "ModelIndex")]
+
+
+if __name__ == "__main__":
+    test_definiciones_y_referencias()
+    test_script_modificado()
+    test_cache_por_contenido()
+    test_contenido_bajo_demanda()
+    test_cancelar()
+    test_construccion_en_segundo_plano()
+    test_fallo_en_la_construccion()
+    test_cerrar_espera_a_la_carga()
+    print("\n  ✓ Índice de símbolos del modelo: todos los tests pasaron\n")
@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""
+Test de la caché de registros con revalidación por versión.
+
+Ejecutar:
+    py -3 tests/test_record_cache.py
+
+No necesita SQL Server: un cursor simulado sirve una tabla en memoria
+(con una versión por registro) y anota cada consulta.
+"""
+
+import os
+import sys
+
+import pyodbc
+
+# Añadir raíz del proyecto al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from odbc_simulado import ServidorBase, conexion
+
+
+COLUMNAS = [
+    ("MODELO", "nvarchar", 3, "NO", 1),
+    ("CODIGO", "nvarchar", 20, "NO", 2),
+    ("SCRIPT", "nvarchar", None, "YES", 3),
+]
+
+CLAVES = ["MODELO", "CODIGO"]
+
+
+class ServidorSimulado(ServidorBase):
+    def __init__(self):
+        super().__init__()
+        # (modelo, código) -> (contenido, versión)
+        self.tabla = {("T01", "ALTA"): ("Sub Alta()\nEnd Sub", 1),
+                      ("T01", "BAJA"): ("x" * 400, 1)}
+        self.columnas = list(COLUMNAS)
+        self.borradas = []
+        self.lecturas_esquema = 0
+
+    def responder(self, sql, params):
+        tabla = self.tabla
+        if "INFORMATION_SCHEMA.COLUMNS" in sql:
+            self.lecturas_esquema += 1
+            return [fila + ("2024-01-01",) for fila in self.columnas]
+        for columna in self.borradas:
+            if f"[{columna}]" in sql:
+                raise pyodbc.ProgrammingError("42S22", f"[42S22] El nombre de columna '{columna}' no es válido.")
+        # Como SQL Server: sin distinguir mayúsculas ni espacios finales
+        params = tuple(str(p).strip().upper() if i >= len(params) - 2 else p
+                       for i, p in enumerate(params))
+        if sql.startswith("UPDATE"):
+            clave = tuple(params[-2:])
+            tabla[clave] = (params[0], tabla[clave][1] + 1)
+            return 1
+        fila = tabla.get(tuple(params))
+        if sql.startswith("SELECT CONVERT"):        # Solo la versión
+            return [(str(fila[1]),)] if fila else []
+        return [tuple(params) + (fila[0], str(fila[1]))] if fila else []
+
+
+def _consultas(servidor):
+    """Consultas de registros recibidas (sin las de esquema)."""
+    return [sql for sql in servidor.consultas if "INFORMATION_SCHEMA.COLUMNS" not in sql]
+
+
+def test_revalidar_por_version():
+    """Un registro ya leído solo cuesta la consulta de su versión."""
+    servidor = ServidorSimulado()
+    db = conexion(servidor)
+    registro = db.get_record_full(CLAVES, ["T01", "ALTA"])
+    assert registro["SCRIPT"] == "Sub Alta()\nEnd Sub"
+    assert len(_consultas(servidor)) == 1
+    registro["SCRIPT"] = "cambiado"                     # Es una copia
+
+    servidor.consultas.clear()
+    registro, version = db.get_record_versioned(CLAVES, ["t01", "alta "])
+    assert registro["SCRIPT"] == "Sub Alta()\nEnd Sub" and version == "1"
+    assert len(_consultas(servidor)) == 1 and _consultas(servidor)[0].startswith("SELECT CONVERT")
+
+    # Cambiado por otro: se vuelve a leer entero
+    servidor.tabla[("T01", "ALTA")] = ("Sub Alta2()\nEnd Sub", 2)
+    servidor.consultas.clear()
+    assert db.get_record_full(CLAVES, ["T01", "ALTA"])["SCRIPT"] == "Sub Alta2()\nEnd Sub"
+    assert len(_consultas(servidor)) == 2
+    assert db.cached_record(["T01", "ALTA"])[1] == "2"
+
+    # Borrado por otro: LookupError y fuera de la caché
+    del servidor.tabla[("T01", "ALTA")]
+    try:
+        db.get_record_full(CLAVES, ["T01", "ALTA"])
+        assert False, "debería lanzar LookupError"
+    except LookupError:
+        pass
+    assert db.cached_record(["T01", "ALTA"]) is None
+
+
+def test_guardar_y_clonar():
+    """Guardar descarta la entrada; un clon comparte la caché; otra tabla es otra entrada."""
+    servidor = ServidorSimulado()
+    db = conexion(servidor)
+    db.get_record_full(CLAVES, ["T01", "ALTA"])
+    db.save_record_full(CLAVES, ["T01", "ALTA"], {"SCRIPT": "x = 2"})
+    assert db.cached_record(["T01", "ALTA"]) is None
+    assert db.get_record_full(CLAVES, ["T01", "ALTA"])["SCRIPT"] == "x = 2"
+
+    otra = db.clone()
+    otra._cnxn = servidor
+    servidor.consultas.clear()
+    assert otra.get_record_full(CLAVES, ["T01", "ALTA"])["SCRIPT"] == "x = 2"
+    assert len(_consultas(servidor)) == 1       # Solo la versión
+    otra.table = "E_PLANTI"
+    assert otra.cached_record(["T01", "ALTA"]) is None
+
+
+def test_version_de_toda_la_fila():
+    """Sin rowversion, la versión es un hash de todas las columnas (no CHECKSUM)."""
+    servidor = ServidorSimulado()
+    db = conexion(servidor)
+    db.get_record_version(CLAVES, ["T01", "ALTA"])
+    sql = _consultas(servidor)[-1]
+    assert "HASHBYTES('SHA2_256'" in sql and "CHECKSUM" not in sql
+    for columna, *_ in COLUMNAS:
+        assert f"CAST([{columna}] AS NVARCHAR(MAX))" in sql
+    # La del índice de scripts solo mira el contenido
+    assert "[CODIGO]" not in db._version_sql()
+
+
+def test_limite_de_bytes():
+    """Al pasar de RECORD_CACHE_BYTES se descarta lo usado hace más tiempo."""
+    servidor = ServidorSimulado()
+    db = conexion(servidor)
+    db.record_cache.max_bytes = 900                     # ALTA ocupa ~90 y BAJA ~850
+    db.get_record_full(CLAVES, ["T01", "ALTA"])
+    db.get_record_full(CLAVES, ["T01", "BAJA"])
+    assert db.cached_record(["T01", "ALTA"]) is None
+    assert db.cached_record(["T01", "BAJA"]) is not None
+    assert db.record_cache.size_bytes <= 900
+
+
+def test_columna_borrada():
+    """42S22 por un esquema viejo: se vuelve a leer el esquema y se repite una vez."""
+    servidor = ServidorSimulado()
+    servidor.columnas.append(("NOTAS", "nvarchar", 200, "YES", 4))
+    db = conexion(servidor)
+    db.get_table_schema()
+    servidor.columnas.pop()                             # ALTER TABLE ... DROP COLUMN NOTAS
+    servidor.borradas.append("NOTAS")
+    registro = db.get_record_full(CLAVES, ["T01", "ALTA"])
+    assert "NOTAS" not in registro and registro["SCRIPT"] == "Sub Alta()\nEnd Sub"
+    assert servidor.lecturas_esquema == 2
+    assert [c["name"] for c in db.get_table_schema()] == ["MODELO", "CODIGO", "SCRIPT"]
+
+    # Guardar una columna que ya no existe: un reintento y LookupError
+    try:
+        db.save_record_full(CLAVES, ["T01", "ALTA"], {"NOTAS": "x"})
+        assert False, "debería lanzar LookupError"
+    except LookupError:
+        pass
+    assert servidor.lecturas_esquema == 3
+
+
+if __name__ == "__main__":
+    test_revalidar_por_version()
+    test_guardar_y_clonar()
+    test_version_de_toda_la_fila()
+    test_limite_de_bytes()
+    test_columna_borrada()
+    print("\n  ✓ Caché de registros: todos los tests pasaron\n")
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+Test de la precarga en segundo plano de registros vecinos.
+
+Ejecutar:
+    py -3 tests/test_record_prefetch.py
+
+No necesita SQL Server: una conexión simulada devuelve registros y
+anota qué se pidió y desde qué conexión.
+"""
+
+import os
+import sys
+import threading
+import time
+
+# Añadir raíz del proyecto al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from editor.record_prefetch import RecordPrefetcher
+
+
+SCRIPTS = [{"label": f"S{i}", "key_values": ["T01", f"S{i}"]} for i in range(8)]
+
+
+class ConexionSimulada:
+    def __init__(self, principal=None):
+        self.table = "G_SCRIPT"
+        self.principal = principal or self
+        self.pedidos = []
+        self.clones = []
+        self.abierta = False
+        self.permiso = threading.Event()
+        self.permiso.set()
+        # record_cache compartida con los clones: (tabla, claves) -> (registro, versión)
+        self.cache = self.principal.cache if principal else {}
+
+    def _clave(self, key_values):
+        return (self.table, tuple(str(v).strip().upper() for v in key_values))
+
+    def cached_record(self, key_values):
+        entrada = self.cache.get(self._clave(key_values))
+        return (dict(entrada[0]), entrada[1]) if entrada else None
+
+    def forget_record(self, key_values):
+        self.cache.pop(self._clave(key_values), None)
+
+    def clone(self):
+        otra = ConexionSimulada(principal=self)
+        otra.table = self.table
+        self.clones.append(otra)
+        return otra
+
+    def connect(self):
+        self.abierta = True
+
+    def close(self):
+        self.abierta = False
+
+    def get_record_versioned(self, key_columns, key_values):
+        self.principal.permiso.wait(5)
+        self.principal.pedidos.append((self.table, key_values[1]))
+        if key_values[1] == "S7":
+            raise LookupError("no existe")
+        registro = {"CODIGO": key_values[1], "SCRIPT": "x" * 10}
+        self.cache[self._clave(key_values)] = (registro, "v1")
+        return dict(registro), "v1"
+
+
+def _esperar(condicion):
+    limite = time.time() + 5
+    while not condicion() and time.time() < limite:
+        time.sleep(0.01)
+    assert condicion()
+
+
+def test_vecinos_y_recientes():
+    """Se precargan los vecinos (los más cercanos primero) y los últimos abiertos."""
+    db = ConexionSimulada()
+    precarga = RecordPrefetcher(db, ["MODELO", "CODIGO"], neighbours=2, recent=3)
+    try:
+        precarga.touch(["T01", "S6"])
+        precarga.touch(["T01", "S3"])
+        precarga.schedule(SCRIPTS, 3)
+        _esperar(lambda: len(db.pedidos) == 5)
+        assert [c for _, c in db.pedidos] == ["S4", "S2", "S5", "S1", "S6"]
+        assert len(db.clones) == 1 and db.clones[0].abierta     # Su propia conexión
+        registro, version = precarga.get(["t01", "s4 "])
+        assert registro == {"CODIGO": "S4", "SCRIPT": "x" * 10} and version == "v1"
+        registro["CODIGO"] = "otro"                            # Es una copia
+        assert precarga.get(["T01", "S4"])[0]["CODIGO"] == "S4"
+        assert precarga.get(["T01", "S0"]) is None
+        # Lo ya precargado no se vuelve a pedir; lo que no existe se salta
+        precarga.schedule(SCRIPTS, 6)
+        _esperar(lambda: len(db.pedidos) == 7)
+        time.sleep(0.05)
+        assert [c for _, c in db.pedidos[5:]] == ["S7", "S3"]
+        db.forget_record(["T01", "S5"])        # Guardado desde la interfaz
+        assert precarga.get(["T01", "S5"]) is None
+    finally:
+        precarga.close()
+    _esperar(lambda: not db.clones[0].abierta)
+
+
+def test_cancelar_y_cambio_de_contexto():
+    """Un nuevo schedule cancela el anterior; otra tabla no usa lo precargado."""
+    db = ConexionSimulada()
+    precarga = RecordPrefetcher(db, ["MODELO", "CODIGO"], neighbours=3, recent=0)
+    try:
+        db.permiso.clear()
+        precarga.schedule(SCRIPTS, 0)           # S1, S2, S3
+        time.sleep(0.05)
+        precarga.schedule(SCRIPTS, 7)           # Cancela: S6, S5, S4
+        db.permiso.set()
+        _esperar(lambda: len(db.pedidos) == 4)
+        time.sleep(0.05)
+        assert [c for _, c in db.pedidos] == ["S1", "S6", "S5", "S4"]
+
+        db.table = "E_PROGRA"                   # switch_context
+        precarga.schedule(SCRIPTS, 7)
+        assert precarga.get(["T01", "S6"]) is None
+        _esperar(lambda: len(db.pedidos) == 7)
+        assert db.pedidos[-1] == ("E_PROGRA", "S4")
+    finally:
+        precarga.close()
+
+
+if __name__ == "__main__":
+    test_vecinos_y_recientes()
+    test_cancelar_y_cambio_de_contexto()
+    print("\n  ✓ Precarga de registros: todos los tests pasaron\n")
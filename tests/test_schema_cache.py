@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+Test de la caché de esquemas de tabla.
+
+Ejecutar:
+    py -3 tests/test_schema_cache.py
+
+No necesita SQL Server: una conexión simulada responde a las consultas
+de esquema y de fecha de modificación y cuenta cuántas recibe.
+"""
+
+import os
+import sys
+import tempfile
+
+# Añadir raíz del proyecto al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db.schema_cache import SchemaCache, schema_key
+from odbc_simulado import ServidorBase, conexion
+
+
+COLUMNAS = [
+    ("MODELO", "nvarchar", 3, "NO", 1),
+    ("CODIGO", "nvarchar", 20, "NO", 2),
+    ("SCRIPT", "nvarchar", None, "YES", 3),
+    ("GRUPO", "nvarchar", 10, "YES", 4),
+]
+
+
+class ServidorSimulado(ServidorBase):
+    def __init__(self):
+        super().__init__()
+        self.columnas = list(COLUMNAS)
+        self.modificada = "2024-01-01T10:00:00"
+
+    def responder(self, sql, params):
+        if "INFORMATION_SCHEMA.COLUMNS" in sql:
+            return [fila + (self.modificada,) for fila in self.columnas]
+        if "sys.objects" in sql:
+            return [(self.modificada,)]
+        if sql.startswith("SELECT CONVERT"):        # Solo la versión del registro
+            return [("v1",)]
+        return [("T01", "S1", "MsgBox 1", "G1", "v1")]
+
+
+def test_cache_en_memoria():
+    """El esquema se pide una vez por sesión; luego cada registro es una consulta."""
+    servidor = ServidorSimulado()
+    db = conexion(servidor)
+    esquema = db.get_table_schema()
+    assert [c["name"] for c in esquema] == ["MODELO", "CODIGO", "SCRIPT", "GRUPO"]
+    esquema[0]["name"] = "CAMBIADO"             # No altera el guardado
+    servidor.consultas.clear()
+    for _ in range(3):
+        assert db.get_record_full(["MODELO", "CODIGO"], ["T01", "S1"])["SCRIPT"] == "MsgBox 1"
+    assert len(servidor.consultas) == 3
+    assert db._existing_columns(["GRUPO", "NOEXISTE"]) == ["GRUPO"]
+    assert len(servidor.consultas) == 3
+    # Otra tabla es otra entrada
+    db.table = "E_PLANTI"
+    db.get_table_schema()
+    assert len(servidor.consultas) == 4
+    # refresh=True vuelve a leerlo
+    db.table = "G_SCRIPT"
+    db.get_table_schema(refresh=True)
+    assert len(servidor.consultas) == 5
+
+
+def test_cache_en_disco():
+    """Al arrancar, el esquema guardado vale si la tabla no se modificó."""
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = os.path.join(tmp, "esquemas.sqlite")
+        servidor = ServidorSimulado()
+        cache = SchemaCache(ruta)
+        conexion(servidor, schema_cache=cache).get_table_schema()
+        cache.close()
+
+        # Nueva sesión: solo la consulta de la fecha de modificación
+        servidor.consultas.clear()
+        cache = SchemaCache(ruta)
+        db = conexion(servidor, schema_cache=cache)
+        assert len(db.get_table_schema()) == 4
+        assert len(servidor.consultas) == 1 and "sys.objects" in servidor.consultas[0]
+        db.get_table_schema()
+        assert len(servidor.consultas) == 1
+        cache.close()
+
+        # Tras un ALTER TABLE la fecha cambia y el esquema se vuelve a leer
+        servidor.columnas.append(("NUEVA", "int", None, "YES", 5))
+        servidor.modificada = "2024-02-01T09:30:00"
+        servidor.consultas.clear()
+        cache = SchemaCache(ruta)
+        assert len(conexion(servidor, schema_cache=cache).get_table_schema()) == 5
+        assert len(servidor.consultas) == 2
+        assert cache.stored(schema_key("SRV", "gestion", "g_script"))[0] == "2024-02-01T09:30:00"
+        cache.invalidate()
+        assert cache.stored(schema_key("srv", "gestion", "g_script")) is None
+        cache.close()
+
+
+if __name__ == "__main__":
+    test_cache_en_memoria()
+    test_cache_en_disco()
+    print("\n  ✓ Caché de esquemas: todos los tests pasaron\n")
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""
+Test del contenido de scripts bajo demanda (listado sin contenido + LRU).
+
+Ejecutar:
+    py -3 tests/test_script_content.py
+
+No necesita SQL Server: un cursor simulado sirve una tabla en memoria y
+cuenta las consultas.
+"""
+
+import os
+import sys
+
+# Añadir raíz del proyecto al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db.connection import ConcurrentUpdateError
+from db.lru_cache import LRUCache
+from odbc_simulado import ServidorBase, conexion
+
+
+TABLA = {
+    ("T01", "ALTA"): "Sub Alta()\nEnd Sub",
+    ("T01", "BAJA"): "Sub Baja()\nEnd Sub",
+    ("T01", "CALCULO"): "x = 1",
+}
+
+
+class ServidorSimulado(ServidorBase):
+    def __init__(self):
+        super().__init__()
+        self.deshacer = []
+
+    def responder(self, sql, params):
+        if sql.startswith("UPDATE"):
+            clave = tuple(params[1:3])
+            if "HASHBYTES" in sql and TABLA.get(clave) != params[3]:
+                return 0                            # Cambiado desde que se leyó
+            self.deshacer.append((clave, TABLA.get(clave)))
+            TABLA[clave] = params[0]
+            return 1
+        if "DATALENGTH" in sql:
+            return [k + (2 * len(v),) for k, v in sorted(TABLA.items()) if k[0] == params[0]]
+        if sql.startswith("SELECT [SCRIPT]"):
+            clave = tuple(v.strip().upper() for v in params)
+            return [(TABLA[clave],)] if clave in TABLA else []
+        claves = [tuple(params[i:i + 2]) for i in range(0, len(params), 2)]
+        return [k + (TABLA[k],) for k in claves if k in TABLA]
+
+    def commit(self):
+        self.deshacer.clear()
+
+    def rollback(self):
+        for clave, anterior in reversed(self.deshacer):
+            TABLA[clave] = anterior
+        self.deshacer.clear()
+
+
+def test_lru():
+    """Se descarta lo usado hace más tiempo al pasar de entradas o de bytes."""
+    cache = LRUCache(max_entries=3, max_bytes=100)
+    for clave in "abc":
+        cache.put(clave, "x" * 10)              # 20 bytes cada uno
+    cache.get("a")
+    cache.put("d", "x")
+    assert "b" not in cache and len(cache) == 3
+    cache.put("e", "x" * 40)                    # 80 bytes: sale c y a
+    assert sorted(cache._items) == ["d", "e"] and cache.size_bytes == 82
+    cache.put("f", "x" * 60)                    # Mayor que el límite: no se guarda
+    assert cache.get("f") is None and cache.size_bytes == 82
+    assert cache.pop("d") == "x" and cache.size_bytes == 80
+
+
+def test_listado_sin_contenido():
+    """Solo claves y tamaño; el contenido se pide una vez y luego sale de la LRU."""
+    db = conexion(ServidorSimulado())
+    scripts = db.get_scripts_for_model(["MODELO", "CODIGO"], ["T01", ""], with_content=False)
+    assert [(s["label"], s["length"]) for s in scripts] == [
+        ("ALTA", 36), ("BAJA", 36), ("CALCULO", 10)]
+    assert all("content" not in s for s in scripts)
+
+    consultas = db._cnxn.consultas
+    consultas.clear()
+    assert db.get_script_content(["MODELO", "CODIGO"], ["T01", "BAJA"]) == TABLA[("T01", "BAJA")]
+    assert db.get_script_content(["MODELO", "CODIGO"], ["t01", "baja "]) == TABLA[("T01", "BAJA")]
+    assert len(consultas) == 1
+    # Varios a la vez: solo los que faltan, en una consulta
+    contenidos = db.get_script_contents(["MODELO", "CODIGO"],
+                                        [["T01", "ALTA"], ["T01", "BAJA"], ["T01", "NO"]])
+    assert contenidos == [TABLA[("T01", "ALTA")], TABLA[("T01", "BAJA")], ""]
+    assert len(consultas) == 2
+    # Una conexión clonada comparte la caché
+    assert db.clone().get_script_content(["MODELO", "CODIGO"], ["T01", "ALTA"]) \
+        == TABLA[("T01", "ALTA")]
+
+
+def test_guardar_descarta():
+    """Guardar desde la conexión descarta el contenido guardado en la LRU."""
+    db = conexion(ServidorSimulado())
+    db.get_script_content(["MODELO", "CODIGO"], ["T01", "CALCULO"])
+    db.save_record_full(["MODELO", "CODIGO"], ["T01", "CALCULO"], {"SCRIPT": "x = 2"})
+    assert db.get_script_content(["MODELO", "CODIGO"], ["T01", "CALCULO"]) == "x = 2"
+
+
+def test_reemplazo_masivo_concurrente():
+    """Si un script cambió desde la vista previa no se guarda ninguno."""
+    db = conexion(ServidorSimulado())
+    alta, baja = TABLA[("T01", "ALTA")], TABLA[("T01", "BAJA")]
+    TABLA[("T01", "BAJA")] = "Sub Baja()\n  ' editado por otro\nEnd Sub"
+    try:
+        db.bulk_update_content(["MODELO", "CODIGO"], [
+            (["T01", "ALTA"], alta.replace("Alta", "Alta2"), alta),
+            (["T01", "BAJA"], baja.replace("Baja", "Baja2"), baja),
+        ])
+        assert False, "debería lanzar ConcurrentUpdateError"
+    except ConcurrentUpdateError as e:
+        assert e.conflicts == [["T01", "BAJA"]]
+    assert TABLA[("T01", "ALTA")] == alta               # Rollback de todos
+    assert "editado por otro" in TABLA[("T01", "BAJA")]
+    # Con el contenido actual sí se guarda
+    assert db.bulk_update_content(["MODELO", "CODIGO"], [
+        (["T01", "ALTA"], "x", alta)]) == 1
+    assert TABLA[("T01", "ALTA")] == "x"
+    TABLA[("T01", "ALTA")], TABLA[("T01", "BAJA")] = alta, baja
+
+
+if __name__ == "__main__":
+    test_lru()
+    test_listado_sin_contenido()
+    test_guardar_descarta()
+    test_reemplazo_masivo_concurrente()
+    print("\n  ✓ Contenido bajo demanda: todos los tests pasaron\n")
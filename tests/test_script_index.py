@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+"""
+Test del índice local de scripts (búsqueda global sin ir al servidor).
+
+Ejecutar:
+    py -3 tests/test_script_index.py
+
+No necesita SQL Server: una conexión simulada devuelve versiones y
+contenidos como lo harían get_script_versions / get_scripts_by_keys, y
+un cursor simulado sirve a la DatabaseConnection real.
+"""
+
+import sys
+import os
+import tempfile
+
+# Añadir raíz del proyecto al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pyodbc
+
+from db.script_index import ScriptIndex, default_index_path, trigrams
+from odbc_simulado import ServidorBase, conexion
+
+
+KEYS = ["MODELO", "CODIGO"]
+
+
+class ConexionSimulada:
+    """Tabla en memoria con la interfaz que usa ScriptIndex.refresh()."""
+
+    table = "G_SCRIPT"
+
+    def __init__(self, filas):
+        self.filas = dict(filas)        # (modelo, codigo) → script
+        self.descargados = 0
+        self.consultas_versiones = 0
+        self.marca = None               # Sin permiso para la marca de cambios
+
+    def get_table_change_marker(self):
+        return self.marca
+
+    def get_script_versions(self, key_columns, content_column=None):
+        self.consultas_versiones += 1
+        return [(list(k), str(len(v)) + ":" + str(hash(v))) for k, v in self.filas.items()]
+
+    def get_scripts_by_keys(self, key_columns, keys_list, content_column=None):
+        for keys in keys_list:
+            self.descargados += 1
+            yield {"label": " / ".join(keys), "key_values": list(keys),
+                   "content": self.filas[tuple(keys)]}
+
+
+def _indice():
+    return ScriptIndex(os.path.join(tempfile.mkdtemp(), "indice.sqlite"))
+
+
+def test_trigramas():
+    assert trigrams("Dim") == {"dim"}
+    assert trigrams("abcd") == {"abc", "bcd"}
+    assert trigrams("ab") == set()
+
+
+def test_ruta_por_servidor():
+    """Un fichero por servidor y base de datos, con nombre válido."""
+    ruta = default_index_path("srv\\SQLEXPRESS", "datosABEL")
+    assert os.path.basename(ruta) == "srv_SQLEXPRESS__datosABEL.sqlite"
+
+
+def test_busqueda():
+    db = ConexionSimulada({
+        ("T01", "ALTA"): "Sub Main()\n  x = CLIENTE.NOMBRE\nEnd Sub",
+        ("T01", "BAJA"): "Sub Main()\n  y = PROVEEDOR.NIF\nEnd Sub",
+    })
+    indice = _indice()
+    assert indice.refresh(db, KEYS) == (2, 0)
+    encontrados = list(indice.search("G_SCRIPT", "cliente.nombre"))
+    assert [r["key_values"] for r in encontrados] == [["T01", "ALTA"]]
+    assert encontrados[0]["label"] == "T01 / ALTA"
+    # Texto corto (menos de un trigrama) y sin resultados
+    assert len(list(indice.search("G_SCRIPT", "ma"))) == 2
+    assert list(indice.search("G_SCRIPT", "inexistente")) == []
+    # Los trigramas seleccionan candidatos, pero la subcadena debe existir
+    assert list(indice.search("G_SCRIPT", "nif.proveedor")) == []
+
+
+def test_refresco_incremental():
+    """Solo se descargan las filas nuevas o cambiadas; las borradas se quitan."""
+    db = ConexionSimulada({("T01", f"C{i}"): f"Sub S{i}()\nEnd Sub" for i in range(50)})
+    indice = _indice()
+    indice.refresh(db, KEYS)
+    assert db.descargados == 50
+
+    db.descargados = 0
+    assert indice.refresh(db, KEYS) == (0, 0)
+    assert db.descargados == 0
+
+    db.filas[("T01", "C7")] = "Sub Nuevo()\n  z = ARTICULO.PRECIO\nEnd Sub"
+    del db.filas[("T01", "C8")]
+    assert indice.refresh(db, KEYS) == (1, 1)
+    assert db.descargados == 1
+    assert indice.count("G_SCRIPT") == 49
+    assert [r["label"] for r in indice.search("G_SCRIPT", "articulo.precio")] == ["T01 / C7"]
+
+
+def test_persistencia_y_guardado():
+    """El índice sobrevive al cierre y se actualiza al guardar desde el editor."""
+    ruta = os.path.join(tempfile.mkdtemp(), "indice.sqlite")
+    db = ConexionSimulada({("T01", "ALTA"): "Sub Main()\nEnd Sub"})
+    indice = ScriptIndex(ruta)
+    indice.refresh(db, KEYS)
+    indice.update_script("G_SCRIPT", ["T01", "ALTA"], "Sub Main()\n  w = STOCK.CANTIDAD\nEnd Sub")
+    indice.close()
+
+    indice = ScriptIndex(ruta)
+    assert [r["label"] for r in indice.search("G_SCRIPT", "stock.cantidad")] == ["T01 / ALTA"]
+    # Guardado con versión vacía: el siguiente refresco lo vuelve a comprobar
+    db.filas[("T01", "ALTA")] = "Sub Main()\n  w = STOCK.CANTIDAD\nEnd Sub"
+    assert indice.refresh(db, KEYS) == (1, 0)
+    indice.close()
+
+
+def test_marca_de_cambios():
+    """Con la marca de la tabla sin cambiar no se piden versiones; sin marca, cada min_interval."""
+    db = ConexionSimulada({("T01", "ALTA"): "Sub Main()\nEnd Sub"})
+    db.marca = "2024-01-01|2024-05-01T10:00:00|2024-04-30"
+    indice = _indice()
+    assert indice.refresh(db, KEYS) == (1, 0)
+    db.filas[("T01", "BAJA")] = "Sub Baja()\nEnd Sub"
+    assert indice.refresh(db, KEYS) == (0, 0) and db.consultas_versiones == 1
+    db.marca = "2024-01-01|2024-05-01T10:05:00|2024-04-30"
+    assert indice.refresh(db, KEYS) == (1, 0) and db.consultas_versiones == 2
+
+    # Sin marca: tras una comprobación, la siguiente espera min_interval
+    db.marca = None
+    del db.filas[("T01", "BAJA")]
+    assert indice.refresh(db, KEYS, min_interval=300) == (0, 0)
+    assert db.consultas_versiones == 2
+    assert indice.refresh(db, KEYS) == (0, 1)
+
+
+class ServidorSimulado(ServidorBase):
+    """Esquema de la tabla, filas (claves, versión) y marca de cambios."""
+
+    def __init__(self, columnas, marca=None):
+        super().__init__()
+        self.columnas = columnas
+        self.marca = marca
+
+    def responder(self, sql, params):
+        if "INFORMATION_SCHEMA.COLUMNS" in sql:
+            return [c + ("2024-01-01",) for c in self.columnas]
+        if "dm_db_index_usage_stats" in sql:
+            if not self.marca:
+                raise pyodbc.Error("42000", "VIEW SERVER STATE permission was denied")
+            return [self.marca]
+        return [("T01 ", "ALTA", "123:40"), ("T01", "BAJA", "456:12")]
+
+
+def test_versiones_desde_la_conexion():
+    """get_script_versions de DatabaseConnection, con y sin columna rowversion."""
+    columnas = [("MODELO", "nvarchar", 3, "NO", 1), ("CODIGO", "nvarchar", 20, "NO", 2),
+                ("SCRIPT", "nvarchar", None, "YES", 3)]
+    for extra, esperado in (([], "HASHBYTES"), ([("VERSION", "timestamp", 8, "NO", 4)], "[VERSION]")):
+        servidor = ServidorSimulado(columnas + extra)
+        db = conexion(servidor)
+        assert db.get_script_versions(KEYS) == [(["T01", "ALTA"], "123:40"),
+                                                (["T01", "BAJA"], "456:12")]
+        assert esperado in servidor.consultas[-1]
+        assert db.get_table_change_marker() is None
+
+
+def test_marca_desde_la_conexion():
+    """La marca une modify_date, última escritura y arranque del servidor."""
+    servidor = ServidorSimulado([], marca=("2024-01-01", None, "2024-04-30"))
+    db = conexion(servidor)
+    assert db.get_table_change_marker() == "2024-01-01||2024-04-30"
+
+
+if __name__ == "__main__":
+    test_trigramas()
+    test_ruta_por_servidor()
+    test_busqueda()
+    test_refresco_incremental()
+    test_persistencia_y_guardado()
+    test_marca_de_cambios()
+    test_versiones_desde_la_conexion()
+    test_marca_desde_la_conexion()
+    print("\n  ✓ Índice local de scripts: todos los tests pasaron\n")
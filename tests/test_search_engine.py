@@ -0,0 +1,277 @@
+# -*- coding: utf-8 -*-
+"""
+Test del motor de búsqueda compartido por las barras de búsqueda.
+
+Ejecutar:
+    py -3 tests/test_search_engine.py
+
+No necesita interfaz gráfica: solo valida la búsqueda sobre texto
+y la conversión offset ↔ índice Tkinter.
+"""
+
+import sys
+import os
+import re
+import time
+from array import array
+
+# Añadir raíz del proyecto al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from editor import search_engine
+from editor.search_engine import (
+    BufferSnapshot,
+    MatchScanner,
+    RegexWorker,
+    SearchTimeout,
+    build_line_starts,
+    compile_pattern,
+    find_matches,
+    format_count,
+    iter_matches,
+    line_hits,
+    minimal_edit,
+    replace_matches,
+)
+
+
+CODIGO = """Sub Main()
+    Dim x
+    dim y
+End Sub"""
+
+
+def test_line_starts():
+    """Cada línea empieza justo después de un salto de línea."""
+    assert build_line_starts("") == [0]
+    assert build_line_starts("a\nbc\n") == [0, 2, 5]
+    starts = build_line_starts(CODIGO)
+    assert len(starts) == 4
+    assert CODIGO[starts[1]:].startswith("    Dim x")
+
+
+def test_find_matches_case():
+    """Búsqueda literal con y sin distinción de mayúsculas."""
+    assert find_matches(CODIGO, "Dim", match_case=True) == [(15, 18)]
+    assert len(find_matches(CODIGO, "dim", match_case=False)) == 2
+    assert find_matches(CODIGO, "", match_case=False) == []
+    # Coincidencias no solapadas, como el bucle original de text.search
+    assert find_matches("aaaa", "aa", match_case=True) == [(0, 2), (2, 4)]
+
+
+def test_snapshot_index():
+    """Conversión offset → índice Tkinter y vuelta."""
+    snap = BufferSnapshot(CODIGO)
+    assert snap.index(0) == "1.0"
+    assert snap.index(15) == "2.4"
+    assert snap.index(len(CODIGO)) == "4.7"
+    for start, end in find_matches(CODIGO, "dim"):
+        assert snap.offset(snap.index(start)) == start
+        assert snap.offset(snap.index(end)) == end
+    # Columnas fuera de rango se ajustan al final de la línea
+    assert snap.offset("1.999") == len("Sub Main()")
+
+
+def test_whole_word_y_regex():
+    """Palabra completa y expresión regular (línea a línea)."""
+    texto = "Dim x\nDimension = 1\nx = Dim2"
+    assert find_matches(texto, "dim", whole_word=True) == [(0, 3)]
+    assert find_matches(texto, r"^\w+", regex=True) == [(0, 3), (6, 15), (20, 21)]
+    # Grupos y clases de caracteres
+    spans = find_matches(texto, r"Dim\d", regex=True, match_case=True)
+    assert [texto[s:e] for s, e in spans] == ["Dim2"]
+
+
+def test_regex_invalida():
+    """Un patrón no válido lanza re.error (la barra lo muestra sin bloquear)."""
+    try:
+        find_matches("abc", "(", regex=True)
+        assert False, "Debería fallar"
+    except re.error:
+        pass
+
+
+def test_rango_seleccion():
+    """Solo se devuelven coincidencias dentro del rango [start, end)."""
+    texto = "a a a a"
+    spans = list(iter_matches(texto, "a", match_case=True, start=2, end=5))
+    assert spans == [(2, 3), (4, 5)]
+
+
+def test_cache_patrones():
+    """El mismo patrón + flags reutiliza el objeto compilado."""
+    p1 = compile_pattern("Dim", False, False, True)
+    p2 = compile_pattern("Dim", False, False, True)
+    assert p1 is p2
+    assert compile_pattern("Dim", True, False, True) is not p1
+
+
+def test_regex_timeout():
+    """El límite de tiempo corta búsquedas regex sobre scripts grandes."""
+    texto = "aaaaaaaaaaaaaaaaaaaa\n" * 20000
+    try:
+        list(iter_matches(texto, r"(a|aa)+b", regex=True,
+                          deadline=time.perf_counter() + 0.05))
+        assert False, "Debería agotar el tiempo"
+    except SearchTimeout:
+        pass
+
+
+def test_regex_lineas_largas():
+    """Las líneas largas se recorren enteras: '$' y '\\b' solo valen en su sitio."""
+    linea = "".join(f"x{i:05d} " for i in range(3000))    # 21000 caracteres
+    texto = "Dim a\n" + linea + "\nDim b"
+    esperado = [m.span() for m in re.finditer(r"x\d+ x\d+", texto)]
+    assert list(iter_matches(texto, r"x\d+ x\d+", regex=True)) == esperado
+    assert list(iter_matches(texto, r"^\w+ \w$", regex=True)) == [(0, 5), (21007, 21012)]
+    assert replace_matches("x" * 10000, ".*$", "X", regex=True) == ("X", 1)
+    assert list(iter_matches("ab" * 5000, "b", regex=True, whole_word=True)) == []
+    # El tiempo se comprueba entre líneas
+    coincidencias = []
+    try:
+        for m in iter_matches(linea + "\n" + linea, r"x\d+", regex=True,
+                              deadline=time.perf_counter()):
+            coincidencias.append(m)
+        assert False, "Debería agotar el tiempo"
+    except SearchTimeout:
+        assert len(coincidencias) == 3000
+
+
+def test_regex_en_proceso():
+    """Una regex catastrófica en el RegexWorker se corta matando el proceso."""
+    texto = "Dim a\n" * 3 + "a" * 28 + "b"
+    viejo = search_engine.REGEX_TIMEOUT
+    search_engine.REGEX_TIMEOUT = 0.5
+    worker = RegexWorker()
+    try:
+        inicio = time.perf_counter()
+        scanner = MatchScanner(texto, r"(a+)+$|Dim", True, True, False, 0, len(texto), 0,
+                               worker=worker)
+        while not scanner.run(0.05):
+            pass
+        assert scanner.timed_out and scanner.count <= 3
+        assert time.perf_counter() - inicio < 5 and not worker.busy
+
+        # El siguiente trabajo arranca otro proceso
+        scanner = MatchScanner(texto, r"D\w+", True, True, False, 0, len(texto), 4,
+                               worker=worker)
+        while not scanner.run(0.05):
+            pass
+        assert not scanner.timed_out and list(scanner.before_starts) == [0]
+        assert list(scanner.after_starts) == [6, 12]
+
+        scanner = MatchScanner(texto, r"(", True, True, False, 0, len(texto), 0,
+                               worker=worker)
+        assert scanner.run(0.05) and scanner.error
+    finally:
+        search_engine.REGEX_TIMEOUT = viejo
+        worker.kill()
+
+
+def test_scanner_desde_cursor():
+    """La búsqueda por porciones empieza en el cursor y acaba ordenada."""
+    texto = "Dim a\n" * 50000
+    origin = texto.index("\n", len(texto) // 2) + 1
+    scanner = MatchScanner(texto, "dim", False, False, False, 0, len(texto), origin)
+    scanner.run(0)  # Una sola porción (un bloque)
+    assert scanner.after_starts and scanner.after_starts[0] == origin
+    while not scanner.run(0.01):
+        pass
+    # Hay 25 000 coincidencias tras el cursor: el tope se llena con ellas
+    assert scanner.capped and not scanner.before_starts
+    assert all(start >= origin for start in scanner.after_starts)
+
+
+def test_scanner_tope():
+    """Al llegar al tope se para y se marca como recortada."""
+    texto = "x " * 30000
+    scanner = MatchScanner(texto, "x", True, False, False, 0, len(texto), 0,
+                           max_matches=10000)
+    while not scanner.run(0.01):
+        pass
+    assert scanner.capped and scanner.count == 10000
+    assert format_count(scanner.count, scanner.capped) == "10 000+"
+    assert format_count(12) == "12"
+
+
+def test_scanner_sin_tope():
+    """Sin tope, before + after es exactamente el resultado de find_matches."""
+    texto = "aXa\n" * 40000
+    origin = 4 * 25000
+    scanner = MatchScanner(texto, "a", False, False, False, 0, len(texto), origin,
+                           max_matches=10 ** 9)
+    while not scanner.run(0.01):
+        pass
+    starts = scanner.before_starts + scanner.after_starts
+    ends = scanner.before_ends + scanner.after_ends
+    assert list(zip(starts, ends)) == find_matches(texto, "a")
+
+
+def test_scanner_arrays():
+    """Las coincidencias se guardan como arrays compactos de offsets."""
+    scanner = MatchScanner(CODIGO, "dim", False, False, False, 0, len(CODIGO), 0)
+    scanner.run(1.0)
+    assert isinstance(scanner.after_starts, array)
+    assert scanner.after_starts.typecode == "i"
+    assert list(scanner.after_starts) == [15, 25]
+
+
+def test_replace_matches():
+    """Reemplazar todo en Python: mismo resultado que las coincidencias."""
+    texto = "Dim a\ndim b\nDimension"
+    assert replace_matches(texto, "dim", "Private", whole_word=True) == \
+        ("Private a\nPrivate b\nDimension", 2)
+    assert replace_matches(texto, "Dim", "X", match_case=True) == ("X a\ndim b\nXension", 2)
+    # Regex con grupos, línea a línea
+    nuevo, n = replace_matches(texto, r"^(\w+) (\w)$", r"\2 = \g<1>", regex=True)
+    assert (nuevo, n) == ("a = Dim\nb = dim\nDimension", 2)
+    # Solo dentro del rango
+    assert replace_matches("a a a", "a", "b", start=1, end=4) == ("a b a", 1)
+    assert replace_matches(texto, "zzz", "y") == (texto, 0)
+    try:
+        replace_matches(texto, r"(\w+)", r"\3", regex=True)
+        assert False, "Debería fallar"
+    except re.error:
+        pass
+
+
+def test_minimal_edit():
+    """El rango mínimo transforma el texto viejo en el nuevo."""
+    viejo = "x" * 10000 + "Dim" + "y" * 10000
+    nuevo = "x" * 10000 + "Private" + "y" * 10000
+    assert minimal_edit(viejo, nuevo) == (10000, 10003, "Private")
+    for a, b in [("", "abc"), ("abc", ""), ("aXa", "aa"), ("aa", "aaa"), ("abc", "abc")]:
+        start, end, texto = minimal_edit(a, b)
+        assert a[:start] + texto + a[end:] == b
+
+
+def test_line_hits():
+    """Una entrada por línea con coincidencias (para buscar en todos los scripts)."""
+    texto = "Sub Main()\r\n  x = CLIENTE.NOMBRE\r\n  y = cliente.nombre & CLIENTE.NIF\r\nEnd Sub"
+    hits = line_hits(texto, "cliente.")
+    assert [(linea, col) for linea, col, _ in hits] == [(2, 6), (3, 6)]
+    assert hits[0][2] == "  x = CLIENTE.NOMBRE"
+    assert line_hits(texto, "cliente.", match_case=True) == [(3, 6, "  y = cliente.nombre & CLIENTE.NIF")]
+    assert line_hits(texto, "Main", max_hits=1) == [(1, 4, "Sub Main()")]
+    assert line_hits(texto, "zzz") == []
+
+
+if __name__ == "__main__":
+    test_line_starts()
+    test_find_matches_case()
+    test_snapshot_index()
+    test_whole_word_y_regex()
+    test_regex_invalida()
+    test_rango_seleccion()
+    test_cache_patrones()
+    test_regex_timeout()
+    test_regex_lineas_largas()
+    test_regex_en_proceso()
+    test_scanner_desde_cursor()
+    test_scanner_tope()
+    test_scanner_sin_tope()
+    test_scanner_arrays()
+    test_replace_matches()
+    test_minimal_edit()
+    test_line_hits()
+    print("\n  ✓ Motor de búsqueda: todos los tests pasaron\n")
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""
+Test de la carga de arranque en un solo viaje al servidor.
+
+Ejecutar:
+    py -3 tests/test_startup_load.py
+
+No necesita SQL Server: un cursor simulado responde al lote con un
+conjunto de resultados por SELECT (leídos con nextset()).
+"""
+
+import os
+import sys
+import tempfile
+
+# Añadir raíz del proyecto al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pyodbc
+
+from db.schema_cache import SchemaCache, schema_key
+from odbc_simulado import Lote, ServidorBase, conexion
+
+
+COLUMNAS = [("MODELO", "nvarchar", 3, "NO", 1, "2024-01-01T10:00:00"),
+            ("CODIGO", "nvarchar", 20, "NO", 2, "2024-01-01T10:00:00"),
+            ("SCRIPT", "nvarchar", None, "YES", 3, "2024-01-01T10:00:00")]
+
+FILAS = [("T01", "ALTA ", "Sub Alta()\nEnd Sub"), ("T01", "BAJA", None)]
+
+
+class ServidorSimulado(ServidorBase):
+    def __init__(self, sin_lotes=False):
+        super().__init__()
+        self.sin_lotes = sin_lotes
+        self.fecha = "2024-01-01T10:00:00"     # sys.objects.modify_date
+
+    def responder(self, sql, params):
+        if self.sin_lotes and ";" in sql:
+            raise pyodbc.Error("Multiple result sets not supported")
+        resultados = Lote()
+        for sentencia in sql.split(";"):
+            if "INFORMATION_SCHEMA" in sentencia:
+                params = params[2:]
+                resultados.append((None, [c[:5] + (self.fecha,) for c in COLUMNAS]))
+            elif "sys.objects" in sentencia:
+                params = params[1:]
+                resultados.append((None, [(self.fecha,)]))
+            elif "SELECT *" in sentencia or "SELECT TOP 1 *" in sentencia:
+                n = sentencia.count("?")
+                valores, params = params[:n], params[n:]
+                filas = [f for f in FILAS if [v.strip() for v in f[:n]] == valores]
+                if "TOP 1" in sentencia:
+                    filas = [f for f in FILAS if f[0] == valores[0]][:1]
+                resultados.append(([("MODELO",), ("CODIGO",), ("SCRIPT",)], filas))
+            elif "DATALENGTH" in sentencia:
+                params = params[1:]
+                filas = [f[:2] + (2 * len(f[2] or ""),) for f in FILAS]
+                resultados.append((None, filas))
+            elif "SELECT" in sentencia:
+                params = params[1:]
+                resultados.append((None, list(FILAS)))
+        return resultados
+
+
+def test_un_viaje():
+    """Esquema, lista y registro llegan en un único lote."""
+    servidor = ServidorSimulado()
+    datos = conexion(servidor).load_startup(["MODELO", "CODIGO"], ["T01", "BAJA"])
+    assert len(servidor.consultas) == 1 and datos["round_trips"] == 1
+    assert [c["name"] for c in datos["schema"]] == ["MODELO", "CODIGO", "SCRIPT"]
+    assert [s["label"] for s in datos["scripts"]] == ["ALTA", "BAJA"]
+    # La lista viaja sin contenido, solo con su tamaño
+    assert "content" not in datos["scripts"][0] and datos["scripts"][0]["length"] == 36
+    assert datos["record"] == {"MODELO": "T01", "CODIGO": "BAJA", "SCRIPT": ""}
+    assert datos["key_values"] == ["T01", "BAJA"]
+
+
+def test_solo_modelo():
+    """Sin CODIGO el registro inicial es el primer script del modelo."""
+    servidor = ServidorSimulado()
+    db = conexion(servidor)
+    db.get_table_schema()                       # Ya en caché: no va en el lote
+    datos = db.load_startup(["MODELO", "CODIGO"], ["T01", ""], include_list=False)
+    assert "INFORMATION_SCHEMA" not in servidor.consultas[-1]
+    assert datos["key_values"] == ["T01", "ALTA"]
+    assert datos["record"]["SCRIPT"] == "Sub Alta()\nEnd Sub"
+    assert datos["scripts"] == []
+
+
+def test_esquema_en_disco():
+    """Con el esquema en el fichero, el lote solo pide su fecha de modificación."""
+    ruta = os.path.join(tempfile.mkdtemp(), "esquemas.sqlite")
+    cache = SchemaCache(ruta)
+    conexion(ServidorSimulado(), schema_cache=cache).load_startup(["MODELO", "CODIGO"], ["T01", "BAJA"])
+    cache.close()
+
+    servidor = ServidorSimulado()
+    cache = SchemaCache(ruta)                   # Otra sesión: memoria vacía
+    datos = conexion(servidor, schema_cache=cache).load_startup(["MODELO", "CODIGO"], ["T01", "BAJA"])
+    assert datos["round_trips"] == 1 and len(servidor.consultas) == 1
+    assert "INFORMATION_SCHEMA" not in servidor.consultas[0] and "sys.objects" in servidor.consultas[0]
+    assert [c["name"] for c in datos["schema"]] == ["MODELO", "CODIGO", "SCRIPT"]
+    cache.close()
+
+    # La tabla cambió: el esquema se vuelve a leer después del lote
+    servidor = ServidorSimulado()
+    servidor.fecha = "2024-06-01T09:00:00"
+    cache = SchemaCache(ruta)
+    datos = conexion(servidor, schema_cache=cache).load_startup(["MODELO", "CODIGO"], ["T01", "BAJA"])
+    assert datos["round_trips"] == 2 and "INFORMATION_SCHEMA" in servidor.consultas[1]
+    assert datos["record"]["CODIGO"] == "BAJA"
+    assert cache.stored(schema_key("srv", "GESTION", "G_SCRIPT"))[0] == "2024-06-01T09:00:00"
+    cache.close()
+
+
+def test_sin_lotes():
+    """Si el driver no admite varios resultados se hacen consultas separadas."""
+    servidor = ServidorSimulado(sin_lotes=True)
+    db = conexion(servidor)
+    db.get_record_full = lambda columnas, valores: {"CODIGO": valores[1]}
+    datos = db.load_startup(["MODELO", "CODIGO"], ["T01", ""])
+    assert datos["round_trips"] == 3
+    assert datos["key_values"] == ["T01", "ALTA"]
+    assert len(datos["scripts"]) == 2
+
+
+if __name__ == "__main__":
+    test_un_viaje()
+    test_solo_modelo()
+    test_esquema_en_disco()
+    test_sin_lotes()
+    print("\n  ✓ Carga de arranque: todos los tests pasaron\n")
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+"""
+Test de la tabla de símbolos (nombres duplicados, sin usar y no declarados).
+
+Ejecutar:
+    py -3 tests/test_symbols.py
+"""
+
+import os
+import sys
+
+# Añadir raíz del proyecto al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from editor.symbols import DefinitionIndex, SymbolAnalyzer, analyze_code
+from editor.vbs_validator import (IncrementalValidator, preprocess, problems_for_save,
+                                  validate_vbs)
+
+
+SCRIPT = """Option Explicit
+Dim gTotal, gSinUso
+Const PI = 3.14
+Class Cliente
+    Private mNombre
+    Private mNoUsado
+    Public Edad
+    Public Property Get Nombre()
+        Nombre = mNombre
+    End Property
+    Public Property Let Nombre(v)
+        mNombre = v
+    End Property
+End Class
+Sub Main(a, ByVal b)
+    Dim x, y, x
+    x = a + &HFF
+    MsgBox "sinDeclarar dentro de una cadena" & _
+        gTotal & obj.Campo
+End Sub
+Function Calcular(n)
+    Calcular = n * PI
+End Function
+"""
+
+
+def _problemas(code):
+    return [(nivel, linea, mensaje.split("'")[1]) for nivel, mensaje, linea in
+            analyze_code(code).problems]
+
+
+def test_problemas():
+    """Duplicados (error), no usados y no declarados (avisos)."""
+    assert _problemas(SCRIPT) == [
+        ("aviso", 2, "gSinUso"),
+        ("aviso", 6, "mNoUsado"),       # Campo privado; Edad es público
+        ("error", 16, "x"),
+        ("aviso", 16, "y"),
+        ("aviso", 18, "obj"),           # Sí 'obj', no 'Campo' ni la cadena
+    ]
+    # Sin Option Explicit no se exige declarar
+    assert ("aviso", 18, "obj") not in _problemas(SCRIPT.replace("Option Explicit", ""))
+    # Sub repetido
+    assert _problemas("Sub A()\nEnd Sub\nSub a()\nEnd Sub") == [("error", 3, "a")]
+
+
+def test_tabla():
+    """Búsquedas por ámbito y definiciones para el esquema del script."""
+    tabla = analyze_code(SCRIPT)
+    assert tabla.option_explicit
+    assert [(s.name, s.kind, s.line) for s in tabla.definitions] == [
+        ("Cliente", "class", 4), ("Nombre", "property", 8), ("Nombre", "property", 11),
+        ("Main", "sub", 15), ("Calcular", "function", 21),
+    ]
+    assert tabla.lookup("X", "Main").line == 16
+    assert tabla.lookup("b", "Main").kind == "parametro"
+    assert tabla.lookup("mNombre", "Cliente.Nombre").scope == "Cliente"
+    assert tabla.lookup("PI", "Calcular").kind == "constante"
+    assert tabla.lookup("x", "Calcular") is None
+    assert tabla.scope_at(17) == "Main"
+    assert tabla.scope_at(3) == ""
+    assert set(tabla.locals("Main")) == {"a", "b", "x", "y"}
+
+
+def test_incremental_por_procedimiento():
+    """Editar un Sub solo vuelve a analizar ese Sub."""
+    analizador = SymbolAnalyzer()
+    analizador.analyze(preprocess(SCRIPT))
+    regiones = len(analizador._cache)
+    editado = SCRIPT.replace("x = a + &HFF", "x = a + &HFF + zz")
+    tabla = analizador.analyze(preprocess(editado))
+    assert len(analizador._cache) == regiones + 1
+    assert ("aviso", 17, "zz") in [(n, l, m.split("'")[1]) for n, m, l in tabla.problems]
+    assert tabla.problems == analyze_code(editado).problems
+
+
+def test_indice_de_definiciones():
+    """El índice del esquema solo relee las líneas cambiadas y desplaza el resto."""
+    indice = DefinitionIndex()
+    assert indice.update(SCRIPT)
+    assert [(s.name, s.line, s.scope) for s in indice.definitions] == [
+        ("Cliente", 4, ""), ("Nombre", 8, "Cliente"), ("Nombre", 11, "Cliente"),
+        ("Main", 15, ""), ("Calcular", 21, ""),
+    ]
+    assert not indice.update(SCRIPT)
+    assert not indice.update(SCRIPT.replace("x = a + &HFF", "x = a"))
+    # Dos líneas nuevas antes de Main: Main y Calcular bajan dos líneas
+    lineas = SCRIPT.split("\n")
+    lineas[14:14] = ["Private Sub Nueva()", "End Sub"]
+    editado = "\n".join(lineas)
+    assert indice.update(editado)
+    assert [(s.name, s.line, s.public) for s in indice.definitions[3:]] == [
+        ("Nueva", 15, False), ("Main", 17, True), ("Calcular", 23, True),
+    ]
+    nuevo = DefinitionIndex()
+    nuevo.update(editado)
+    assert nuevo.definitions == indice.definitions
+
+
+def test_regla_del_validador():
+    """La regla 'simbolos' forma parte del validador (también incremental)."""
+    validador = IncrementalValidator()
+    assert validador.validate(SCRIPT) == validate_vbs(SCRIPT)
+    assert ("error", "Nombre duplicado: 'x' ya está declarado en la línea 16", 16) \
+        in validate_vbs(SCRIPT)
+    editado = SCRIPT.replace("    Dim x, y, x\n", "    Dim x, y\n")
+    assert validador.validate(editado) == validate_vbs(editado)
+    assert all("'x'" not in mensaje for _, mensaje, _ in validate_vbs(editado))
+
+
+def test_avisos_solo_en_vivo():
+    """Al guardar solo cuentan los errores de 'simbolos'; WScript es del host."""
+    assert _problemas("Option Explicit\nWScript.Echo \"hola\"") == []
+    problemas = validate_vbs(SCRIPT)
+    assert problems_for_save(SCRIPT, problemas) == [
+        ("error", "Nombre duplicado: 'x' ya está declarado en la línea 16", 16)]
+    sin_uso = "Dim a\nIf True Then\n"
+    problemas = validate_vbs(sin_uso)
+    guardar = problems_for_save(sin_uso, [list(p) for p in problemas])  # Como en la caché
+    assert len(guardar) == len(problemas) - 1 and all("'a'" not in p[1] for p in guardar)
+
+
+if __name__ == "__main__":
+    test_problemas()
+    test_tabla()
+    test_incremental_por_procedimiento()
+    test_indice_de_definiciones()
+    test_regla_del_validador()
+    test_avisos_solo_en_vivo()
+    print("\n  ✓ Tabla de símbolos: todos los tests pasaron\n")
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""
+Test de la caché persistente de resultados de validación.
+
+Ejecutar:
+    py -3 tests/test_validation_cache.py
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+
+# Añadir raíz del proyecto al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from editor.validation_cache import ValidationCache
+from editor.vbs_validator import validate_vbs
+
+
+SIN_CERRAR = "Function Calcular()\n  Calcular = 1\n"
+
+
+def _ruta():
+    return os.path.join(tempfile.mkdtemp(), "cache.sqlite")
+
+
+def test_validate_vbs_con_cache():
+    """validate_vbs consulta la caché antes de validar y guarda el resultado."""
+    cache = ValidationCache(_ruta())
+    esperado = validate_vbs(SIN_CERRAR)
+    assert validate_vbs(SIN_CERRAR, cache=cache) == esperado
+    assert (cache.hits, cache.misses) == (0, 1)
+    assert validate_vbs(SIN_CERRAR, cache=cache) == esperado
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert cache.stats()["tasa_aciertos"] == 0.5
+    cache.close()
+
+
+def test_persistencia_y_version():
+    """Los resultados sobreviven al cierre; otra versión de reglas los invalida."""
+    ruta = _ruta()
+    cache = ValidationCache(ruta, version="1")
+    cache.put(SIN_CERRAR, validate_vbs(SIN_CERRAR))
+    cache.close()
+
+    cache = ValidationCache(ruta, version="1")
+    assert cache.get(SIN_CERRAR) == validate_vbs(SIN_CERRAR)
+    cache.close()
+
+    cache = ValidationCache(ruta, version="2")
+    assert cache.get(SIN_CERRAR) is None
+    # Estadísticas acumuladas de las sesiones anteriores
+    assert cache.stats()["aciertos_acumulados"] == 1
+    cache.put(SIN_CERRAR, [])
+    cache.close()
+
+
+def test_versiones_compartiendo_fichero():
+    """Editor y lint con reglas distintas no se borran las entradas mutuamente."""
+    ruta = _ruta()
+    editor = ValidationCache(ruta, version="1")
+    editor.put(SIN_CERRAR, validate_vbs(SIN_CERRAR))
+    editor.flush()
+    lint = ValidationCache(ruta, version="2")
+    assert lint.get(SIN_CERRAR) is None
+    lint.put(SIN_CERRAR, [])
+    lint.close()
+    assert editor.get(SIN_CERRAR) == validate_vbs(SIN_CERRAR)
+    editor.close()
+
+    editor = ValidationCache(ruta, version="1")
+    assert len(editor) == 2
+    assert editor.get(SIN_CERRAR) == validate_vbs(SIN_CERRAR)
+    editor.close()
+
+    # Las de la versión que ya no se usa salen primero al llenarse
+    cache = ValidationCache(ruta, version="1", max_entries=4)
+    cache.put("x = 1", [])
+    cache.put("x = 2", [])
+    cache.get(SIN_CERRAR)
+    cache.put("x = 3", [])
+    assert len(cache) == 3 and cache.evictions == 2
+    assert cache.get(SIN_CERRAR) is not None
+    assert cache.get("x = 1") is None
+    cache.close()
+    assert ValidationCache(ruta, version="2").get(SIN_CERRAR) is None
+
+
+def test_esquema_antiguo():
+    """Un fichero con la clave antigua (solo el hash) se rehace al abrirlo."""
+    ruta = _ruta()
+    conexion = sqlite3.connect(ruta)
+    conexion.execute("CREATE TABLE results (hash TEXT PRIMARY KEY, version TEXT NOT NULL, "
+                     "problems TEXT NOT NULL, used INTEGER NOT NULL)")
+    conexion.execute("INSERT INTO results VALUES ('abc', '1', '[]', 1)")
+    conexion.commit()
+    conexion.close()
+    cache = ValidationCache(ruta, version="2")
+    assert len(cache) == 0
+    cache.put(SIN_CERRAR, [])
+    assert ValidationCache(ruta, version="1").get(SIN_CERRAR) is None
+    cache.close()
+
+
+def test_descarte_por_tamano():
+    """Al llenarse se descartan las entradas usadas hace más tiempo."""
+    cache = ValidationCache(_ruta(), max_entries=10)
+    for i in range(10):
+        cache.put(f"x = {i}", [])
+    cache.get("x = 0")             # La más antigua, pero usada ahora
+    cache.put("x = 10", [])
+    assert len(cache) == 9
+    assert cache.evictions == 2
+    assert cache.get("x = 0") == []
+    assert cache.get("x = 1") is None
+    assert cache.get("x = 10") == []
+    cache.close()
+
+
+if __name__ == "__main__":
+    test_validate_vbs_con_cache()
+    test_persistencia_y_version()
+    test_versiones_compartiendo_fichero()
+    test_esquema_antiguo()
+    test_descarte_por_tamano()
+    print("\n  ✓ Caché de validación: todos los tests pasaron\n")
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""
+Test de los tokens VBScript compartidos por el resaltado y el validador.
+
+Ejecutar:
+    py -3 tests/test_vb_tokens.py
+
+No necesita interfaz gráfica ni BD (sí Pygments).
+"""
+
+import sys
+import os
+
+# Añadir raíz del proyecto al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from editor.syntax.vb_tokens import TokenCache, _lex_joined, lex_lines, line_tokens
+from editor.vbs_validator import validate_vbs
+
+
+def _tags(line):
+    return [(line[start:end], tag) for start, end, tag in line_tokens(line)
+            if line[start:end].strip()]
+
+
+def test_tramos_por_linea():
+    assert _tags('x = "a\'b" \' nota') == [
+        ("x", "variable"), ("=", "operator"), ('"a\'b"', "string"), ("' nota", "comment"),
+    ]
+    assert _tags("  End If") == [("End", "keyword"), ("If", "keyword")]
+
+
+def test_lineas_independientes():
+    """Cada línea se tokeniza igual sola que dentro del documento."""
+    lineas = ["REM", "If a Then", "End Sub", "Function F", 'x = a[1] & "c', "End If"]
+    assert _lex_joined(lineas) == _lex_joined(lineas[:1]) + _lex_joined(lineas[1:])
+    assert [line_tokens(l) for l in lineas] == lex_lines(lineas)
+    # REM vacío no convierte en comentario la línea siguiente
+    assert _tags("If a Then")[0] == ("If", "keyword")
+    # Un carácter desconocido no se traga la cadena sin cerrar
+    assert validate_vbs('x = a[1] & "c') == [("error", "Comillas sin cerrar en esta línea", 1)]
+
+
+def test_cache_por_generacion():
+    cache = TokenCache()
+    primero = cache.stream("Sub A()\nEnd Sub")
+    assert cache.stream("Sub A()\nEnd Sub") is primero
+    segundo = cache.stream("Sub B()\nEnd Sub")
+    assert segundo.generation == primero.generation + 1
+    # La línea sin cambios reutiliza sus tramos
+    assert segundo.tokens[1] is primero.tokens[1]
+
+
+if __name__ == "__main__":
+    test_tramos_por_linea()
+    test_lineas_independientes()
+    test_cache_por_generacion()
+    print("\n  ✓ Tokens VBScript: todos los tests pasaron\n")
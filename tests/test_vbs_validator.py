@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+"""
+Test del validador de sintaxis VBScript.
+
+Ejecutar:
+    py -3 tests/test_vbs_validator.py
+
+No necesita interfaz gráfica ni BD.
+"""
+
+import sys
+import os
+
+# Añadir raíz del proyecto al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from editor.vbs_validator import (
+    IncrementalValidator,
+    debug_report,
+    preprocess_line,
+    register_rule,
+    rule_stats,
+    ruleset_version,
+    set_disabled_rules,
+    unregister_rule,
+    validate_vbs,
+)
+
+
+SCRIPT_OK = """Sub Main()
+    Dim x ' comentario con "comillas
+    For i = 1 To 10
+        If x = "a'b" Then
+            x = Len("(") + (i * 2)
+        Else
+            Call Procesar(x)
+        End If
+    Next
+    Do While x < 3
+        x = x + 1
+    Loop
+    Select Case x
+        Case 1: x = 2
+    End Select
+    If x Then x = 0
+End Sub
+REM fin"""
+
+
+def test_script_correcto():
+    assert validate_vbs(SCRIPT_OK) == []
+    assert validate_vbs("   \n") == [("error", "El script está vacío", 0)]
+
+
+def test_bloque_sin_cerrar():
+    """Se informa la primera apertura sin cierre de cada tipo."""
+    code = "Function F()\n  For i = 1 To 3\n  For j = 1 To 3\n  Next"
+    assert validate_vbs(code) == [
+        ("error", "Bloque sin cerrar: Function / End Function (1 apertura sin cierre)", 1),
+        ("error", "Bloque sin cerrar: For / Next (1 apertura sin cierre)", 2),
+    ]
+
+
+def test_bloque_mal_anidado():
+    """Un End If que cierra un For se informa con las dos líneas."""
+    code = "Sub Main()\n  If a Then\n    For i = 1 To 3\n  End If\nEnd Sub"
+    assert validate_vbs(code) == [
+        ("error", "Bloque mal anidado: 'End If' cierra un 'For' abierto en la línea 3", 4),
+    ]
+
+
+def test_cierre_extra_ignorado():
+    """Un End Sub suelto es un patrón válido en G21."""
+    assert validate_vbs("x = 1\nEnd Sub") == []
+    assert validate_vbs("Private Sub A()\n  If a Then\n  End If\nEnd Sub") == []
+
+
+def test_comentarios_ignorados():
+    assert validate_vbs("' If a Then\nREM For i = 1 To 2\nx = 1 ' Do") == []
+
+
+def test_preproceso_linea():
+    """Código, cadenas, paridad de comillas y paréntesis en una sola pasada."""
+    info = preprocess_line('  x = F("a\'(b") + (1 \' nota (')
+    assert info.code == '  x = F("a\'(b") + (1 '
+    assert info.strings == ((8, 14),)
+    assert not info.quotes_odd and not info.is_comment
+    assert info.parens == 1
+    assert preprocess_line('y = "abierta (').quotes_odd
+    assert preprocess_line("  REM nota").is_comment
+    assert preprocess_line("  End If ' fin").block == ("c", 2)
+
+
+def test_validacion_incremental():
+    """Tras cada edición devuelve lo mismo que una validación completa."""
+    lineas = SCRIPT_OK.splitlines()
+    validador = IncrementalValidator()
+    assert validador.validate(SCRIPT_OK) == []
+
+    ediciones = [
+        (3, '        If x = "a Then'),        # comillas sin cerrar
+        (3, "        If x = 1 Then"),         # se corrige
+        (8, "    Next)"),                     # paréntesis de más
+        (2, "    For i = 1 To 10 ' otra vez"),
+    ]
+    for indice, linea in ediciones:
+        lineas[indice] = linea
+        code = "\n".join(lineas)
+        assert validador.validate(code) == validate_vbs(code)
+
+    lineas.insert(4, "    Do")                 # cambia el número de líneas
+    code = "\n".join(lineas)
+    assert validador.validate(code) == validate_vbs(code)
+    assert validador.validate("") == [("error", "El script está vacío", 0)]
+
+
+
+def test_reglas_desactivadas():
+    """Una regla desactivada no se ejecuta y cambia la versión de las reglas."""
+    code = 'Sub Main()\n  x = "abc\n  y = (1'
+    assert [p[1] for p in validate_vbs(code)] == [
+        "Bloque sin cerrar: Sub / End Sub (1 apertura sin cierre)",
+        "Comillas sin cerrar en esta línea",
+        "Hay 1 paréntesis '(' sin cerrar en el script",
+    ]
+    version = ruleset_version()
+    validador = IncrementalValidator()
+    validador.validate(code)
+    try:
+        set_disabled_rules(["comillas", "parentesis"])
+        assert len(validate_vbs(code)) == 1
+        assert validador.validate(code) == validate_vbs(code)
+        assert ruleset_version() != version
+        assert "Desactivadas: comillas, parentesis" in debug_report()
+    finally:
+        set_disabled_rules([])
+    assert validador.validate(code) == validate_vbs(code)
+
+
+def test_regla_registrada():
+    """Reglas propias de línea y globales (no incrementales), con tiempos."""
+    register_rule("sin_tabuladores", "line", description="Tabuladores",
+                  line=lambda info: (("aviso", "Tabulador"),) if "\t" in info.code else ())
+    register_rule("max_lineas", "global", incremental=False, description="Longitud",
+                  check=lambda infos: [("aviso", "Script largo", 0)] if len(infos) > 3 else [])
+    try:
+        validador = IncrementalValidator()
+        code = "x = 1\n\ty = 2\nz = 3"
+        assert validate_vbs(code) == [("aviso", "Tabulador", 2)]
+        assert validador.validate(code) == validate_vbs(code)
+        code += "\n\tw = 4"
+        assert validador.validate(code) == validate_vbs(code) == [
+            ("aviso", "Tabulador", 2), ("aviso", "Tabulador", 4), ("aviso", "Script largo", 0),
+        ]
+        ultima = {nombre: problemas for nombre, _, problemas in rule_stats.last_run}
+        assert ultima == {"bloques": 0, "comillas": 0, "parentesis": 0,
+                          "lineas_largas": 0, "simbolos": 0, "sin_tabuladores": 2, "max_lineas": 1}
+        assert "sin_tabuladores" in debug_report()
+        try:
+            register_rule("comillas", "line", line=lambda info: ())
+            assert False, "nombre repetido"
+        except ValueError:
+            pass
+    finally:
+        unregister_rule("sin_tabuladores")
+        unregister_rule("max_lineas")
+
+
+if __name__ == "__main__":
+    test_script_correcto()
+    test_bloque_sin_cerrar()
+    test_bloque_mal_anidado()
+    test_cierre_extra_ignorado()
+    test_comentarios_ignorados()
+    test_preproceso_linea()
+    test_validacion_incremental()
+    test_reglas_desactivadas()
+    test_regla_registrada()
+    print("\n  ✓ Validador VBS: todos los tests pasaron\n")